@@ -46,7 +46,13 @@ Usage:
 """
 import logging
 import imaplib
-from typing import Dict, Any, Optional, List, Callable, TYPE_CHECKING
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable, Iterable, Iterator, Tuple, Union, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from src.auth.interfaces import AuthenticatorProtocol
@@ -61,9 +67,25 @@ from src.rules import (
     load_whitelist_rules,
     check_blacklist,
     apply_whitelist,
-    ActionEnum
+    compile_imap_exclusions,
+    ActionEnum,
+    RuleFileCache
+)
+from src.imap_client import (
+    BatchedFlagWriter,
+    CONNECTION_SLOT_TIMEOUT,
+    DEFAULT_FLAG_BATCH_SIZE,
+    DEFAULT_FLAG_FLUSH_SECONDS,
+    DEFAULT_MAX_TEXT_PART_BYTES,
+    FOLDER_UID_STRIDE,
+    ImapClient,
+    IMAPConnectionError,
+    IMAPConnectionLimitError,
+    IMAPFetchError,
+    SERVER_CONNECTIONS,
+    build_uid_set,
+    folder_number
 )
-from src.imap_client import ImapClient, IMAPConnectionError, IMAPFetchError
 from src.auth.strategies import PasswordAuthenticator, OAuthAuthenticator
 from src.auth.interfaces import AuthenticationError
 from src.auth.token_manager import TokenManager
@@ -74,13 +96,60 @@ try:
 except ImportError:
     # Fallback for type checking
     AuthenticatorProtocol = Any
-from src.llm_client import LLMClient, LLMResponse
+from src.llm_client import (
+    BATCH_PROMPT_VERSION,
+    COMBINED_PROMPT_VERSION,
+    PROMPT_VERSION,
+    LLMClient,
+    LLMResponse
+)
+from src.rate_limiter import get_shared_rate_limiter
 from src.note_generator import NoteGenerator
 from src.decision_logic import DecisionLogic, ClassificationResult
 from src.progress import create_progress_bar, tqdm_write
+from src.concurrency import propagate_context
+from src.vault_index import VaultUidIndex
+from src.sync_state import (
+    DEFAULT_MAX_FAILED_ATTEMPTS,
+    DEFAULT_SYNC_STATE_FILE,
+    SyncState,
+    SyncStateStore,
+    update_failed_attempts,
+)
+from src.token_usage import (
+    DEFAULT_TOKEN_STATS_FILE,
+    TokenStats,
+    TokenStatsStore,
+    TokenUsage,
+    estimate_tokens_from_sizes
+)
+from src.classification_cache import (
+    ClassificationCache,
+    DEFAULT_MAX_ENTRIES,
+    DEFAULT_TTL_DAYS,
+    make_cache_key
+)
 
 logger = logging.getLogger(__name__)
 
+# Number of UIDs requested per UID FETCH command (imap.fetch_batch_size)
+DEFAULT_FETCH_BATCH_SIZE = 50
+
+# Number of UIDs per RFC822.SIZE FETCH; the response carries no message data, so a
+# large backlog is sized in a few round trips (same cap as cleanup_flags.SCAN_BATCH_SIZE)
+SIZE_FETCH_BATCH_SIZE = 1000
+
+# IMAP connections per account used to scan imap.folders (imap.folder_connections)
+DEFAULT_FOLDER_CONNECTIONS = 3
+
+# Rules files used when paths.blacklist_file / paths.whitelist_file are not set
+DEFAULT_BLACKLIST_FILE = 'config/blacklist.yaml'
+DEFAULT_WHITELIST_FILE = 'config/whitelist.yaml'
+
+# Serializes confirmation prompts of accounts processed in parallel (--parallel-accounts),
+# so each cost estimate and the answer typed for it belong to the same account
+_CONFIRMATION_LOCK = threading.Lock()
+
 
 @dataclass
 class CostEstimate:
@@ -105,27 +174,43 @@ class CostEstimate:
 
 def prompt_user_confirmation(
     cost_estimate: CostEstimate,
-    confirmation_callback: Optional[Callable[[str], str]] = None
+    confirmation_callback: Optional[Callable[[str], str]] = None,
+    account_id: Optional[str] = None
 ) -> bool:
     """
     Prompt user for confirmation before proceeding with high-cost operation.
     
     This function displays the cost estimate and asks for explicit user confirmation.
     It can be used in CLI environments or with custom confirmation handlers.
+    Prompts from several threads are shown one at a time.
     
     Args:
         cost_estimate: CostEstimate object with cost information
         confirmation_callback: Optional callback function for custom confirmation handling.
                              If provided, should accept a prompt string and return user input.
                              If None, uses built-in input() function.
+        account_id: Optional account the estimate belongs to (shown in the prompt)
     
     Returns:
         True if user confirmed, False if cancelled
     """
+    with _CONFIRMATION_LOCK:
+        return _prompt_user_confirmation(cost_estimate, confirmation_callback, account_id)
+
+
+def _prompt_user_confirmation(
+    cost_estimate: CostEstimate,
+    confirmation_callback: Optional[Callable[[str], str]],
+    account_id: Optional[str]
+) -> bool:
+    account_label = f" for account '{account_id}'" if account_id else ""
+    
     # Display cost information
     print("\n" + "=" * 70)
-    print("SAFETY INTERLOCK: Cost Estimation")
+    print(f"SAFETY INTERLOCK: Cost Estimation{account_label}")
     print("=" * 70)
+    if account_id:
+        print(f"Account: {account_id}")
     print(f"Emails to process: {cost_estimate.email_count}")
     print(f"Model: {cost_estimate.model_name}")
     print(f"Estimated cost: {cost_estimate.currency}{cost_estimate.estimated_cost:.4f}")
@@ -138,12 +223,11 @@ def prompt_user_confirmation(
     print("=" * 70 + "\n")
     
     # Get user confirmation
+    prompt = f"Type 'yes' to confirm and proceed{account_label}, or anything else to cancel: "
     if confirmation_callback:
-        response = confirmation_callback(
-            "Type 'yes' to confirm and proceed, or anything else to cancel: "
-        )
+        response = confirmation_callback(prompt)
     else:
-        response = input("Type 'yes' to confirm and proceed, or anything else to cancel: ")
+        response = input(prompt)
     
     confirmed = response.lower().strip() == 'yes'
     
@@ -158,7 +242,8 @@ def prompt_user_confirmation(
 def estimate_processing_cost(
     email_count: int,
     model_config: Dict[str, Any],
-    safety_config: Optional[Dict[str, Any]] = None
+    safety_config: Optional[Dict[str, Any]] = None,
+    estimated_usage: Optional[TokenUsage] = None
 ) -> CostEstimate:
     """
     Estimate the cost of processing emails based on email count and model configuration.
@@ -166,7 +251,9 @@ def estimate_processing_cost(
     This function calculates the estimated cost using:
     - Email count (from IMAP search)
     - Model pricing (from config)
-    - Average tokens per email (from config or default)
+    - Estimated tokens of the pending emails (from their sizes, see
+      src.token_usage.estimate_tokens_from_sizes), or else the average tokens per
+      email (from config or default)
     
     Args:
         email_count: Number of emails to process
@@ -179,6 +266,8 @@ def estimate_processing_cost(
                       Expected keys:
                       - average_tokens_per_email: Average tokens per email (default: 2000)
                       - currency: Currency symbol (default: '$')
+        estimated_usage: Optional prompt/completion token estimate for all emails
+                        (replaces average_tokens_per_email)
     
     Returns:
         CostEstimate object with cost breakdown and formatted display string
@@ -239,25 +328,35 @@ def estimate_processing_cost(
         )
     
     cost_per_1k_tokens = float(model_config['cost_per_1k_tokens'])
-    total_tokens = email_count * average_tokens_per_email
+    if estimated_usage is not None:
+        total_tokens = estimated_usage.total_tokens
+        tokens_per_email = round(total_tokens / email_count)
+    else:
+        tokens_per_email = average_tokens_per_email
+        total_tokens = email_count * average_tokens_per_email
     total_cost = (total_tokens / 1000.0) * cost_per_1k_tokens
     cost_per_email = total_cost / email_count if email_count > 0 else 0.0
     
+    breakdown = {
+        'total_emails': email_count,
+        'pricing_model': 'token_based',
+        'tokens_per_email': tokens_per_email,
+        'total_tokens': total_tokens,
+        'cost_per_1k_tokens': cost_per_1k_tokens,
+        'total_cost': total_cost
+    }
+    if estimated_usage is not None:
+        breakdown['prompt_tokens'] = estimated_usage.prompt_tokens
+        breakdown['completion_tokens'] = estimated_usage.completion_tokens
+    
     return CostEstimate(
         email_count=email_count,
         estimated_cost=total_cost,
         currency=currency,
         cost_per_email=cost_per_email,
-        tokens_per_email=average_tokens_per_email,
+        tokens_per_email=tokens_per_email,
         model_name=model_name,
-        breakdown={
-            'total_emails': email_count,
-            'pricing_model': 'token_based',
-            'tokens_per_email': average_tokens_per_email,
-            'total_tokens': total_tokens,
-            'cost_per_1k_tokens': cost_per_1k_tokens,
-            'total_cost': total_cost
-        }
+        breakdown=breakdown
     )
 
 
@@ -310,6 +409,20 @@ class ConfigurableImapClient(ImapClient):
         self._account_config = config
         self._imap_config = imap_config
         
+        # Compiled blacklist exclusions appended to searches (see set_search_exclusions)
+        self._search_exclusions: List[str] = []
+        
+        # imap.fetch_mode 'text_parts': download only the text parts, not attachments
+        if imap_config.get('fetch_mode', 'full') == 'text_parts':
+            self.text_parts_max_chars = config.get('processing', {}).get('max_body_chars', 6000)
+        self.max_text_part_bytes = imap_config.get('max_text_part_bytes', DEFAULT_MAX_TEXT_PART_BYTES)
+        
+        # Slot in SERVER_CONNECTIONS held while connected (imap.max_server_connections);
+        # pooled extra connections set wait_for_connection_slot to False to fail fast
+        self.max_server_connections: Optional[int] = imap_config.get('max_server_connections')
+        self.wait_for_connection_slot = True
+        self._server_slot: Optional[str] = None
+        
         # Validate required fields
         required_fields = ['server', 'port', 'username']
         missing_fields = [field for field in required_fields if field not in self._imap_config]
@@ -460,6 +573,7 @@ class ConfigurableImapClient(ImapClient):
             port = self._imap_config['port']
             username = self._imap_config['username']
             
+            self._acquire_server_slot(f"{server}:{port}")
             logger.info(f"Connecting to IMAP server {server}:{port} as {username}")
             
             # Connect based on port (SSL for 993, STARTTLS for 143)
@@ -489,27 +603,124 @@ class ConfigurableImapClient(ImapClient):
                 logger.error(error_msg)
                 raise IMAPConnectionError(error_msg) from e
             
+            # Capabilities are re-read after authentication (see has_capability)
+            self._capabilities = None
+            
+            # Enable CONDSTORE before SELECT so the server reports HIGHESTMODSEQ
+            self._enable_condstore()
+            
             # Select INBOX (default mailbox)
             typ, data = self._imap.select('INBOX')
             if typ != 'OK':
                 raise IMAPConnectionError(f"Failed to select INBOX: {data}")
+            self._read_mailbox_status('INBOX')
             
             self._connected = True
             logger.info("IMAP connection established successfully")
             
         except IMAPConnectionError:
             # Re-raise IMAP connection errors as-is
+            self._release_server_slot()
             raise
         except imaplib.IMAP4.error as e:
+            self._release_server_slot()
             error_msg = f"IMAP protocol error: {e}"
             logger.error(error_msg)
             raise IMAPConnectionError(error_msg) from e
         except Exception as e:
+            self._release_server_slot()
             error_msg = f"IMAP connection failed: {e}"
             logger.error(error_msg)
             raise IMAPConnectionError(error_msg) from e
     
-    def count_unprocessed_emails(self, force_reprocess: bool = False) -> tuple[int, List[str]]:
+    def disconnect(self) -> None:
+        """Close the IMAP connection and free its server connection slot."""
+        try:
+            super().disconnect()
+        finally:
+            self._release_server_slot()
+    
+    def _acquire_server_slot(self, server: str) -> None:
+        """
+        Take a slot for server in SERVER_CONNECTIONS (capped by imap.max_server_connections).
+        
+        Raises:
+            IMAPConnectionLimitError: If no slot becomes free in time
+        """
+        if self._server_slot is not None:
+            return
+        timeout = CONNECTION_SLOT_TIMEOUT if self.wait_for_connection_slot else 0
+        if not SERVER_CONNECTIONS.acquire(server, self.max_server_connections, timeout):
+            raise IMAPConnectionLimitError(
+                f"All {self.max_server_connections} connection(s) allowed to {server} "
+                f"are in use (imap.max_server_connections)"
+            )
+        self._server_slot = server
+    
+    def _release_server_slot(self) -> None:
+        if self._server_slot is not None:
+            SERVER_CONNECTIONS.release(self._server_slot)
+            self._server_slot = None
+    
+    def set_search_exclusions(self, exclusion_chunks: List[str]) -> None:
+        """
+        Set the exclusion clauses appended to every unprocessed-email search.
+        
+        Args:
+            exclusion_chunks: Chunks of clauses as returned by compile_imap_exclusions()
+        """
+        self._search_exclusions = list(exclusion_chunks)
+    
+    def _search_excluding(self, query: str, min_uid: Optional[int] = None) -> List[str]:
+        """
+        Search for query minus the emails matched by the search exclusions.
+        
+        Each exclusion chunk is searched as '<query> <chunk>' and the results are
+        intersected, so no single command exceeds the server's length limit. If the
+        server rejects an exclusion search, the exclusions are disabled for this
+        connection and the plain query is used (the header pre-filter still drops
+        blacklisted emails client-side). Errors of the plain query are raised.
+        
+        Args:
+            query: Base IMAP search criteria
+            min_uid: Optional minimum UID (see ImapClient.search_uids)
+        
+        Returns:
+            Matching UIDs as strings (ascending)
+        """
+        if not self._search_exclusions:
+            return self.search_uids(query, min_uid=min_uid)
+        
+        try:
+            uids = None
+            for chunk in self._search_exclusions:
+                found = self.search_uids(f"{query} {chunk}", min_uid=min_uid)
+                if uids is None:
+                    uids = found
+                else:
+                    found_set = set(found)
+                    uids = [uid for uid in uids if uid in found_set]
+                if not uids:
+                    break
+        except (IMAPFetchError, imaplib.IMAP4.error) as e:
+            # If the plain query fails too, the exclusions were not the problem
+            # and the error is left to the caller's fallback
+            uids = self.search_uids(query, min_uid=min_uid)
+            logger.warning(
+                f"IMAP search with blacklist exclusions failed: {e}. "
+                f"Searching without them; blacklisted emails are filtered after the header fetch."
+            )
+            self._search_exclusions = []
+            return uids
+        
+        logger.debug(f"Searched with {len(self._search_exclusions)} blacklist exclusion chunk(s)")
+        return uids
+    
+    def count_unprocessed_emails(
+        self,
+        force_reprocess: bool = False,
+        min_uid: Optional[int] = None
+    ) -> tuple[int, List[str]]:
         """
         Count unprocessed emails using IMAP.search without fetching.
         
@@ -522,6 +733,8 @@ class ConfigurableImapClient(ImapClient):
         
         Args:
             force_reprocess: If True, include processed emails in search
+            min_uid: Optional minimum UID; the search is restricted to UID > min_uid
+                     on the server (see ImapClient.search_uids)
             
         Returns:
             Tuple of (email_count, list_of_uids)
@@ -550,24 +763,8 @@ class ConfigurableImapClient(ImapClient):
         
         try:
             # Try IMAP search first
-            logger.debug(f"Executing IMAP UID SEARCH with query: {search_query}")
-            typ, data = self._imap.uid('SEARCH', None, search_query)
-            
-            if typ != 'OK':
-                raise IMAPFetchError(f"IMAP search failed: {data}")
-            
-            if not data or not data[0]:
-                logger.info("No unprocessed emails found")
-                return (0, [])
-            
-            # Parse UIDs
-            uid_bytes = data[0]
-            if isinstance(uid_bytes, bytes):
-                uid_str = uid_bytes.decode('utf-8')
-            else:
-                uid_str = str(uid_bytes)
-            
-            uids = [uid.strip() for uid in uid_str.split() if uid.strip()]
+            logger.debug(f"Executing IMAP UID SEARCH with query: {search_query} (min_uid: {min_uid})")
+            uids = self._search_excluding(search_query, min_uid=min_uid)
             
             if not uids:
                 logger.info("No emails found" if force_reprocess else "No unprocessed emails found")
@@ -596,23 +793,7 @@ class ConfigurableImapClient(ImapClient):
                 )
                 # Just search with user_query - no KEYWORD filtering
                 # The vault-based min_uid tracking will handle avoiding reprocessing
-                typ, data = self._imap.uid('SEARCH', None, user_query)
-                
-                if typ != 'OK':
-                    raise IMAPFetchError(f"IMAP search failed: {data}")
-                
-                if not data or not data[0]:
-                    logger.info("No emails found")
-                    return (0, [])
-                
-                # Parse UIDs
-                uid_bytes = data[0]
-                if isinstance(uid_bytes, bytes):
-                    uid_str = uid_bytes.decode('utf-8')
-                else:
-                    uid_str = str(uid_bytes)
-                
-                uids = [uid.strip() for uid in uid_str.split() if uid.strip()]
+                uids = self._search_excluding(user_query, min_uid=min_uid)
                 
                 if not uids:
                     logger.info("No emails found")
@@ -629,6 +810,58 @@ class ConfigurableImapClient(ImapClient):
                 logger.error(error_msg)
                 raise IMAPFetchError(error_msg) from e
     
+    def refresh_mailbox_status(self) -> Dict[str, Any]:
+        """
+        Re-select the mailbox to update UIDNEXT/HIGHESTMODSEQ on a long-lived connection.
+        
+        Returns:
+            Updated mailbox status (see ImapClient.get_mailbox_status)
+            
+        Raises:
+            IMAPConnectionError: If the mailbox cannot be selected
+        """
+        self._ensure_connected()
+        mailbox = self._mailbox_status.get('mailbox', 'INBOX')
+        typ, data = self._imap.select(mailbox)
+        if typ != 'OK':
+            raise IMAPConnectionError(f"Failed to select {mailbox}: {data}")
+        self._read_mailbox_status(mailbox)
+        return self.get_mailbox_status()
+    
+    def find_reopened_uids(self, modseq: int, last_uid: int) -> List[str]:
+        """
+        Find already-seen emails (UID <= last_uid) that are unprocessed again.
+        
+        Uses CHANGEDSINCE to fetch flags of emails changed after modseq only, and
+        returns those that no longer carry processed_tag (e.g. after cleanup-flags)
+        and still match the account query.
+        
+        Args:
+            modseq: HIGHESTMODSEQ saved by the previous run
+            last_uid: Highest UID handled by the previous run
+            
+        Returns:
+            UIDs as strings (ascending)
+            
+        Raises:
+            IMAPFetchError: If the fetch or search fails
+        """
+        processed_tag = self._imap_config.get('processed_tag', 'AIProcessed')
+        changed = self.fetch_flags_changed_since(modseq, last_uid)
+        uids = sorted(
+            (uid for uid, flags in changed.items() if processed_tag not in flags),
+            key=int
+        )
+        
+        user_query = self._imap_config.get('query', 'ALL')
+        if uids and user_query.strip().upper() != 'ALL':
+            matching = set(self.search_uids(f"{user_query} UID {build_uid_set(uids)}"))
+            uids = [uid for uid in uids if uid in matching]
+        
+        if uids:
+            logger.info(f"Found {len(uids)} email(s) whose '{processed_tag}' flag was removed since last run")
+        return uids
+    
     def get_unprocessed_emails(
         self, 
         max_emails: Optional[int] = None, 
@@ -649,6 +882,53 @@ class ConfigurableImapClient(ImapClient):
         """
         self._ensure_connected()
         
+        uids = self._select_uids(max_emails, force_reprocess, uids, min_uid)
+        emails = self._fetch_emails_in_batches(uids)
+        
+        logger.info(f"Successfully retrieved {len(emails)} email(s)")
+        return emails
+    
+    def iter_unprocessed_emails(
+        self,
+        max_emails: Optional[int] = None,
+        force_reprocess: bool = False,
+        uids: Optional[List[str]] = None,
+        min_uid: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream unprocessed emails instead of returning them as one list.
+        
+        Selects UIDs exactly like get_unprocessed_emails (the search, if any, runs
+        immediately), then fetches lazily: only one batch of imap.fetch_batch_size
+        emails is held in memory and the first email is available after one round trip.
+        
+        Args:
+            max_emails: Maximum number of emails to fetch
+            force_reprocess: If True, include processed emails
+            uids: Optional pre-fetched list of UIDs to use (for safety interlock flow)
+            min_uid: Optional minimum UID to filter by (only process emails with UID > min_uid)
+        
+        Returns:
+            Iterator of email dictionaries (same format as get_email_by_uid)
+        """
+        self._ensure_connected()
+        
+        uids = self._select_uids(max_emails, force_reprocess, uids, min_uid)
+        return self._iter_emails_in_batches(uids)
+    
+    def _select_uids(
+        self,
+        max_emails: Optional[int],
+        force_reprocess: bool,
+        uids: Optional[List[str]],
+        min_uid: Optional[int]
+    ) -> List[str]:
+        """
+        Resolve the UIDs to fetch: search (unless UIDs are given), then filter and limit.
+        
+        Raises:
+            IMAPFetchError: If the search fails
+        """
         try:
             # If UIDs are provided (from safety interlock), use them directly
             if uids is not None:
@@ -678,37 +958,15 @@ class ConfigurableImapClient(ImapClient):
                     from src.imap_connection import build_imap_query_with_exclusions
                     search_query = build_imap_query_with_exclusions(user_query, [processed_tag])
                 
-                # Search for UIDs
-                typ, data = self._imap.uid('SEARCH', None, search_query)
-                
-                if typ != 'OK':
-                    raise IMAPFetchError(f"IMAP search failed: {data}")
-                
-                if not data or not data[0]:
-                    logger.info("No unprocessed emails found")
-                    return []
-                
-                # Parse UIDs
-                uid_bytes = data[0]
-                if isinstance(uid_bytes, bytes):
-                    uid_str = uid_bytes.decode('utf-8')
-                else:
-                    uid_str = str(uid_bytes)
-                
-                uids = [uid.strip() for uid in uid_str.split() if uid.strip()]
+                # Search for UIDs (min_uid is applied by the server)
+                uids = self._search_excluding(search_query, min_uid=min_uid)
                 
                 if not uids:
-                    logger.info("No emails found" if force_reprocess else "No unprocessed emails found")
-                    return []
-                
-                # Filter by min_uid if provided
-                if min_uid is not None:
-                    original_count = len(uids)
-                    uids = [uid for uid in uids if int(uid) > min_uid]
-                    logger.info(f"Filtered to {len(uids)} emails with UID > {min_uid} (from {original_count})")
-                    if not uids:
+                    if min_uid is not None:
                         logger.info(f"No emails found with UID > {min_uid}")
-                        return []
+                    else:
+                        logger.info("No emails found" if force_reprocess else "No unprocessed emails found")
+                    return []
                 
                 logger.info(f"Found {len(uids)} email(s)" + (" (including processed)" if force_reprocess else ""))
                 
@@ -717,25 +975,7 @@ class ConfigurableImapClient(ImapClient):
                     logger.info(f"Limiting to {max_emails_per_run} emails (found {len(uids)})")
                     uids = uids[:max_emails_per_run]
             
-            # Fetch emails with progress bar
-            emails = []
-            # Get account identifier from config (username as fallback)
-            account_name = self._imap_config.get('username', 'account')
-            for uid in create_progress_bar(
-                uids,
-                desc=f"Fetching emails ({account_name})",
-                unit="emails"
-            ):
-                try:
-                    email_data = self.get_email_by_uid(uid)
-                    emails.append(email_data)
-                except IMAPFetchError as e:
-                    tqdm_write(f"Skipping email UID {uid} due to fetch error: {e}")
-                    logger.warning(f"Skipping email UID {uid} due to fetch error: {e}")
-                    continue
-            
-            logger.info(f"Successfully retrieved {len(emails)} email(s)")
-            return emails
+            return uids
             
         except IMAPFetchError:
             raise
@@ -743,103 +983,829 @@ class ConfigurableImapClient(ImapClient):
             error_msg = f"Error retrieving unprocessed emails: {e}"
             logger.error(error_msg)
             raise IMAPFetchError(error_msg) from e
-
-
-def create_imap_client_from_config(config: Dict[str, Any]) -> ImapClient:
-    """
-    Factory function to create an IMAP client from a configuration dictionary.
-    
-    This function extracts IMAP settings from the config dict and creates
-    a ConfigurableImapClient instance that can work with account-specific configs.
     
-    Args:
-        config: Configuration dictionary containing IMAP settings under 'imap' key.
-               Expected structure:
-               {
-                   'imap': {
-                       'server': str,
-                       'port': int,
-                       'username': str,
-                       'password': str,  # or 'password_env': str for env var
-                       'query': str,
-                       'processed_tag': str
-                   }
-               }
+    def _fetch_emails_in_batches(self, uids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch emails for the given UIDs into a list, with a progress bar.
+        
+        Args:
+            uids: Email UIDs to fetch (order is preserved in the result)
+            
+        Returns:
+            List of email dictionaries (same format as get_email_by_uid)
+        """
+        # Get account identifier from config (username as fallback)
+        account_name = self._imap_config.get('username', 'account')
+        
+        with create_progress_bar(
+            total=len(uids),
+            desc=f"Fetching emails ({account_name})",
+            unit="emails"
+        ) as pbar:
+            return list(self._iter_emails_in_batches(uids, progress=pbar.update))
     
-    Returns:
-        ConfigurableImapClient instance (not connected yet)
+    def _iter_emails_in_batches(
+        self,
+        uids: List[str],
+        progress: Optional[Callable[[int], Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield emails for the given UIDs using batched UID FETCH commands.
+        
+        UIDs are fetched in chunks of imap.fetch_batch_size per round trip. If a batch
+        command fails, or a message is missing from the batch response, the affected
+        UIDs are retried one at a time so a single bad message never drops its batch.
+        
+        Args:
+            uids: Email UIDs to fetch (order is preserved)
+            progress: Optional callback invoked with 1 for every UID handled
+            
+        Yields:
+            Email dictionaries (same format as get_email_by_uid)
+        """
+        batch_size = self._imap_config.get('fetch_batch_size', DEFAULT_FETCH_BATCH_SIZE)
+        
+        for start in range(0, len(uids), batch_size):
+            chunk = uids[start:start + batch_size]
+            fetched = {}
+            if len(chunk) > 1:
+                try:
+                    fetched = self.get_emails_by_uids(chunk)
+                except IMAPFetchError as e:
+                    logger.warning(
+                        f"Batch fetch of {len(chunk)} email(s) failed, falling back to per-UID fetch: {e}"
+                    )
+            
+            for uid in chunk:
+                email_data = fetched.pop(uid, None)
+                if email_data is None:
+                    try:
+                        email_data = self.get_email_by_uid(uid)
+                    except IMAPFetchError as e:
+                        tqdm_write(f"Skipping email UID {uid} due to fetch error: {e}")
+                        logger.warning(f"Skipping email UID {uid} due to fetch error: {e}")
+                        email_data = None
+                if progress is not None:
+                    progress(1)
+                if email_data is not None:
+                    yield email_data
     
-    Raises:
-        AccountProcessorSetupError: If required IMAP config is missing
+    def fetch_headers(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch header-only data for the given UIDs in batches.
+        
+        Chunks that fail are logged and left out of the result, so callers treat
+        those UIDs as "headers unknown" and fall back to the full fetch.
+        
+        Args:
+            uids: Email UIDs to fetch headers for
+            
+        Returns:
+            Dictionary mapping UID to header data (see ImapClient.get_headers_by_uids)
+        """
+        batch_size = self._imap_config.get('fetch_batch_size', DEFAULT_FETCH_BATCH_SIZE)
+        headers_by_uid = {}
+        for start in range(0, len(uids), batch_size):
+            chunk = uids[start:start + batch_size]
+            try:
+                headers_by_uid.update(self.get_headers_by_uids(chunk))
+            except IMAPFetchError as e:
+                logger.warning(f"Header fetch of {len(chunk)} email(s) failed, skipping pre-filter for them: {e}")
+        return headers_by_uid
     
-    Note:
-        The returned client is not connected. Call connect() on it separately.
-    """
-    return ConfigurableImapClient(config)
+    def fetch_message_sizes(self, uids: List[str]) -> Dict[str, int]:
+        """
+        Fetch RFC822.SIZE for the given UIDs in batches of SIZE_FETCH_BATCH_SIZE.
+        
+        Chunks that fail are logged and left out of the result (their emails are
+        estimated without a size).
+        
+        Args:
+            uids: Email UIDs to fetch sizes for
+            
+        Returns:
+            Dictionary mapping UID to message size in bytes
+        """
+        sizes = {}
+        for start in range(0, len(uids), SIZE_FETCH_BATCH_SIZE):
+            chunk = uids[start:start + SIZE_FETCH_BATCH_SIZE]
+            try:
+                sizes.update(self.get_message_sizes(chunk))
+            except IMAPFetchError as e:
+                logger.warning(f"Size fetch of {len(chunk)} email(s) failed: {e}")
+        return sizes
 
 
-class AccountProcessor:
+class MultiFolderImapClient(ImapClient):
     """
-    Isolated per-account email processing pipeline.
-    
-    This class handles the complete email processing pipeline for a single account,
-    ensuring complete state isolation. Each instance maintains its own:
-    - IMAP connection (not shared with other accounts)
-    - Configuration (account-specific merged config)
-    - Processing context (per-run state)
-    - Logger (with account identifier)
+    IMAP client that scans several mailboxes (imap.folders) over a small connection pool.
     
-    The processing pipeline follows this flow:
-    1. Blacklist Check → DROP, RECORD, or PASS
-    2. Content Parsing → HTML to Markdown (with fallback)
-    3. LLM Processing → Classification and scoring
-    4. Whitelist Modifiers → Score boost and tag addition
-    5. Note Generation → Create Obsidian notes
+    Folder entries may contain LIST wildcards ('*', '%'); they are resolved when
+    connecting. Searches, header fetches and body fetches run concurrently, one
+    folder per pooled ConfigurableImapClient connection (imap.folder_connections),
+    and the fetched emails are merged into a single stream.
     
-    State Isolation:
-        - All state is stored on self (instance variables)
-        - No class variables or shared singletons
-        - Configuration is immutable (passed in, not modified)
-        - IMAP connection is per-instance
-        - Processing context is per-run
+    With imap.fetch_shards K > 1, the UIDs of each folder are also split into K
+    contiguous UID ranges that are fetched on separate connections, so a single
+    huge mailbox (e.g. an initial import of INBOX) is downloaded in parallel.
+    Pooled connections count against imap.max_server_connections; the pool stops
+    growing when the cap is reached.
     
-    Example:
-        >>> processor = AccountProcessor(
-        ...     account_id='work',
-        ...     account_config=config,
-        ...     imap_client_factory=create_imap_client_from_config,
-        ...     llm_client=LLMClient(config),
-        ...     blacklist_service=load_blacklist_rules,
-        ...     whitelist_service=load_whitelist_rules,
-        ...     note_generator=NoteGenerator(),
-        ...     parser=parse_html_content,
-        ...     logger=logger
-        ... )
-        >>> processor.setup()
-        >>> processor.run()
-        >>> processor.teardown()
+    IMAP UIDs are only unique within a mailbox, so emails are identified by folder
+    UIDs: folder_number(mailbox) * FOLDER_UID_STRIDE + UID. INBOX has number 0, so
+    its UIDs are unchanged. Email dictionaries carry the mailbox name under 'folder'.
+    Incremental positions are stored per folder (see set_sync_state_store).
     """
     
     def __init__(
         self,
-        account_id: str,
-        account_config: Dict[str, Any],
-        imap_client_factory: Callable[[Dict[str, Any]], ImapClient],
-        llm_client: LLMClient,
-        blacklist_service: Callable[[str], List],
-        whitelist_service: Callable[[str], List],
-        note_generator: NoteGenerator,
-        parser: Callable[[str, str], tuple],
-        decision_logic: Optional[DecisionLogic] = None,
-        logger: Optional[logging.Logger] = None,
-        confirmation_callback: Optional[Callable[[str], str]] = None
+        config: Dict[str, Any],
+        authenticator: Optional[AuthenticatorProtocol] = None,
+        connection_factory: Optional[Callable[[], ConfigurableImapClient]] = None
     ):
         """
-        Initialize AccountProcessor with account-specific configuration and dependencies.
+        Initialize the client (does not connect yet).
         
-        All dependencies are injected to ensure:
-        - Testability (can mock dependencies)
-        - State isolation (no shared mutable state)
+        Args:
+            config: Account configuration; imap.folders lists mailbox names or LIST patterns
+            authenticator: Optional authenticator shared by all pooled connections
+            connection_factory: Optional callable creating one pooled connection
+                                (defaults to ConfigurableImapClient(config, authenticator))
+        
+        Raises:
+            AccountProcessorSetupError: If required configuration is missing or invalid
+        """
+        imap_config = config.get('imap', {})
+        super().__init__(processed_tag=imap_config.get('processed_tag', 'AIProcessed'))
+        self._account_config = config
+        self._imap_config = imap_config
+        self.folder_patterns: List[str] = list(imap_config.get('folders') or ['INBOX'])
+        self.pool_size = max(1, imap_config.get('folder_connections', DEFAULT_FOLDER_CONNECTIONS))
+        self.fetch_shards = max(1, imap_config.get('fetch_shards', 1))
+        
+        if connection_factory is None:
+            connection_factory = lambda: ConfigurableImapClient(config, authenticator)
+        self._connection_factory = connection_factory
+        # The first connection is created up front so configuration errors surface here
+        self._connections: List[ConfigurableImapClient] = [connection_factory()]
+        self._pool: 'queue.Queue[ConfigurableImapClient]' = queue.Queue()
+        
+        self.folders: List[str] = []
+        self._folders_by_number: Dict[int, str] = {}
+        self._folder_status: Dict[str, Dict[str, Any]] = {}
+        self._search_exclusions: List[str] = []
+        
+        # Per-folder incremental positions (see set_sync_state_store / save_sync_state)
+        self._sync_state_store: Optional[SyncStateStore] = None
+        self._account_id: Optional[str] = None
+        self._folder_states: Dict[str, Optional[SyncState]] = {}
+        self._folder_failures: Dict[str, Dict[int, int]] = {}
+        self._scanned_folders: Dict[str, Tuple[Dict[str, Any], Optional[int]]] = {}
+    
+    def connect(self) -> None:
+        """
+        Connect, resolve imap.folders and open the connection pool.
+        
+        Raises:
+            IMAPConnectionError: If a connection fails or no mailbox matches imap.folders
+        """
+        if self._connected:
+            logger.warning("Already connected to IMAP server")
+            return
+        
+        first = self._connections[0]
+        first.connect()
+        try:
+            self.folders = self._resolve_folders(first)
+            self._folders_by_number = {}
+            for folder in self.folders:
+                number = folder_number(folder)
+                if number in self._folders_by_number:
+                    raise IMAPConnectionError(
+                        f"Folders {self._folders_by_number[number]!r} and {folder!r} "
+                        f"map to the same UID range; remove one of them from imap.folders"
+                    )
+                self._folders_by_number[number] = folder
+            
+            while len(self._connections) < min(self.pool_size, len(self.folders) * self.fetch_shards):
+                connection = self._connection_factory()
+                connection.wait_for_connection_slot = False
+                self._connections.append(connection)
+                try:
+                    connection.connect()
+                except IMAPConnectionLimitError as e:
+                    self._connections.pop()
+                    logger.info(f"Not opening more connections: {e}")
+                    break
+        except Exception:
+            self._close_connections()
+            raise
+        
+        self._pool = queue.Queue()
+        for connection in self._connections:
+            connection.set_search_exclusions(self._search_exclusions)
+            self._pool.put(connection)
+        self._connected = True
+        logger.info(
+            f"Scanning {len(self.folders)} folder(s) over {len(self._connections)} "
+            f"connection(s): {', '.join(self.folders)}"
+        )
+    
+    def disconnect(self) -> None:
+        """Close all pooled connections."""
+        self._close_connections()
+        self._connected = False
+    
+    def _close_connections(self) -> None:
+        for connection in self._connections:
+            try:
+                connection.disconnect()
+            except Exception as e:
+                logger.warning(f"Error closing IMAP connection: {e}")
+        self._connections = self._connections[:1]
+        self._pool = queue.Queue()
+    
+    def _ensure_connected(self) -> None:
+        """Ensure the connection pool is open."""
+        if not self._connected:
+            raise IMAPConnectionError("Not connected to IMAP server. Call connect() first.")
+    
+    def _resolve_folders(self, connection: ConfigurableImapClient) -> List[str]:
+        """Expand imap.folders patterns with LIST (in configuration order, without duplicates)."""
+        folders: List[str] = []
+        for pattern in self.folder_patterns:
+            if '*' in pattern or '%' in pattern:
+                try:
+                    matches = connection.list_mailboxes(pattern)
+                except IMAPFetchError as e:
+                    raise IMAPConnectionError(str(e)) from e
+                if not matches:
+                    logger.warning(f"No mailbox matches imap.folders pattern {pattern!r}")
+            else:
+                matches = [pattern]
+            for name in matches:
+                if name not in folders:
+                    folders.append(name)
+        if not folders:
+            raise IMAPConnectionError(f"No mailbox matches imap.folders {self.folder_patterns}")
+        return folders
+    
+    @contextmanager
+    def _folder_connection(self, folder: str, reselect: bool = False) -> Iterator[ConfigurableImapClient]:
+        """
+        Borrow a pooled connection with folder selected (blocks while all are in use).
+        
+        Args:
+            folder: Mailbox to select
+            reselect: Select the mailbox even if it is already selected, to refresh
+                      UIDNEXT/HIGHESTMODSEQ
+        """
+        connection = self._pool.get()
+        try:
+            if reselect or connection.get_mailbox_status().get('mailbox') != folder:
+                self._folder_status[folder] = connection.select_mailbox(folder)
+            yield connection
+        finally:
+            self._pool.put(connection)
+    
+    def _run_on_pool(self, func: Callable[..., Any], tasks: List[Tuple[Any, ...]]) -> List[Any]:
+        """Run func(*task) for every task, one worker per pooled connection, and return the results in order."""
+        if len(tasks) <= 1 or len(self._connections) <= 1:
+            return [func(*task) for task in tasks]
+        with ThreadPoolExecutor(max_workers=len(self._connections)) as executor:
+            futures = [executor.submit(propagate_context(func), *task) for task in tasks]
+            return [future.result() for future in futures]
+    
+    def _run_per_folder(self, func: Callable[[str], Any], folders: Iterable[str]) -> Dict[str, Any]:
+        """Run func(folder) for every folder on the pool and return the results by folder."""
+        folders = list(folders)
+        return dict(zip(folders, self._run_on_pool(func, [(folder,) for folder in folders])))
+    
+    def _shard(self, by_folder: Dict[str, List[str]]) -> List[Tuple[str, List[str]]]:
+        """
+        Split the UIDs of every folder into imap.fetch_shards contiguous UID ranges.
+        
+        Returns:
+            List of (folder, mailbox UIDs) tasks; a folder is not split further than
+            the pool has connections
+        """
+        shards = min(self.fetch_shards, len(self._connections))
+        tasks: List[Tuple[str, List[str]]] = []
+        for folder, local_uids in by_folder.items():
+            size = -(-len(local_uids) // shards) if local_uids else 0
+            if size == 0:
+                tasks.append((folder, local_uids))
+                continue
+            for start in range(0, len(local_uids), size):
+                tasks.append((folder, local_uids[start:start + size]))
+        return tasks
+    
+    def _folder_uid(self, folder: str, uid: Any) -> str:
+        """Return the folder UID of a mailbox UID."""
+        return str(folder_number(folder) * FOLDER_UID_STRIDE + int(uid))
+    
+    def _split_uid(self, uid: Any) -> Tuple[str, str]:
+        """
+        Return (folder, mailbox UID) for a folder UID.
+        
+        Raises:
+            IMAPFetchError: If the UID does not belong to a scanned folder
+        """
+        number, local_uid = divmod(int(uid), FOLDER_UID_STRIDE)
+        folder = self._folders_by_number.get(number)
+        if folder is None:
+            raise IMAPFetchError(f"UID {uid} does not belong to any folder in imap.folders")
+        return folder, str(local_uid)
+    
+    def _split_uids(self, uids: Iterable[Any]) -> Dict[str, List[str]]:
+        """Group folder UIDs by folder (order is preserved within each folder)."""
+        by_folder: Dict[str, List[str]] = {}
+        for uid in uids:
+            folder, local_uid = self._split_uid(uid)
+            by_folder.setdefault(folder, []).append(local_uid)
+        return by_folder
+    
+    def _tag_email(self, email_dict: Dict[str, Any], folder: str) -> Dict[str, Any]:
+        email_dict['uid'] = self._folder_uid(folder, email_dict['uid'])
+        email_dict['folder'] = folder
+        return email_dict
+    
+    def set_search_exclusions(self, exclusion_chunks: List[str]) -> None:
+        """Set the blacklist exclusion clauses on every pooled connection."""
+        self._search_exclusions = list(exclusion_chunks)
+        for connection in self._connections:
+            connection.set_search_exclusions(self._search_exclusions)
+    
+    def set_sync_state_store(self, store: SyncStateStore, account_id: str) -> None:
+        """
+        Track incremental positions per folder in store (keyed by account and mailbox).
+        
+        With a store, folders whose saved state is still valid are searched from their
+        last UID only (plus the emails pending retry), unchanged folders (same UIDNEXT
+        and HIGHESTMODSEQ, nothing to retry) are skipped, and folders whose UIDVALIDITY
+        changed are searched in full.
+        """
+        self._sync_state_store = store
+        self._account_id = account_id
+    
+    def _load_folder_state(self, folder: str, status: Dict[str, Any]) -> Optional[SyncState]:
+        if self._sync_state_store is None or status.get('uidvalidity') is None:
+            return None
+        try:
+            state = self._sync_state_store.load(self._account_id, folder)
+            if state is not None and not state.is_valid_for(status):
+                logger.warning(
+                    f"UIDVALIDITY of {folder} changed ({state.uidvalidity} -> {status['uidvalidity']}). "
+                    f"Stored UIDs are no longer valid; searching the whole folder."
+                )
+                self._sync_state_store.reset(self._account_id, folder)
+                state = None
+        except Exception as e:
+            logger.warning(f"Could not load sync state for {folder}: {e}")
+            state = None
+        return state
+    
+    def _load_folder_failures(self, folder: str) -> Dict[int, int]:
+        try:
+            return self._sync_state_store.load_failed(self._account_id, folder)
+        except Exception as e:
+            logger.warning(f"Could not load failed UIDs for {folder}: {e}")
+            return {}
+    
+    def _scan_folder(self, folder: str, force_reprocess: bool, min_uid: Optional[int]) -> List[str]:
+        """Search one folder and return its matching emails as folder UIDs."""
+        base = folder_number(folder) * FOLDER_UID_STRIDE
+        if min_uid is not None and min_uid >= base + FOLDER_UID_STRIDE - 1:
+            return []
+        
+        with self._folder_connection(folder, reselect=True) as connection:
+            status = self._folder_status[folder]
+            state = None
+            failures: Dict[int, int] = {}
+            if min_uid is not None:
+                local_min = min_uid - base if min_uid >= base else None
+            else:
+                state = self._load_folder_state(folder, status)
+                local_min = state.last_uid if state is not None else None
+                if state is not None:
+                    failures = self._load_folder_failures(folder)
+            self._folder_states[folder] = state
+            self._folder_failures[folder] = failures
+            self._scanned_folders[folder] = (status, local_min)
+            
+            retry_uids = [str(uid) for uid in sorted(failures)] if not force_reprocess else []
+            if state is not None and not force_reprocess and state.is_up_to_date(status) and not retry_uids:
+                logger.info(f"Folder {folder} unchanged since last run")
+                return []
+            
+            _, uids = connection.count_unprocessed_emails(force_reprocess=force_reprocess, min_uid=local_min)
+            earlier_uids: List[str] = []
+            if (
+                state is not None and not force_reprocess
+                and state.highest_modseq is not None and status.get('highest_modseq') is not None
+            ):
+                earlier_uids = connection.find_reopened_uids(state.highest_modseq, state.last_uid)
+            uids = earlier_uids + [uid for uid in retry_uids if uid not in earlier_uids] + uids
+        
+        if uids:
+            logger.info(f"Found {len(uids)} email(s) in folder {folder}")
+        return [self._folder_uid(folder, uid) for uid in uids]
+    
+    def count_unprocessed_emails(
+        self,
+        force_reprocess: bool = False,
+        min_uid: Optional[int] = None
+    ) -> tuple[int, List[str]]:
+        """
+        Search all folders concurrently and return the matching folder UIDs.
+        
+        Args:
+            force_reprocess: If True, include processed emails in search
+            min_uid: Optional minimum folder UID; without it, each folder is searched
+                     from its saved position (see set_sync_state_store)
+            
+        Returns:
+            Tuple of (email_count, folder_uids), grouped by folder in imap.folders order
+            
+        Raises:
+            IMAPFetchError: If a folder search fails
+        """
+        self._ensure_connected()
+        self._scanned_folders = {}
+        results = self._run_per_folder(
+            lambda folder: self._scan_folder(folder, force_reprocess, min_uid),
+            self.folders
+        )
+        uids = [uid for folder in self.folders for uid in results[folder]]
+        logger.info(f"Found {len(uids)} email(s) in {len(self.folders)} folder(s)")
+        return (len(uids), uids)
+    
+    def save_sync_state(self, uids: List[str], failed_uids: Optional[List[str]] = None) -> None:
+        """
+        Store the position of every folder searched by the last count_unprocessed_emails().
+        
+        Failed UIDs are stored per folder with their attempt count and retried by the
+        next runs, until imap.max_failed_attempts is reached (see update_failed_attempts).
+        
+        Args:
+            uids: Folder UIDs handled by the run
+            failed_uids: Folder UIDs that were not processed, recorded or dropped
+        """
+        if self._sync_state_store is None:
+            return
+        handled = self._group_by_folder(uids)
+        failed = self._group_by_folder(failed_uids or [])
+        max_attempts = self._imap_config.get('max_failed_attempts', DEFAULT_MAX_FAILED_ATTEMPTS)
+        
+        for folder, (status, local_min) in self._scanned_folders.items():
+            if status.get('uidvalidity') is None:
+                continue
+            folder_failed = [int(uid) for uid in failed.get(folder, [])]
+            candidates = [int(uid) for uid in handled.get(folder, [])] + folder_failed
+            failures, given_up = update_failed_attempts(
+                self._folder_failures.get(folder, {}), candidates, folder_failed, max_attempts
+            )
+            previous = self._folder_states.get(folder)
+            if previous is not None:
+                candidates.append(previous.last_uid)
+            if local_min is not None:
+                candidates.append(local_min)
+            if not candidates:
+                continue
+            state = SyncState(
+                uidvalidity=status['uidvalidity'],
+                last_uid=max(candidates),
+                highest_modseq=status.get('highest_modseq')
+            )
+            try:
+                self._sync_state_store.save(self._account_id, folder, state)
+                self._sync_state_store.save_failed(self._account_id, folder, failures)
+            except Exception as e:
+                logger.warning(f"Could not save sync state for {folder}: {e}")
+            for uid in given_up:
+                logger.warning(
+                    f"Giving up on email UID {uid} in folder {folder} after {max_attempts} failed attempt(s)"
+                )
+    
+    def _group_by_folder(self, uids: List[str]) -> Dict[str, List[str]]:
+        """Split folder UIDs into folder -> local UIDs (unknown UIDs are skipped)."""
+        grouped: Dict[str, List[str]] = {}
+        for uid in uids:
+            try:
+                folder, local_uid = self._split_uid(uid)
+            except IMAPFetchError:
+                continue
+            grouped.setdefault(folder, []).append(local_uid)
+        return grouped
+    
+    def fetch_headers(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch header-only data for folder UIDs, one folder UID range per pooled connection."""
+        
+        def fetch(folder: str, local_uids: List[str]) -> Dict[str, Dict[str, Any]]:
+            with self._folder_connection(folder) as connection:
+                headers = connection.fetch_headers(local_uids)
+            return {
+                self._folder_uid(folder, uid): self._tag_email(header_dict, folder)
+                for uid, header_dict in headers.items()
+            }
+        
+        headers_by_uid: Dict[str, Dict[str, Any]] = {}
+        for headers in self._run_on_pool(fetch, self._shard(self._split_uids(uids))):
+            headers_by_uid.update(headers)
+        return headers_by_uid
+    
+    def fetch_message_sizes(self, uids: List[str]) -> Dict[str, int]:
+        """Fetch RFC822.SIZE for folder UIDs, one folder UID range per pooled connection."""
+        
+        def fetch(folder: str, local_uids: List[str]) -> Dict[str, int]:
+            with self._folder_connection(folder) as connection:
+                sizes = connection.fetch_message_sizes(local_uids)
+            return {self._folder_uid(folder, uid): size for uid, size in sizes.items()}
+        
+        sizes_by_uid: Dict[str, int] = {}
+        for sizes in self._run_on_pool(fetch, self._shard(self._split_uids(uids))):
+            sizes_by_uid.update(sizes)
+        return sizes_by_uid
+    
+    def get_email_by_uid(self, uid: str) -> Dict[str, Any]:
+        """Fetch one email by folder UID."""
+        self._ensure_connected()
+        folder, local_uid = self._split_uid(uid)
+        with self._folder_connection(folder) as connection:
+            email_dict = connection.get_email_by_uid(local_uid)
+        return self._tag_email(email_dict, folder)
+    
+    def get_unprocessed_emails(
+        self,
+        max_emails: Optional[int] = None,
+        force_reprocess: bool = False,
+        uids: Optional[List[str]] = None,
+        min_uid: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Retrieve unprocessed emails of all folders (see iter_unprocessed_emails)."""
+        return list(self.iter_unprocessed_emails(max_emails, force_reprocess, uids, min_uid))
+    
+    def iter_unprocessed_emails(
+        self,
+        max_emails: Optional[int] = None,
+        force_reprocess: bool = False,
+        uids: Optional[List[str]] = None,
+        min_uid: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the emails of all folders as one iterator.
+        
+        Folders (and the UID ranges of imap.fetch_shards) are fetched concurrently
+        in batches of imap.fetch_batch_size. Emails of one range arrive in UID order;
+        ranges are interleaved as their batches arrive. A connection is only held
+        while a batch is fetched, so flags can be stored while the stream is consumed.
+        
+        Args:
+            max_emails: Maximum number of emails to fetch
+            force_reprocess: If True, include processed emails
+            uids: Optional pre-fetched folder UIDs (for safety interlock flow)
+            min_uid: Optional minimum folder UID
+        """
+        self._ensure_connected()
+        if uids is None:
+            _, uids = self.count_unprocessed_emails(force_reprocess=force_reprocess, min_uid=min_uid)
+            max_emails = max_emails or self._account_config.get('processing', {}).get('max_emails_per_run')
+            if max_emails and len(uids) > max_emails:
+                logger.info(f"Limiting to {max_emails} emails (found {len(uids)})")
+                uids = uids[:max_emails]
+        elif min_uid is not None:
+            uids = [uid for uid in uids if int(uid) > min_uid]
+        return self._iter_folder_emails(self._split_uids(uids))
+    
+    def _iter_folder_emails(self, by_folder: Dict[str, List[str]]) -> Iterator[Dict[str, Any]]:
+        if not by_folder:
+            return
+        batch_size = self._imap_config.get('fetch_batch_size', DEFAULT_FETCH_BATCH_SIZE)
+        batches: 'queue.Queue[Any]' = queue.Queue(maxsize=len(self._connections) * 2)
+        stop = threading.Event()
+        done = object()
+        
+        def put(item: Any) -> None:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        
+        def produce(folder: str, local_uids: List[str]) -> None:
+            try:
+                for start in range(0, len(local_uids), batch_size):
+                    if stop.is_set():
+                        return
+                    with self._folder_connection(folder) as connection:
+                        emails = list(connection._iter_emails_in_batches(local_uids[start:start + batch_size]))
+                    put([self._tag_email(email_dict, folder) for email_dict in emails])
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+        
+        tasks = self._shard(by_folder)
+        executor = ThreadPoolExecutor(max_workers=len(self._connections))
+        for folder, local_uids in tasks:
+            executor.submit(propagate_context(produce), folder, local_uids)
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = batches.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield from item
+        finally:
+            stop.set()
+            executor.shutdown(wait=True)
+    
+    def set_flag(self, uid: str, flag: str) -> bool:
+        """Set a flag on an email given by folder UID."""
+        try:
+            folder, local_uid = self._split_uid(uid)
+        except IMAPFetchError as e:
+            logger.warning(str(e))
+            return False
+        with self._folder_connection(folder) as connection:
+            return connection.set_flag(local_uid, flag)
+    
+    def set_flag_bulk(self, uids: List[str], flag: str) -> bool:
+        """Set a flag on several emails (one UID STORE per folder)."""
+        return self._store_per_folder('set_flag_bulk', uids, flag)
+    
+    def clear_flag(self, uid: str, flag: str) -> bool:
+        """Clear a flag from an email given by folder UID."""
+        return self._store_per_folder('clear_flag_bulk', [uid], flag)
+    
+    def clear_flag_bulk(self, uids: List[str], flag: str) -> bool:
+        """Clear a flag from several emails (one UID STORE per folder)."""
+        return self._store_per_folder('clear_flag_bulk', uids, flag)
+    
+    def _store_per_folder(self, method: str, uids: List[str], flag: str) -> bool:
+        if not uids:
+            return True
+        try:
+            by_folder = self._split_uids(uids)
+        except IMAPFetchError as e:
+            logger.warning(str(e))
+            return False
+        success = True
+        for folder, local_uids in by_folder.items():
+            with self._folder_connection(folder) as connection:
+                success = getattr(connection, method)(local_uids, flag) and success
+        return success
+    
+    def has_flag(self, uid: str, flag: str) -> bool:
+        """Check if an email given by folder UID has a flag."""
+        try:
+            folder, local_uid = self._split_uid(uid)
+        except IMAPFetchError as e:
+            logger.warning(str(e))
+            return False
+        with self._folder_connection(folder) as connection:
+            return connection.has_flag(local_uid, flag)
+    
+    def wait_for_new_mail(
+        self,
+        timeout: float,
+        poll_interval: float,
+        stop_event: Optional[threading.Event] = None
+    ) -> bool:
+        """
+        Wait poll_interval seconds, then check every folder's UIDNEXT with STATUS.
+        
+        IDLE only watches the selected mailbox, so several folders are polled instead.
+        
+        Returns:
+            True if any folder received new messages since it was last selected
+        """
+        self._ensure_connected()
+        if stop_event is not None:
+            if stop_event.wait(poll_interval):
+                return False
+        else:
+            time.sleep(poll_interval)
+        
+        connection = self._pool.get()
+        try:
+            for folder in self.folders:
+                uidnext = connection.get_uidnext(folder)
+                if uidnext is not None and uidnext != self._folder_status.get(folder, {}).get('uidnext'):
+                    return True
+        finally:
+            self._pool.put(connection)
+        return False
+
+
+def create_imap_client_from_config(config: Dict[str, Any]) -> ImapClient:
+    """
+    Factory function to create an IMAP client from a configuration dictionary.
+    
+    This function extracts IMAP settings from the config dict and creates
+    a ConfigurableImapClient instance that can work with account-specific configs.
+    
+    Args:
+        config: Configuration dictionary containing IMAP settings under 'imap' key.
+               Expected structure:
+               {
+                   'imap': {
+                       'server': str,
+                       'port': int,
+                       'username': str,
+                       'password': str,  # or 'password_env': str for env var
+                       'query': str,
+                       'processed_tag': str
+                   }
+               }
+    
+    Returns:
+        ConfigurableImapClient instance (not connected yet), a MultiFolderImapClient
+        if imap.folders is set or imap.fetch_shards > 1, or a LocalMailboxClient if source.type is 'maildir',
+        'mbox' or 'eml'
+    
+    Raises:
+        AccountProcessorSetupError: If required IMAP config is missing
+    
+    Note:
+        The returned client is not connected. Call connect() on it separately.
+    """
+    source_type = (config.get('source') or {}).get('type', 'imap')
+    if source_type != 'imap':
+        from src.local_mailbox import LocalMailboxClient
+        return LocalMailboxClient(config)
+    imap_config = config.get('imap', {})
+    if imap_config.get('folders') or imap_config.get('fetch_shards', 1) > 1:
+        return MultiFolderImapClient(config)
+    return ConfigurableImapClient(config)
+
+
+class AccountProcessor:
+    """
+    Isolated per-account email processing pipeline.
+    
+    This class handles the complete email processing pipeline for a single account,
+    ensuring complete state isolation. Each instance maintains its own:
+    - IMAP connection (not shared with other accounts)
+    - Configuration (account-specific merged config)
+    - Processing context (per-run state)
+    - Logger (with account identifier)
+    
+    The processing pipeline follows this flow:
+    1. Blacklist Check → DROP, RECORD, or PASS
+    2. Content Parsing → HTML to Markdown (with fallback)
+    3. LLM Processing → Classification and scoring
+    4. Whitelist Modifiers → Score boost and tag addition
+    5. Note Generation → Create Obsidian notes
+    
+    State Isolation:
+        - All state is stored on self (instance variables)
+        - No class variables or shared singletons
+        - Configuration is immutable (passed in, not modified)
+        - IMAP connection is per-instance
+        - Processing context is per-run
+    
+    Example:
+        >>> processor = AccountProcessor(
+        ...     account_id='work',
+        ...     account_config=config,
+        ...     imap_client_factory=create_imap_client_from_config,
+        ...     llm_client=LLMClient(config),
+        ...     blacklist_service=load_blacklist_rules,
+        ...     whitelist_service=load_whitelist_rules,
+        ...     note_generator=NoteGenerator(),
+        ...     parser=parse_html_content,
+        ...     logger=logger
+        ... )
+        >>> processor.setup()
+        >>> processor.run()
+        >>> processor.teardown()
+    """
+    
+    def __init__(
+        self,
+        account_id: str,
+        account_config: Dict[str, Any],
+        imap_client_factory: Callable[[Dict[str, Any]], ImapClient],
+        llm_client: LLMClient,
+        blacklist_service: Callable[[str], List],
+        whitelist_service: Callable[[str], List],
+        note_generator: NoteGenerator,
+        parser: Callable[[str, str], tuple],
+        decision_logic: Optional[DecisionLogic] = None,
+        logger: Optional[logging.Logger] = None,
+        confirmation_callback: Optional[Callable[[str], str]] = None
+    ):
+        """
+        Initialize AccountProcessor with account-specific configuration and dependencies.
+        
+        All dependencies are injected to ensure:
+        - Testability (can mock dependencies)
+        - State isolation (no shared mutable state)
         - Flexibility (can swap implementations)
         
         Args:
@@ -890,6 +1856,41 @@ class AccountProcessor:
         self._dropped_emails: List[EmailContext] = []
         self._recorded_emails: List[EmailContext] = []
         
+        # Token accounting (per-run): tokens reported by the API, and the share spent
+        # on emails with a known RFC822.SIZE (added to the account's token history)
+        self._token_usage = TokenUsage()
+        self._message_sizes: Dict[str, int] = {}
+        self._sized_token_stats = TokenStats(emails=0, message_bytes=0, prompt_tokens=0, completion_tokens=0)
+        self._estimated_token_usage: Optional[TokenUsage] = None
+        
+        # Compiled rules, reloaded only when the rules file changes on disk
+        paths_config = account_config.get('paths', {})
+        self._blacklist_path = paths_config.get('blacklist_file', DEFAULT_BLACKLIST_FILE)
+        self._whitelist_path = paths_config.get('whitelist_file', DEFAULT_WHITELIST_FILE)
+        self._blacklist_cache = RuleFileCache(blacklist_service)
+        self._whitelist_cache = RuleFileCache(whitelist_service)
+        
+        # Sidecar UID index of written notes (opened on first write)
+        self._uid_index: Optional[VaultUidIndex] = None
+        
+        # Summarization client (created on first use, shares the pooled HTTP session)
+        self._summary_client = None
+        
+        # Classification result cache (opened in setup() if enabled)
+        self._classification_cache: Optional[ClassificationCache] = None
+        
+        # Buffered processed-flag updates (created in setup(), flushed in run()/teardown())
+        self._flag_writer: Optional[BatchedFlagWriter] = None
+        
+        # Per-mailbox sync state (UIDVALIDITY, last UID, HIGHESTMODSEQ; opened in setup())
+        self._sync_state_store: Optional[SyncStateStore] = None
+        
+        # Per-account token history for size-based cost estimates (opened in setup())
+        self._token_stats_store: Optional[TokenStatsStore] = None
+        
+        # Blacklist rules last compiled into IMAP search exclusions (reset in setup())
+        self._search_exclusion_rules = None
+        
         self.logger.info(f"AccountProcessor initialized for account: {account_id}")
     
     def setup(self) -> None:
@@ -909,26 +1910,37 @@ class AccountProcessor:
         try:
             # Create IMAP client using factory (with account-specific config)
             self._imap_conn = self._imap_client_factory(self.config)
+            self._search_exclusion_rules = None
             
             # Connect to IMAP server using account-specific credentials
             self._imap_conn.connect()
             
             self.logger.info(f"IMAP connection established for account: {self.account_id}")
             
-            # Initialize processing context
-            self._processing_context = {
-                'account_id': self.account_id,
-                'start_time': None,  # Set in run()
-                'emails_fetched': 0,
-                'emails_processed': 0,
-                'emails_dropped': 0,
-                'emails_recorded': 0
-            }
+            imap_config = self.config.get('imap', {})
+            self._flag_writer = BatchedFlagWriter(
+                self._imap_conn,
+                imap_config.get('processed_tag', 'AIProcessed'),
+                batch_size=imap_config.get('flag_batch_size', DEFAULT_FLAG_BATCH_SIZE),
+                flush_interval=imap_config.get('flag_flush_seconds', DEFAULT_FLAG_FLUSH_SECONDS)
+            )
+            
+            # Load rules once up front; later lookups reuse them until the files change
+            blacklist_rules = self._blacklist_cache.get(self._blacklist_path)
+            whitelist_rules = self._whitelist_cache.get(self._whitelist_path)
+            self.logger.info(
+                f"Loaded {len(blacklist_rules)} blacklist and {len(whitelist_rules)} whitelist "
+                f"rule(s) for account: {self.account_id}"
+            )
             
-            # Reset per-run results
-            self._processed_emails = []
-            self._dropped_emails = []
-            self._recorded_emails = []
+            self._classification_cache = self._open_classification_cache()
+            self._sync_state_store = self._open_sync_state_store()
+            if self._sync_state_store is not None and isinstance(self._imap_conn, MultiFolderImapClient):
+                self._imap_conn.set_sync_state_store(self._sync_state_store, self.account_id)
+            self._token_stats_store = self._open_token_stats_store()
+            
+            # Initialize processing context and per-run results
+            self._reset_run_state()
             
             self.logger.info(f"AccountProcessor setup complete for account: {self.account_id}")
             
@@ -949,7 +1961,8 @@ class AccountProcessor:
         debug_prompt: bool = False,
         min_uid: Optional[int] = None,
         after_date: Optional[datetime] = None,
-        before_date: Optional[datetime] = None
+        before_date: Optional[datetime] = None,
+        interactive: bool = True
     ) -> None:
         """
         Execute the processing pipeline for this account.
@@ -958,8 +1971,10 @@ class AccountProcessor:
         1. Counts emails using IMAP.search (safety interlock)
         2. Estimates cost based on email count and model config
         3. Prompts user for confirmation if cost exceeds threshold
-        4. Fetches emails from IMAP (only if confirmed)
-        5. For each email:
+        4. Fetches emails from IMAP (only if confirmed); headers are checked against
+           the blacklist first so dropped emails are never downloaded in full
+        5. For each email, as soon as it is fetched (emails are streamed, not
+           collected into a list first):
            - Checks blacklist rules
            - Parses content (HTML to Markdown)
            - Calls LLM for classification
@@ -974,6 +1989,9 @@ class AccountProcessor:
             min_uid: Optional minimum UID to filter by (only process emails with UID > min_uid)
             after_date: Optional datetime - only process emails sent/received after this date
             before_date: Optional datetime - only process emails sent/received before this date
+            interactive: If False, never prompt for confirmation (e.g. watch mode): runs
+                         estimated at or below safety_interlock.cost_threshold proceed,
+                         others are skipped with a warning
         
         Raises:
             AccountProcessorRunError: If run fails critically
@@ -985,8 +2003,9 @@ class AccountProcessor:
         
         self.logger.info(f"Starting processing run for account: {self.account_id}")
         
-        # Update processing context
+        # Start from a fresh processing context (watch mode calls run() repeatedly)
         import time
+        self._reset_run_state()
         self._processing_context['start_time'] = time.time()
         
         try:
@@ -1024,19 +2043,57 @@ class AccountProcessor:
                 imap_config['query'] = date_query
                 self.logger.info(f"Using date-filtered query: {date_query}")
             
-            # Check for min_uid from vault if not explicitly provided
+            # Check for min_uid from the sync state, then the vault, if not explicitly provided
+            sync_state = None
+            uidvalidity_changed = False
             if min_uid is None:
-                from src.vault_utils import get_max_uid_from_vault
-                vault_path = self.config.get('paths', {}).get('obsidian_vault')
-                if vault_path:
-                    max_uid = get_max_uid_from_vault(self.account_id, vault_path)
-                    if max_uid:
-                        min_uid = max_uid
-                        self.logger.info(f"Found max UID in vault: {max_uid}, only processing UIDs > {max_uid}")
+                sync_state, uidvalidity_changed = self._load_sync_state()
+                if sync_state is not None:
+                    min_uid = sync_state.last_uid
+                    self.logger.info(
+                        f"Found sync state: last UID {sync_state.last_uid}, only processing UIDs > {min_uid}"
+                    )
+                elif not uidvalidity_changed and not isinstance(self._imap_conn, MultiFolderImapClient):
+                    # (multi-folder clients track their positions per folder)
+                    from src.vault_utils import get_max_uid_from_vault
+                    vault_path = self.config.get('paths', {}).get('obsidian_vault')
+                    if vault_path:
+                        max_uid = get_max_uid_from_vault(self.account_id, vault_path)
+                        if max_uid:
+                            min_uid = max_uid
+                            self.logger.info(f"Found max UID in vault: {max_uid}, only processing UIDs > {max_uid}")
+            
+            reopened_uids: List[str] = []
+            retry_uids: List[str] = []
+            if sync_state is not None and not force_reprocess:
+                if after_date is None and before_date is None:
+                    # Emails that failed in earlier runs lie below last_uid; retry them by UID
+                    retry_uids = [str(uid) for uid in sorted(self._failed_attempts)]
+                mailbox_status = self._imap_conn.get_mailbox_status()
+                if sync_state.is_up_to_date(mailbox_status) and not retry_uids:
+                    # Same UIDVALIDITY, no new UIDs and no flag changes: nothing to search
+                    if original_query is not None:
+                        imap_config['query'] = original_query
+                    self.logger.info("Mailbox unchanged since last run. No emails to process.")
+                    return
+                if sync_state.highest_modseq is not None and mailbox_status.get('highest_modseq') is not None:
+                    reopened_uids = self._imap_conn.find_reopened_uids(
+                        sync_state.highest_modseq, sync_state.last_uid
+                    )
+            
+            # Keep blacklisted emails out of the search results entirely
+            self._apply_search_exclusions()
             
             # Safety Interlock: Step 1 - Count emails before fetching
             self.logger.info("Safety interlock: Counting emails before processing...")
-            email_count, uids = self._imap_conn.count_unprocessed_emails(force_reprocess=force_reprocess)
+            email_count, uids = self._imap_conn.count_unprocessed_emails(
+                force_reprocess=force_reprocess,
+                min_uid=min_uid  # Searched server-side as UID <min_uid+1>:*
+            )
+            earlier_uids = reopened_uids + [uid for uid in retry_uids if uid not in reopened_uids]
+            if earlier_uids:
+                uids = earlier_uids + uids
+                email_count = len(uids)
             
             # Restore original query if we modified it
             if original_query is not None:
@@ -1044,11 +2101,16 @@ class AccountProcessor:
             
             if email_count == 0:
                 self.logger.info("No emails to process. Exiting.")
+                if after_date is None and before_date is None:
+                    self._save_sync_state(sync_state, min_uid, [])
                 return
             
-            # Safety Interlock: Step 2 - Estimate cost
+            # Safety Interlock: Step 2 - Estimate cost (from the raw sizes of the pending
+            # emails, fetched in bulk, and the account's token history)
             safety_config = self.config.get('safety_interlock', {})
             model_config = self.config.get('classification', {})
+            self._message_sizes = self._fetch_message_sizes(uids)
+            self._estimated_token_usage = self._estimate_token_usage(uids)
             
             # Check if safety interlock is enabled
             interlock_enabled = safety_config.get('enabled', True)
@@ -1060,14 +2122,15 @@ class AccountProcessor:
                     cost_estimate = estimate_processing_cost(
                         email_count=email_count,
                         model_config=model_config,
-                        safety_config=safety_config
+                        safety_config=safety_config,
+                        estimated_usage=self._estimated_token_usage
                     )
                     
                     self.logger.info(f"Cost estimate: {cost_estimate}")
                     
                     # Safety Interlock: Step 3 - Check threshold and prompt for confirmation
                     needs_confirmation = True
-                    if skip_below_threshold and cost_estimate.estimated_cost <= cost_threshold:
+                    if (skip_below_threshold or not interactive) and cost_estimate.estimated_cost <= cost_threshold:
                         self.logger.info(
                             f"Cost ({cost_estimate.currency}{cost_estimate.estimated_cost:.4f}) "
                             f"is below threshold ({cost_estimate.currency}{cost_threshold:.4f}). "
@@ -1075,11 +2138,22 @@ class AccountProcessor:
                         )
                         needs_confirmation = False
                     
+                    if needs_confirmation and not interactive:
+                        # Nobody to ask (e.g. a watch thread): decline instead of blocking on stdin
+                        self.logger.warning(
+                            f"Processing skipped by safety interlock for account {self.account_id}: "
+                            f"estimated cost {cost_estimate.currency}{cost_estimate.estimated_cost:.4f} "
+                            f"exceeds threshold {cost_estimate.currency}{cost_threshold:.4f} and "
+                            f"confirmation is not possible. Run once without --watch to confirm."
+                        )
+                        return
+                    
                     if needs_confirmation:
                         # Safety Interlock: Step 4 - Prompt user for confirmation
                         confirmed = prompt_user_confirmation(
                             cost_estimate,
-                            confirmation_callback=self._confirmation_callback
+                            confirmation_callback=self._confirmation_callback,
+                            account_id=self.account_id
                         )
                         
                         if not confirmed:
@@ -1101,50 +2175,114 @@ class AccountProcessor:
             # Safety Interlock: Step 5 - Fetch emails using pre-counted UIDs
             # Use max_emails parameter if provided, otherwise use config
             max_emails_config = max_emails if max_emails is not None else self.config.get('processing', {}).get('max_emails_per_run')
-            emails = self._imap_conn.get_unprocessed_emails(
+            
+            # Apply the run limit up front so the pending set is known (UIDs are
+            # already > min_uid, except reopened ones found via CHANGEDSINCE)
+            if max_emails_config and len(uids) > max_emails_config:
+                uids = uids[:max_emails_config]
+            
+            # Header-only pass: drop blacklisted emails before their bodies are downloaded
+            # UIDs handled by this run (dropped or fetched) advance the sync state
+            handled_uids = list(uids)
+            if self._header_prefilter_enabled():
+                uids = self._prefilter_blacklisted_uids(uids)
+                fetch_set = set(uids)
+                handled_uids = [uid for uid in handled_uids if uid not in fetch_set]
+            else:
+                handled_uids = []
+            
+            if not uids:
+                self.logger.info("No emails left to fetch after filtering.")
+                self._log_processing_summary()
+                if after_date is None and before_date is None:
+                    self._save_sync_state(sync_state, min_uid, handled_uids)
+                return
+            
+            # Stream emails: each one is processed as soon as its batch arrives,
+            # so memory stays bounded regardless of run size
+            emails = self._imap_conn.iter_unprocessed_emails(
                 max_emails=max_emails_config,
                 force_reprocess=force_reprocess,
-                uids=uids,  # Use pre-counted UIDs to avoid re-searching
-                min_uid=min_uid  # Filter by min_uid if provided
-            )
-            self._processing_context['emails_fetched'] = len(emails)
-            
-            self.logger.info(
-                f"Fetched {len(emails)} email(s) for account {self.account_id}"
+                uids=uids  # Use pre-counted UIDs to avoid re-searching
             )
+            emails = self._track_fetched_uids(emails, handled_uids)
             
             # Process each email with progress bar
-            for email_dict in create_progress_bar(
+            emails = create_progress_bar(
                 emails,
+                total=len(uids),
                 desc=f"Processing emails ({self.account_id})",
                 unit="emails"
-            ):
-                try:
-                    self._process_message(email_dict, debug_prompt=debug_prompt)
-                except Exception as e:
-                    # Log error but continue processing other emails
-                    error_msg = (
-                        f"Error processing email UID {email_dict.get('uid', 'unknown')} "
-                        f"for account {self.account_id}: {e}"
-                    )
-                    tqdm_write(error_msg)
-                    self.logger.error(error_msg, exc_info=True)
-                    continue
+            )
+            classification_config = self.config.get('classification', {})
+            max_concurrency = classification_config.get('max_concurrency', 1)
+            batch_size = classification_config.get('batch_size', 1)
+            if batch_size > 1:
+                self._process_emails_in_batches(emails, batch_size, max_concurrency, debug_prompt=debug_prompt)
+            elif max_concurrency > 1:
+                self._process_emails_concurrently(emails, max_concurrency, debug_prompt=debug_prompt)
+            else:
+                for email_dict in emails:
+                    self._processing_context['emails_fetched'] += 1
+                    try:
+                        self._process_message(email_dict, debug_prompt=debug_prompt)
+                    except Exception as e:
+                        # Log error but continue processing other emails
+                        self._log_email_error(email_dict.get('uid', 'unknown'), e)
+                        continue
+            
+            self.logger.info(
+                f"Fetched {self._processing_context['emails_fetched']} email(s) for account {self.account_id}"
+            )
             
             # Log summary
             self._log_processing_summary()
             
+            # Date-filtered runs only cover part of the mailbox, so they don't advance the state.
+            # Emails that failed or were never fetched are retried by the next runs.
+            if after_date is None and before_date is None:
+                fetched = set(handled_uids)
+                failed_uids = self._failed_uids + [uid for uid in uids if uid not in fetched]
+                self._save_sync_state(sync_state, min_uid, handled_uids, failed_uids)
+            
         except Exception as e:
             error_msg = f"Processing run failed for account {self.account_id}: {e}"
             self.logger.error(error_msg, exc_info=True)
             raise AccountProcessorRunError(error_msg) from e
+        finally:
+            self._flush_processed_flags()
+    
+    def _reset_run_state(self) -> None:
+        """Reset the processing context counters and per-run result lists."""
+        self._processing_context = {
+            'account_id': self.account_id,
+            'start_time': None,  # Set in run()
+            'emails_fetched': 0,
+            'emails_processed': 0,
+            'emails_dropped': 0,
+            'emails_recorded': 0
+        }
+        self._processed_emails = []
+        self._dropped_emails = []
+        self._recorded_emails = []
+        self._failed_uids = []
+        self._failed_attempts = {}
+        self._token_usage = TokenUsage()
+        self._message_sizes = {}
+        self._sized_token_stats = TokenStats(emails=0, message_bytes=0, prompt_tokens=0, completion_tokens=0)
+        self._estimated_token_usage = None
+    
+    @property
+    def token_usage(self) -> TokenUsage:
+        """Tokens used by LLM requests (classification and summaries) in the current or last run."""
+        return self._token_usage
     
     def teardown(self) -> None:
         """
         Clean up resources allocated during setup() and run().
         
         This method:
-        - Closes IMAP connection
+        - Flushes buffered processed flags and closes IMAP connection
         - Clears processing context
         - Resets per-run state
         
@@ -1154,7 +2292,9 @@ class AccountProcessor:
         """
         self.logger.info(f"Tearing down AccountProcessor for account: {self.account_id}")
         
-        # Close IMAP connection
+        # Store any processed flags still buffered, then close IMAP connection
+        self._flush_processed_flags()
+        self._flag_writer = None
         if self._imap_conn is not None:
             try:
                 self._imap_conn.disconnect()
@@ -1166,6 +2306,50 @@ class AccountProcessor:
             finally:
                 self._imap_conn = None
         
+        # Close classification cache
+        if self._classification_cache is not None:
+            try:
+                self._classification_cache.close()
+            except Exception as e:
+                self.logger.warning(
+                    f"Error closing classification cache for account {self.account_id}: {e}"
+                )
+            finally:
+                self._classification_cache = None
+        
+        # Close sync state store
+        if self._sync_state_store is not None:
+            try:
+                self._sync_state_store.close()
+            except Exception as e:
+                self.logger.warning(
+                    f"Error closing sync state store for account {self.account_id}: {e}"
+                )
+            finally:
+                self._sync_state_store = None
+        
+        # Close token history store
+        if self._token_stats_store is not None:
+            try:
+                self._token_stats_store.close()
+            except Exception as e:
+                self.logger.warning(
+                    f"Error closing token stats store for account {self.account_id}: {e}"
+                )
+            finally:
+                self._token_stats_store = None
+        
+        # Close vault UID index
+        if self._uid_index is not None:
+            try:
+                self._uid_index.close()
+            except Exception as e:
+                self.logger.warning(
+                    f"Error closing vault UID index for account {self.account_id}: {e}"
+                )
+            finally:
+                self._uid_index = None
+        
         # Clear processing context
         self._processing_context = {}
         
@@ -1174,6 +2358,40 @@ class AccountProcessor:
         
         self.logger.info(f"AccountProcessor teardown complete for account: {self.account_id}")
     
+    def wait_for_new_mail(
+        self,
+        timeout: float,
+        poll_interval: float,
+        stop_event: Optional[threading.Event] = None
+    ) -> bool:
+        """
+        Block on the open IMAP connection until new mail arrives (used by watch mode).
+        
+        Uses IDLE when the server supports it and NOOP polling otherwise. When new
+        mail is reported, the mailbox status is refreshed so the next run() searches
+        from the current UIDNEXT.
+        
+        Args:
+            timeout: Maximum seconds to spend in one IDLE command
+            poll_interval: Seconds between NOOP polls without IDLE support
+            stop_event: Optional event that ends the wait early when set
+        
+        Returns:
+            True if new mail was reported, False on timeout or stop
+        
+        Raises:
+            AccountProcessorRunError: If not set up
+            IMAPConnectionError: If the connection is lost
+        """
+        if self._imap_conn is None:
+            raise AccountProcessorRunError(
+                f"AccountProcessor not set up for account {self.account_id}. Call setup() first."
+            )
+        new_mail = self._imap_conn.wait_for_new_mail(timeout, poll_interval, stop_event)
+        if new_mail and isinstance(self._imap_conn, ConfigurableImapClient):
+            self._imap_conn.refresh_mailbox_status()
+        return new_mail
+    
     def _fetch_emails(self) -> List[Dict[str, Any]]:
         """
         Fetch emails from IMAP server for this account.
@@ -1197,6 +2415,92 @@ class AccountProcessor:
             self.logger.error(error_msg)
             raise AccountProcessorRunError(error_msg) from e
     
+    def _header_prefilter_enabled(self) -> bool:
+        """
+        Check whether the header-only blacklist pass should run.
+        
+        Requires processing.header_prefilter (default: True), an IMAP client that
+        supports batched header fetches and at least one DROP rule (without one the
+        pass could not skip any body fetch and would only cost a round trip).
+        """
+        if not self.config.get('processing', {}).get('header_prefilter', True):
+            return False
+        if not isinstance(self._imap_conn, (ConfigurableImapClient, MultiFolderImapClient)):
+            return False
+        rules = self._blacklist_cache.get(self._blacklist_path)
+        return any(rule.action == ActionEnum.DROP for rule in rules or [])
+    
+    def _apply_search_exclusions(self) -> None:
+        """
+        Push literal DROP sender rules into the IMAP search as NOT FROM clauses.
+        
+        Requires processing.server_side_blacklist (default: True) and a
+        ConfigurableImapClient or MultiFolderImapClient. Rules are only recompiled
+        when the blacklist file changed, so a connection that fell back to plain
+        searches keeps doing so.
+        """
+        if not self.config.get('processing', {}).get('server_side_blacklist', True):
+            return
+        if not isinstance(self._imap_conn, (ConfigurableImapClient, MultiFolderImapClient)):
+            return
+        
+        rules = self._blacklist_cache.get(self._blacklist_path)
+        if rules is self._search_exclusion_rules:
+            return
+        self._search_exclusion_rules = rules
+        
+        exclusions = compile_imap_exclusions(rules)
+        self._imap_conn.set_search_exclusions(exclusions)
+        if exclusions:
+            clause_count = sum(chunk.count('NOT FROM ') for chunk in exclusions)
+            self.logger.info(
+                f"Excluding {clause_count} blacklisted sender(s) in the IMAP search "
+                f"({len(exclusions)} chunk(s)) for account {self.account_id}"
+            )
+    
+    def _prefilter_blacklisted_uids(self, uids: List[str]) -> List[str]:
+        """
+        Run blacklist rules on header-only data and return the UIDs that need a body fetch.
+        
+        DROP emails are recorded as dropped here and never downloaded. PASS and RECORD
+        emails (and any whose headers could not be fetched) are returned unchanged,
+        in their original order.
+        
+        Args:
+            uids: Candidate email UIDs
+        
+        Returns:
+            UIDs to fetch in full
+        """
+        if not uids:
+            return uids
+        
+        headers_by_uid = self._imap_conn.fetch_headers(uids)
+        
+        remaining = []
+        for uid in uids:
+            header_dict = headers_by_uid.get(uid)
+            if header_dict is None:
+                # Headers unavailable: let the full pipeline decide
+                remaining.append(uid)
+                continue
+            
+            email_context = from_imap_dict(header_dict)
+            if self._check_blacklist(email_context) == ActionEnum.DROP:
+                self.logger.info(f"Email UID {uid} dropped by blacklist for account {self.account_id}")
+                email_context.result_action = "DROPPED"
+                self._dropped_emails.append(email_context)
+                continue
+            remaining.append(uid)
+        
+        dropped = len(uids) - len(remaining)
+        if dropped:
+            self.logger.info(
+                f"Header pre-filter dropped {dropped} of {len(uids)} email(s) "
+                f"before body fetch for account {self.account_id}"
+            )
+        return remaining
+    
     def _process_message(self, email_dict: Dict[str, Any], debug_prompt: bool = False) -> None:
         """
         Process a single email through the complete pipeline.
@@ -1213,6 +2517,27 @@ class AccountProcessor:
             email_dict: Email dictionary from IMAP client
             debug_prompt: If True, write classification prompts to debug files
         """
+        email_context = self._prepare_message(email_dict)
+        if email_context is None:
+            return
+        
+        llm_response = self._classify_with_llm(email_context, debug_prompt=debug_prompt)
+        self._complete_message(email_context, llm_response)
+    
+    def _prepare_message(self, email_dict: Dict[str, Any]) -> Optional[EmailContext]:
+        """
+        Run the pipeline stages that come before LLM classification.
+        
+        Creates the EmailContext, applies blacklist rules (handling DROP and RECORD
+        completely) and parses the content.
+        
+        Args:
+            email_dict: Email dictionary from IMAP client
+        
+        Returns:
+            EmailContext ready for classification, or None if the blacklist
+            already handled the email
+        """
         # Create EmailContext from IMAP data
         email_context = from_imap_dict(email_dict)
         uid = email_context.uid
@@ -1226,7 +2551,7 @@ class AccountProcessor:
             self.logger.info(f"Email UID {uid} dropped by blacklist for account {self.account_id}")
             email_context.result_action = "DROPPED"
             self._dropped_emails.append(email_context)
-            return
+            return None
         
         if blacklist_action == ActionEnum.RECORD:
             self.logger.info(f"Email UID {uid} recorded by blacklist for account {self.account_id}")
@@ -1234,19 +2559,37 @@ class AccountProcessor:
             # Generate raw markdown without AI
             self._generate_raw_note(email_context)
             self._recorded_emails.append(email_context)
-            return
+            return None
         
         # Stage 2: Content Parsing
         self._parse_content(email_context)
         
-        # Stage 3: LLM Classification
-        llm_response = self._classify_with_llm(email_context, debug_prompt=debug_prompt)
+        return email_context
+    
+    def _complete_message(self, email_context: EmailContext, llm_response: Optional[LLMResponse]) -> None:
+        """
+        Run the pipeline stages that come after LLM classification.
+        
+        Applies decision logic and whitelist rules, generates the summary and note,
+        sets the processed flag and writes analytics.
+        
+        Args:
+            email_context: EmailContext returned by _prepare_message
+            llm_response: Result of _classify_with_llm (None if classification failed)
+        """
+        uid = email_context.uid
+        
+        # Stage 3: LLM Classification result
         if not llm_response:
             self.logger.warning(
                 f"LLM classification failed for UID {uid}, skipping note generation"
             )
+            self._failed_uids.append(str(uid))
             return
         
+        if isinstance(llm_response.usage, TokenUsage):
+            self._record_token_usage(uid, llm_response.usage)
+        
         # Store LLM scores
         email_context.llm_score = llm_response.importance_score
         
@@ -1267,7 +2610,9 @@ class AccountProcessor:
             classification_result = self.decision_logic.classify(adjusted_llm_response)
         
         # Stage 4.5: Summarization (if email is important and summarization is configured)
-        self._generate_summary_if_needed(email_context, classification_result, uid)
+        self._generate_summary_if_needed(
+            email_context, classification_result, uid, precomputed_summary=llm_response.summary
+        )
         
         # Stage 5: Note Generation
         self._generate_note(email_context, classification_result)
@@ -1281,12 +2626,154 @@ class AccountProcessor:
         self._mark_email_processed(uid)
         
         # Log to structured analytics (if available)
-        self._log_email_processed(uid, classification_result, success=True)
+        self._log_email_processed(uid, classification_result, success=True, usage=llm_response.usage)
         
         self.logger.info(
             f"Successfully processed email UID {uid} for account {self.account_id}"
         )
     
+    def _process_emails_concurrently(
+        self,
+        emails: Iterable[Dict[str, Any]],
+        max_concurrency: int,
+        debug_prompt: bool = False
+    ) -> None:
+        """
+        Process a stream of emails with up to max_concurrency LLM calls in flight.
+        
+        Only classification runs on worker threads. Fetching, parsing, note writing,
+        IMAP flagging and analytics stay on the calling thread and are applied in the
+        original email order, because the IMAP connection is not thread-safe and
+        downstream steps must not be reordered. Retries and backoff still happen
+        per request inside LLMClient.classify_email.
+        
+        Args:
+            emails: Iterable of email dictionaries from the IMAP client
+            max_concurrency: Maximum number of classifications in flight
+            debug_prompt: If True, write classification prompts to debug files
+        """
+        pending = deque()
+        
+        with ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix=f"classify-{self.account_id}"
+        ) as executor:
+            for email_dict in emails:
+                self._processing_context['emails_fetched'] += 1
+                try:
+                    email_context = self._prepare_message(email_dict)
+                except Exception as e:
+                    self._log_email_error(email_dict.get('uid', 'unknown'), e)
+                    continue
+                if email_context is None:
+                    continue
+                
+                future = executor.submit(
+                    propagate_context(self._classify_with_llm),
+                    email_context,
+                    debug_prompt=debug_prompt
+                )
+                pending.append((email_context, future))
+                
+                # Window is full: finish the oldest email before reading the next one
+                if len(pending) >= max_concurrency:
+                    self._complete_pending(*pending.popleft())
+            
+            while pending:
+                self._complete_pending(*pending.popleft())
+    
+    def _complete_pending(self, email_context: EmailContext, future: Future) -> None:
+        """Wait for a classification future and complete its email, isolating errors."""
+        try:
+            self._complete_message(email_context, future.result())
+        except Exception as e:
+            self._log_email_error(email_context.uid, e)
+    
+    def _process_emails_in_batches(
+        self,
+        emails: Iterable[Dict[str, Any]],
+        batch_size: int,
+        max_concurrency: int,
+        debug_prompt: bool = False
+    ) -> None:
+        """
+        Process a stream of emails, classifying up to batch_size emails per LLM request.
+        
+        Emails are prepared on the calling thread and grouped; each group is classified
+        with LLMClient.classify_emails_batch on a worker thread, with up to
+        max_concurrency groups in flight. As in _process_emails_concurrently, the
+        remaining pipeline stages run on the calling thread in the original email order.
+        
+        Args:
+            emails: Iterable of email dictionaries from the IMAP client
+            batch_size: Maximum number of emails per classification request
+            max_concurrency: Maximum number of batch requests in flight
+            debug_prompt: If True, write classification prompts to debug files
+        """
+        pending = deque()
+        batch: List[EmailContext] = []
+        
+        with ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix=f"classify-{self.account_id}"
+        ) as executor:
+            for email_dict in emails:
+                self._processing_context['emails_fetched'] += 1
+                try:
+                    email_context = self._prepare_message(email_dict)
+                except Exception as e:
+                    self._log_email_error(email_dict.get('uid', 'unknown'), e)
+                    continue
+                if email_context is None:
+                    continue
+                
+                batch.append(email_context)
+                if len(batch) < batch_size:
+                    continue
+                future = executor.submit(
+                    propagate_context(self._classify_batch_with_llm),
+                    batch,
+                    debug_prompt=debug_prompt
+                )
+                pending.append((batch, future))
+                batch = []
+                
+                # Window is full: finish the oldest batch before reading the next one
+                if len(pending) >= max_concurrency:
+                    self._complete_pending_batch(*pending.popleft())
+            
+            if batch:
+                future = executor.submit(
+                    propagate_context(self._classify_batch_with_llm),
+                    batch,
+                    debug_prompt=debug_prompt
+                )
+                pending.append((batch, future))
+            while pending:
+                self._complete_pending_batch(*pending.popleft())
+    
+    def _complete_pending_batch(self, email_contexts: List[EmailContext], future: Future) -> None:
+        """Wait for a batch classification future and complete its emails in order, isolating errors."""
+        try:
+            llm_responses = future.result()
+        except Exception as e:
+            for email_context in email_contexts:
+                self._log_email_error(email_context.uid, e)
+            return
+        for email_context, llm_response in zip(email_contexts, llm_responses):
+            try:
+                self._complete_message(email_context, llm_response)
+            except Exception as e:
+                self._log_email_error(email_context.uid, e)
+    
+    def _log_email_error(self, uid: str, error: Exception) -> None:
+        """Log a per-email processing error without aborting the run."""
+        error_msg = f"Error processing email UID {uid} for account {self.account_id}: {error}"
+        tqdm_write(error_msg)
+        self.logger.error(error_msg, exc_info=True)
+        if uid != 'unknown':
+            self._failed_uids.append(str(uid))
+    
     def _check_blacklist(self, email_context: EmailContext) -> ActionEnum:
         """
         Check email against blacklist rules.
@@ -1297,10 +2784,8 @@ class AccountProcessor:
         Returns:
             ActionEnum indicating action to take (DROP, RECORD, or PASS)
         """
-        # Load blacklist rules
-        # TODO: Get blacklist path from config
-        blacklist_path = Path("config/blacklist.yaml")
-        rules = self._blacklist_service(str(blacklist_path))
+        # Cached rules (reloaded only if the file changed since the last email)
+        rules = self._blacklist_cache.get(self._blacklist_path)
         
         # Check against rules
         return check_blacklist(email_context, rules)
@@ -1343,14 +2828,37 @@ class AccountProcessor:
             # Build email content for LLM
             email_content = email_context.parsed_body or email_context.raw_text or ""
             
-            # Call LLM
-            llm_response = self.llm_client.classify_email(
-                email_content=email_content,
-                user_prompt=None,  # TODO: Load prompt from config if needed
-                max_chars=None,  # TODO: Get from config
-                debug_prompt=debug_prompt,
-                debug_uid=email_context.uid
-            )
+            summary_instructions = self._combined_summary_instructions()
+            importance_threshold = self.config.get('processing', {}).get('importance_threshold', 7)
+            
+            # Reuse a stored result for identical content before calling the API
+            if summary_instructions:
+                prompt_version = f"combined-{COMBINED_PROMPT_VERSION}:{importance_threshold}:{summary_instructions}"
+            else:
+                prompt_version = PROMPT_VERSION
+            cache_key = self._classification_cache_key(email_content, prompt_version)
+            if cache_key is not None:
+                cached_response = self._lookup_cached_classification(cache_key, email_context.uid)
+                if cached_response is not None:
+                    return cached_response
+            
+            # Call LLM (classification and summary in one request in combined mode)
+            if summary_instructions:
+                llm_response = self.llm_client.classify_and_summarize(
+                    email_content=email_content,
+                    summary_instructions=summary_instructions,
+                    importance_threshold=importance_threshold,
+                    debug_prompt=debug_prompt,
+                    debug_uid=email_context.uid
+                )
+            else:
+                llm_response = self.llm_client.classify_email(
+                    email_content=email_content,
+                    user_prompt=None,  # TODO: Load prompt from config if needed
+                    max_chars=None,  # TODO: Get from config
+                    debug_prompt=debug_prompt,
+                    debug_uid=email_context.uid
+                )
             
             self.logger.debug(
                 f"LLM classification for UID {email_context.uid} "
@@ -1359,6 +2867,9 @@ class AccountProcessor:
                 f"importance={llm_response.importance_score}"
             )
             
+            if cache_key is not None:
+                self._store_cached_classification(cache_key, llm_response, email_context.uid)
+            
             return llm_response
             
         except Exception as e:
@@ -1369,6 +2880,389 @@ class AccountProcessor:
             )
             return None
     
+    def _classify_batch_with_llm(
+        self,
+        email_contexts: List[EmailContext],
+        debug_prompt: bool = False
+    ) -> List[Optional[LLMResponse]]:
+        """
+        Classify several emails with LLMClient.classify_emails_batch.
+        
+        Cached results are reused; only the remaining emails are sent.
+        
+        Args:
+            email_contexts: EmailContexts to classify
+            debug_prompt: If True, write classification prompts to debug files
+        
+        Returns:
+            One LLMResponse per email context (None where classification failed)
+        """
+        responses: Dict[str, Optional[LLMResponse]] = {}
+        contents: Dict[str, str] = {}
+        cache_keys: Dict[str, Optional[str]] = {}
+        for email_context in email_contexts:
+            uid = email_context.uid
+            contents[uid] = email_context.parsed_body or email_context.raw_text or ""
+            cache_keys[uid] = self._classification_cache_key(contents[uid], f"batch-{BATCH_PROMPT_VERSION}")
+            if cache_keys[uid] is not None:
+                responses[uid] = self._lookup_cached_classification(cache_keys[uid], uid)
+        
+        uncached = {uid: content for uid, content in contents.items() if responses.get(uid) is None}
+        if uncached:
+            try:
+                results = self.llm_client.classify_emails_batch(uncached, debug_prompt=debug_prompt)
+            except Exception as e:
+                self.logger.error(
+                    f"LLM batch classification failed for {len(uncached)} email(s) "
+                    f"(account {self.account_id}): {e}",
+                    exc_info=True
+                )
+                results = {}
+            for uid in uncached:
+                llm_response = results.get(uid)
+                responses[uid] = llm_response
+                if llm_response is None:
+                    self.logger.error(
+                        f"LLM classification failed for UID {uid} (account {self.account_id})"
+                    )
+                elif cache_keys[uid] is not None:
+                    self._store_cached_classification(cache_keys[uid], llm_response, uid)
+        
+        return [responses.get(email_context.uid) for email_context in email_contexts]
+    
+    def _combined_summary_instructions(self) -> Optional[str]:
+        """
+        Return the summarization prompt if summarization.combined_mode is enabled.
+        
+        Returns:
+            Prompt text to send with the classification, or None if combined mode is
+            off, summarization is not configured or the prompt cannot be loaded
+        """
+        if not self.config.get('summarization', {}).get('combined_mode', False):
+            return None
+        if not self.config.get('processing', {}).get('summarization_tags'):
+            return None
+        from src.summarization import load_summarization_prompt
+        return load_summarization_prompt(self.config.get('paths', {}).get('summarization_prompt_path')) or None
+    
+    def _open_classification_cache(self) -> Optional[ClassificationCache]:
+        """
+        Open the classification cache if classification.cache_enabled is set.
+        
+        Returns:
+            ClassificationCache, or None if disabled or the database cannot be opened
+            (processing then continues without a cache)
+        """
+        classification_config = self.config.get('classification', {})
+        if not classification_config.get('cache_enabled', False):
+            return None
+        
+        cache_path = self.config.get('paths', {}).get(
+            'classification_cache_file', 'logs/classification_cache.sqlite3'
+        )
+        try:
+            return ClassificationCache(
+                cache_path,
+                ttl_days=classification_config.get('cache_ttl_days', DEFAULT_TTL_DAYS),
+                max_entries=classification_config.get('cache_max_entries', DEFAULT_MAX_ENTRIES)
+            )
+        except Exception as e:
+            self.logger.warning(
+                f"Classification cache unavailable for account {self.account_id} "
+                f"({cache_path}): {e}. Continuing without cache."
+            )
+            return None
+    
+    @staticmethod
+    def _track_fetched_uids(
+        emails: Iterable[Dict[str, Any]],
+        handled_uids: List[str]
+    ) -> Iterator[Dict[str, Any]]:
+        """Pass emails through, appending each UID that was fetched to handled_uids."""
+        for email_dict in emails:
+            if email_dict.get('uid') is not None:
+                handled_uids.append(str(email_dict['uid']))
+            yield email_dict
+    
+    def _open_sync_state_store(self) -> Optional[SyncStateStore]:
+        """
+        Open the sync state store if imap.sync_state_enabled is set (default: True).
+        
+        Only used with ConfigurableImapClient when the server reported UIDVALIDITY
+        on SELECT, and with MultiFolderImapClient (which checks it per folder).
+        
+        Returns:
+            SyncStateStore, or None if disabled, unsupported or the database cannot be
+            opened (incremental runs then fall back to the vault max UID)
+        """
+        if not self.config.get('imap', {}).get('sync_state_enabled', True):
+            return None
+        if not isinstance(self._imap_conn, MultiFolderImapClient):
+            if not isinstance(self._imap_conn, ConfigurableImapClient):
+                return None
+            if self._imap_conn.get_mailbox_status().get('uidvalidity') is None:
+                return None
+        
+        state_path = self.config.get('paths', {}).get('sync_state_file', DEFAULT_SYNC_STATE_FILE)
+        try:
+            return SyncStateStore(state_path)
+        except Exception as e:
+            self.logger.warning(
+                f"Sync state unavailable for account {self.account_id} "
+                f"({state_path}): {e}. Falling back to vault UID tracking."
+            )
+            return None
+    
+    def _open_token_stats_store(self) -> Optional[TokenStatsStore]:
+        """
+        Open the token history store used for size-based cost estimates.
+        
+        Only used while the safety interlock is enabled, with ConfigurableImapClient
+        and MultiFolderImapClient (which can fetch RFC822.SIZE in bulk).
+        
+        Returns:
+            TokenStatsStore, or None if unused or the database cannot be opened
+            (cost estimates then use safety_interlock.average_tokens_per_email)
+        """
+        if not self.config.get('safety_interlock', {}).get('enabled', True):
+            return None
+        if not isinstance(self._imap_conn, (ConfigurableImapClient, MultiFolderImapClient)):
+            return None
+        
+        stats_path = self.config.get('paths', {}).get('token_stats_file', DEFAULT_TOKEN_STATS_FILE)
+        try:
+            return TokenStatsStore(stats_path)
+        except Exception as e:
+            self.logger.warning(
+                f"Token history unavailable for account {self.account_id} "
+                f"({stats_path}): {e}. Estimating costs from average_tokens_per_email."
+            )
+            return None
+    
+    def _fetch_message_sizes(self, uids: List[str]) -> Dict[str, int]:
+        """
+        Fetch RFC822.SIZE of the pending emails if a token history store is open.
+        
+        Returns:
+            Dictionary mapping UID to message size (empty if unavailable)
+        """
+        if self._token_stats_store is None or not uids:
+            return {}
+        try:
+            return self._imap_conn.fetch_message_sizes(uids)
+        except Exception as e:
+            self.logger.warning(f"Failed to fetch message sizes for account {self.account_id}: {e}")
+            return {}
+    
+    def _estimate_token_usage(self, uids: List[str]) -> Optional[TokenUsage]:
+        """
+        Estimate the tokens needed to classify the pending emails from their sizes.
+        
+        Emails whose size is unknown are assumed to be like the others.
+        
+        Returns:
+            Estimated TokenUsage, or None if no sizes are known
+        """
+        sizes = [self._message_sizes[uid] for uid in uids if uid in self._message_sizes]
+        if not sizes:
+            return None
+        
+        history = self._token_stats_store.load(self.account_id)
+        estimate = estimate_tokens_from_sizes(
+            sizes, history, max_body_chars=self.config.get('processing', {}).get('max_body_chars', 6000)
+        )
+        if len(sizes) < len(uids):
+            scale = len(uids) / len(sizes)
+            estimate = TokenUsage(
+                prompt_tokens=round(estimate.prompt_tokens * scale),
+                completion_tokens=round(estimate.completion_tokens * scale)
+            )
+        source = (
+            f"{history.prompt_tokens_per_byte:.3f} prompt tokens/byte over {history.emails} email(s)"
+            if history is not None and history.reliable else "no token history yet"
+        )
+        self.logger.info(
+            f"Estimated {estimate.prompt_tokens:,} prompt + {estimate.completion_tokens:,} completion "
+            f"token(s) for {len(uids)} email(s) ({sum(sizes):,} bytes, {source}) "
+            f"for account {self.account_id}"
+        )
+        return estimate
+    
+    def _record_token_usage(self, uid: str, usage: TokenUsage) -> None:
+        """
+        Add the tokens of one classification to the run totals.
+        
+        Emails with a known size whose request reported usage (i.e. not served from
+        the classification cache) also feed the account's token history.
+        """
+        self._token_usage.add(usage)
+        size = self._message_sizes.get(uid)
+        if size and usage.prompt_tokens:
+            stats = self._sized_token_stats
+            stats.emails += 1
+            stats.message_bytes += size
+            stats.prompt_tokens += usage.prompt_tokens
+            stats.completion_tokens += usage.completion_tokens
+    
+    def _load_sync_state(self) -> Tuple[Optional[SyncState], bool]:
+        """
+        Load the sync state of the selected mailbox (and its UIDs pending retry).
+        
+        Returns:
+            Tuple of (state, uidvalidity_changed). state is None if there is no
+            usable state. uidvalidity_changed is True if a saved state was discarded
+            because the mailbox UIDVALIDITY changed; stored UIDs (including those in
+            the vault) then refer to different messages and must not be used.
+        """
+        if self._sync_state_store is None:
+            return None, False
+        
+        mailbox_status = self._imap_conn.get_mailbox_status()
+        mailbox = mailbox_status.get('mailbox')
+        if not mailbox or mailbox_status.get('uidvalidity') is None:
+            return None, False
+        
+        try:
+            state = self._sync_state_store.load(self.account_id, mailbox)
+            failed_attempts = self._sync_state_store.load_failed(self.account_id, mailbox)
+        except Exception as e:
+            self.logger.warning(f"Could not load sync state for account {self.account_id}: {e}")
+            return None, False
+        if state is None:
+            return None, False
+        
+        if not state.is_valid_for(mailbox_status):
+            self.logger.warning(
+                f"UIDVALIDITY of {mailbox} changed for account {self.account_id} "
+                f"({state.uidvalidity} -> {mailbox_status['uidvalidity']}). "
+                f"Stored UIDs are no longer valid; searching the whole mailbox."
+            )
+            try:
+                self._sync_state_store.reset(self.account_id, mailbox)
+            except Exception as e:
+                self.logger.warning(f"Could not reset sync state for account {self.account_id}: {e}")
+            return None, True
+        
+        self._failed_attempts = failed_attempts
+        return state, False
+    
+    def _save_sync_state(
+        self,
+        previous: Optional[SyncState],
+        min_uid: Optional[int],
+        uids: List[str],
+        failed_uids: Optional[List[str]] = None
+    ) -> None:
+        """
+        Store the sync position after a completed run (errors are logged, not raised).
+        
+        last_uid becomes the highest of the previous position, min_uid and the UIDs
+        handled or failed by this run. Failed UIDs are stored with their attempt count
+        and retried explicitly by the next runs; after imap.max_failed_attempts attempts
+        they are given up with a warning. HIGHESTMODSEQ is the value reported when the
+        mailbox was selected, so changes made during the run are seen next time.
+        
+        Args:
+            previous: State loaded at the start of the run (if any)
+            min_uid: Minimum UID used by this run
+            uids: UIDs handled by this run
+            failed_uids: UIDs that were not processed, recorded or dropped
+        """
+        if self._sync_state_store is None:
+            return
+        from src.dry_run import is_dry_run
+        if is_dry_run():
+            return
+        if isinstance(self._imap_conn, MultiFolderImapClient):
+            self._imap_conn.save_sync_state(uids, failed_uids)
+            return
+        
+        mailbox_status = self._imap_conn.get_mailbox_status()
+        mailbox = mailbox_status.get('mailbox')
+        uidvalidity = mailbox_status.get('uidvalidity')
+        if not mailbox or uidvalidity is None:
+            return
+        
+        failed = [int(uid) for uid in failed_uids or []]
+        candidates = [int(uid) for uid in uids] + failed
+        max_attempts = self.config.get('imap', {}).get('max_failed_attempts', DEFAULT_MAX_FAILED_ATTEMPTS)
+        failed_attempts, given_up = update_failed_attempts(
+            self._failed_attempts, candidates, failed, max_attempts
+        )
+        if previous is not None:
+            candidates.append(previous.last_uid)
+        if min_uid is not None:
+            candidates.append(min_uid)
+        if not candidates:
+            return
+        
+        state = SyncState(
+            uidvalidity=uidvalidity,
+            last_uid=max(candidates),
+            highest_modseq=mailbox_status.get('highest_modseq')
+        )
+        try:
+            self._sync_state_store.save(self.account_id, mailbox, state)
+            self._sync_state_store.save_failed(self.account_id, mailbox, failed_attempts)
+            self.logger.debug(f"Saved sync state for account {self.account_id}: {state}")
+        except Exception as e:
+            self.logger.warning(f"Could not save sync state for account {self.account_id}: {e}")
+        for uid in given_up:
+            self.logger.warning(
+                f"Giving up on email UID {uid} of account {self.account_id} "
+                f"after {max_attempts} failed attempt(s)"
+            )
+    
+    def _classification_cache_key(
+        self,
+        email_content: str,
+        prompt_version: Union[int, str] = PROMPT_VERSION
+    ) -> Optional[str]:
+        """
+        Build the cache key for the content sent to the LLM, or None if caching is off.
+        
+        Mirrors LLMClient.classify_email: same model/temperature defaults and the same
+        truncation to processing.max_body_chars, so equal keys mean equal requests.
+        prompt_version identifies the prompt the content is sent with (single, batch or
+        combined, including the combined prompt's threshold and instructions), so
+        results of one prompt are never served for another.
+        """
+        if self._classification_cache is None:
+            return None
+        classification_config = self.config.get('classification', {})
+        max_chars = self.config.get('processing', {}).get('max_body_chars', 6000)
+        return make_cache_key(
+            classification_config.get('model', ''),
+            classification_config.get('temperature', 0.1),
+            prompt_version,
+            email_content[:max_chars]
+        )
+    
+    def _lookup_cached_classification(self, cache_key: str, uid: str) -> Optional[LLMResponse]:
+        """Return the cached LLMResponse for cache_key, or None (cache errors count as a miss)."""
+        try:
+            cached_response = self._classification_cache.get(cache_key)
+        except Exception as e:
+            self.logger.warning(f"Classification cache lookup failed for UID {uid}: {e}")
+            return None
+        if cached_response is not None:
+            self.logger.debug(
+                f"Classification cache hit for UID {uid} (account {self.account_id}): "
+                f"spam={cached_response.spam_score}, importance={cached_response.importance_score}"
+            )
+        return cached_response
+    
+    def _store_cached_classification(self, cache_key: str, llm_response: LLMResponse, uid: str) -> None:
+        """Store a fresh classification result in the cache (errors are logged, not raised)."""
+        from src.dry_run import is_dry_run
+        if is_dry_run():
+            # Dry-run reads the cache but never writes files
+            return
+        try:
+            self._classification_cache.put(cache_key, llm_response)
+        except Exception as e:
+            self.logger.warning(f"Could not store classification for UID {uid} in cache: {e}")
+    
     def _apply_whitelist(self, email_context: EmailContext) -> None:
         """
         Apply whitelist rules to email.
@@ -1382,10 +3276,8 @@ class AccountProcessor:
             # Can't apply whitelist without a score
             return
         
-        # Load whitelist rules
-        # TODO: Get whitelist path from config
-        whitelist_path = Path("config/whitelist.yaml")
-        rules = self._whitelist_service(str(whitelist_path))
+        # Cached rules (reloaded only if the file changed since the last email)
+        rules = self._whitelist_cache.get(self._whitelist_path)
         
         # Apply whitelist rules
         current_score = email_context.llm_score or 0.0
@@ -1407,14 +3299,16 @@ class AccountProcessor:
         self,
         email_context: EmailContext,
         classification_result: ClassificationResult,
-        uid: str
+        uid: str,
+        precomputed_summary: Optional[str] = None
     ) -> None:
         """
         Generate summary for email if summarization is required.
         
         This method:
         - Checks if email tags match summarization_tags from config
-        - Calls LLM to generate summary if required
+        - Uses the summary returned with the classification (combined mode), or
+          calls the LLM to generate the summary if required
         - Stores summary result in email_context for template rendering
         - Handles errors gracefully (summarization failure doesn't break pipeline)
         
@@ -1422,6 +3316,7 @@ class AccountProcessor:
             email_context: EmailContext to check and potentially summarize
             classification_result: Classification result with tags
             uid: Email UID for logging
+            precomputed_summary: Summary from LLMClient.classify_and_summarize, if any
         """
         try:
             # Get summarization tags from config
@@ -1447,6 +3342,21 @@ class AccountProcessor:
                 f"(account {self.account_id}, tags: {email_tags})"
             )
             
+            if precomputed_summary:
+                # Combined mode: the classification response already carries the summary
+                email_context.summary = {
+                    'success': True,
+                    'summary': precomputed_summary,
+                    'action_items': [],
+                    'priority': 'medium',
+                    'error': None
+                }
+                self.logger.info(
+                    f"Using summary from classification response for email UID {uid} "
+                    f"({len(precomputed_summary)} chars, account {self.account_id})"
+                )
+                return
+            
             # Get summarization prompt path from config
             summarization_prompt_path = self.config.get('paths', {}).get('summarization_prompt_path')
             
@@ -1490,7 +3400,10 @@ class AccountProcessor:
                     )
                     return
                 
-                openrouter_client = OpenRouterClient(api_key, api_url)
+                # One client per processor; its HTTP connections are pooled and reused
+                if self._summary_client is None:
+                    self._summary_client = OpenRouterClient(api_key, api_url)
+                openrouter_client = self._summary_client
             except Exception as e:
                 self.logger.warning(
                     f"Failed to create OpenRouter client for summarization: {e}"
@@ -1516,6 +3429,8 @@ class AccountProcessor:
                 # Store summary result in email_context for template rendering
                 # We'll add it to email_data dict in _generate_note
                 email_context.summary = summary_result
+                if summary_result.get('usage'):
+                    self._token_usage.add(TokenUsage(**summary_result['usage']))
                 
                 if summary_result.get('success', False):
                     summary_text = summary_result.get('summary', '')
@@ -1596,7 +3511,8 @@ class AccountProcessor:
                 note_content=note_content,
                 email_subject=email_context.subject,
                 email_uid=email_context.uid,
-                email_date=email_context.date  # Pass date for file timestamp
+                email_date=email_context.date,  # Pass date for file timestamp
+                message_id=email_context.message_id
             )
             
         except Exception as e:
@@ -1641,7 +3557,8 @@ class AccountProcessor:
                 note_content=note_content,
                 email_subject=email_context.subject,
                 email_uid=email_context.uid,
-                email_date=email_context.date  # Pass date for file timestamp
+                email_date=email_context.date,  # Pass date for file timestamp
+                message_id=email_context.message_id
             )
             
         except Exception as e:
@@ -1656,19 +3573,22 @@ class AccountProcessor:
         note_content: str,
         email_subject: str,
         email_uid: str,
-        email_date: Optional[str] = None
+        email_date: Optional[str] = None,
+        message_id: Optional[str] = None
     ) -> None:
         """
         Write note to file system with account-specific subdirectory.
         
         Creates a subdirectory in the Obsidian vault named after the account
         (e.g., 'info-nica' for account_id 'info.nica') and writes the note there.
+        Written notes are also recorded in the vault UID index (src.vault_index).
         
         Args:
             note_content: Generated note content (Markdown)
             email_subject: Email subject for filename generation
-            email_uid: Email UID for logging
+            email_uid: Email UID for logging and the UID index
             email_date: Optional email date string (RFC 2822 format) for file timestamp
+            message_id: Optional Message-ID header, stored in the UID index
         """
         from src.obsidian_note_creation import write_obsidian_note
         from src.obsidian_utils import InvalidPathError, WritePermissionError, FileWriteError
@@ -1741,6 +3661,9 @@ class AccountProcessor:
                 f"(account {self.account_id}): {file_path}"
             )
             
+            if not dry_run_mode:
+                self._record_note_in_index(vault_path, email_uid, file_path, message_id)
+            
         except (InvalidPathError, WritePermissionError, FileWriteError) as e:
             self.logger.error(
                 f"Failed to write note for UID {email_uid} "
@@ -1754,12 +3677,42 @@ class AccountProcessor:
                 exc_info=True
             )
     
+    def _record_note_in_index(
+        self,
+        vault_path: str,
+        email_uid: str,
+        file_path: Any,
+        message_id: Optional[str]
+    ) -> None:
+        """
+        Add a written note to the vault UID index.
+        
+        Failures are logged and ignored: the index can always be rebuilt from the
+        notes themselves (scan-uids --rebuild).
+        
+        Args:
+            vault_path: Base Obsidian vault path
+            email_uid: Email UID
+            file_path: Path the note was written to
+            message_id: Message-ID header (if known)
+        """
+        try:
+            if self._uid_index is None:
+                self._uid_index = VaultUidIndex.for_vault(vault_path)
+            self._uid_index.add(self.account_id, int(email_uid), str(file_path), message_id)
+        except Exception as e:
+            self.logger.warning(
+                f"Could not update vault UID index for UID {email_uid} "
+                f"(account {self.account_id}): {e}"
+            )
+    
     def _log_email_processed(
         self,
         uid: str,
         classification_result: Optional[ClassificationResult],
         success: bool,
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        usage: Optional[TokenUsage] = None
     ) -> None:
         """
         Log email processing result to structured analytics.
@@ -1769,6 +3722,7 @@ class AccountProcessor:
             classification_result: Classification result (if successful)
             success: Whether processing succeeded
             error: Error message (if failed)
+            usage: Classification tokens reported by the API (if any)
         """
         try:
             # Use V4 AnalyticsWriter for structured analytics
@@ -1786,7 +3740,8 @@ class AccountProcessor:
                     uid=uid,
                     status='success',
                     importance_score=int(classification_result.importance_score) if classification_result.importance_score >= 0 else -1,
-                    spam_score=int(classification_result.spam_score) if classification_result.spam_score >= 0 else -1
+                    spam_score=int(classification_result.spam_score) if classification_result.spam_score >= 0 else -1,
+                    token_usage=usage.to_dict() if isinstance(usage, TokenUsage) else None
                 )
             else:
                 # Log failed processing
@@ -1806,18 +3761,76 @@ class AccountProcessor:
         """
         Mark email as processed in IMAP.
         
+        The flag is buffered and stored together with other processed UIDs in one
+        UID STORE (see _flush_processed_flags).
+        
         Args:
             uid: Email UID
         """
         try:
-            processed_tag = self.config.get('imap', {}).get('processed_tag', 'AIProcessed')
-            self._imap_conn.set_flag(uid, processed_tag)
+            if self._flag_writer is not None:
+                self._flag_writer.add(uid)
+            else:
+                processed_tag = self.config.get('imap', {}).get('processed_tag', 'AIProcessed')
+                self._imap_conn.set_flag(uid, processed_tag)
         except Exception as e:
             self.logger.warning(
                 f"Failed to mark email UID {uid} as processed "
                 f"for account {self.account_id}: {e}"
             )
     
+    def _flush_processed_flags(self) -> None:
+        """Store all buffered processed flags (failures are logged, not raised)."""
+        if self._flag_writer is None or self._imap_conn is None:
+            return
+        try:
+            failed = self._flag_writer.flush()
+            if failed:
+                self.logger.warning(
+                    f"Failed to mark {len(failed)} email(s) as processed "
+                    f"for account {self.account_id}: UIDs {', '.join(failed)}"
+                )
+        except Exception as e:
+            self.logger.warning(
+                f"Failed to flush processed flags for account {self.account_id}: {e}"
+            )
+    
+    def _log_token_usage(self) -> None:
+        """
+        Log and record the tokens used in this run.
+        
+        Writes a run summary to structured analytics and adds the emails with a
+        known size to the account's token history (failures are logged, not raised).
+        """
+        usage = self._token_usage
+        estimate = self._estimated_token_usage
+        self.logger.info(
+            f"LLM token usage for account {self.account_id}: "
+            f"prompt={usage.prompt_tokens:,} (cached {usage.cached_tokens:,}), "
+            f"completion={usage.completion_tokens:,}"
+            + (f", estimated={estimate.total_tokens:,}" if estimate is not None else "")
+        )
+        if not usage.total_tokens:
+            return
+        
+        try:
+            from src.analytics_writer import AnalyticsWriter
+            analytics_file = self.config.get('paths', {}).get('analytics_file', 'logs/analytics.jsonl')
+            AnalyticsWriter(analytics_file).write_run_summary(
+                account_id=self.account_id,
+                emails_processed=self._processing_context.get('emails_processed', 0),
+                token_usage=usage.to_dict(),
+                estimated_tokens=estimate.total_tokens if estimate is not None else None
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to log token usage to structured analytics: {e}")
+        
+        if self._token_stats_store is not None:
+            try:
+                self._token_stats_store.record(self.account_id, self._sized_token_stats)
+            except Exception as e:
+                self.logger.warning(f"Failed to update token history for account {self.account_id}: {e}")
+    
     def _log_processing_summary(self) -> None:
         """Log summary of processing run."""
         context = self._processing_context
@@ -1833,3 +3846,22 @@ class AccountProcessor:
             f"recorded={len(self._recorded_emails)}, "
             f"time={elapsed_time:.2f}s"
         )
+        
+        cache = self._classification_cache
+        if cache is not None:
+            self.logger.info(
+                f"Classification cache for account {self.account_id}: "
+                f"hits={cache.hits}, misses={cache.misses}"
+            )
+        
+        self._log_token_usage()
+        
+        # Process-wide LLM rate limiter (shared by all accounts)
+        limiter = get_shared_rate_limiter().stats()
+        concurrency_limit = limiter['concurrency_limit']
+        self.logger.info(
+            f"LLM rate limiter: rate={limiter['requests_per_second']:.2f} req/s, "
+            f"concurrency_limit={'unlimited' if concurrency_limit is None else concurrency_limit}, "
+            f"queue_depth={limiter['queue_depth']} (peak {limiter['peak_queue_depth']}), "
+            f"rate_limited={limiter['rate_limited']}"
+        )
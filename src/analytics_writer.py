@@ -31,7 +31,7 @@ import logging
 import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -63,7 +63,8 @@ class AnalyticsWriter:
         uid: str,
         status: str,
         importance_score: int = -1,
-        spam_score: int = -1
+        spam_score: int = -1,
+        token_usage: Optional[Dict[str, int]] = None
     ) -> bool:
         """
         Write email processing event to analytics JSONL file.
@@ -73,30 +74,69 @@ class AnalyticsWriter:
             status: Processing status ('success' or 'error')
             importance_score: Importance score (0-10, or -1 for errors)
             spam_score: Spam score (0-10, or -1 for errors)
+            token_usage: Optional prompt_tokens / completion_tokens / cached_tokens
+                         reported by the API for this email
             
         Returns:
             True if write succeeded, False otherwise
         """
-        try:
-            entry = {
-                'uid': uid,
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'status': status,
-                'importance_score': importance_score,
-                'spam_score': spam_score
-            }
+        entry = {
+            'uid': uid,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'status': status,
+            'importance_score': importance_score,
+            'spam_score': spam_score
+        }
+        if token_usage is not None:
+            entry.update(token_usage)
+        return self._write_entry(entry, f"UID {uid}")
+    
+    def write_run_summary(
+        self,
+        account_id: str,
+        emails_processed: int,
+        token_usage: Dict[str, int],
+        estimated_tokens: Optional[int] = None
+    ) -> bool:
+        """
+        Write the token totals of one account processing run.
+        
+        Entries are marked with 'event': 'run_summary' to tell them apart from
+        per-email entries.
+        
+        Args:
+            account_id: Account identifier
+            emails_processed: Number of emails processed in the run
+            token_usage: prompt_tokens / completion_tokens / cached_tokens of the run
+            estimated_tokens: Tokens estimated by the safety interlock, if any
             
+        Returns:
+            True if write succeeded, False otherwise
+        """
+        entry = {
+            'event': 'run_summary',
+            'account_id': account_id,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'emails_processed': emails_processed,
+            **token_usage,
+            'estimated_tokens': estimated_tokens
+        }
+        return self._write_entry(entry, f"run summary of account {account_id}")
+    
+    def _write_entry(self, entry: Dict[str, Any], description: str) -> bool:
+        """Append one JSON object to the analytics file (errors are logged, not raised)."""
+        try:
             with self._lock:
                 # Append to JSONL file (one JSON object per line)
                 with open(self._analytics_path, 'a', encoding='utf-8') as f:
                     json_str = json.dumps(entry, ensure_ascii=False)
                     f.write(json_str + '\n')
                 
-                logger.debug(f"Wrote analytics entry for UID {uid}")
+                logger.debug(f"Wrote analytics entry for {description}")
                 return True
         except Exception as e:
             logger.error(
-                f"Failed to write analytics entry for UID {uid}: {e}",
+                f"Failed to write analytics entry for {description}: {e}",
                 exc_info=True
             )
             return False
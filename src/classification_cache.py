@@ -0,0 +1,184 @@
+"""
+Persistent cache of LLM classification results.
+
+Classifying the same email twice (--force-reprocess, re-running a backfill after
+a vault wipe or a note template change) would otherwise pay for the same LLM call
+again. This module stores LLMResponse results in a local SQLite database, keyed by
+a hash of everything that determines the model's answer:
+
+    model, temperature, prompt version (and kind of prompt), truncated email content
+
+Entries expire after a TTL, and the table is trimmed to a maximum number of
+entries (least recently used first).
+
+Usage:
+    >>> from src.classification_cache import ClassificationCache, make_cache_key
+    >>>
+    >>> cache = ClassificationCache('logs/classification_cache.sqlite3')
+    >>> key = make_cache_key('openai/gpt-4o-mini', 0.2, 1, truncated_content)
+    >>> response = cache.get(key)
+    >>> if response is None:
+    ...     response = llm_client.classify_email(content)
+    ...     cache.put(key, response)
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from src.llm_client import LLMResponse
+
+logger = logging.getLogger(__name__)
+
+# Default limits (classification.cache_ttl_days / classification.cache_max_entries)
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_ENTRIES = 100000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS classifications (
+    key TEXT PRIMARY KEY,
+    spam_score INTEGER NOT NULL,
+    importance_score INTEGER NOT NULL,
+    raw_response TEXT,
+    summary TEXT,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_classifications_last_used ON classifications (last_used_at);
+"""
+
+
+def make_cache_key(model: str, temperature: float, prompt_version: Union[int, str], content: str) -> str:
+    """
+    Build the cache key for one classification request.
+
+    Args:
+        model: LLM model identifier
+        temperature: Sampling temperature
+        prompt_version: Version of the prompt the content is sent with (see llm_client.PROMPT_VERSION)
+        content: Email content exactly as sent to the model (after truncation)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    material = json.dumps([model, float(temperature), str(prompt_version), content], ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ClassificationCache:
+    """
+    SQLite-backed store of LLMResponse results with TTL and size-bounded eviction.
+
+    Safe to share between threads (access is serialized with a lock). Hit and miss
+    counts are kept per instance, i.e. per processing run.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl_days: int = DEFAULT_TTL_DAYS,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path: Path to the SQLite database file
+            ttl_days: Days after which an entry is ignored and evicted (0 = never expires)
+            max_entries: Maximum number of entries kept (least recently used are evicted)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_days * 86400 if ttl_days else None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(classifications)")}
+        if 'summary' not in columns:
+            # Databases created before combined-mode summaries were cached
+            self._conn.execute("ALTER TABLE classifications ADD COLUMN summary TEXT")
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        """
+        Look up a cached classification.
+
+        Args:
+            key: Cache key from make_cache_key()
+
+        Returns:
+            Cached LLMResponse, or None on a miss (absent or expired)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT spam_score, importance_score, raw_response, created_at, summary "
+                "FROM classifications WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds and now - row[3] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM classifications WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE classifications SET last_used_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return LLMResponse(spam_score=row[0], importance_score=row[1], raw_response=row[2], summary=row[4])
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        """
+        Store a classification result and evict expired/excess entries.
+
+        Args:
+            key: Cache key from make_cache_key()
+            response: LLMResponse to store
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications "
+                "(key, spam_score, importance_score, raw_response, summary, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, response.spam_score, response.importance_score, response.raw_response,
+                 response.summary, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM classifications WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        count = self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM classifications WHERE key IN ("
+                "SELECT key FROM classifications ORDER BY last_used_at ASC LIMIT ?)",
+                (excess,)
+            )
+            logger.debug(f"Evicted {excess} classification cache entries")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
@@ -18,10 +18,13 @@ import re
 from typing import List, Dict, Any
 from dataclasses import dataclass
 
-from src.imap_client import ImapClient, IMAPConnectionError, IMAPFetchError
+from src.imap_client import ImapClient, IMAPConnectionError, IMAPFetchError, build_uid_set
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of UIDs per UID FETCH (FLAGS) / UID STORE command
+SCAN_BATCH_SIZE = 1000
+
 
 @dataclass
 class FlagScanResult:
@@ -111,12 +114,18 @@ class CleanupFlags:
         except Exception as e:
             logger.warning(f"Error disconnecting from IMAP server: {e}")
     
-    def scan_flags(self, dry_run: bool = False) -> List[FlagScanResult]:
+    def scan_flags(self, dry_run: bool = False, include_subjects: bool = True) -> List[FlagScanResult]:
         """
         Scan all emails and identify application-specific flags.
         
+        Flags are read with one UID FETCH (FLAGS) sweep (UID 1:* when the query is
+        ALL, otherwise the matching UIDs in chunks of SCAN_BATCH_SIZE) instead of
+        one FETCH per email. Subjects are only needed for the report and are
+        fetched afterwards in batches, for the flagged emails only.
+        
         Args:
             dry_run: If True, only scan without making changes
+            include_subjects: If False, skip the subject fetch (subjects are left empty)
             
         Returns:
             List of FlagScanResult objects for emails with application flags
@@ -130,8 +139,6 @@ class CleanupFlags:
         logger.info(f"Scanning emails for application-specific flags (dry_run={dry_run})")
         
         try:
-            # Get all emails (use ALL query to get everything)
-            # We'll fetch flags for all emails
             imap_config = self._config.get('imap', {})
             user_query = imap_config.get('query', 'ALL')
             logger.debug(f"Using IMAP query: {user_query}")
@@ -161,17 +168,27 @@ class CleanupFlags:
             
             logger.info(f"Found {len(uids)} email(s) to scan")
             
-            # Scan flags for each email
-            results: List[FlagScanResult] = []
+            flags_by_uid = self._fetch_flags(uids, fetch_all=user_query.strip().upper() == 'ALL')
             
+            results: List[FlagScanResult] = []
             for uid in uids:
-                try:
-                    scan_result = self._scan_email_flags(uid)
-                    if scan_result.application_flags:  # Only include emails with application flags
-                        results.append(scan_result)
-                except Exception as e:
-                    logger.warning(f"Error scanning flags for email UID {uid}: {e}")
+                all_flags = flags_by_uid.get(uid)
+                if all_flags is None:
+                    logger.warning(f"No flags returned for email UID {uid}")
                     continue
+                application_flags = [flag for flag in all_flags if flag in self.application_flags]
+                if application_flags:  # Only include emails with application flags
+                    results.append(FlagScanResult(
+                        uid=uid,
+                        subject='',
+                        application_flags=application_flags,
+                        all_flags=all_flags
+                    ))
+            
+            if include_subjects and results:
+                subjects = self._fetch_subjects([result.uid for result in results])
+                for result in results:
+                    result.subject = subjects.get(result.uid, '[Unknown]')
             
             logger.info(f"Scan complete: {len(results)} email(s) have application-specific flags")
             return results
@@ -181,59 +198,70 @@ class CleanupFlags:
             logger.error(error_msg)
             raise CleanupFlagsError(error_msg) from e
     
-    def _scan_email_flags(self, uid: str) -> FlagScanResult:
+    def _fetch_flags(self, uids: List[str], fetch_all: bool = False) -> Dict[str, List[str]]:
         """
-        Scan flags for a single email.
+        Fetch the flags of many emails with as few UID FETCH commands as possible.
         
         Args:
-            uid: Email UID
+            uids: UIDs to fetch flags for
+            fetch_all: If True, sweep the whole mailbox with a single UID FETCH 1:*
             
         Returns:
-            FlagScanResult with flags information
-        """
-        try:
-            # Fetch FLAGS and basic headers (subject) for the email
-            typ, data = self.imap_client._imap.uid('FETCH', uid, '(FLAGS BODY[HEADER.FIELDS (SUBJECT)])')
-            
-            if typ != 'OK' or not data or not data[0]:
-                logger.warning(f"Failed to fetch flags for email UID {uid}")
-                return FlagScanResult(uid=uid, subject="[Unknown]", application_flags=[], all_flags=[])
+            Dictionary mapping UID to its flags (without backslashes)
             
-            # Parse flags from response
-            flags_str = str(data[0])
-            all_flags = self._parse_flags_from_response(flags_str)
+        Raises:
+            CleanupFlagsError: If a FLAGS fetch fails
+        """
+        if fetch_all:
+            uid_sets = ['1:*']
+        else:
+            uid_sets = [
+                build_uid_set(uids[i:i + SCAN_BATCH_SIZE])
+                for i in range(0, len(uids), SCAN_BATCH_SIZE)
+            ]
+        
+        wanted = set(uids)
+        flags_by_uid: Dict[str, List[str]] = {}
+        for uid_set in uid_sets:
+            typ, data = self.imap_client._imap.uid('FETCH', uid_set, '(FLAGS)')
+            if typ != 'OK':
+                raise CleanupFlagsError(f"IMAP FLAGS fetch failed: {data}")
+            for item in data or []:
+                if isinstance(item, tuple):
+                    item = item[0]
+                if isinstance(item, bytes):
+                    item = item.decode('utf-8', errors='replace')
+                if not item:
+                    continue
+                uid_match = re.search(r'UID\s+(\d+)', item)
+                if uid_match and uid_match.group(1) in wanted:
+                    flags_by_uid[uid_match.group(1)] = self._parse_flags_from_response(item)
+        
+        logger.debug(f"Fetched flags for {len(flags_by_uid)} email(s) in {len(uid_sets)} command(s)")
+        return flags_by_uid
+    
+    def _fetch_subjects(self, uids: List[str]) -> Dict[str, str]:
+        """
+        Fetch subjects for the scan report in batches of imap.fetch_batch_size.
+        
+        Args:
+            uids: UIDs of the emails to report
             
-            # Extract subject if available
-            subject = "[No Subject]"
+        Returns:
+            Dictionary mapping UID to subject (emails that could not be fetched are omitted)
+        """
+        batch_size = self._config.get('imap', {}).get('fetch_batch_size', 50)
+        subjects: Dict[str, str] = {}
+        for i in range(0, len(uids), batch_size):
+            chunk = uids[i:i + batch_size]
             try:
-                # Try to extract subject from response
-                subject_match = re.search(r'Subject:\s*(.+)', flags_str, re.IGNORECASE)
-                if subject_match:
-                    subject = subject_match.group(1).strip()
-            except Exception:
-                pass
-            
-            # If subject not found in flags response, fetch it separately
-            if subject == "[No Subject]":
-                try:
-                    email_data = self.imap_client.get_email_by_uid(uid)
-                    subject = email_data.get('subject', '[No Subject]')
-                except Exception:
-                    pass
-            
-            # Identify application-specific flags
-            application_flags = [flag for flag in all_flags if flag in self.application_flags]
-            
-            return FlagScanResult(
-                uid=uid,
-                subject=subject,
-                application_flags=application_flags,
-                all_flags=all_flags
-            )
-            
-        except Exception as e:
-            logger.warning(f"Error scanning email UID {uid}: {e}")
-            return FlagScanResult(uid=uid, subject="[Error]", application_flags=[], all_flags=[])
+                headers = self.imap_client.get_headers_by_uids(chunk)
+            except Exception as e:
+                logger.warning(f"Error fetching subjects for {len(chunk)} email(s): {e}")
+                continue
+            for uid, header_data in headers.items():
+                subjects[uid] = header_data.get('subject') or '[No Subject]'
+        return subjects
     
     def _parse_flags_from_response(self, flags_str: str) -> List[str]:
         """
@@ -248,7 +276,7 @@ class CleanupFlags:
         flags = []
         try:
             # Extract flags between parentheses: FLAGS (\\Seen \\Flagged AIProcessed)
-            flags_match = re.search(r'FLAGS\s+\(([^)]+)\)', flags_str)
+            flags_match = re.search(r'FLAGS\s+\(([^)]*)\)', flags_str)
             if flags_match:
                 flags_raw = flags_match.group(1).split()
                 # Remove backslashes and clean up
@@ -262,6 +290,10 @@ class CleanupFlags:
         """
         Remove application-specific flags from emails.
         
+        UIDs are grouped per flag and cleared with one UID STORE <set> -FLAGS per
+        chunk of SCAN_BATCH_SIZE emails. If a grouped STORE fails, its emails are
+        retried one by one so failures are counted per email and flag.
+        
         Args:
             scan_results: List of FlagScanResult objects from scan_flags()
             dry_run: If True, only log what would be removed without making changes
@@ -289,29 +321,25 @@ class CleanupFlags:
             errors=0
         )
         
+        # Group UIDs by flag so each flag is cleared with a few grouped STOREs
+        uids_by_flag: Dict[str, List[str]] = {}
         for result in scan_results:
-            try:
-                flags_removed = 0
-                for flag in result.application_flags:
-                    if dry_run:
-                        logger.info(f"[DRY RUN] Would remove flag '{flag}' from email UID {result.uid} ({result.subject})")
-                        flags_removed += 1
-                    else:
-                        success = self.imap_client.clear_flag(result.uid, flag)
-                        if success:
-                            logger.info(f"Removed flag '{flag}' from email UID {result.uid} ({result.subject})")
-                            flags_removed += 1
-                        else:
-                            logger.warning(f"Failed to remove flag '{flag}' from email UID {result.uid}")
-                            summary.errors += 1
-                
-                if flags_removed > 0:
-                    summary.total_flags_removed += flags_removed
-                    summary.emails_modified += 1
-                    
-            except Exception as e:
-                logger.error(f"Error removing flags from email UID {result.uid}: {e}")
-                summary.errors += 1
+            for flag in result.application_flags:
+                uids_by_flag.setdefault(flag, []).append(result.uid)
+        
+        modified_uids = set()
+        for flag, uids in uids_by_flag.items():
+            for i in range(0, len(uids), SCAN_BATCH_SIZE):
+                chunk = uids[i:i + SCAN_BATCH_SIZE]
+                if dry_run:
+                    logger.info(f"[DRY RUN] Would remove flag '{flag}' from {len(chunk)} email(s): UIDs {build_uid_set(chunk)}")
+                    removed = chunk
+                else:
+                    removed = self._clear_flag_on_uids(chunk, flag)
+                    summary.errors += len(chunk) - len(removed)
+                summary.total_flags_removed += len(removed)
+                modified_uids.update(removed)
+        summary.emails_modified = len(modified_uids)
         
         logger.info(
             f"Cleanup complete: {summary.emails_modified} email(s) modified, "
@@ -320,6 +348,36 @@ class CleanupFlags:
         
         return summary
     
+    def _clear_flag_on_uids(self, uids: List[str], flag: str) -> List[str]:
+        """
+        Clear a flag from a group of emails, retrying per email if the grouped STORE fails.
+        
+        Args:
+            uids: Email UIDs
+            flag: Flag to remove
+            
+        Returns:
+            UIDs the flag was removed from
+        """
+        try:
+            if self.imap_client.clear_flag_bulk(uids, flag):
+                logger.info(f"Removed flag '{flag}' from {len(uids)} email(s): UIDs {build_uid_set(uids)}")
+                return list(uids)
+        except Exception as e:
+            logger.warning(f"Grouped removal of flag '{flag}' failed: {e}")
+        
+        removed = []
+        for uid in uids:
+            try:
+                if self.imap_client.clear_flag(uid, flag):
+                    logger.info(f"Removed flag '{flag}' from email UID {uid}")
+                    removed.append(uid)
+                else:
+                    logger.warning(f"Failed to remove flag '{flag}' from email UID {uid}")
+            except Exception as e:
+                logger.error(f"Error removing flag '{flag}' from email UID {uid}: {e}")
+        return removed
+    
     def format_scan_results(self, results: List[FlagScanResult]) -> str:
         """
         Format scan results for display.
@@ -340,7 +398,8 @@ class CleanupFlags:
         
         for i, result in enumerate(results, 1):
             lines.append(f"  {i}. UID: {result.uid}")
-            lines.append(f"     Subject: {result.subject}")
+            if result.subject:
+                lines.append(f"     Subject: {result.subject}")
             lines.append(f"     Application flags: {', '.join(result.application_flags) if result.application_flags else 'None'}")
             lines.append("")
         
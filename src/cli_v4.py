@@ -6,7 +6,7 @@ All commands use V4 components (MasterOrchestrator, ConfigLoader) exclusively.
 
 CLI Structure:
     python main.py process [--account <name>] [--all] [--dry-run] [--uid <ID>] [--force-reprocess]
-    python main.py cleanup-flags [--account <name>] [--dry-run]
+    python main.py cleanup-flags [--account <name>] [--dry-run] [--no-subjects]
     python main.py backfill [--account <name>] [--dry-run]
     python main.py show-config [--account <name>] [--format <format>]
 """
@@ -217,6 +217,18 @@ def _format_orchestration_result(result, use_formatted_output: bool = True) -> N
     type=str,
     help='Only process emails sent/received before this date. Supports formats: DD.MM.YYYY, YYYY-MM-DD, DD/MM/YYYY, or natural language (e.g., "2 Feb 2022")'
 )
+@click.option(
+    '--parallel-accounts',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of accounts to process at the same time with --all (default: 1, sequential).'
+)
+@click.option(
+    '--watch',
+    is_flag=True,
+    default=False,
+    help='Keep running and process new mail as it arrives (IMAP IDLE, NOOP polling fallback). Stop with Ctrl+C.'
+)
 @click.pass_context
 def process(
     ctx: click.Context,
@@ -228,7 +240,9 @@ def process(
     max_emails: Optional[int],
     debug_prompt: bool,
     after: Optional[str],
-    before: Optional[str]
+    before: Optional[str],
+    parallel_accounts: int,
+    watch: bool
 ):
     """
     Main command for email processing.
@@ -239,11 +253,13 @@ def process(
     Examples:
         python main.py process --account work              # Process 'work' account
         python main.py process --all                       # Process all accounts
+        python main.py process --all --parallel-accounts 4 # Process 4 accounts at a time
         python main.py process --account work --dry-run    # Preview processing
         python main.py process --account work --uid 12345  # Process specific email
         python main.py process --account work --force-reprocess  # Reprocess all emails
         python main.py process --account work --after 02.02.2022  # Process emails after date
         python main.py process --account work --before 2022-12-31  # Process emails before date
+        python main.py process --all --watch               # Process new mail as it arrives
     """
     # Validate account selection
     if account and all_accounts:
@@ -267,6 +283,10 @@ def process(
             click.echo("Error: --uid cannot be used with --all. Specify a single account with --account.", err=True)
             sys.exit(1)
     
+    if watch and (uid or force_reprocess or after or before):
+        click.echo("Error: --watch cannot be combined with --uid, --force-reprocess, --after or --before.", err=True)
+        sys.exit(1)
+    
     # Build argv for MasterOrchestrator
     argv = []
     if account:
@@ -290,6 +310,10 @@ def process(
         argv.extend(['--after', after])
     if before:
         argv.extend(['--before', before])
+    if parallel_accounts > 1:
+        argv.extend(['--parallel-accounts', str(parallel_accounts)])
+    if watch:
+        argv.append('--watch')
     
     try:
         # Get orchestrator from context
@@ -325,8 +349,14 @@ def process(
     default=False,
     help='Preview which flags would be removed without actually removing them.'
 )
+@click.option(
+    '--no-subjects',
+    is_flag=True,
+    default=False,
+    help='Do not fetch email subjects for the report (faster on large mailboxes).'
+)
 @click.pass_context
-def cleanup_flags(ctx: click.Context, account: str, dry_run: bool):
+def cleanup_flags(ctx: click.Context, account: str, dry_run: bool, no_subjects: bool):
     """
     Maintenance command to clean up application-specific IMAP flags.
     
@@ -342,6 +372,7 @@ def cleanup_flags(ctx: click.Context, account: str, dry_run: bool):
     Examples:
         python main.py cleanup-flags --account work
         python main.py cleanup-flags --account work --dry-run
+        python main.py cleanup-flags --account work --no-subjects
     """
     try:
         from src.cleanup_flags import CleanupFlags, CleanupFlagsError
@@ -404,7 +435,7 @@ def cleanup_flags(ctx: click.Context, account: str, dry_run: bool):
         try:
             # Scan for flags
             click.echo("\nScanning emails for application-specific flags...")
-            scan_results = cleanup.scan_flags(dry_run=dry_run)
+            scan_results = cleanup.scan_flags(dry_run=dry_run, include_subjects=not no_subjects)
             
             if not scan_results:
                 click.echo("\nNo emails with application-specific flags found.")
@@ -540,11 +571,18 @@ def backfill(
     default='simple',
     help='Output format: simple (just max UID) or detailed (full statistics)'
 )
+@click.option(
+    '--rebuild',
+    is_flag=True,
+    default=False,
+    help='Rebuild the vault UID index from a full scan of the notes'
+)
 @click.pass_context
 def scan_uids(
     ctx: click.Context,
     account: str,
-    format: str
+    format: str,
+    rebuild: bool
 ):
     """
     Scan Obsidian vault for the highest UID in markdown frontmatter.
@@ -557,12 +595,16 @@ def scan_uids(
     The account-specific vault directory is determined by converting the account_id
     to a subdirectory name (e.g., 'info.nica' -> 'info-nica').
     
+    The max UID is answered from the vault UID index, which is kept up to date as
+    notes are written. Use --rebuild after adding, moving or deleting notes by hand.
+    
     Examples:
         python main.py scan-uids --account work
         python main.py scan-uids --account work --format detailed
+        python main.py scan-uids --account work --rebuild
     """
     try:
-        from src.vault_utils import get_max_uid_from_vault, scan_vault_stats
+        from src.vault_utils import get_max_uid_from_vault, rebuild_uid_index, scan_vault_stats
         from src.config_loader import ConfigurationError
         
         # Get config loader from context
@@ -582,6 +624,10 @@ def scan_uids(
             click.echo("Please configure paths.obsidian_vault in your account or global config.", err=True)
             sys.exit(1)
         
+        if rebuild:
+            indexed = rebuild_uid_index(account, vault_path)
+            click.echo(f"Rebuilt vault UID index: {indexed} note(s) indexed", err=True)
+        
         # Scan vault
         if format.lower() == 'detailed':
             stats = scan_vault_stats(account, vault_path)
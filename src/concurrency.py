@@ -0,0 +1,57 @@
+"""
+Helpers for running work on worker threads.
+
+Logging context (account_id, correlation_id, ...) and dry-run mode are stored per
+thread, so a function submitted to a ThreadPoolExecutor would otherwise run without
+them. propagate_context() captures the caller's state and re-applies it inside the
+worker before the function runs.
+
+Usage:
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> from src.concurrency import propagate_context
+    >>>
+    >>> with ThreadPoolExecutor(max_workers=4) as executor:
+    ...     future = executor.submit(propagate_context(classify), email_context)
+"""
+import contextvars
+import functools
+from typing import Any, Callable, TypeVar
+
+from src.dry_run import is_dry_run, set_dry_run
+from src.logging_context import clear_context, get_logging_context, set_account_context
+
+T = TypeVar('T')
+
+
+def propagate_context(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Wrap a callable so it runs with the caller's logging context and dry-run mode.
+
+    The state is captured when propagate_context() is called (on the submitting
+    thread) and applied when the wrapper runs (on the worker thread). Each call of
+    the wrapper runs in its own copy of the captured contextvars, so concurrent
+    workers never share or leak context.
+
+    Args:
+        func: Callable to run on a worker thread
+
+    Returns:
+        Wrapped callable with the same signature
+    """
+    context = contextvars.copy_context()
+    logging_context = get_logging_context()
+    dry_run = is_dry_run()
+
+    def _apply_and_call(*args: Any, **kwargs: Any) -> T:
+        set_dry_run(dry_run)
+        # Pool threads are reused: drop whatever a previous task left behind
+        clear_context()
+        if logging_context:
+            set_account_context(**logging_context)
+        return func(*args, **kwargs)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        return context.copy().run(_apply_and_call, *args, **kwargs)
+
+    return wrapper
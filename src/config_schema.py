@@ -31,6 +31,8 @@ def get_v4_config_schema() -> SchemaDefinition:
     - Each top-level key represents a configuration section (e.g., 'imap', 'paths')
     - Each section contains field definitions with validation rules
     - Field definitions include: type, required, default, constraints
+    - 'required_when' limits 'required' to configs where another field (by
+      dotted path, falling back to its schema default) has one of the listed values
     
     Returns:
         Dictionary containing the complete schema definition
@@ -39,10 +41,12 @@ def get_v4_config_schema() -> SchemaDefinition:
         {
             'section_name': {
                 'required': bool,
+                'required_when': {'section.field': [values]} (optional),
                 'fields': {
                     'field_name': {
                         'type': type or tuple of types,
                         'required': bool,
+                        'required_when': {'section.field': [values]} (optional),
                         'default': default_value (optional),
                         'constraints': {
                             'min': min_value (optional),
@@ -59,10 +63,12 @@ def get_v4_config_schema() -> SchemaDefinition:
     return {
         'imap': {
             'required': True,
+            'required_when': {'source.type': ['imap']},  # Local sources need no IMAP account
             'fields': {
                 'server': {
                     'type': str,
                     'required': True,
+                    'required_when': {'source.type': ['imap']},
                     'constraints': {
                         'min_length': 1
                     }
@@ -79,6 +85,7 @@ def get_v4_config_schema() -> SchemaDefinition:
                 'username': {
                     'type': str,
                     'required': True,
+                    'required_when': {'source.type': ['imap']},
                     'constraints': {
                         'min_length': 1
                     }
@@ -115,6 +122,115 @@ def get_v4_config_schema() -> SchemaDefinition:
                         'item_type': str,
                         'min_length': 1  # At least one flag required
                     }
+                },
+                'fetch_batch_size': {
+                    'type': int,
+                    'required': False,
+                    'default': 50,
+                    'constraints': {
+                        'min': 1,
+                        'max': 1000
+                    }
+                },
+                'max_text_part_bytes': {
+                    'type': int,
+                    'required': False,
+                    'default': 1048576,
+                    'constraints': {
+                        'min': 1024
+                    }
+                },
+                'fetch_mode': {
+                    'type': str,
+                    'required': False,
+                    'default': 'full',
+                    'constraints': {
+                        'enum': ['full', 'text_parts']
+                    }
+                },
+                'flag_batch_size': {
+                    'type': int,
+                    'required': False,
+                    'default': 100,
+                    'constraints': {
+                        'min': 1,
+                        'max': 1000
+                    }
+                },
+                'flag_flush_seconds': {
+                    'type': int,
+                    'required': False,
+                    'default': 30,
+                    'constraints': {
+                        'min': 0,
+                        'max': 3600
+                    }
+                },
+                'sync_state_enabled': {
+                    'type': bool,
+                    'required': False,
+                    'default': True,
+                    'constraints': {}
+                },
+                'max_failed_attempts': {
+                    'type': int,
+                    'required': False,
+                    'default': 3,
+                    'constraints': {
+                        'min': 1
+                    }
+                },
+                'idle_refresh_seconds': {
+                    'type': int,
+                    'required': False,
+                    'default': 1500,
+                    'constraints': {
+                        'min': 60,
+                        'max': 1740
+                    }
+                },
+                'poll_interval_seconds': {
+                    'type': int,
+                    'required': False,
+                    'default': 10,
+                    'constraints': {
+                        'min': 1,
+                        'max': 3600
+                    }
+                },
+                'folders': {
+                    'type': (list, type(None)),
+                    'required': False,
+                    'default': None,  # None = INBOX only
+                    'constraints': {
+                        'item_type': str  # Mailbox names or LIST patterns ('Lists/*')
+                    }
+                },
+                'folder_connections': {
+                    'type': int,
+                    'required': False,
+                    'default': 3,
+                    'constraints': {
+                        'min': 1,
+                        'max': 10
+                    }
+                },
+                'fetch_shards': {
+                    'type': int,
+                    'required': False,
+                    'default': 1,
+                    'constraints': {
+                        'min': 1,
+                        'max': 10
+                    }
+                },
+                'max_server_connections': {
+                    'type': (int, type(None)),
+                    'required': False,
+                    'default': None,  # None = no cap
+                    'constraints': {
+                        'min': 1
+                    }
                 }
             }
         },
@@ -173,6 +289,46 @@ def get_v4_config_schema() -> SchemaDefinition:
                     'required': False,
                     'default': None,
                     'constraints': {}
+                },
+                'blacklist_file': {
+                    'type': str,
+                    'required': False,
+                    'default': 'config/blacklist.yaml',
+                    'constraints': {
+                        'min_length': 1
+                    }
+                },
+                'whitelist_file': {
+                    'type': str,
+                    'required': False,
+                    'default': 'config/whitelist.yaml',
+                    'constraints': {
+                        'min_length': 1
+                    }
+                },
+                'classification_cache_file': {
+                    'type': str,
+                    'required': False,
+                    'default': 'logs/classification_cache.sqlite3',
+                    'constraints': {
+                        'min_length': 1
+                    }
+                },
+                'sync_state_file': {
+                    'type': str,
+                    'required': False,
+                    'default': 'logs/sync_state.sqlite3',
+                    'constraints': {
+                        'min_length': 1
+                    }
+                },
+                'token_stats_file': {
+                    'type': str,
+                    'required': False,
+                    'default': 'logs/token_stats.sqlite3',
+                    'constraints': {
+                        'min_length': 1
+                    }
                 }
             }
         },
@@ -194,6 +350,22 @@ def get_v4_config_schema() -> SchemaDefinition:
                     'constraints': {
                         'min_length': 1
                     }
+                },
+                'max_requests_per_second': {
+                    'type': (int, float, type(None)),
+                    'required': False,
+                    'default': None,  # None = no limit
+                    'constraints': {
+                        'min': 0.01
+                    }
+                },
+                'max_tokens_per_minute': {
+                    'type': (int, type(None)),
+                    'required': False,
+                    'default': None,  # None = no limit
+                    'constraints': {
+                        'min': 1
+                    }
                 }
             }
         },
@@ -231,6 +403,55 @@ def get_v4_config_schema() -> SchemaDefinition:
                     'constraints': {
                         'min': 1
                     }
+                },
+                'max_concurrency': {
+                    'type': int,
+                    'required': False,
+                    'default': 1,
+                    'constraints': {
+                        'min': 1,
+                        'max': 32
+                    }
+                },
+                'batch_size': {
+                    'type': int,
+                    'required': False,
+                    'default': 1,  # 1 = one email per request
+                    'constraints': {
+                        'min': 1,
+                        'max': 50
+                    }
+                },
+                'batch_max_tokens': {
+                    'type': int,
+                    'required': False,
+                    'default': 8000,
+                    'constraints': {
+                        'min': 500
+                    }
+                },
+                'cache_enabled': {
+                    'type': bool,
+                    'required': False,
+                    'default': False,
+                    'constraints': {}
+                },
+                'cache_ttl_days': {
+                    'type': int,
+                    'required': False,
+                    'default': 30,
+                    'constraints': {
+                        'min': 0,
+                        'max': 3650
+                    }
+                },
+                'cache_max_entries': {
+                    'type': int,
+                    'required': False,
+                    'default': 100000,
+                    'constraints': {
+                        'min': 1
+                    }
                 }
             }
         },
@@ -268,6 +489,12 @@ def get_v4_config_schema() -> SchemaDefinition:
                     'constraints': {
                         'min': 1
                     }
+                },
+                'combined_mode': {
+                    'type': bool,
+                    'required': False,
+                    'default': False,
+                    'constraints': {}
                 }
             }
         },
@@ -315,6 +542,16 @@ def get_v4_config_schema() -> SchemaDefinition:
                     'constraints': {
                         'item_type': str  # If list, items must be strings
                     }
+                },
+                'header_prefilter': {
+                    'type': bool,
+                    'required': False,
+                    'default': True
+                },
+                'server_side_blacklist': {
+                    'type': bool,
+                    'required': False,
+                    'default': True
                 }
             }
         },
@@ -354,6 +591,35 @@ def get_v4_config_schema() -> SchemaDefinition:
                     }
                 }
             }
+        },
+        'source': {
+            'required': False,  # Optional - defaults to the IMAP server in the imap section
+            'fields': {
+                'type': {
+                    'type': str,
+                    'required': False,
+                    'default': 'imap',
+                    'constraints': {
+                        'enum': ['imap', 'maildir', 'mbox', 'eml']
+                    }
+                },
+                'path': {
+                    'type': (str, type(None)),
+                    'required': False,  # Required for maildir, mbox and eml
+                    'default': None,
+                    'constraints': {
+                        'min_length': 1
+                    }
+                },
+                'state_file': {
+                    'type': str,
+                    'required': False,
+                    'default': 'logs/local_mailbox.sqlite3',
+                    'constraints': {
+                        'min_length': 1
+                    }
+                }
+            }
         }
     }
 
@@ -399,6 +665,9 @@ def validate_schema_structure(schema: SchemaDefinition) -> bool:
         if not isinstance(section_def['required'], bool):
             raise ValueError(f"Section '{section_name}' 'required' must be a boolean")
         
+        if not isinstance(section_def.get('required_when', {}), dict):
+            raise ValueError(f"Section '{section_name}' 'required_when' must be a dictionary")
+        
         if not isinstance(section_def['fields'], dict):
             raise ValueError(f"Section '{section_name}' 'fields' must be a dictionary")
         
@@ -428,6 +697,11 @@ def validate_schema_structure(schema: SchemaDefinition) -> bool:
                     f"Field '{section_name}.{field_name}' 'required' must be a boolean"
                 )
             
+            if not isinstance(field_def.get('required_when', {}), dict):
+                raise ValueError(
+                    f"Field '{section_name}.{field_name}' 'required_when' must be a dictionary"
+                )
+            
             # Validate constraints if present
             if 'constraints' in field_def:
                 if not isinstance(field_def['constraints'], dict):
@@ -120,7 +120,7 @@ class ConfigSchemaValidator:
             section_config = config.get(section_name)
             
             # Check if required section is missing
-            if section_def.get('required', False) and section_config is None:
+            if self._is_required(section_def, config) and section_config is None:
                 result.errors.append(ValidationIssue(
                     path=section_path,
                     error_code='MISSING_REQUIRED_SECTION',
@@ -151,7 +151,7 @@ class ConfigSchemaValidator:
                 field_value = section_config.get(field_name)
                 
                 # Check if required field is missing
-                if field_def.get('required', False) and field_value is None:
+                if self._is_required(field_def, config) and field_value is None:
                     result.errors.append(ValidationIssue(
                         path=field_path,
                         error_code='MISSING_REQUIRED_FIELD',
@@ -227,6 +227,34 @@ class ConfigSchemaValidator:
         
         return result
     
+    def _is_required(self, definition: Dict[str, Any], config: Dict[str, Any]) -> bool:
+        """
+        Check whether a section or field is required for this configuration.
+        
+        A definition with 'required_when' (e.g. {'source.type': ['imap']}) is only
+        required if every referenced value is one of the listed values; a value
+        missing from the config falls back to its schema default.
+        
+        Args:
+            definition: Section or field definition from the schema
+            config: Configuration dictionary being validated
+            
+        Returns:
+            True if the section or field must be present
+        """
+        if not definition.get('required', False):
+            return False
+        for path, allowed_values in definition.get('required_when', {}).items():
+            section_name, field_name = path.split('.', 1)
+            section_config = config.get(section_name)
+            value = section_config.get(field_name) if isinstance(section_config, dict) else None
+            if value is None:
+                field_def = self.schema.get(section_name, {}).get('fields', {}).get(field_name, {})
+                value = field_def.get('default')
+            if value not in allowed_values:
+                return False
+        return True
+    
     def _validate_type(
         self, 
         path: str, 
@@ -13,6 +13,7 @@ import time
 import re
 from typing import Dict, Any, Optional, List
 from src.openrouter_client import OpenRouterClient, OpenRouterAPIError
+from src.token_usage import TokenUsage
 
 logger = logging.getLogger(__name__)
 
@@ -149,8 +150,10 @@ def call_llm_for_summarization(
                 break  # Don't retry non-retryable errors
             
             if is_retryable and attempt < max_retries:
-                # Exponential backoff: 1s, 2s, 4s
+                # Exponential backoff: 1s, 2s, 4s (or the server's Retry-After)
                 sleep_time = 2 ** (attempt - 1)
+                if getattr(e, 'retry_after', None) is not None:
+                    sleep_time = e.retry_after
                 logger.info(f"Retrying in {sleep_time}s...")
                 time.sleep(sleep_time)
             else:
@@ -265,6 +268,7 @@ def generate_email_summary(
             - success: bool - Whether summary was generated successfully
             - summary: str - Raw summary text from LLM (inserted directly, no parsing)
             - error: Optional[str] - Error message if failed
+            - usage: Dict[str, int] - Tokens reported by the API (only if the call succeeded)
             - action_items: List[str] - (Deprecated, always empty) Kept for backward compatibility
             - priority: str - (Deprecated, always 'medium') Kept for backward compatibility
     
@@ -389,6 +393,7 @@ def generate_email_summary(
         
         # Add metadata
         parsed_result['api_latency'] = api_latency
+        parsed_result['usage'] = TokenUsage.from_api_response(raw_response).to_dict()
         parsed_result['error'] = None
         
         return parsed_result
@@ -0,0 +1,88 @@
+"""
+Shared HTTP session for LLM API calls.
+
+Every requests.post() call opens a new TCP+TLS connection to the API host. This
+module keeps a single keep-alive requests.Session per process whose connection
+pool is shared by LLMClient and OpenRouterClient, across emails and across the
+accounts processed by MasterOrchestrator.
+
+The pool grows to the largest size any client asks for (e.g. the configured
+classification.max_concurrency), so concurrent classification never has to open
+throw-away connections because the pool is full.
+
+Usage:
+    >>> from src.http_session import get_shared_session
+    >>>
+    >>> session = get_shared_session(pool_size=8)
+    >>> response = session.post(url, json=payload, headers=headers, timeout=60)
+"""
+import logging
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Default connection pool size (same as requests' own default)
+DEFAULT_POOL_SIZE = 10
+
+_lock = threading.Lock()
+_shared_session: Optional[requests.Session] = None
+_shared_pool_size = 0
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Create a requests.Session whose connection pool holds pool_size connections per host.
+
+    Args:
+        pool_size: Maximum number of kept-alive connections per host
+
+    Returns:
+        New requests.Session
+    """
+    session = requests.Session()
+    _mount_adapters(session, pool_size)
+    return session
+
+
+def _mount_adapters(session: requests.Session, pool_size: int) -> None:
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def get_shared_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Return the process-wide session, creating it or enlarging its pool if needed.
+
+    Args:
+        pool_size: Minimum pool size the caller needs (e.g. its max concurrency)
+
+    Returns:
+        Shared requests.Session
+    """
+    global _shared_session, _shared_pool_size
+    pool_size = max(pool_size, DEFAULT_POOL_SIZE)
+    with _lock:
+        if _shared_session is None:
+            _shared_session = create_session(pool_size)
+            _shared_pool_size = pool_size
+            logger.debug(f"Created shared HTTP session (pool size {pool_size})")
+        elif pool_size > _shared_pool_size:
+            _mount_adapters(_shared_session, pool_size)
+            _shared_pool_size = pool_size
+            logger.debug(f"Enlarged shared HTTP session pool to {pool_size}")
+        return _shared_session
+
+
+def close_shared_session() -> None:
+    """Close the shared session and its pooled connections (a new one is created on next use)."""
+    global _shared_session, _shared_pool_size
+    with _lock:
+        if _shared_session is not None:
+            _shared_session.close()
+        _shared_session = None
+        _shared_pool_size = 0
@@ -0,0 +1,340 @@
+"""
+BODYSTRUCTURE parsing and partial text-part fetching support.
+
+A full RFC822 fetch downloads every attachment of a message, although only its
+text/plain and text/html parts are used. With imap.fetch_mode 'text_parts', the
+client first fetches BODYSTRUCTURE (plus the header block), picks the body parts
+that the RFC822 parser would have used, and then fetches only those sections with
+BODY.PEEK[<section>]<0.N>. This module contains the protocol-level pieces:
+
+- parse_fetch_response(): parse imaplib's UID FETCH data (including literals)
+- find_text_parts(): locate the first non-attachment text/plain and text/html parts
+- text_part_fetch_item(): build the BODY.PEEK item, capped at a byte budget derived
+  from processing.max_body_chars
+- decode_text_part(): undo the transfer encoding and charset locally (also for
+  truncated base64/quoted-printable data)
+
+Usage:
+    >>> items = parse_fetch_response(data)[0]
+    >>> parts = find_text_parts(items['BODYSTRUCTURE'])
+    >>> parts['plain'].section
+    '1.1'
+"""
+import base64
+import binascii
+import logging
+import quopri
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Encoded bytes fetched per requested character. UTF-8 needs up to 4 bytes per
+# character; HTML parts also carry markup that is stripped before truncation.
+PLAIN_BYTES_PER_CHAR = 4
+HTML_BYTES_PER_CHAR = 16
+
+# Size growth of the content transfer encodings (base64 incl. line breaks, QP worst case)
+_ENCODING_OVERHEAD = {
+    'base64': 1.4,
+    'quoted-printable': 3.0,
+}
+
+# Origin suffix of a partial FETCH response item, e.g. BODY[1.2]<0>
+_ORIGIN_RE = re.compile(r'<\d+>$')
+
+# Incomplete quoted-printable escape left at the end of a truncated part
+_QP_PARTIAL_ESCAPE_RE = re.compile(rb'=[0-9A-Fa-f]?$')
+
+
+class BodyStructureError(ValueError):
+    """Raised when a FETCH response or BODYSTRUCTURE cannot be parsed."""
+    pass
+
+
+@dataclass
+class TextPart:
+    """A text/plain or text/html body part located in a BODYSTRUCTURE."""
+    section: str
+    subtype: str
+    charset: Optional[str]
+    encoding: str
+    size: int
+
+
+def _flatten_fetch_data(data: List[Any]) -> bytes:
+    """Join imaplib FETCH data into one response text, re-inlining literals."""
+    chunks = []
+    for item in data or []:
+        if isinstance(item, tuple) and len(item) >= 2:
+            chunks.append(item[0] or b'')
+            chunks.append(b'\r\n')
+            chunks.append(item[1] or b'')
+        elif isinstance(item, bytes):
+            chunks.append(item)
+    return b''.join(chunks)
+
+
+def _skip_space(buf: bytes, pos: int) -> int:
+    while pos < len(buf) and buf[pos] in b' \r\n\t':
+        pos += 1
+    return pos
+
+
+def _parse_value(buf: bytes, pos: int) -> Tuple[Any, int]:
+    """
+    Parse one value starting at pos.
+
+    Returns (value, new_pos). Lists become Python lists, quoted strings and
+    literals bytes, NIL None and all other atoms str.
+    """
+    pos = _skip_space(buf, pos)
+    if pos >= len(buf):
+        raise BodyStructureError("Unexpected end of FETCH response")
+
+    char = buf[pos:pos + 1]
+    if char == b'(':
+        values = []
+        pos += 1
+        while True:
+            pos = _skip_space(buf, pos)
+            if pos >= len(buf):
+                raise BodyStructureError("Unterminated list in FETCH response")
+            if buf[pos:pos + 1] == b')':
+                return values, pos + 1
+            value, pos = _parse_value(buf, pos)
+            values.append(value)
+
+    if char == b'"':
+        out = bytearray()
+        pos += 1
+        while pos < len(buf):
+            current = buf[pos:pos + 1]
+            if current == b'\\' and pos + 1 < len(buf):
+                out += buf[pos + 1:pos + 2]
+                pos += 2
+            elif current == b'"':
+                return bytes(out), pos + 1
+            else:
+                out += current
+                pos += 1
+        raise BodyStructureError("Unterminated quoted string in FETCH response")
+
+    if char == b'{':
+        end = buf.find(b'}', pos)
+        if end < 0:
+            raise BodyStructureError("Malformed literal in FETCH response")
+        length = int(buf[pos + 1:end])
+        start = end + 1
+        if buf[start:start + 2] == b'\r\n':
+            start += 2
+        return buf[start:start + length], start + length
+
+    # Atom; section specifiers like BODY[HEADER.FIELDS (FROM)] may contain spaces
+    start = pos
+    depth = 0
+    while pos < len(buf):
+        current = buf[pos:pos + 1]
+        if current == b'[':
+            depth += 1
+        elif current == b']':
+            depth -= 1
+        elif depth <= 0 and (current in b' ()\r\n' or current == b'"'):
+            break
+        pos += 1
+    atom = buf[start:pos].decode('ascii', errors='replace')
+    if atom.upper() == 'NIL':
+        return None, pos
+    return atom, pos
+
+
+def parse_fetch_response(data: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Parse a (UID) FETCH response into one item dictionary per message.
+
+    Item names are upper-cased and partial origins are removed, so 'BODY[1.2]<0>'
+    is returned as 'BODY[1.2]'.
+
+    Args:
+        data: Data list returned by imaplib's uid('FETCH', ...)
+
+    Returns:
+        List of {item_name: value} dictionaries, in response order
+
+    Raises:
+        BodyStructureError: If the response is malformed
+    """
+    buf = _flatten_fetch_data(data)
+    messages = []
+    pos = _skip_space(buf, 0)
+    while pos < len(buf):
+        _, pos = _parse_value(buf, pos)  # Message sequence number
+        items, pos = _parse_value(buf, pos)
+        if not isinstance(items, list):
+            raise BodyStructureError(f"Expected FETCH item list, got {items!r}")
+        message = {}
+        for index in range(0, len(items) - 1, 2):
+            name = str(items[index]).upper()
+            message[_ORIGIN_RE.sub('', name)] = items[index + 1]
+        messages.append(message)
+        pos = _skip_space(buf, pos)
+    return messages
+
+
+def _text(value: Any) -> str:
+    """Return a BODYSTRUCTURE string field as lower-case text ('' for NIL)."""
+    if value is None:
+        return ''
+    if isinstance(value, bytes):
+        return value.decode('ascii', errors='replace').lower()
+    return str(value).lower()
+
+
+def _params(value: Any) -> Dict[str, str]:
+    """Turn a BODYSTRUCTURE parameter list into a dictionary."""
+    if not isinstance(value, list):
+        return {}
+    params = {}
+    for index in range(0, len(value) - 1, 2):
+        raw_value = value[index + 1]
+        if isinstance(raw_value, bytes):
+            raw_value = raw_value.decode('utf-8', errors='replace')
+        params[_text(value[index])] = raw_value
+    return params
+
+
+def _is_attachment(disposition: Any) -> bool:
+    return isinstance(disposition, list) and bool(disposition) and _text(disposition[0]) == 'attachment'
+
+
+def find_text_parts(bodystructure: Any) -> Dict[str, TextPart]:
+    """
+    Locate the body parts used for the email text.
+
+    Returns the first text/plain and text/html parts that are not attachments
+    (Content-Disposition: attachment). Encapsulated messages (message/rfc822)
+    are not searched.
+
+    Args:
+        bodystructure: Parsed BODYSTRUCTURE value (see parse_fetch_response)
+
+    Returns:
+        Dictionary with optional 'plain' and 'html' TextPart entries
+
+    Raises:
+        BodyStructureError: If the structure is malformed
+    """
+    if not isinstance(bodystructure, list) or not bodystructure:
+        raise BodyStructureError(f"Invalid BODYSTRUCTURE: {bodystructure!r}")
+
+    found: Dict[str, TextPart] = {}
+
+    def walk(node: List[Any], section: str) -> None:
+        if isinstance(node[0], list):
+            children = []
+            for value in node:
+                if not isinstance(value, list):
+                    break
+                children.append(value)
+            # Multipart extension data: subtype, parameters, disposition, ...
+            extension = node[len(children):]
+            if len(extension) > 2 and _is_attachment(extension[2]):
+                return
+            for index, child in enumerate(children, 1):
+                if child:
+                    walk(child, f"{section}.{index}" if section else str(index))
+            return
+
+        if len(node) < 7:
+            raise BodyStructureError(f"Invalid body part in BODYSTRUCTURE: {node!r}")
+        if _text(node[0]) != 'text':
+            return
+        subtype = _text(node[1])
+        key = {'plain': 'plain', 'html': 'html'}.get(subtype)
+        if key is None or key in found:
+            return
+        if len(node) > 9 and _is_attachment(node[9]):
+            return
+        try:
+            size = int(node[6])
+        except (TypeError, ValueError):
+            raise BodyStructureError(f"Invalid body part size in BODYSTRUCTURE: {node!r}")
+        found[key] = TextPart(
+            section=section or '1',
+            subtype=subtype,
+            charset=_params(node[2]).get('charset'),
+            encoding=_text(node[5]) or '7bit',
+            size=size
+        )
+
+    walk(bodystructure, '')
+    return found
+
+
+def text_part_byte_budget(part: TextPart, max_chars: int) -> int:
+    """Return the number of encoded bytes needed for max_chars characters of a part."""
+    per_char = HTML_BYTES_PER_CHAR if part.subtype == 'html' else PLAIN_BYTES_PER_CHAR
+    return int(max_chars * per_char * _ENCODING_OVERHEAD.get(part.encoding, 1.0))
+
+
+def text_part_fetch_item(part: TextPart, max_chars: Optional[int]) -> str:
+    """
+    Build the FETCH item for a text part.
+
+    The part is fetched completely if it fits into the byte budget for max_chars,
+    otherwise only its first bytes are requested with a <0.N> partial range.
+
+    Example:
+        >>> text_part_fetch_item(TextPart('1.1', 'plain', 'utf-8', '7bit', 900000), 4000)
+        'BODY.PEEK[1.1]<0.16000>'
+    """
+    if max_chars:
+        budget = text_part_byte_budget(part, max_chars)
+        if part.size > budget:
+            return f"BODY.PEEK[{part.section}]<0.{budget}>"
+    return f"BODY.PEEK[{part.section}]"
+
+
+def decode_text_part(data: Optional[bytes], part: TextPart, truncated: bool = False) -> str:
+    """
+    Decode the transfer encoding and charset of a fetched text part.
+
+    Args:
+        data: Raw section bytes as returned by the server (None for NIL)
+        part: TextPart describing the section
+        truncated: True if data is a partial range; incomplete base64 quanta,
+                   quoted-printable escapes and characters at the end are dropped
+
+    Returns:
+        Decoded text
+    """
+    if not data:
+        return ''
+
+    if part.encoding == 'base64':
+        encoded = re.sub(rb'\s+', b'', data)
+        if truncated:
+            encoded = encoded[:len(encoded) // 4 * 4]
+        try:
+            payload = base64.b64decode(encoded)
+        except (binascii.Error, ValueError) as e:
+            logger.warning(f"Invalid base64 in body part {part.section}: {e}")
+            payload = data
+    elif part.encoding == 'quoted-printable':
+        if truncated:
+            data = _QP_PARTIAL_ESCAPE_RE.sub(b'', data)
+        payload = quopri.decodestring(data)
+    else:
+        payload = data
+
+    try:
+        text = payload.decode(part.charset or 'utf-8', errors='replace')
+    except LookupError:
+        logger.warning(f"Unknown charset {part.charset!r} in body part {part.section}, using utf-8")
+        text = payload.decode('utf-8', errors='replace')
+
+    if truncated:
+        # A multi-byte character cut by the byte range decodes as U+FFFD
+        text = text.rstrip('\ufffd')
+    return text
@@ -7,11 +7,27 @@ Configuration is provided via account-specific configuration dictionaries or fac
 import imaplib
 import logging
 import email
+import re
+import select
+import ssl
+import threading
+import time
+import zlib
 from email.header import decode_header
-from typing import List, Dict, Any, Optional
+from email.message import Message
+from email.parser import BytesFeedParser, BytesHeaderParser
+from email.policy import compat32
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, FrozenSet
 from contextlib import contextmanager
 
 from src.config import ConfigError
+from src.imap_bodystructure import (
+    BodyStructureError,
+    decode_text_part,
+    find_text_parts,
+    parse_fetch_response,
+    text_part_fetch_item
+)
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +47,426 @@ class IMAPFetchError(IMAPClientError):
     pass
 
 
+class IMAPConnectionLimitError(IMAPConnectionError):
+    """Raised when no connection slot for a server is free (imap.max_server_connections)."""
+    pass
+
+
+# Matches the UID data item in a FETCH response envelope, e.g. b'3 (UID 1204 RFC822 {5120}'
+_FETCH_UID_RE = re.compile(rb'UID (\d+)')
+
+# Matches the ALL / COUNT result items of an ESEARCH response (RFC 4731)
+_ESEARCH_ALL_RE = re.compile(r'\bALL\s+([\d:,]+)', re.IGNORECASE)
+_ESEARCH_COUNT_RE = re.compile(r'\bCOUNT\s+(\d+)', re.IGNORECASE)
+
+# Matches the FLAGS data item of a FETCH response, e.g. 'FLAGS (\\Seen AIProcessed)'
+_FETCH_FLAGS_RE = re.compile(r'FLAGS\s+\(([^)]*)\)')
+
+# Matches the RFC822.SIZE data item of a FETCH response, e.g. '5 (UID 1204 RFC822.SIZE 48211)'
+_FETCH_SIZE_RE = re.compile(r'RFC822\.SIZE\s+(\d+)', re.IGNORECASE)
+
+# SELECT response codes recorded as mailbox status (see get_mailbox_status)
+_MAILBOX_STATUS_CODES = {
+    'uidvalidity': 'UIDVALIDITY',
+    'uidnext': 'UIDNEXT',
+    'highest_modseq': 'HIGHESTMODSEQ'
+}
+
+# Matches a LIST response line, e.g. b'(\\HasNoChildren) "/" "Lists/python"'
+_LIST_RE = re.compile(rb'^\((?P<flags>[^)]*)\)\s+(?:NIL|"(?:[^"\\]|\\.)*")\s+(?P<name>.*)$')
+
+# Matches the UIDNEXT item of a STATUS response, e.g. b'"INBOX" (UIDNEXT 4392)'
+_STATUS_UIDNEXT_RE = re.compile(rb'UIDNEXT\s+(\d+)', re.IGNORECASE)
+
+# Multi-folder UIDs are folder_number * FOLDER_UID_STRIDE + UID (IMAP UIDs are 32-bit)
+FOLDER_UID_STRIDE = 2 ** 32
+
+# Seconds connect() waits for a free slot under imap.max_server_connections
+CONNECTION_SLOT_TIMEOUT = 300.0
+
+# Matches an untagged EXISTS response (new message count), e.g. b'* 24 EXISTS'
+_EXISTS_RE = re.compile(rb'^\* \d+ EXISTS', re.IGNORECASE)
+
+# Longest single wait inside IDLE, so a stop request is noticed quickly
+IDLE_WAKEUP_SECONDS = 1.0
+
+# Header fields fetched by the header-only pass (enough for blacklist evaluation)
+HEADER_FIELDS = 'FROM SUBJECT DATE TO CC MESSAGE-ID'
+
+# Processed flags are stored once this many UIDs are pending (imap.flag_batch_size)
+DEFAULT_FLAG_BATCH_SIZE = 100
+
+# ...or once the oldest pending UID has waited this long (imap.flag_flush_seconds)
+DEFAULT_FLAG_FLUSH_SECONDS = 30
+
+# Bytes of each text part kept by the streaming parser (imap.max_text_part_bytes)
+DEFAULT_MAX_TEXT_PART_BYTES = 1024 * 1024
+
+# Size of the slices of a raw message fed to the streaming parser
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Longest incomplete line buffered while a part body is being discarded
+# (MIME boundary lines are at most 76 characters)
+_MAX_DISCARDED_LINE = 8 * 1024
+
+
+def build_uid_set(uids: Iterable[str]) -> str:
+    """
+    Build a compact IMAP UID set from a list of UIDs.
+    
+    Consecutive UIDs are collapsed into ranges, e.g. ['1', '2', '3', '7'] -> '1:3,7'.
+    Order is normalized (ascending) and duplicates are removed.
+    
+    Args:
+        uids: UIDs as strings (or ints)
+        
+    Returns:
+        UID set string suitable for UID FETCH/STORE commands ('' for no UIDs)
+    """
+    numbers = sorted({int(uid) for uid in uids})
+    if not numbers:
+        return ''
+    
+    ranges = []
+    start = prev = numbers[0]
+    for number in numbers[1:]:
+        if number == prev + 1:
+            prev = number
+            continue
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+        start = prev = number
+    ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ','.join(ranges)
+
+
+def parse_uid_set(uid_set: str) -> List[str]:
+    """
+    Expand an IMAP UID set into individual UIDs (inverse of build_uid_set).
+    
+    Used for ESEARCH (RFC 4731) results, which return matches as a compact set,
+    e.g. '2,10:12' -> ['2', '10', '11', '12']. Reversed ranges ('12:10') are
+    accepted as the RFC allows either order.
+    
+    Args:
+        uid_set: UID set string (without '*')
+        
+    Returns:
+        UIDs as strings in ascending order per range
+    """
+    uids = []
+    for part in uid_set.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if ':' in part:
+            low, high = sorted(int(value) for value in part.split(':', 1))
+            uids.extend(str(uid) for uid in range(low, high + 1))
+        else:
+            uids.append(str(int(part)))
+    return uids
+
+
+def parse_fetch_literals(data: List[Any]) -> List[Tuple[str, bytes]]:
+    """
+    Extract (uid, literal) pairs from a multi-message UID FETCH response.
+    
+    imaplib returns one tuple per message literal: (envelope, literal_bytes), followed
+    by a closing b')' element. Most servers put the UID item in the envelope, but some
+    send it after the literal (e.g. b' UID 1204)'), so the trailing element is checked too.
+    
+    Args:
+        data: Data list returned by imaplib's uid('FETCH', ...)
+        
+    Returns:
+        List of (uid, literal_bytes) tuples in response order. Messages whose UID
+        cannot be determined are skipped.
+    """
+    results = []
+    for index, item in enumerate(data or []):
+        if not isinstance(item, tuple) or len(item) < 2:
+            continue
+        envelope, literal = item[0], item[1]
+        match = _FETCH_UID_RE.search(envelope or b'')
+        if not match and index + 1 < len(data) and isinstance(data[index + 1], bytes):
+            match = _FETCH_UID_RE.search(data[index + 1])
+        if not match:
+            logger.warning(f"Could not determine UID for FETCH response item: {envelope!r}")
+            continue
+        results.append((match.group(1).decode('ascii'), literal))
+    return results
+
+
+class StreamingMessageParser:
+    """
+    Incremental RFC822 parser that drops attachment payloads as they arrive.
+    
+    Wraps email.parser.BytesFeedParser, but only passes on what the email pipeline
+    uses: all headers (of the message and every part), multipart boundaries, and
+    the bodies of text parts without Content-Disposition: attachment, each up to
+    max_text_part_bytes (whole lines). Bodies of attachments and non-text parts
+    are discarded line by line while they stream, so the resulting message tree
+    never holds them and memory use does not grow with attachment size.
+    
+    Encapsulated messages (message/rfc822) are parsed the same way.
+    
+    Example:
+        >>> parser = StreamingMessageParser(max_text_part_bytes=65536)
+        >>> for start in range(0, len(raw), 65536):
+        ...     parser.feed(raw[start:start + 65536])
+        >>> msg = parser.close()
+    """
+    
+    def __init__(self, max_text_part_bytes: int = DEFAULT_MAX_TEXT_PART_BYTES):
+        """
+        Create a parser for one message.
+        
+        Args:
+            max_text_part_bytes: Maximum number of (encoded) bytes kept per text part
+        """
+        self._parser = BytesFeedParser(policy=compat32)
+        self._max_text_part_bytes = max_text_part_bytes
+        self._boundaries: List[bytes] = []
+        self._in_headers = True
+        self._header_lines: List[bytes] = []
+        self._keep_body = True
+        self._body_bytes = 0
+        self._partial = b''
+        self._skipping_line = False
+        self.discarded_bytes = 0
+    
+    def feed(self, data: bytes) -> None:
+        """Feed the next chunk of raw message bytes."""
+        start = 0
+        while True:
+            end = data.find(b'\n', start)
+            if end < 0:
+                rest = data[start:]
+                if self._skipping_line:
+                    self.discarded_bytes += len(rest)
+                else:
+                    self._partial += rest
+                    if len(self._partial) > _MAX_DISCARDED_LINE and self._discarding_body():
+                        # Too long to be a boundary line: drop it up to its end
+                        self.discarded_bytes += len(self._partial)
+                        self._partial = b''
+                        self._skipping_line = True
+                return
+            
+            line = data[start:end + 1]
+            start = end + 1
+            if self._skipping_line:
+                self._skipping_line = False
+                self.discarded_bytes += len(line)
+                continue
+            if self._partial:
+                line = self._partial + line
+                self._partial = b''
+            self._process_line(line)
+    
+    def close(self) -> Message:
+        """Finish parsing and return the message tree."""
+        if self._partial:
+            self._process_line(self._partial)
+            self._partial = b''
+        return self._parser.close()
+    
+    def _discarding_body(self) -> bool:
+        """Return True if lines of the current part body are being dropped."""
+        if self._in_headers:
+            return False
+        return not self._keep_body or self._body_bytes >= self._max_text_part_bytes
+    
+    def _match_boundary(self, line: bytes) -> Optional[Tuple[int, bool]]:
+        """Return (boundary stack index, is_closing) if line is an active boundary line."""
+        if not line.startswith(b'--') or not self._boundaries:
+            return None
+        stripped = line.rstrip(b'\r\n').rstrip(b' \t')
+        for index in range(len(self._boundaries) - 1, -1, -1):
+            delimiter = b'--' + self._boundaries[index]
+            if stripped == delimiter:
+                return index, False
+            if stripped == delimiter + b'--':
+                return index, True
+        return None
+    
+    def _process_line(self, line: bytes) -> None:
+        if self._in_headers:
+            self._header_lines.append(line)
+            self._parser.feed(line)
+            if line in (b'\r\n', b'\n'):
+                self._start_body()
+            return
+        
+        boundary = self._match_boundary(line)
+        if boundary is not None:
+            index, closing = boundary
+            # A boundary of an outer multipart also ends every nested one
+            del self._boundaries[index + 1:]
+            if closing:
+                self._boundaries.pop()
+                self._keep_body = True
+                self._body_bytes = 0
+            else:
+                self._in_headers = True
+            self._parser.feed(line)
+            return
+        
+        if self._discarding_body():
+            self.discarded_bytes += len(line)
+            return
+        self._body_bytes += len(line)
+        self._parser.feed(line)
+    
+    def _start_body(self) -> None:
+        """Decide from the part headers just read whether its body is kept."""
+        headers = BytesHeaderParser(policy=compat32).parsebytes(b''.join(self._header_lines))
+        self._header_lines = []
+        self._in_headers = False
+        self._body_bytes = 0
+        
+        maintype = headers.get_content_maintype()
+        if maintype == 'multipart':
+            boundary = headers.get_boundary()
+            if boundary:
+                self._boundaries.append(boundary.encode('utf-8', errors='surrogateescape'))
+            self._keep_body = True
+        elif maintype == 'message' and headers.get_content_subtype() == 'rfc822':
+            # The body of an encapsulated message starts with its own headers
+            self._in_headers = True
+        else:
+            disposition = str(headers.get('Content-Disposition', '')).lower()
+            self._keep_body = maintype == 'text' and 'attachment' not in disposition
+
+
+def parse_message_streaming(
+    raw_email: bytes,
+    max_text_part_bytes: int = DEFAULT_MAX_TEXT_PART_BYTES
+) -> Message:
+    """
+    Parse raw RFC822 bytes with StreamingMessageParser, in fixed-size chunks.
+    
+    Args:
+        raw_email: Raw message bytes
+        max_text_part_bytes: Maximum number of bytes kept per text part
+        
+    Returns:
+        Message tree with headers and text parts only (attachment payloads empty)
+    """
+    parser = StreamingMessageParser(max_text_part_bytes)
+    for start in range(0, len(raw_email), _STREAM_CHUNK_SIZE):
+        parser.feed(raw_email[start:start + _STREAM_CHUNK_SIZE])
+    return parser.close()
+
+
+class ServerConnectionLimiter:
+    """
+    Process-wide count of open IMAP connections per server, with an optional cap.
+    
+    Connections of all accounts (and of every pooled connection of one account)
+    on the same server:port share the count, so --parallel-accounts and sharded
+    fetching together never open more than imap.max_server_connections.
+    
+    Example:
+        >>> if SERVER_CONNECTIONS.acquire('imap.example.com:993', limit=10, timeout=0):
+        ...     try:
+        ...         ...  # open and use the connection
+        ...     finally:
+        ...         SERVER_CONNECTIONS.release('imap.example.com:993')
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._open: Dict[str, int] = {}
+    
+    def acquire(self, server: str, limit: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Take a connection slot for a server.
+        
+        Args:
+            server: Server key (e.g. 'imap.example.com:993')
+            limit: Maximum open connections for the server (None = unlimited)
+            timeout: Seconds to wait for a free slot (0 = don't wait, None = forever)
+            
+        Returns:
+            True if a slot was taken, False if none became free in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while limit is not None and self._open.get(server, 0) >= limit:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self._open[server] = self._open.get(server, 0) + 1
+            return True
+    
+    def release(self, server: str) -> None:
+        """Return a slot taken with acquire()."""
+        with self._condition:
+            if self._open.get(server, 0) > 0:
+                self._open[server] -= 1
+            self._condition.notify_all()
+    
+    def open_connections(self, server: str) -> int:
+        """Return the number of slots currently taken for a server."""
+        with self._condition:
+            return self._open.get(server, 0)
+
+
+# Shared by all clients of the process
+SERVER_CONNECTIONS = ServerConnectionLimiter()
+
+
+def quote_mailbox(name: str) -> str:
+    """Quote a mailbox name (or LIST pattern) as an IMAP quoted string."""
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def parse_list_response(data: List[Any]) -> List[Tuple[str, FrozenSet[str]]]:
+    """
+    Parse the data of an imaplib list() call.
+    
+    Args:
+        data: LIST responses; names sent as literals arrive as (line, name) tuples
+        
+    Returns:
+        List of (mailbox_name, attributes) tuples; attributes are lower-cased
+        (e.g. frozenset({'\\noselect'}))
+    """
+    mailboxes = []
+    for item in data or []:
+        literal = None
+        if isinstance(item, tuple):
+            item, literal = item[0], item[1]
+        if not isinstance(item, bytes):
+            continue
+        match = _LIST_RE.match(item.strip())
+        if not match:
+            logger.debug(f"Ignoring unparseable LIST response: {item!r}")
+            continue
+        if literal is not None:
+            name = literal
+        else:
+            name = match.group('name').strip()
+            if name.startswith(b'"') and name.endswith(b'"'):
+                name = re.sub(rb'\\(.)', rb'\1', name[1:-1])
+        attributes = frozenset(flag.lower() for flag in match.group('flags').decode('ascii', errors='replace').split())
+        mailboxes.append((name.decode('utf-8', errors='replace'), attributes))
+    return mailboxes
+
+
+def folder_number(mailbox: str) -> int:
+    """
+    Return the stable number of a mailbox used in multi-folder UIDs.
+    
+    INBOX is 0, so INBOX UIDs are unchanged; other mailboxes get a number derived
+    from their name (1 .. 2**31-1), which keeps multi-folder UIDs below 2**63.
+    """
+    if mailbox.upper() == 'INBOX':
+        return 0
+    return zlib.crc32(mailbox.encode('utf-8')) % (2 ** 31 - 1) + 1
+
+
 class ImapClient:
     """
     IMAP client for email retrieval and flag management.
@@ -54,6 +490,13 @@ class ImapClient:
         self._imap: Optional[imaplib.IMAP4] = None
         self._connected = False
         self._processed_tag = processed_tag
+        self._capabilities: Optional[FrozenSet[str]] = None
+        self._mailbox_status: Dict[str, Any] = {}
+        self._idle_count = 0
+        # Set to processing.max_body_chars to fetch only text parts (see get_emails_by_uids)
+        self.text_parts_max_chars: Optional[int] = None
+        # Bytes kept per text part when parsing full messages (see _parse_email_message)
+        self.max_text_part_bytes = DEFAULT_MAX_TEXT_PART_BYTES
     
     def connect(self) -> None:
         """
@@ -81,12 +524,428 @@ class ImapClient:
             finally:
                 self._imap = None
                 self._connected = False
+                self._capabilities = None
+                self._mailbox_status = {}
     
     def _ensure_connected(self) -> None:
         """Ensure IMAP connection is established."""
         if not self._connected or not self._imap:
             raise IMAPConnectionError("Not connected to IMAP server. Call connect() first.")
     
+    def has_capability(self, name: str) -> bool:
+        """
+        Check whether the server advertises a capability (e.g. 'ESEARCH').
+        
+        CAPABILITY is requested once per connection: many servers only list their
+        extensions after authentication, while imaplib keeps the pre-login list.
+        
+        Args:
+            name: Capability name (case-insensitive)
+            
+        Returns:
+            True if advertised, False otherwise (including when CAPABILITY fails)
+            
+        Raises:
+            IMAPConnectionError: If not connected
+        """
+        self._ensure_connected()
+        return name.upper() in self._load_capabilities()
+    
+    def _load_capabilities(self) -> FrozenSet[str]:
+        """Request CAPABILITY once per connection (usable before SELECT)."""
+        if self._capabilities is None:
+            capabilities = frozenset()
+            try:
+                typ, data = self._imap.capability()
+                if typ == 'OK':
+                    line = b' '.join(item for item in data or [] if isinstance(item, bytes))
+                    capabilities = frozenset(line.decode('ascii', errors='replace').upper().split())
+            except Exception as e:
+                logger.debug(f"CAPABILITY command failed: {e}")
+            self._capabilities = capabilities
+        return self._capabilities
+    
+    def _enable_condstore(self) -> bool:
+        """
+        Enable CONDSTORE (RFC 7162) before SELECT if the server supports it.
+        
+        Once enabled, SELECT reports HIGHESTMODSEQ and FETCH accepts CHANGEDSINCE.
+        QRESYNC implies CONDSTORE, so either capability is sufficient.
+        
+        Returns:
+            True if CONDSTORE is enabled, False otherwise (UID ranges are used instead)
+        """
+        capabilities = self._load_capabilities()
+        if 'CONDSTORE' not in capabilities and 'QRESYNC' not in capabilities:
+            return False
+        try:
+            typ, data = self._imap.xatom('ENABLE', 'CONDSTORE')
+        except Exception as e:
+            logger.debug(f"ENABLE CONDSTORE failed: {e}")
+            return False
+        if typ != 'OK':
+            logger.debug(f"ENABLE CONDSTORE rejected: {data}")
+            return False
+        logger.debug("CONDSTORE enabled")
+        return True
+    
+    def _read_mailbox_status(self, mailbox: str) -> None:
+        """
+        Record UIDVALIDITY, UIDNEXT and HIGHESTMODSEQ from the SELECT response codes.
+        
+        imaplib keeps the untagged OK [CODE value] responses of SELECT; codes the
+        server did not send are stored as None. The EXISTS count of SELECT is
+        discarded, so poll() only reports EXISTS responses that arrive later.
+        """
+        status: Dict[str, Any] = {'mailbox': mailbox}
+        for key, code in _MAILBOX_STATUS_CODES.items():
+            value = None
+            try:
+                typ, data = self._imap.response(code)
+                item = data[-1] if data else None
+                if isinstance(item, bytes):
+                    item = item.decode('ascii', errors='replace')
+                if item is not None and str(item).strip().isdigit():
+                    value = int(str(item).strip())
+            except Exception as e:
+                logger.debug(f"Could not read {code} for {mailbox}: {e}")
+            status[key] = value
+        try:
+            self._imap.response('EXISTS')
+        except Exception as e:
+            logger.debug(f"Could not clear EXISTS for {mailbox}: {e}")
+        self._mailbox_status = status
+        logger.debug(f"Mailbox status: {status}")
+    
+    def select_mailbox(self, mailbox: str) -> Dict[str, Any]:
+        """
+        Select a mailbox and record its status.
+        
+        Args:
+            mailbox: Mailbox name as returned by LIST (e.g. 'Lists/python')
+            
+        Returns:
+            Mailbox status (see get_mailbox_status)
+            
+        Raises:
+            IMAPConnectionError: If not connected or the mailbox cannot be selected
+        """
+        self._ensure_connected()
+        typ, data = self._imap.select(quote_mailbox(mailbox))
+        if typ != 'OK':
+            raise IMAPConnectionError(f"Failed to select {mailbox}: {data}")
+        self._read_mailbox_status(mailbox)
+        return self.get_mailbox_status()
+    
+    def list_mailboxes(self, pattern: str = '*') -> List[str]:
+        """
+        List selectable mailboxes matching a LIST pattern ('*' and '%' wildcards).
+        
+        Args:
+            pattern: Mailbox pattern, e.g. 'Lists/*'
+            
+        Returns:
+            Mailbox names in server order (mailboxes flagged \\Noselect are left out)
+            
+        Raises:
+            IMAPFetchError: If the LIST command fails
+        """
+        self._ensure_connected()
+        typ, data = self._imap.list('""', quote_mailbox(pattern))
+        if typ != 'OK':
+            raise IMAPFetchError(f"IMAP LIST {pattern} failed: {data}")
+        return [
+            name for name, attributes in parse_list_response(data)
+            if '\\noselect' not in attributes and '\\nonexistent' not in attributes
+        ]
+    
+    def get_uidnext(self, mailbox: str) -> Optional[int]:
+        """
+        Return the UIDNEXT of a mailbox with STATUS (without selecting it).
+        
+        Raises:
+            IMAPConnectionError: If not connected or STATUS fails
+        """
+        self._ensure_connected()
+        typ, data = self._imap.status(quote_mailbox(mailbox), '(UIDNEXT)')
+        if typ != 'OK':
+            raise IMAPConnectionError(f"IMAP STATUS {mailbox} failed: {data}")
+        for item in data or []:
+            match = _STATUS_UIDNEXT_RE.search(item if isinstance(item, bytes) else b'')
+            if match:
+                return int(match.group(1))
+        return None
+    
+    def get_mailbox_status(self) -> Dict[str, Any]:
+        """
+        Return the status of the selected mailbox as reported by SELECT.
+        
+        Returns:
+            Dictionary with 'mailbox', 'uidvalidity', 'uidnext' and 'highest_modseq'
+            (values are None when the server did not report them; empty dict if no
+            mailbox was selected through connect())
+        """
+        return dict(self._mailbox_status)
+    
+    def fetch_flags_changed_since(self, modseq: int, max_uid: int) -> Dict[str, List[str]]:
+        """
+        Fetch flags of emails changed since a mod-sequence (CONDSTORE CHANGEDSINCE).
+        
+        Only emails up to max_uid whose flags changed after modseq are returned, so
+        the response size depends on the number of changes, not on the mailbox size.
+        
+        Args:
+            modseq: HIGHESTMODSEQ saved by the previous run
+            max_uid: Highest UID to check (newer emails are found by UID search)
+            
+        Returns:
+            Dictionary mapping UID to its flags (without backslashes)
+            
+        Raises:
+            IMAPConnectionError: If not connected
+            IMAPFetchError: If the fetch fails
+        """
+        self._ensure_connected()
+        
+        typ, data = self._imap.uid(
+            'FETCH', f'1:{int(max_uid)}', '(UID FLAGS)', f'(CHANGEDSINCE {int(modseq)})'
+        )
+        if typ != 'OK':
+            raise IMAPFetchError(f"IMAP CHANGEDSINCE fetch failed: {data}")
+        
+        flags_by_uid: Dict[str, List[str]] = {}
+        for item in data or []:
+            if isinstance(item, tuple):
+                item = item[0]
+            if isinstance(item, bytes):
+                item = item.decode('utf-8', errors='replace')
+            if not item:
+                continue
+            uid_match = re.search(r'UID\s+(\d+)', item)
+            if not uid_match or int(uid_match.group(1)) > max_uid:
+                continue
+            flags_match = _FETCH_FLAGS_RE.search(item)
+            flags = flags_match.group(1).split() if flags_match else []
+            flags_by_uid[uid_match.group(1)] = [flag.strip('\\') for flag in flags]
+        
+        logger.debug(f"{len(flags_by_uid)} email(s) changed since MODSEQ {modseq}")
+        return flags_by_uid
+    
+    def search_uids(self, query: str, min_uid: Optional[int] = None) -> List[str]:
+        """
+        Run UID SEARCH and return the matching UIDs.
+        
+        With min_uid, 'UID <min_uid+1>:*' is added to the search criteria so the
+        server only returns emails newer than the last processed one instead of
+        every UID in the mailbox. Results are still checked against min_uid, because
+        'n:*' always matches the highest UID, even when it is below n.
+        
+        If the server advertises ESEARCH (RFC 4731), RETURN (MIN MAX COUNT ALL) is
+        used so matches come back as a compact UID set (e.g. '1:5000') rather than
+        one number per email.
+        
+        Args:
+            query: IMAP search criteria
+            min_uid: Optional UID; only UIDs greater than it are returned
+            
+        Returns:
+            Matching UIDs as strings (ascending)
+            
+        Raises:
+            IMAPConnectionError: If not connected
+            IMAPFetchError: If the search fails
+        """
+        self._ensure_connected()
+        
+        if min_uid is not None:
+            query = f"{query} UID {int(min_uid) + 1}:*"
+        
+        if self.has_capability('ESEARCH'):
+            uids = self._esearch_uids(query)
+        else:
+            typ, data = self._imap.uid('SEARCH', None, query)
+            if typ != 'OK':
+                raise IMAPFetchError(f"IMAP search failed: {data}")
+            uid_bytes = data[0] if data else None
+            if isinstance(uid_bytes, bytes):
+                uid_str = uid_bytes.decode('utf-8')
+            else:
+                uid_str = str(uid_bytes or '')
+            uids = [uid.strip() for uid in uid_str.split() if uid.strip()]
+        
+        if min_uid is not None:
+            uids = [uid for uid in uids if int(uid) > min_uid]
+        return uids
+    
+    def _esearch_uids(self, query: str) -> List[str]:
+        """Run UID SEARCH RETURN (MIN MAX COUNT ALL) and expand the returned UID set."""
+        typ, data = self._imap.uid('SEARCH', 'RETURN (MIN MAX COUNT ALL)', query)
+        if typ != 'OK':
+            raise IMAPFetchError(f"IMAP search failed: {data}")
+        
+        # imaplib files the untagged ESEARCH response separately from SEARCH
+        typ, data = self._imap.response('ESEARCH')
+        text = b' '.join(item for item in data or [] if isinstance(item, bytes))
+        text = text.decode('ascii', errors='replace')
+        
+        all_match = _ESEARCH_ALL_RE.search(text)
+        uids = parse_uid_set(all_match.group(1)) if all_match else []
+        
+        count_match = _ESEARCH_COUNT_RE.search(text)
+        if count_match and int(count_match.group(1)) != len(uids):
+            logger.warning(
+                f"ESEARCH COUNT {count_match.group(1)} does not match {len(uids)} returned UID(s)"
+            )
+        logger.debug(f"ESEARCH returned {len(uids)} UID(s): {text}")
+        return uids
+    
+    def idle(self, timeout: float, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        Wait for new mail with IMAP IDLE (RFC 2177).
+        
+        The server pushes an untagged EXISTS response as soon as a message arrives,
+        so new mail is noticed without polling. IDLE ends on the first EXISTS, after
+        timeout seconds (servers drop idle clients after 30 minutes, so callers
+        should re-IDLE well before that) or when stop_event is set.
+        
+        Args:
+            timeout: Maximum number of seconds to stay in IDLE
+            stop_event: Optional event that ends IDLE early when set
+            
+        Returns:
+            True if the server reported new messages, False otherwise
+            
+        Raises:
+            IMAPConnectionError: If not connected or the connection is lost
+            IMAPFetchError: If the server rejects IDLE
+        """
+        self._ensure_connected()
+        
+        self._idle_count += 1
+        tag = f'IDLE{self._idle_count}'.encode('ascii')
+        self._imap.send(tag + b' IDLE\r\n')
+        line = self._imap.readline()
+        while line.startswith(b'* '):
+            # Untagged responses queued before IDLE started
+            if _EXISTS_RE.match(line):
+                self._finish_idle(tag)
+                return True
+            line = self._imap.readline()
+        if not line.startswith(b'+'):
+            raise IMAPFetchError(f"IMAP IDLE rejected: {line!r}")
+        logger.debug(f"IDLE started (timeout: {timeout:.0f}s)")
+        
+        new_mail = False
+        deadline = time.monotonic() + timeout
+        while not new_mail and not (stop_event is not None and stop_event.is_set()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not self._wait_readable(min(remaining, IDLE_WAKEUP_SECONDS)):
+                continue
+            line = self._imap.readline()
+            if not line or line.startswith(b'* BYE'):
+                raise IMAPConnectionError(f"IMAP connection closed during IDLE: {line!r}")
+            logger.debug(f"IDLE response: {line!r}")
+            new_mail = bool(_EXISTS_RE.match(line))
+        
+        return self._finish_idle(tag) or new_mail
+    
+    def _finish_idle(self, tag: bytes) -> bool:
+        """Send DONE and read up to the tagged IDLE completion; True if EXISTS arrived meanwhile."""
+        self._imap.send(b'DONE\r\n')
+        new_mail = False
+        while True:
+            line = self._imap.readline()
+            if not line:
+                raise IMAPConnectionError("IMAP connection closed while ending IDLE")
+            if line.startswith(tag + b' '):
+                if not line.startswith(tag + b' OK'):
+                    logger.warning(f"IDLE ended with: {line!r}")
+                return new_mail
+            new_mail = new_mail or bool(_EXISTS_RE.match(line))
+    
+    def _wait_readable(self, timeout: float) -> bool:
+        """
+        Wait until a response line can be read without blocking.
+        
+        Data already read from the socket counts as readable: lines buffered by
+        imaplib's reader (e.g. an EXISTS that arrived together with the IDLE
+        continuation) and TLS records decrypted but not yet consumed.
+        """
+        if self._has_buffered_data():
+            return True
+        sock = self._imap.sock
+        if isinstance(sock, ssl.SSLSocket) and sock.pending():
+            return True
+        readable, _, _ = select.select([sock], [], [], timeout)
+        return bool(readable)
+    
+    def _has_buffered_data(self) -> bool:
+        """Return True if imaplib's buffered reader holds unread data (never blocks)."""
+        peek = getattr(getattr(self._imap, 'file', None), 'peek', None)
+        if peek is None:
+            return False
+        sock = self._imap.sock
+        previous_timeout = sock.gettimeout()
+        # peek() only reads the socket when its buffer is empty; non-blocking, that
+        # read fails immediately instead of waiting for the server
+        sock.settimeout(0.0)
+        try:
+            return bool(peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(previous_timeout)
+    
+    def poll(self) -> bool:
+        """
+        Check for new mail with NOOP (fallback for servers without IDLE).
+        
+        Returns:
+            True if the server reported new messages (untagged EXISTS)
+            
+        Raises:
+            IMAPConnectionError: If not connected or NOOP fails
+        """
+        self._ensure_connected()
+        
+        typ, data = self._imap.noop()
+        if typ != 'OK':
+            raise IMAPConnectionError(f"IMAP NOOP failed: {data}")
+        typ, data = self._imap.response('EXISTS')
+        return bool(data and data[0] is not None)
+    
+    def wait_for_new_mail(
+        self,
+        timeout: float,
+        poll_interval: float,
+        stop_event: Optional[threading.Event] = None
+    ) -> bool:
+        """
+        Block until new mail arrives, using IDLE if advertised and NOOP polling otherwise.
+        
+        Args:
+            timeout: Maximum seconds to spend in one IDLE command
+            poll_interval: Seconds between NOOP polls when IDLE is not supported
+            stop_event: Optional event that ends the wait early when set
+            
+        Returns:
+            True if the server reported new messages, False on timeout or stop
+            
+        Raises:
+            IMAPConnectionError: If the connection is lost
+        """
+        if self.has_capability('IDLE'):
+            return self.idle(timeout, stop_event)
+        
+        if stop_event is not None:
+            if stop_event.wait(poll_interval):
+                return False
+        else:
+            time.sleep(poll_interval)
+        return self.poll()
+    
     def __enter__(self):
         """Context manager entry."""
         self.connect()
@@ -125,6 +984,12 @@ class ImapClient:
         """
         self._ensure_connected()
         
+        if self.text_parts_max_chars:
+            emails = self.get_emails_by_uids([uid])
+            if uid not in emails:
+                raise IMAPFetchError(f"Failed to fetch email UID {uid}")
+            return emails[uid]
+        
         try:
             # Use UID FETCH (not FETCH) to maintain UID consistency
             typ, data = self._imap.uid('FETCH', uid, '(RFC822)')
@@ -135,81 +1000,7 @@ class ImapClient:
             if not data or not data[0] or len(data[0]) < 2:
                 raise IMAPFetchError(f"Invalid FETCH response for UID {uid}")
             
-            # Parse email
-            raw_email = data[0][1]
-            msg = email.message_from_bytes(raw_email)
-            
-            # Decode headers
-            subject = self._decode_mime_header(msg.get('Subject', ''))
-            sender = self._decode_mime_header(msg.get('From', ''))
-            to_header = msg.get('To', '')
-            recipients = [addr.strip() for addr in to_header.split(',')] if to_header else []
-            date = self._decode_mime_header(msg.get('Date', ''))
-            
-            # Extract body
-            body = ''
-            html_body = ''
-            
-            if msg.is_multipart():
-                for part in msg.walk():
-                    content_type = part.get_content_type()
-                    content_disposition = str(part.get('Content-Disposition', ''))
-                    
-                    # Skip attachments
-                    if 'attachment' in content_disposition:
-                        continue
-                    
-                    # Extract text/plain
-                    if content_type == 'text/plain':
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            try:
-                                charset = part.get_content_charset() or 'utf-8'
-                                body = payload.decode(charset, errors='replace')
-                            except Exception as e:
-                                logger.warning(f"Error decoding plain text body for UID {uid}: {e}")
-                                body = payload.decode('utf-8', errors='replace')
-                    
-                    # Extract text/html
-                    elif content_type == 'text/html':
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            try:
-                                charset = part.get_content_charset() or 'utf-8'
-                                html_body = payload.decode(charset, errors='replace')
-                            except Exception as e:
-                                logger.warning(f"Error decoding HTML body for UID {uid}: {e}")
-                                html_body = payload.decode('utf-8', errors='replace')
-            else:
-                # Single part message
-                payload = msg.get_payload(decode=True)
-                if payload:
-                    try:
-                        charset = msg.get_content_charset() or 'utf-8'
-                        content = payload.decode(charset, errors='replace')
-                        if msg.get_content_type() == 'text/html':
-                            html_body = content
-                        else:
-                            body = content
-                    except Exception as e:
-                        logger.warning(f"Error decoding body for UID {uid}: {e}")
-                        body = payload.decode('utf-8', errors='replace')
-            
-            # Extract all headers
-            headers = {}
-            for key, value in msg.items():
-                headers[key] = self._decode_mime_header(value)
-            
-            return {
-                'uid': uid,
-                'subject': subject,
-                'from': sender,
-                'to': recipients,
-                'date': date,
-                'body': body,
-                'html_body': html_body,
-                'headers': headers
-            }
+            return self._parse_email_message(uid, data[0][1])
             
         except IMAPFetchError:
             raise
@@ -218,6 +1009,390 @@ class ImapClient:
             logger.error(error_msg)
             raise IMAPFetchError(error_msg) from e
     
+    def get_emails_by_uids(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve several emails with a single UID FETCH round trip.
+        
+        Messages that are missing from the response or fail to parse are left out
+        of the result, so callers can retry them individually.
+        
+        If text_parts_max_chars is set, only the text parts are downloaded
+        (see get_text_parts_by_uids) instead of the full RFC822 messages.
+        
+        Args:
+            uids: Email UIDs (strings) to fetch in one command
+            
+        Returns:
+            Dictionary mapping UID to email data (same format as get_email_by_uid)
+            
+        Raises:
+            IMAPFetchError: If the FETCH command itself fails
+            IMAPConnectionError: If not connected
+        """
+        self._ensure_connected()
+        
+        if not uids:
+            return {}
+        
+        if self.text_parts_max_chars:
+            return self.get_text_parts_by_uids(uids, self.text_parts_max_chars)
+        return self._get_rfc822_by_uids(uids)
+    
+    def _get_rfc822_by_uids(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch and parse full RFC822 messages with one UID FETCH (see get_emails_by_uids)."""
+        requested = set(uids)
+        try:
+            # Ask for UID explicitly so every response item can be mapped back
+            typ, data = self._imap.uid('FETCH', build_uid_set(uids), '(UID RFC822)')
+        except Exception as e:
+            error_msg = f"Error fetching {len(uids)} email(s) in batch: {e}"
+            logger.error(error_msg)
+            raise IMAPFetchError(error_msg) from e
+        
+        if typ != 'OK':
+            raise IMAPFetchError(f"Failed to fetch {len(uids)} email(s) in batch: {data}")
+        
+        # Release each raw message as soon as it is parsed instead of holding the batch
+        literals = parse_fetch_literals(data)
+        del data
+        literals.reverse()
+        
+        emails = {}
+        while literals:
+            uid, raw_email = literals.pop()
+            if uid not in requested:
+                continue
+            try:
+                emails[uid] = self._parse_email_message(uid, raw_email)
+            except Exception as e:
+                logger.warning(f"Error parsing email UID {uid} from batch response: {e}")
+        return emails
+    
+    def get_text_parts_by_uids(self, uids: List[str], max_chars: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve several emails without downloading their attachments.
+        
+        Fetches BODYSTRUCTURE and the header block first, then only the first
+        non-attachment text/plain and text/html sections with BODY.PEEK. Sections
+        larger than the byte budget for max_chars characters are fetched as a
+        <0.N> partial range. Transfer encodings and charsets are decoded locally.
+        Messages whose structure cannot be parsed are fetched as full RFC822.
+        
+        Emails sharing the same section layout are fetched in one command, so a
+        batch usually costs two or three round trips instead of one, in exchange
+        for not transferring attachments.
+        
+        Args:
+            uids: Email UIDs (strings) to fetch
+            max_chars: Number of body characters needed (processing.max_body_chars)
+            
+        Returns:
+            Dictionary mapping UID to email data (same format as get_email_by_uid)
+            
+        Raises:
+            IMAPFetchError: If the BODYSTRUCTURE FETCH command itself fails
+            IMAPConnectionError: If not connected
+        """
+        self._ensure_connected()
+        
+        if not uids:
+            return {}
+        
+        requested = set(uids)
+        try:
+            typ, data = self._imap.uid('FETCH', build_uid_set(uids), '(UID BODYSTRUCTURE BODY.PEEK[HEADER])')
+        except Exception as e:
+            error_msg = f"Error fetching structure of {len(uids)} email(s): {e}"
+            logger.error(error_msg)
+            raise IMAPFetchError(error_msg) from e
+        
+        if typ != 'OK':
+            raise IMAPFetchError(f"Failed to fetch structure of {len(uids)} email(s): {data}")
+        
+        try:
+            messages = parse_fetch_response(data)
+        except BodyStructureError as e:
+            logger.warning(f"Could not parse BODYSTRUCTURE response, fetching full messages: {e}")
+            messages = []
+        
+        # Group emails by the FETCH items they need: one command per group
+        groups: Dict[str, List[str]] = {}
+        layouts: Dict[str, Tuple[bytes, Dict[str, Any]]] = {}
+        for items in messages:
+            uid = str(items.get('UID', ''))
+            header = items.get('BODY[HEADER]')
+            if uid not in requested or uid in layouts or not isinstance(header, bytes):
+                continue
+            try:
+                parts = find_text_parts(items.get('BODYSTRUCTURE'))
+            except BodyStructureError as e:
+                logger.warning(f"Could not parse BODYSTRUCTURE of email UID {uid}: {e}")
+                continue
+            layouts[uid] = (header, parts)
+            fetch_items = ' '.join(text_part_fetch_item(part, max_chars) for part in parts.values())
+            groups.setdefault(fetch_items, []).append(uid)
+        
+        sections: Dict[str, Dict[str, Any]] = {}
+        for fetch_items, group_uids in groups.items():
+            if not fetch_items:
+                continue
+            try:
+                typ, data = self._imap.uid('FETCH', build_uid_set(group_uids), f'(UID {fetch_items})')
+                if typ != 'OK':
+                    raise IMAPFetchError(f"{data}")
+                for items in parse_fetch_response(data):
+                    sections[str(items.get('UID', ''))] = items
+            except (IMAPFetchError, BodyStructureError, imaplib.IMAP4.error) as e:
+                logger.warning(f"Error fetching text parts of {len(group_uids)} email(s): {e}")
+        
+        emails = {}
+        for uid, (header, parts) in layouts.items():
+            items = sections.get(uid, {})
+            if parts and not items:
+                # Missing from the section response: fetched in full below
+                continue
+            bodies = {}
+            for key, part in parts.items():
+                section = items.get(f'BODY[{part.section}]')
+                truncated = text_part_fetch_item(part, max_chars).endswith('>')
+                bodies[key] = decode_text_part(section, part, truncated=truncated)
+            try:
+                msg = email.message_from_bytes(header)
+                emails[uid] = self._build_email_dict(uid, msg, bodies.get('plain', ''), bodies.get('html', ''))
+            except Exception as e:
+                logger.warning(f"Error parsing headers of email UID {uid}: {e}")
+        
+        # Anything without a usable structure or sections is fetched the classic way
+        fallback = [uid for uid in uids if uid not in emails]
+        if fallback:
+            emails.update(self._get_rfc822_by_uids(fallback))
+        return emails
+    
+    def get_headers_by_uids(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve only the headers of several emails with a single UID FETCH round trip.
+        
+        Uses BODY.PEEK so the \\Seen flag is not set, and requests only HEADER_FIELDS,
+        which is all that blacklist rules need.
+        
+        Args:
+            uids: Email UIDs (strings) to fetch headers for
+            
+        Returns:
+            Dictionary mapping UID to header data (same keys as get_email_by_uid,
+            with empty body and html_body, plus cc and message_id)
+            
+        Raises:
+            IMAPFetchError: If the FETCH command itself fails
+            IMAPConnectionError: If not connected
+        """
+        self._ensure_connected()
+        
+        if not uids:
+            return {}
+        
+        requested = set(uids)
+        try:
+            typ, data = self._imap.uid(
+                'FETCH', build_uid_set(uids), f'(UID BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})])'
+            )
+        except Exception as e:
+            error_msg = f"Error fetching headers for {len(uids)} email(s): {e}"
+            logger.error(error_msg)
+            raise IMAPFetchError(error_msg) from e
+        
+        if typ != 'OK':
+            raise IMAPFetchError(f"Failed to fetch headers for {len(uids)} email(s): {data}")
+        
+        headers_by_uid = {}
+        for uid, raw_headers in parse_fetch_literals(data):
+            if uid not in requested:
+                continue
+            try:
+                headers_by_uid[uid] = self._parse_email_headers(uid, raw_headers)
+            except Exception as e:
+                logger.warning(f"Error parsing headers for email UID {uid}: {e}")
+        return headers_by_uid
+    
+    def get_message_sizes(self, uids: List[str]) -> Dict[str, int]:
+        """
+        Retrieve the raw size (RFC822.SIZE) of several emails with a single UID FETCH.
+        
+        The server answers from its index without sending message data, so this is
+        cheap even for large backlogs.
+        
+        Args:
+            uids: Email UIDs (strings)
+            
+        Returns:
+            Dictionary mapping UID to message size in bytes
+            
+        Raises:
+            IMAPFetchError: If the FETCH command itself fails
+            IMAPConnectionError: If not connected
+        """
+        self._ensure_connected()
+        
+        if not uids:
+            return {}
+        
+        requested = set(uids)
+        try:
+            typ, data = self._imap.uid('FETCH', build_uid_set(uids), '(UID RFC822.SIZE)')
+        except Exception as e:
+            error_msg = f"Error fetching sizes for {len(uids)} email(s): {e}"
+            logger.error(error_msg)
+            raise IMAPFetchError(error_msg) from e
+        
+        if typ != 'OK':
+            raise IMAPFetchError(f"Failed to fetch sizes for {len(uids)} email(s): {data}")
+        
+        sizes: Dict[str, int] = {}
+        for item in data or []:
+            if isinstance(item, tuple):
+                item = item[0]
+            if isinstance(item, bytes):
+                item = item.decode('utf-8', errors='replace')
+            if not item:
+                continue
+            uid_match = re.search(r'UID\s+(\d+)', item)
+            size_match = _FETCH_SIZE_RE.search(item)
+            if uid_match and size_match and uid_match.group(1) in requested:
+                sizes[uid_match.group(1)] = int(size_match.group(1))
+        return sizes
+    
+    def _parse_email_headers(self, uid: str, raw_headers: bytes) -> Dict[str, Any]:
+        """
+        Parse a header-only FETCH literal into the email dictionary format.
+        
+        Args:
+            uid: Email UID (string)
+            raw_headers: Raw header block bytes
+            
+        Returns:
+            Dictionary with header data and empty body fields
+        """
+        msg = email.message_from_bytes(raw_headers)
+        to_header = msg.get('To', '')
+        cc_header = msg.get('Cc', '')
+        headers = {key: self._decode_mime_header(value) for key, value in msg.items()}
+        
+        return {
+            'uid': uid,
+            'subject': self._decode_mime_header(msg.get('Subject', '')),
+            'from': self._decode_mime_header(msg.get('From', '')),
+            'to': [addr.strip() for addr in to_header.split(',')] if to_header else [],
+            'cc': [addr.strip() for addr in cc_header.split(',')] if cc_header else [],
+            'date': self._decode_mime_header(msg.get('Date', '')),
+            'message_id': headers.get('Message-ID') or headers.get('Message-Id'),
+            'body': '',
+            'html_body': '',
+            'headers': headers
+        }
+    
+    def _parse_email_message(self, uid: str, raw_email: bytes) -> Dict[str, Any]:
+        """
+        Parse a raw RFC822 message into the email dictionary format.
+        
+        Shared by single and batched fetches so both return the same shape. The
+        message is parsed with StreamingMessageParser, so attachment payloads are
+        never decoded or kept, and text parts are capped at max_text_part_bytes.
+        
+        Args:
+            uid: Email UID (string)
+            raw_email: Raw RFC822 message bytes
+            
+        Returns:
+            Dictionary with email data (see get_email_by_uid)
+        """
+        msg = parse_message_streaming(raw_email, self.max_text_part_bytes)
+        
+        # Extract body
+        body = ''
+        html_body = ''
+        
+        if msg.is_multipart():
+            for part in msg.walk():
+                content_type = part.get_content_type()
+                content_disposition = str(part.get('Content-Disposition', ''))
+                
+                # Skip attachments
+                if 'attachment' in content_disposition:
+                    continue
+                
+                # Extract text/plain
+                if content_type == 'text/plain':
+                    payload = part.get_payload(decode=True)
+                    if payload:
+                        try:
+                            charset = part.get_content_charset() or 'utf-8'
+                            body = payload.decode(charset, errors='replace')
+                        except Exception as e:
+                            logger.warning(f"Error decoding plain text body for UID {uid}: {e}")
+                            body = payload.decode('utf-8', errors='replace')
+                
+                # Extract text/html
+                elif content_type == 'text/html':
+                    payload = part.get_payload(decode=True)
+                    if payload:
+                        try:
+                            charset = part.get_content_charset() or 'utf-8'
+                            html_body = payload.decode(charset, errors='replace')
+                        except Exception as e:
+                            logger.warning(f"Error decoding HTML body for UID {uid}: {e}")
+                            html_body = payload.decode('utf-8', errors='replace')
+        else:
+            # Single part message
+            payload = msg.get_payload(decode=True)
+            if payload:
+                try:
+                    charset = msg.get_content_charset() or 'utf-8'
+                    content = payload.decode(charset, errors='replace')
+                    if msg.get_content_type() == 'text/html':
+                        html_body = content
+                    else:
+                        body = content
+                except Exception as e:
+                    logger.warning(f"Error decoding body for UID {uid}: {e}")
+                    body = payload.decode('utf-8', errors='replace')
+        
+        return self._build_email_dict(uid, msg, body, html_body)
+    
+    def _build_email_dict(self, uid: str, msg: Message, body: str, html_body: str) -> Dict[str, Any]:
+        """
+        Build the email dictionary from a parsed message's headers and extracted bodies.
+        
+        Args:
+            uid: Email UID (string)
+            msg: Parsed message (only its headers are used)
+            body: Plain text body
+            html_body: HTML body
+            
+        Returns:
+            Dictionary with email data (see get_email_by_uid)
+        """
+        subject = self._decode_mime_header(msg.get('Subject', ''))
+        sender = self._decode_mime_header(msg.get('From', ''))
+        to_header = msg.get('To', '')
+        recipients = [addr.strip() for addr in to_header.split(',')] if to_header else []
+        date = self._decode_mime_header(msg.get('Date', ''))
+        
+        # Extract all headers
+        headers = {}
+        for key, value in msg.items():
+            headers[key] = self._decode_mime_header(value)
+        
+        return {
+            'uid': uid,
+            'subject': subject,
+            'from': sender,
+            'to': recipients,
+            'date': date,
+            'body': body,
+            'html_body': html_body,
+            'headers': headers
+        }
+    
     def _decode_mime_header(self, header_value: str) -> str:
         """
         Decode MIME-encoded header value.
@@ -356,6 +1531,29 @@ class ImapClient:
             logger.error(error_msg)
             raise IMAPFetchError(error_msg) from e
     
+    def iter_unprocessed_emails(
+        self,
+        max_emails: Optional[int] = None,
+        force_reprocess: bool = False,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over unprocessed emails.
+        
+        The base implementation materializes get_unprocessed_emails(); clients that can
+        fetch incrementally (e.g. ConfigurableImapClient) override this to stream.
+        
+        Args:
+            max_emails: Maximum number of emails to retrieve (None = all)
+            force_reprocess: If True, include processed emails (for reprocessing)
+            **kwargs: Extra selection arguments forwarded to get_unprocessed_emails
+                      (e.g. uids, min_uid)
+            
+        Returns:
+            Iterator of email dictionaries (same format as get_email_by_uid)
+        """
+        return iter(self.get_unprocessed_emails(max_emails=max_emails, force_reprocess=force_reprocess, **kwargs))
+    
     def set_flag(self, uid: str, flag: str) -> bool:
         """
         Set an IMAP flag on an email.
@@ -402,6 +1600,58 @@ class ImapClient:
             logger.error(f"Error setting flag '{flag}' on email UID {uid}: {e}")
             return False
     
+    def set_flag_bulk(self, uids: List[str], flag: str) -> bool:
+        """
+        Set an IMAP flag on several emails with a single UID STORE command.
+        
+        UIDs are sent as a compressed UID set (e.g. '1201:1250,1300'). The .SILENT
+        variant is used so the server does not echo the new flags of every message.
+        
+        Args:
+            uids: Email UIDs
+            flag: Flag name (e.g., '\\Seen', 'AIProcessed')
+            
+        Returns:
+            True if the server accepted the command, False otherwise
+            
+        Raises:
+            IMAPConnectionError: If not connected
+        """
+        if not uids:
+            return True
+        
+        uid_set = build_uid_set(uids)
+        
+        # Check if in dry-run mode
+        try:
+            from src.dry_run import is_dry_run
+            from src.dry_run_output import DryRunOutput
+            dry_run = is_dry_run()
+        except ImportError:
+            dry_run = False
+        
+        if dry_run:
+            try:
+                output = DryRunOutput()
+                output.warning(f"Would set IMAP flag '{flag}' on email UIDs {uid_set}")
+            except Exception:
+                logger.info(f"[DRY RUN] Would set flag '{flag}' on email UIDs {uid_set}")
+            return True
+        
+        self._ensure_connected()
+        
+        try:
+            typ, data = self._imap.uid('STORE', uid_set, '+FLAGS.SILENT', f'({flag})')
+            if typ == 'OK':
+                logger.debug(f"Set flag '{flag}' on {len(uids)} email(s): UIDs {uid_set}")
+                return True
+            else:
+                logger.warning(f"Failed to set flag '{flag}' on email UIDs {uid_set}: {data}")
+                return False
+        except Exception as e:
+            logger.error(f"Error setting flag '{flag}' on email UIDs {uid_set}: {e}")
+            return False
+    
     def clear_flag(self, uid: str, flag: str) -> bool:
         """
         Clear an IMAP flag from an email.
@@ -448,6 +1698,57 @@ class ImapClient:
             logger.error(f"Error clearing flag '{flag}' from email UID {uid}: {e}")
             return False
     
+    def clear_flag_bulk(self, uids: List[str], flag: str) -> bool:
+        """
+        Clear an IMAP flag from several emails with a single UID STORE command.
+        
+        Counterpart of set_flag_bulk() (compressed UID set, .SILENT variant).
+        
+        Args:
+            uids: Email UIDs
+            flag: Flag name (e.g., '\\Seen', 'AIProcessed')
+            
+        Returns:
+            True if the server accepted the command, False otherwise
+            
+        Raises:
+            IMAPConnectionError: If not connected
+        """
+        if not uids:
+            return True
+        
+        uid_set = build_uid_set(uids)
+        
+        # Check if in dry-run mode
+        try:
+            from src.dry_run import is_dry_run
+            from src.dry_run_output import DryRunOutput
+            dry_run = is_dry_run()
+        except ImportError:
+            dry_run = False
+        
+        if dry_run:
+            try:
+                output = DryRunOutput()
+                output.warning(f"Would clear IMAP flag '{flag}' from email UIDs {uid_set}")
+            except Exception:
+                logger.info(f"[DRY RUN] Would clear flag '{flag}' from email UIDs {uid_set}")
+            return True
+        
+        self._ensure_connected()
+        
+        try:
+            typ, data = self._imap.uid('STORE', uid_set, '-FLAGS.SILENT', f'({flag})')
+            if typ == 'OK':
+                logger.debug(f"Cleared flag '{flag}' from {len(uids)} email(s): UIDs {uid_set}")
+                return True
+            else:
+                logger.warning(f"Failed to clear flag '{flag}' from email UIDs {uid_set}: {data}")
+                return False
+        except Exception as e:
+            logger.error(f"Error clearing flag '{flag}' from email UIDs {uid_set}: {e}")
+            return False
+    
     def has_flag(self, uid: str, flag: str) -> bool:
         """
         Check if an email has a specific IMAP flag.
@@ -566,3 +1867,97 @@ class ImapClient:
 
 # Alias for backward compatibility with tests that use IMAPClient
 IMAPClient = ImapClient
+
+
+class BatchedFlagWriter:
+    """
+    Accumulates UIDs that need a flag and stores them in batches.
+    
+    Instead of one UID STORE round trip per email, UIDs are collected and written
+    with ImapClient.set_flag_bulk() as a single compressed UID set. A flush happens
+    when batch_size UIDs are pending, when the oldest pending UID has waited
+    flush_interval seconds (checked whenever a UID is added), and whenever flush()
+    is called explicitly (e.g. before disconnecting). If a bulk STORE fails, every
+    UID of the batch is retried individually with set_flag().
+    
+    Not thread-safe: use it from the thread that owns the IMAP connection.
+    
+    Example:
+        >>> writer = BatchedFlagWriter(client, 'AIProcessed', batch_size=50)
+        >>> for uid in processed_uids:
+        ...     writer.add(uid)
+        >>> writer.flush()
+    """
+    
+    def __init__(
+        self,
+        client: ImapClient,
+        flag: str,
+        batch_size: int = DEFAULT_FLAG_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLAG_FLUSH_SECONDS
+    ):
+        """
+        Initialize the writer.
+        
+        Args:
+            client: Connected IMAP client used to store the flags
+            flag: Flag to set (e.g., 'AIProcessed')
+            batch_size: Number of pending UIDs that triggers a flush
+            flush_interval: Seconds a UID may stay pending before a flush is triggered
+                            (0 = flush on every add)
+        """
+        self._client = client
+        self.flag = flag
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending: List[str] = []
+        self._first_pending_at: Optional[float] = None
+    
+    @property
+    def pending(self) -> List[str]:
+        """UIDs added but not yet stored."""
+        return list(self._pending)
+    
+    def add(self, uid: str) -> None:
+        """Queue a UID, flushing if the size or time threshold is reached."""
+        if not self._pending:
+            self._first_pending_at = time.monotonic()
+        self._pending.append(uid)
+        
+        if (
+            len(self._pending) >= self.batch_size
+            or time.monotonic() - self._first_pending_at >= self.flush_interval
+        ):
+            self.flush()
+    
+    def flush(self) -> List[str]:
+        """
+        Store the flag on all pending UIDs.
+        
+        Returns:
+            UIDs that could not be flagged, even after retrying them one by one
+        """
+        if not self._pending:
+            return []
+        
+        uids, self._pending = self._pending, []
+        self._first_pending_at = None
+        
+        try:
+            if self._client.set_flag_bulk(uids, self.flag):
+                return []
+        except Exception as e:
+            logger.warning(f"Bulk flag update failed for {len(uids)} email(s): {e}")
+        
+        logger.info(f"Retrying flag '{self.flag}' individually for {len(uids)} email(s)")
+        failed = []
+        for uid in uids:
+            try:
+                if not self._client.set_flag(uid, self.flag):
+                    failed.append(uid)
+            except Exception as e:
+                logger.warning(f"Error setting flag '{self.flag}' on email UID {uid}: {e}")
+                failed.append(uid)
+        if failed:
+            logger.warning(f"Could not set flag '{self.flag}' on email UIDs: {', '.join(failed)}")
+        return failed
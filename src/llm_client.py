@@ -10,15 +10,43 @@ import os
 import json
 import logging
 import random
+import re
 import time
 import requests
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, List, Mapping, Optional
+from dataclasses import dataclass, field
 
 from src.config import ConfigError
+from src.http_session import get_shared_session
+from src.rate_limiter import RateLimiter, get_shared_rate_limiter, parse_retry_after
+from src.token_usage import CHARS_PER_TOKEN, TokenUsage
 
 logger = logging.getLogger(__name__)
 
+# Version of the classification prompt (system message and JSON instructions).
+# Part of the classification cache key: bump it whenever the prompt wording changes
+# so cached results from the old prompt are not reused.
+PROMPT_VERSION = 1
+
+# Versions of the batch (classify_emails_batch) and combined (classify_and_summarize)
+# prompts. Each prompt has its own cache namespace, so a result is only reused for
+# the same kind of request.
+BATCH_PROMPT_VERSION = 1
+COMBINED_PROMPT_VERSION = 1
+
+# Defaults for classify_emails_batch (classification.batch_size / batch_max_tokens)
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_BATCH_MAX_TOKENS = 8000
+
+# Tokens reserved for the batch instructions and each email's separator
+BATCH_PROMPT_OVERHEAD_TOKENS = 200
+BATCH_ITEM_OVERHEAD_TOKENS = 10
+
+
+def estimate_tokens(text: str) -> int:
+    """Return a rough token count for text (CHARS_PER_TOKEN characters per token)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
 
 class LLMClientError(Exception):
     """Base exception for LLM client errors."""
@@ -35,12 +63,24 @@ class LLMResponseParseError(LLMClientError):
     pass
 
 
+class LLMRateLimitError(LLMAPIError):
+    """Raised when the LLM API answers HTTP 429 (retry_after: seconds requested by the server)."""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 @dataclass
 class LLMResponse:
     """Structured response from LLM API."""
     spam_score: int
     importance_score: int
     raw_response: Optional[str] = None
+    # Only set by classify_and_summarize, for emails the model judged important
+    summary: Optional[str] = None
+    # Tokens reported by the API (all attempts; a share of the request for batches)
+    usage: TokenUsage = field(default_factory=TokenUsage)
     
     def to_dict(self) -> Dict[str, int]:
         """Convert to dictionary format."""
@@ -64,12 +104,23 @@ class LLMClient:
         print(f"Spam: {response.spam_score}, Importance: {response.importance_score}")
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
         """
         Initialize LLM client with account-specific configuration.
         
         Args:
             config: Account-specific merged configuration dictionary
+            session: Optional requests.Session to send API requests with. Defaults to
+                     the process-wide keep-alive session (src.http_session), with its
+                     pool sized to classification.max_concurrency.
+            rate_limiter: Optional RateLimiter for API requests. Defaults to the
+                          process-wide limiter (src.rate_limiter) with the limits in
+                          openrouter.max_requests_per_second / max_tokens_per_minute.
             
         Raises:
             ConfigError: If required configuration values are missing or invalid
@@ -93,6 +144,19 @@ class LLMClient:
         self._retry_attempts = classification_config.get('retry_attempts', 3)
         self._retry_delay_seconds = classification_config.get('retry_delay_seconds', 1)
         
+        # Keep-alive HTTP session (connections are reused across requests and accounts)
+        if session is None:
+            session = get_shared_session(pool_size=classification_config.get('max_concurrency', 1))
+        self._session = session
+        
+        # Process-wide limiter (shared with other accounts and OpenRouterClient)
+        if rate_limiter is None:
+            rate_limiter = get_shared_rate_limiter(
+                requests_per_second=openrouter_config.get('max_requests_per_second'),
+                tokens_per_minute=openrouter_config.get('max_tokens_per_minute')
+            )
+        self._rate_limiter = rate_limiter
+        
         # Store config for max_body_chars access
         self._config = config
     
@@ -151,6 +215,54 @@ class LLMClient:
         
         return full_prompt
     
+    def _truncate(self, email_content: str, max_chars: Optional[int] = None) -> str:
+        """Truncate email content to processing.max_body_chars (or max_chars if smaller)."""
+        processing_config = self._config.get('processing', {})
+        default_max_chars = processing_config.get('max_body_chars', 6000)
+        
+        if max_chars:
+            effective_max = min(max_chars, default_max_chars) if max_chars else default_max_chars
+        else:
+            effective_max = default_max_chars
+        
+        if len(email_content) > effective_max:
+            logger.info(f"Truncating email content from {len(email_content)} to {effective_max} characters")
+            email_content = email_content[:effective_max] + "\n[Content truncated]"
+        return email_content
+    
+    def _format_batch_prompt(self, email_contents: List[str]) -> str:
+        """
+        Format one prompt classifying several emails.
+        
+        Emails are numbered 1..n in the prompt; the numbers are the ids the model
+        must return, independent of the caller's email ids.
+        
+        Args:
+            email_contents: Truncated email contents
+            
+        Returns:
+            Formatted prompt string requesting one JSON result per email
+        """
+        parts = [
+            f"Analyze each of the following {len(email_contents)} emails and provide a classification "
+            "score for each one. Consider factors such as sender reputation, content relevance, "
+            "urgency indicators, and spam characteristics. Classify every email independently."
+        ]
+        for index, email_content in enumerate(email_contents, start=1):
+            parts.append(f"=== EMAIL id={index} ===\n{email_content}")
+        parts.append(
+            "IMPORTANT: You must respond with ONLY a valid JSON object with a single field \"results\": "
+            "an array containing one object per email with exactly these three fields:\n"
+            "- id: The integer id of the email\n"
+            "- spam_score: An integer from 0-10 where 0 is definitely not spam and 10 is definitely spam\n"
+            "- importance_score: An integer from 0-10 where 0 is not important and 10 is very important\n\n"
+            "Example response format:\n"
+            '{"results": [{"id": 1, "spam_score": 2, "importance_score": 8}, '
+            '{"id": 2, "spam_score": 9, "importance_score": 1}]}\n\n'
+            "Do not include any explanation, markdown formatting, or additional text. Only the JSON object."
+        )
+        return "\n\n".join(parts)
+    
     def _make_api_request(self, prompt: str) -> Dict[str, Any]:
         """
         Make a single API request to the LLM.
@@ -162,6 +274,7 @@ class LLMClient:
             Raw API response dictionary
             
         Raises:
+            LLMRateLimitError: If the API answers HTTP 429
             LLMAPIError: If API call fails
         """
         url = f"{self._api_url.rstrip('/')}/chat/completions"
@@ -189,10 +302,20 @@ class LLMClient:
         logger.debug(f"Making API request to {url}")
         logger.debug(f"Model: {self._model}, Temperature: {self._temperature}")
         
+        rate_limited = False
+        retry_after = None
+        self._rate_limiter.acquire(tokens=estimate_tokens(prompt))
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=60)
+            response = self._session.post(url, json=payload, headers=headers, timeout=60)
+            if response.status_code == 429:
+                rate_limited = True
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                raise LLMRateLimitError(f"HTTP 429 rate limited: {response.text}", retry_after=retry_after)
             response.raise_for_status()
             return response.json()
+        except LLMRateLimitError as e:
+            logger.warning(f"API request rate limited: {e}")
+            raise
         except requests.exceptions.HTTPError as e:
             status_code = e.response.status_code if e.response else "unknown"
             error_msg = f"HTTP {status_code} error: {e.response.text if e.response else str(e)}"
@@ -206,6 +329,8 @@ class LLMClient:
             error_msg = f"Invalid JSON in API response: {e}"
             logger.error(error_msg)
             raise LLMAPIError(error_msg) from e
+        finally:
+            self._rate_limiter.release(rate_limited=rate_limited, retry_after=retry_after)
     
     def _parse_response(self, api_response: Dict[str, Any]) -> LLMResponse:
         """
@@ -278,10 +403,12 @@ class LLMClient:
                 logger.warning(f"importance_score out of range (0-10): {importance_score}, clamping to valid range")
                 importance_score = max(0, min(10, importance_score))
             
+            summary = parsed_json.get("summary")
             return LLMResponse(
                 spam_score=spam_score,
                 importance_score=importance_score,
-                raw_response=content
+                raw_response=content,
+                summary=summary.strip() if isinstance(summary, str) and summary.strip() else None
             )
             
         except LLMResponseParseError:
@@ -289,6 +416,68 @@ class LLMClient:
         except Exception as e:
             raise LLMResponseParseError(f"Unexpected error parsing response: {e}") from e
     
+    def _parse_batch_response(self, api_response: Dict[str, Any], count: int) -> Dict[int, LLMResponse]:
+        """
+        Parse a batch classification response.
+        
+        Accepts {"results": [...]} or a bare JSON array. Items with an unknown id
+        or invalid scores are skipped (the caller re-queues missing emails).
+        
+        Args:
+            api_response: Raw API response dictionary
+            count: Number of emails in the request (valid ids are 1..count)
+            
+        Returns:
+            LLMResponse objects by prompt id
+            
+        Raises:
+            LLMResponseParseError: If the response contains no JSON results at all
+        """
+        content = api_response.get("choices", [{}])[0].get("message", {}).get("content", "")
+        if not content:
+            raise LLMResponseParseError("Empty response content from LLM")
+        
+        content_clean = content.strip()
+        if content_clean.startswith("```"):
+            lines = content_clean.split("\n")
+            content_clean = "\n".join(lines[1:-1]) if len(lines) > 2 else content_clean
+        
+        try:
+            parsed_json = json.loads(content_clean)
+        except json.JSONDecodeError as e:
+            json_match = re.search(r'\[.*\]', content_clean, re.DOTALL)
+            if not json_match:
+                raise LLMResponseParseError(f"Could not parse JSON from response: {e}")
+            try:
+                parsed_json = json.loads(json_match.group())
+            except json.JSONDecodeError:
+                raise LLMResponseParseError(f"Could not parse JSON from response: {e}")
+        
+        items = parsed_json.get("results") if isinstance(parsed_json, dict) else parsed_json
+        if not isinstance(items, list):
+            raise LLMResponseParseError(f"Response contains no results array: {content[:200]}")
+        
+        results: Dict[int, LLMResponse] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                item_id = int(item.get("id"))
+                spam_score = int(item.get("spam_score"))
+                importance_score = int(item.get("importance_score"))
+            except (ValueError, TypeError):
+                logger.warning(f"Skipping invalid batch result: {item}")
+                continue
+            if not 1 <= item_id <= count or item_id in results:
+                logger.warning(f"Skipping batch result with unexpected id {item_id}")
+                continue
+            results[item_id] = LLMResponse(
+                spam_score=max(0, min(10, spam_score)),
+                importance_score=max(0, min(10, importance_score)),
+                raw_response=json.dumps(item)
+            )
+        return results
+    
     def _write_debug_prompt(self, prompt: str, uid: Optional[str] = None) -> None:
         """
         Write the formatted prompt to a debug file.
@@ -344,6 +533,12 @@ class LLMClient:
         jitter = exponential_delay * 0.25 * random.random()
         return exponential_delay + jitter
     
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Return the delay before the next attempt: the server's Retry-After for 429s, else backoff."""
+        if isinstance(error, LLMRateLimitError) and error.retry_after is not None:
+            return error.retry_after
+        return self._calculate_backoff_delay(attempt)
+    
     def classify_email(
         self,
         email_content: str,
@@ -375,18 +570,7 @@ class LLMClient:
             LLMAPIError: If all retry attempts fail
             LLMResponseParseError: If response cannot be parsed
         """
-        # Truncate email content if needed
-        processing_config = self._config.get('processing', {})
-        default_max_chars = processing_config.get('max_body_chars', 6000)
-        
-        if max_chars:
-            effective_max = min(max_chars, default_max_chars) if max_chars else default_max_chars
-        else:
-            effective_max = default_max_chars
-        
-        if len(email_content) > effective_max:
-            logger.info(f"Truncating email content from {len(email_content)} to {effective_max} characters")
-            email_content = email_content[:effective_max] + "\n[Content truncated]"
+        email_content = self._truncate(email_content, max_chars)
         
         # Format prompt
         prompt = self._format_prompt_for_json(email_content, user_prompt)
@@ -395,21 +579,87 @@ class LLMClient:
         if debug_prompt:
             self._write_debug_prompt(prompt, debug_uid)
         
-        # Retry logic
+        return self._request_classification(prompt)
+    
+    def classify_and_summarize(
+        self,
+        email_content: str,
+        summary_instructions: str,
+        importance_threshold: int,
+        max_chars: Optional[int] = None,
+        debug_prompt: bool = False,
+        debug_uid: Optional[str] = None
+    ) -> LLMResponse:
+        """
+        Classify an email and, if it is important, summarize it in the same request.
+        
+        The model returns the usual scores plus a "summary" field, which it fills only
+        when importance_score >= importance_threshold (null otherwise). This saves the
+        second request (and sending the body twice) for emails that get summarized.
+        
+        Args:
+            email_content: The email content to classify
+            summary_instructions: Summarization prompt (e.g. from paths.summarization_prompt_path)
+            importance_threshold: Importance score from which a summary is requested
+            max_chars: Maximum characters to send (truncates if needed)
+            debug_prompt: If True, write the formatted prompt to a debug file
+            debug_uid: Optional email UID for debug filename
+            
+        Returns:
+            LLMResponse with spam_score, importance_score and summary (None if not important)
+            
+        Raises:
+            LLMAPIError: If all retry attempts fail
+        """
+        email_content = self._truncate(email_content, max_chars)
+        prompt = (
+            "Analyze the following email and provide a classification score. "
+            "Consider factors such as sender reputation, content relevance, urgency indicators, "
+            "and spam characteristics. If the importance_score is "
+            f"{importance_threshold} or higher, also summarize the email following these "
+            f"summarization instructions:\n\n{summary_instructions.strip()}"
+            f"\n\n---\n{email_content}\n---\n\n"
+            "IMPORTANT: You must respond with ONLY a valid JSON object containing exactly these three fields:\n"
+            "- spam_score: An integer from 0-10 where 0 is definitely not spam and 10 is definitely spam\n"
+            "- importance_score: An integer from 0-10 where 0 is not important and 10 is very important\n"
+            f"- summary: The summary as a Markdown string if importance_score >= {importance_threshold}, "
+            "otherwise null\n\n"
+            "Example response format:\n"
+            '{"spam_score": 2, "importance_score": 8, "summary": "Short summary of the email..."}\n\n'
+            "Do not include any explanation, markdown formatting, or additional text. Only the JSON object."
+        )
+        
+        if debug_prompt:
+            self._write_debug_prompt(prompt, debug_uid)
+        
+        return self._request_classification(prompt)
+    
+    def _request_classification(self, prompt: str) -> LLMResponse:
+        """
+        Send a classification prompt with retry logic.
+        
+        Raises:
+            LLMAPIError: If all retry attempts fail
+        """
         last_error = None
+        # Answers that failed to parse were still billed
+        usage = TokenUsage()
         for attempt in range(1, self._retry_attempts + 1):
             try:
                 logger.info(f"LLM API call attempt {attempt}/{self._retry_attempts}")
                 
                 # Make API request
                 api_response = self._make_api_request(prompt)
+                usage.add(TokenUsage.from_api_response(api_response))
                 
                 # Parse response
                 result = self._parse_response(api_response)
+                result.usage = usage
                 
                 logger.info(
                     f"LLM classification successful: spam_score={result.spam_score}, "
-                    f"importance_score={result.importance_score}"
+                    f"importance_score={result.importance_score}, "
+                    f"tokens={usage.prompt_tokens}+{usage.completion_tokens}"
                 )
                 return result
                 
@@ -418,7 +668,7 @@ class LLMClient:
                 logger.warning(f"Attempt {attempt} failed: {e}")
                 
                 if attempt < self._retry_attempts:
-                    delay = self._calculate_backoff_delay(attempt)
+                    delay = self._retry_delay(attempt, e)
                     logger.info(f"Retrying in {delay:.2f} seconds...")
                     time.sleep(delay)
                 else:
@@ -428,3 +678,147 @@ class LLMClient:
         raise LLMAPIError(
             f"Failed after {self._retry_attempts} attempts. Last error: {last_error}"
         ) from last_error
+    
+    def classify_emails_batch(
+        self,
+        emails: Mapping[str, str],
+        max_chars: Optional[int] = None,
+        debug_prompt: bool = False
+    ) -> Dict[str, LLMResponse]:
+        """
+        Classify several emails with as few API requests as possible.
+        
+        Emails are truncated like in classify_email and packed in order into requests
+        of at most classification.batch_size emails whose estimated prompt size stays
+        within classification.batch_max_tokens. Each request asks for a JSON array of
+        {id, spam_score, importance_score}, and the results are mapped back by id.
+        Emails missing from a response (or from a request that failed after all retries),
+        and emails too large for the token budget, are classified individually with
+        classify_email.
+        
+        Args:
+            emails: Email contents by caller id (e.g. UID), in the order to send them
+            max_chars: Maximum characters to send per email (truncates if needed)
+            debug_prompt: If True, write each formatted prompt to a debug file
+            
+        Returns:
+            LLMResponse objects by caller id. Emails that could not be classified,
+            even individually, are left out.
+        """
+        classification_config = self._config.get('classification', {})
+        batch_size = max(1, classification_config.get('batch_size', DEFAULT_BATCH_SIZE))
+        max_tokens = classification_config.get('batch_max_tokens', DEFAULT_BATCH_MAX_TOKENS)
+        
+        truncated = {email_id: self._truncate(content, max_chars) for email_id, content in emails.items()}
+        batches: List[List[str]] = []
+        individual: List[str] = []
+        current: List[str] = []
+        current_tokens = BATCH_PROMPT_OVERHEAD_TOKENS
+        for email_id, content in truncated.items():
+            tokens = estimate_tokens(content) + BATCH_ITEM_OVERHEAD_TOKENS
+            if BATCH_PROMPT_OVERHEAD_TOKENS + tokens > max_tokens:
+                individual.append(email_id)
+                continue
+            if current and (len(current) >= batch_size or current_tokens + tokens > max_tokens):
+                batches.append(current)
+                current, current_tokens = [], BATCH_PROMPT_OVERHEAD_TOKENS
+            current.append(email_id)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        
+        results: Dict[str, LLMResponse] = {}
+        for batch in batches:
+            if len(batch) == 1:
+                individual.append(batch[0])
+                continue
+            batch_results = self._classify_batch_request([truncated[email_id] for email_id in batch], debug_prompt)
+            for index, email_id in enumerate(batch, start=1):
+                if index in batch_results:
+                    results[email_id] = batch_results[index]
+                else:
+                    individual.append(email_id)
+            logger.info(
+                f"LLM batch classification: {len(batch_results)}/{len(batch)} email(s) classified in one request"
+            )
+        
+        # Remaining emails are sent one at a time, in the original order
+        individual_ids = set(individual)
+        for email_id in [email_id for email_id in truncated if email_id in individual_ids]:
+            try:
+                results[email_id] = self.classify_email(
+                    emails[email_id],
+                    max_chars=max_chars,
+                    debug_prompt=debug_prompt,
+                    debug_uid=email_id
+                )
+            except LLMClientError as e:
+                logger.error(f"LLM classification failed for email {email_id}: {e}")
+        return {email_id: results[email_id] for email_id in emails if email_id in results}
+    
+    def _classify_batch_request(self, email_contents: List[str], debug_prompt: bool = False) -> Dict[int, LLMResponse]:
+        """
+        Send one batch request with retry logic.
+        
+        Returns:
+            LLMResponse objects by prompt id (empty if every attempt failed)
+        """
+        prompt = self._format_batch_prompt(email_contents)
+        if debug_prompt:
+            self._write_debug_prompt(prompt)
+        
+        usage = TokenUsage()
+        for attempt in range(1, self._retry_attempts + 1):
+            try:
+                logger.info(
+                    f"LLM batch API call attempt {attempt}/{self._retry_attempts} "
+                    f"({len(email_contents)} emails)"
+                )
+                api_response = self._make_api_request(prompt)
+                usage.add(TokenUsage.from_api_response(api_response))
+                results = self._parse_batch_response(api_response, len(email_contents))
+                self._apportion_usage(usage, results, email_contents)
+                return results
+            except (LLMAPIError, LLMResponseParseError) as e:
+                logger.warning(f"Batch attempt {attempt} failed: {e}")
+                if attempt < self._retry_attempts:
+                    delay = self._retry_delay(attempt, e)
+                    logger.info(f"Retrying in {delay:.2f} seconds...")
+                    time.sleep(delay)
+        
+        logger.error(f"Batch request failed after {self._retry_attempts} attempts; classifying individually")
+        return {}
+    
+    def _apportion_usage(
+        self,
+        usage: TokenUsage,
+        results: Dict[int, LLMResponse],
+        email_contents: List[str]
+    ) -> None:
+        """
+        Split the usage of a batch request over its results.
+        
+        Prompt and cached tokens are split by estimated email size, completion tokens
+        evenly; rounding remainders go to the last result so the shares add up.
+        """
+        if not results:
+            return
+        ids = sorted(results)
+        weights = [estimate_tokens(email_contents[item_id - 1]) for item_id in ids]
+        total_weight = sum(weights)
+        remaining = TokenUsage(usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens)
+        for position, (item_id, weight) in enumerate(zip(ids, weights)):
+            if position == len(ids) - 1:
+                share = remaining
+            else:
+                share = TokenUsage(
+                    prompt_tokens=usage.prompt_tokens * weight // total_weight,
+                    completion_tokens=usage.completion_tokens // len(ids),
+                    cached_tokens=usage.cached_tokens * weight // total_weight
+                )
+                remaining = TokenUsage(
+                    remaining.prompt_tokens - share.prompt_tokens,
+                    remaining.completion_tokens - share.completion_tokens,
+                    remaining.cached_tokens - share.cached_tokens
+                )
+            results[item_id].usage = share
@@ -0,0 +1,562 @@
+"""
+Local mailbox sources (Maildir, mbox, directory of .eml files).
+
+Exported archives can be run through the same classification and note pipeline
+as an IMAP account, at disk speed and without a server. LocalMailboxClient
+implements the ImapClient methods used by AccountProcessor and BatchedFlagWriter
+(count_unprocessed_emails, get/iter_unprocessed_emails, get_email_by_uid,
+set_flag, set_flag_bulk, ...) on top of a local source selected with the
+'source' config section:
+
+    source:
+      type: maildir        # imap (default), maildir, mbox or eml
+      path: /archive/2019  # Maildir directory, mbox file or .eml directory
+
+IMAP flags are kept in a SQLite store (source.state_file), which also assigns
+every message a UID. UIDs are assigned in a deterministic order (sorted Maildir
+keys, mbox file order, sorted relative .eml paths) and never change once stored,
+so repeated runs over the same archive select the same emails in the same
+order; this makes a local source usable as a reproducible benchmark input.
+mbox messages are stored under their Message-ID (a SHA-256 of the raw message
+when the header is missing), not under their mailbox.mbox index: the index is
+the position in the file and shifts when an earlier message is deleted or the
+file is compacted.
+
+Usage:
+    >>> client = LocalMailboxClient({'source': {'type': 'mbox', 'path': 'archive.mbox'}})
+    >>> client.connect()
+    >>> count, uids = client.count_unprocessed_emails()
+    >>> client.set_flag(uids[0], 'AIProcessed')
+"""
+import hashlib
+import logging
+import mailbox
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from src.imap_client import (
+    DEFAULT_MAX_TEXT_PART_BYTES,
+    IMAPConnectionError,
+    IMAPFetchError,
+    ImapClient,
+    build_uid_set
+)
+
+logger = logging.getLogger(__name__)
+
+# Source types handled by LocalMailboxClient (source.type)
+LOCAL_SOURCE_TYPES = ('maildir', 'mbox', 'eml')
+
+# Location of the UID/flag database (source.state_file)
+DEFAULT_LOCAL_STATE_FILE = 'logs/local_mailbox.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    source TEXT NOT NULL,
+    message_key TEXT NOT NULL,
+    uid INTEGER NOT NULL,
+    PRIMARY KEY (source, message_key),
+    UNIQUE (source, uid)
+);
+CREATE TABLE IF NOT EXISTS flags (
+    source TEXT NOT NULL,
+    uid INTEGER NOT NULL,
+    flag TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (source, uid, flag)
+);
+"""
+
+
+class LocalMailboxStore:
+    """
+    SQLite-backed UID assignment and flag storage for local sources.
+
+    A single instance can be shared between threads; access is serialized with a lock.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open (and create if needed) the store database.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self) -> 'LocalMailboxStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def assign_uids(self, source: str, keys: Iterable[str]) -> Dict[str, int]:
+        """
+        Return the UID of every message key, assigning new UIDs where needed.
+
+        Keys seen for the first time get consecutive UIDs above the highest UID of
+        the source, in the order they are given.
+
+        Args:
+            source: Source identifier (see LocalMailboxClient.source_id)
+            keys: Message keys in delivery order
+
+        Returns:
+            Dictionary mapping message key -> UID (only for the given keys)
+        """
+        keys = list(keys)
+        with self._lock:
+            known = dict(self._conn.execute(
+                "SELECT message_key, uid FROM messages WHERE source = ?", (source,)
+            ).fetchall())
+            next_uid = max(known.values(), default=0) + 1
+            new_rows = []
+            for key in keys:
+                if key not in known:
+                    known[key] = next_uid
+                    new_rows.append((source, key, next_uid))
+                    next_uid += 1
+            if new_rows:
+                self._conn.executemany(
+                    "INSERT INTO messages (source, message_key, uid) VALUES (?, ?, ?)", new_rows
+                )
+                self._conn.commit()
+        return {key: known[key] for key in keys}
+
+    def rename_keys(self, source: str, renames: Dict[str, str]) -> None:
+        """
+        Store messages under new keys, keeping their UIDs (old keys that are unknown,
+        or whose new key is already stored, are left as they are).
+
+        Args:
+            source: Source identifier (see LocalMailboxClient.source_id)
+            renames: Dictionary mapping old message key -> new message key
+        """
+        with self._lock:
+            known = {row[0] for row in self._conn.execute(
+                "SELECT message_key FROM messages WHERE source = ?", (source,)
+            ).fetchall()}
+            rows = [
+                (new, source, old) for old, new in renames.items()
+                if old in known and new not in known
+            ]
+            if rows:
+                self._conn.executemany(
+                    "UPDATE messages SET message_key = ? WHERE source = ? AND message_key = ?", rows
+                )
+                self._conn.commit()
+
+    def flagged_uids(self, source: str, flag: str) -> Set[int]:
+        """Return the UIDs of the source that carry a flag."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT uid FROM flags WHERE source = ? AND flag = ?", (source, flag)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def add_flag(self, source: str, uids: Iterable[int], flag: str) -> None:
+        """Set a flag on several UIDs."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO flags (source, uid, flag, updated_at) VALUES (?, ?, ?, ?)",
+                [(source, int(uid), flag, now) for uid in uids]
+            )
+            self._conn.commit()
+
+    def remove_flag(self, source: str, uids: Iterable[int], flag: str) -> None:
+        """Clear a flag from several UIDs."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM flags WHERE source = ? AND uid = ? AND flag = ?",
+                [(source, int(uid), flag) for uid in uids]
+            )
+            self._conn.commit()
+
+
+class EmlDirectory:
+    """
+    Read-only directory tree of .eml files with the mailbox.Mailbox key interface.
+
+    Keys are the file paths relative to the directory (POSIX separators).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def keys(self) -> List[str]:
+        """Return the relative paths of all .eml files (sorted)."""
+        return sorted(
+            file.relative_to(self.path).as_posix()
+            for file in self.path.rglob('*')
+            if file.suffix.lower() == '.eml' and file.is_file()
+        )
+
+    def get_bytes(self, key: str) -> bytes:
+        """Return the raw message stored under a key."""
+        return (self.path / key).read_bytes()
+
+    def close(self) -> None:
+        """Nothing to release (files are read on demand)."""
+        pass
+
+
+def _dry_run_warning(message: str) -> bool:
+    """Report a flag change that dry-run mode skips; returns True when in dry-run mode."""
+    try:
+        from src.dry_run import is_dry_run
+        from src.dry_run_output import DryRunOutput
+        dry_run = is_dry_run()
+    except ImportError:
+        dry_run = False
+
+    if dry_run:
+        try:
+            output = DryRunOutput()
+            output.warning(f"Would {message}")
+        except Exception:
+            logger.info(f"[DRY RUN] Would {message}")
+    return dry_run
+
+
+class LocalMailboxClient(ImapClient):
+    """
+    ImapClient replacement that reads emails from a Maildir, mbox file or .eml directory.
+
+    Sources are opened read-only; processed state lives in a LocalMailboxStore.
+    Only the account query 'ALL' can be evaluated locally, other imap.query values
+    are ignored with a warning.
+    """
+
+    def __init__(self, config: Dict[str, Any], store: Optional[LocalMailboxStore] = None):
+        """
+        Initialize the client from an account configuration (does not open the source yet).
+
+        Args:
+            config: Account configuration with a 'source' section (type, path, state_file);
+                    imap.processed_tag, imap.query and imap.max_text_part_bytes are honoured
+            store: Optional store to use instead of opening source.state_file
+
+        Raises:
+            IMAPConnectionError: If source.type or source.path is missing or invalid
+        """
+        self._source_config = config.get('source', {}) or {}
+        self._imap_config = config.get('imap', {}) or {}
+        self._account_config = config
+        super().__init__(processed_tag=self._imap_config.get('processed_tag', 'AIProcessed'))
+        self.max_text_part_bytes = self._imap_config.get('max_text_part_bytes', DEFAULT_MAX_TEXT_PART_BYTES)
+
+        self.source_type = str(self._source_config.get('type', '')).lower()
+        if self.source_type not in LOCAL_SOURCE_TYPES:
+            raise IMAPConnectionError(
+                f"Unsupported local source type {self.source_type!r} "
+                f"(expected one of: {', '.join(LOCAL_SOURCE_TYPES)})"
+            )
+        if not self._source_config.get('path'):
+            raise IMAPConnectionError("source.path is required for local mailbox sources")
+        self.path = Path(self._source_config['path']).expanduser()
+
+        self._store = store
+        self._owns_store = store is None
+        self._mailbox: Any = None
+        self._keys_by_uid: Dict[str, str] = {}
+        self._mailbox_keys: Dict[str, Any] = {}
+
+    @property
+    def source_id(self) -> str:
+        """Identifier of the source in the store (type and absolute path)."""
+        return f"{self.source_type}:{self.path.resolve()}"
+
+    def connect(self) -> None:
+        """
+        Open the source and assign UIDs to its messages.
+
+        Raises:
+            IMAPConnectionError: If the source does not exist or cannot be read
+        """
+        if self._connected:
+            return
+        if not self.path.exists():
+            raise IMAPConnectionError(f"Local {self.source_type} source not found: {self.path}")
+
+        try:
+            if self.source_type == 'maildir':
+                self._mailbox = mailbox.Maildir(str(self.path), factory=None, create=False)
+            elif self.source_type == 'mbox':
+                self._mailbox = mailbox.mbox(str(self.path), factory=None, create=False)
+            else:
+                self._mailbox = EmlDirectory(self.path)
+            if self._store is None:
+                state_file = self._source_config.get('state_file') or DEFAULT_LOCAL_STATE_FILE
+                self._store = LocalMailboxStore(state_file)
+        except (OSError, mailbox.Error, sqlite3.Error) as e:
+            raise IMAPConnectionError(f"Failed to open local {self.source_type} source {self.path}: {e}") from e
+
+        self._connected = True
+        self._scan()
+
+        query = self._imap_config.get('query', 'ALL')
+        if query.strip().upper() != 'ALL':
+            logger.warning(f"imap.query {query!r} is not supported for local sources, using ALL")
+        logger.info(f"Opened local {self.source_type} source {self.path} ({len(self._keys_by_uid)} email(s))")
+
+    def disconnect(self) -> None:
+        """Close the source (and the store, if this client opened it)."""
+        if not self._connected:
+            return
+        try:
+            self._mailbox.close()
+        except Exception as e:
+            logger.warning(f"Error closing local source {self.path}: {e}")
+        if self._owns_store and self._store is not None:
+            self._store.close()
+            self._store = None
+        self._mailbox = None
+        self._keys_by_uid = {}
+        self._mailbox_keys = {}
+        self._mailbox_status = {}
+        self._connected = False
+
+    def _ensure_connected(self) -> None:
+        """Ensure the source is open."""
+        if not self._connected:
+            raise IMAPConnectionError("Local source is not open. Call connect() first.")
+
+    def _scan(self) -> int:
+        """
+        Re-read the message keys of the source and assign UIDs to new messages.
+
+        Returns:
+            Number of messages that were not known before
+        """
+        keys = self._mailbox.keys()
+        if self.source_type == 'maildir':
+            keys = sorted(keys)
+        if self.source_type == 'mbox':
+            self._mailbox_keys = self._mbox_message_keys(keys)
+            # Stores written before mbox messages were keyed by Message-ID used the index
+            self._store.rename_keys(self.source_id, {
+                str(index): key for key, index in self._mailbox_keys.items()
+            })
+        else:
+            self._mailbox_keys = {str(key): key for key in keys}
+        uids = self._store.assign_uids(self.source_id, self._mailbox_keys)
+        known = len(self._keys_by_uid)
+        self._keys_by_uid = {str(uid): key for key, uid in sorted(uids.items(), key=lambda item: item[1])}
+        self._mailbox_status = {
+            'mailbox': str(self.path),
+            'uidvalidity': None,
+            'uidnext': max(uids.values(), default=0) + 1,
+            'highest_modseq': None
+        }
+        return len(self._keys_by_uid) - known
+
+    def _mbox_message_keys(self, indexes: Iterable[int]) -> Dict[str, int]:
+        """
+        Return a stable key for every mbox message, mapped to its current index.
+
+        The key is the Message-ID, or 'sha256:<digest>' of the raw message when the
+        header is missing; repeated keys get a '#<n>' suffix in file order.
+        """
+        keys: Dict[str, int] = {}
+        for index in indexes:
+            raw = self._mailbox.get_bytes(index)
+            key = ' '.join(str(BytesHeaderParser().parsebytes(raw).get('Message-ID', '')).split())
+            if not key:
+                key = 'sha256:' + hashlib.sha256(raw).hexdigest()
+            unique_key, count = key, 1
+            while unique_key in keys:
+                count += 1
+                unique_key = f"{key}#{count}"
+            keys[unique_key] = index
+        return keys
+
+    def _matching_uids(self, force_reprocess: bool, min_uid: Optional[int]) -> List[str]:
+        """Return all UIDs of the source (ascending), without processed ones unless forced."""
+        uids = list(self._keys_by_uid)
+        if not force_reprocess:
+            processed = self._store.flagged_uids(self.source_id, self._processed_tag)
+            uids = [uid for uid in uids if int(uid) not in processed]
+        if min_uid is not None:
+            uids = [uid for uid in uids if int(uid) > min_uid]
+        return uids
+
+    def count_unprocessed_emails(
+        self,
+        force_reprocess: bool = False,
+        min_uid: Optional[int] = None
+    ) -> tuple[int, List[str]]:
+        """
+        Count emails of the source that do not carry processed_tag.
+
+        Args:
+            force_reprocess: If True, include processed emails
+            min_uid: Optional minimum UID (only UIDs > min_uid are counted)
+
+        Returns:
+            Tuple of (email_count, list_of_uids)
+        """
+        self._ensure_connected()
+        uids = self._matching_uids(force_reprocess, min_uid)
+        logger.info(f"Found {len(uids)} email(s) in local source" + (" (including processed)" if force_reprocess else ""))
+        return (len(uids), uids)
+
+    def get_email_by_uid(self, uid: str) -> Dict[str, Any]:
+        """
+        Read and parse one email of the source.
+
+        Raises:
+            IMAPFetchError: If the UID is unknown or the message cannot be read
+        """
+        self._ensure_connected()
+        key = self._keys_by_uid.get(str(uid))
+        if key is None:
+            raise IMAPFetchError(f"Email UID {uid} not found in local source {self.path}")
+        try:
+            raw = self._mailbox.get_bytes(self._mailbox_keys[key])
+        except (OSError, KeyError) as e:
+            raise IMAPFetchError(f"Failed to read email UID {uid} from {self.path}: {e}") from e
+        return self._parse_email_message(str(uid), raw)
+
+    def get_emails_by_uids(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Read several emails; UIDs that cannot be read are skipped with a warning."""
+        return {email['uid']: email for email in self._iter_emails(uids)}
+
+    def _iter_emails(self, uids: List[str]) -> Iterator[Dict[str, Any]]:
+        for uid in uids:
+            try:
+                yield self.get_email_by_uid(uid)
+            except IMAPFetchError as e:
+                logger.warning(f"Skipping email UID {uid}: {e}")
+
+    def get_unprocessed_emails(
+        self,
+        max_emails: Optional[int] = None,
+        force_reprocess: bool = False,
+        uids: Optional[List[str]] = None,
+        min_uid: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Read unprocessed emails (same selection arguments as ConfigurableImapClient).
+
+        Args:
+            max_emails: Maximum number of emails to read
+            force_reprocess: If True, include processed emails
+            uids: Optional pre-selected UIDs (for safety interlock flow)
+            min_uid: Optional minimum UID (only UIDs > min_uid are read)
+        """
+        return list(self.iter_unprocessed_emails(max_emails, force_reprocess, uids, min_uid))
+
+    def iter_unprocessed_emails(
+        self,
+        max_emails: Optional[int] = None,
+        force_reprocess: bool = False,
+        uids: Optional[List[str]] = None,
+        min_uid: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream unprocessed emails; messages are read from disk one at a time."""
+        self._ensure_connected()
+        if uids is None:
+            uids = self._matching_uids(force_reprocess, min_uid)
+        elif min_uid is not None:
+            uids = [uid for uid in uids if int(uid) > min_uid]
+        max_emails = max_emails or self._account_config.get('processing', {}).get('max_emails_per_run')
+        if max_emails and len(uids) > max_emails:
+            logger.info(f"Limiting to {max_emails} emails (found {len(uids)})")
+            uids = uids[:max_emails]
+        return self._iter_emails(uids)
+
+    def get_headers_by_uids(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return parsed emails (headers included); reading locally costs the same."""
+        return self.get_emails_by_uids(uids)
+
+    def _known_uids(self, uids: List[str]) -> List[int]:
+        known = [int(uid) for uid in uids if str(uid) in self._keys_by_uid]
+        if len(known) != len(uids):
+            logger.warning(f"Ignoring unknown UIDs for local source {self.path}")
+        return known
+
+    def set_flag(self, uid: str, flag: str) -> bool:
+        """Set a flag on an email in the local store."""
+        return self.set_flag_bulk([uid], flag)
+
+    def set_flag_bulk(self, uids: List[str], flag: str) -> bool:
+        """Set a flag on several emails in one store transaction."""
+        if not uids:
+            return True
+        if _dry_run_warning(f"set flag '{flag}' on email UIDs {build_uid_set(uids)}"):
+            return True
+        self._ensure_connected()
+        known = self._known_uids(uids)
+        if not known:
+            return False
+        try:
+            self._store.add_flag(self.source_id, known, flag)
+        except sqlite3.Error as e:
+            logger.error(f"Error setting flag '{flag}' on email UIDs {build_uid_set(uids)}: {e}")
+            return False
+        return len(known) == len(uids)
+
+    def clear_flag(self, uid: str, flag: str) -> bool:
+        """Clear a flag from an email in the local store."""
+        return self.clear_flag_bulk([uid], flag)
+
+    def clear_flag_bulk(self, uids: List[str], flag: str) -> bool:
+        """Clear a flag from several emails in one store transaction."""
+        if not uids:
+            return True
+        if _dry_run_warning(f"clear flag '{flag}' from email UIDs {build_uid_set(uids)}"):
+            return True
+        self._ensure_connected()
+        try:
+            self._store.remove_flag(self.source_id, self._known_uids(uids), flag)
+        except sqlite3.Error as e:
+            logger.error(f"Error clearing flag '{flag}' from email UIDs {build_uid_set(uids)}: {e}")
+            return False
+        return True
+
+    def has_flag(self, uid: str, flag: str) -> bool:
+        """Check whether an email carries a flag in the local store."""
+        self._ensure_connected()
+        return int(uid) in self._store.flagged_uids(self.source_id, flag)
+
+    def wait_for_new_mail(
+        self,
+        timeout: float,
+        poll_interval: float,
+        stop_event: Optional[threading.Event] = None
+    ) -> bool:
+        """
+        Wait poll_interval seconds, then rescan the source for new messages.
+
+        Returns:
+            True if messages were added to the source, False otherwise or on stop
+        """
+        self._ensure_connected()
+        if stop_event is not None:
+            if stop_event.wait(poll_interval):
+                return False
+        else:
+            time.sleep(poll_interval)
+        if self.source_type == 'mbox':
+            # mailbox.mbox caches its table of contents
+            self._mailbox.close()
+            self._mailbox = mailbox.mbox(str(self.path), factory=None, create=False)
+        return self._scan() > 0
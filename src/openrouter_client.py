@@ -6,12 +6,15 @@ Provides OpenAI-compatible interface to OpenRouter API.
 import sys
 import os
 import requests
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
 # Fix import path for when running as script
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.config import ConfigManager
+from src.http_session import get_shared_session
+from src.llm_client import estimate_tokens
+from src.rate_limiter import RateLimiter, get_shared_rate_limiter, parse_retry_after
 
 class OpenRouterAPIError(Exception):
     """
@@ -25,6 +28,16 @@ class OpenRouterAPIError(Exception):
     """
     pass
 
+class OpenRouterRateLimitError(OpenRouterAPIError):
+    """
+    Raised when OpenRouter answers HTTP 429.
+    
+    retry_after holds the seconds requested by the Retry-After header (or None).
+    """
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 def get_openrouter_headers(api_key: str) -> Dict[str, str]:
     '''
     Returns authentication and content-type headers for OpenRouter API (OpenAI-compatible).
@@ -37,22 +50,44 @@ def get_openrouter_headers(api_key: str) -> Dict[str, str]:
 class OpenRouterClient:
     '''
     Simple OpenAI-compatible client for OpenRouter API.
+    Requests go through a keep-alive session (the shared one from
+    src.http_session unless a session is passed in) and the process-wide
+    rate limiter from src.rate_limiter (shared with LLMClient).
     Usage:
         client = OpenRouterClient(api_key, api_url)
         response = client.chat_completion({...})
     '''
-    def __init__(self, api_key: str, api_url: str = "https://openrouter.ai/api/v1"):
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str = "https://openrouter.ai/api/v1",
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
         self.api_key = api_key
         self.api_url = api_url.rstrip("/")
+        self.session = session if session is not None else get_shared_session()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_shared_rate_limiter()
 
     def chat_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         '''
         Calls /chat/completions endpoint with the provided payload dict (OpenAI-compatible).
-        Raises OpenRouterAPIError on HTTP/API errors.
+        Raises OpenRouterRateLimitError on HTTP 429, OpenRouterAPIError on other HTTP/API errors.
         '''
         url = self.api_url + "/chat/completions"
         headers = get_openrouter_headers(self.api_key)
-        response = requests.post(url, json=payload, headers=headers, timeout=60)
+        prompt = "".join(str(message.get("content", "")) for message in payload.get("messages", []))
+        rate_limited = False
+        retry_after = None
+        self.rate_limiter.acquire(tokens=estimate_tokens(prompt))
+        try:
+            response = self.session.post(url, json=payload, headers=headers, timeout=60)
+            if response.status_code == 429:
+                rate_limited = True
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                raise OpenRouterRateLimitError(f"HTTP 429: {response.text}", retry_after=retry_after)
+        finally:
+            self.rate_limiter.release(rate_limited=rate_limited, retry_after=retry_after)
         try:
             response.raise_for_status()
         except requests.HTTPError as e:
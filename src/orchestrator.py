@@ -35,8 +35,10 @@ See Also:
     - src/cli_v4.py - V4 CLI integration
 """
 import logging
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
@@ -52,6 +54,7 @@ except ImportError:
 # V4 imports
 from src.logging_context import set_account_context, set_correlation_id, clear_context, with_account_context
 from src.logging_helpers import log_account_start, log_account_end, log_config_overrides, log_error_with_context
+from src.concurrency import propagate_context
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +76,7 @@ from src.content_parser import parse_html_content
 from src.llm_client import LLMClient
 from src.note_generator import NoteGenerator
 from src.decision_logic import DecisionLogic
+from src.token_usage import TokenUsage
 
 
 @dataclass
@@ -86,12 +90,22 @@ class OrchestrationResult:
         failed_accounts: Number of accounts that failed
         account_results: Dictionary mapping account_id to (success: bool, error: Optional[str])
         total_time: Total orchestration time (seconds)
+        token_usage: Dictionary mapping account_id to the LLM tokens used by its run
     """
     total_accounts: int
     successful_accounts: int
     failed_accounts: int
     account_results: Dict[str, Tuple[bool, Optional[str]]] = field(default_factory=dict)
     total_time: float = 0.0
+    token_usage: Dict[str, TokenUsage] = field(default_factory=dict)
+    
+    @property
+    def total_token_usage(self) -> TokenUsage:
+        """LLM tokens used by all accounts of the run."""
+        total = TokenUsage()
+        for usage in self.token_usage.values():
+            total.add(usage)
+        return total
     
     def __str__(self) -> str:
         """Format orchestration result for display."""
@@ -174,6 +188,9 @@ class MasterOrchestrator:
         # Account selection (set during run)
         self.accounts_to_process: List[str] = []
         
+        # LLM tokens used per account in the current run (filled by _process_account)
+        self._token_usage: Dict[str, TokenUsage] = {}
+        
         # Note: Components are now created per-account with account-specific config
         # No longer using shared instances to support per-account configuration
         
@@ -191,6 +208,8 @@ class MasterOrchestrator:
         - --config-dir <path>: Override config directory (default: 'config')
         - --dry-run: Run in preview mode (no side effects)
         - --log-level <level>: Set logging level (DEBUG, INFO, WARN, ERROR)
+        - --parallel-accounts <n>: Process up to n accounts at the same time
+        - --watch: Keep processing new mail as it arrives until interrupted
         
         Args:
             argv: Optional list of command-line arguments (default: sys.argv[1:])
@@ -211,6 +230,8 @@ Examples:
   %(prog)s --all-accounts                   # Process all available accounts
   %(prog)s --account work --dry-run         # Preview mode for single account
   %(prog)s --all-accounts --log-level DEBUG # Process all with debug logging
+  %(prog)s --all-accounts --parallel-accounts 4  # Process up to 4 accounts at once
+  %(prog)s --all-accounts --watch           # Process new mail as it arrives
             """
         )
         
@@ -288,6 +309,17 @@ Examples:
             type=int,
             help='Only process emails with UID greater than this value. Useful for incremental processing.'
         )
+        parser.add_argument(
+            '--parallel-accounts',
+            type=int,
+            default=1,
+            help='Number of accounts to process at the same time (default: 1, sequential). Each account keeps its own IMAP connection and error isolation.'
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Keep running: hold one IMAP connection per account and process new mail as it arrives (IMAP IDLE, NOOP polling fallback). Stop with Ctrl+C.'
+        )
         
         return parser.parse_args(argv)
     
@@ -465,6 +497,8 @@ Examples:
         
         # Create components with account-specific configuration
         # Each account gets its own instances with account-specific config
+        # (LLM clients share the process-wide keep-alive HTTP session, so pooled
+        # connections to the API are reused from one account to the next)
         llm_client = LLMClient(account_config)
         note_generator = NoteGenerator(account_config)
         decision_logic = DecisionLogic(account_config)
@@ -488,6 +522,239 @@ Examples:
         
         return processor
     
+    def _process_account(
+        self,
+        account_id: str,
+        args: argparse.Namespace,
+        correlation_id: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Create, set up, run and tear down the AccountProcessor for one account.
+        
+        All errors are caught and returned, so a failing account never affects the
+        others (sequential or parallel).
+        
+        Args:
+            account_id: Account to process
+            args: Parsed CLI arguments (processing options)
+            correlation_id: Correlation ID of this orchestration run
+        
+        Returns:
+            Tuple of (success, error message or None)
+        """
+        account_start_time = time.time()
+        processor = None
+        
+        # Set account context for this account's processing
+        with with_account_context(account_id=account_id, correlation_id=correlation_id):
+            self.logger.info("=" * 60)
+            log_account_start(account_id, correlation_id=correlation_id)
+            self.logger.info("=" * 60)
+            
+            try:
+                # Create AccountProcessor for this account
+                processor = self.create_account_processor(account_id)
+                
+                # Set up account (IMAP connection, etc.)
+                processor.setup()
+                
+                # Parse date strings if provided
+                from src.date_query_builder import parse_date_string
+                from datetime import datetime
+                after_date = None
+                before_date = None
+                
+                if hasattr(args, 'after') and args.after:
+                    try:
+                        after_date = parse_date_string(args.after)
+                        self.logger.info(f"Date filter --after: {after_date}")
+                    except ValueError as e:
+                        self.logger.error(f"Invalid --after date format: {e}")
+                        raise ValueError(f"Invalid --after date format: {e}")
+                
+                if hasattr(args, 'before') and args.before:
+                    try:
+                        before_date = parse_date_string(args.before)
+                        self.logger.info(f"Date filter --before: {before_date}")
+                    except ValueError as e:
+                        self.logger.error(f"Invalid --before date format: {e}")
+                        raise ValueError(f"Invalid --before date format: {e}")
+                
+                # Run processing with options from CLI
+                processor.run(
+                    force_reprocess=args.force_reprocess,
+                    uid=args.uid,
+                    max_emails=args.max_emails,
+                    debug_prompt=args.debug_prompt,
+                    min_uid=getattr(args, 'min_uid', None),
+                    after_date=after_date,
+                    before_date=before_date
+                )
+                if isinstance(processor.token_usage, TokenUsage):
+                    self._token_usage[account_id] = processor.token_usage
+                
+                # Teardown (cleanup, close connections)
+                processor.teardown()
+                
+                # Record success
+                account_time = time.time() - account_start_time
+                outcome = (True, None)
+                log_account_end(account_id, success=True, processing_time=account_time, correlation_id=correlation_id)
+                
+            except AccountProcessorSetupError as e:
+                # Setup failed (e.g., IMAP connection error)
+                account_time = time.time() - account_start_time
+                error_msg = f"Setup failed: {e}"
+                outcome = (False, error_msg)
+                log_account_end(account_id, success=False, processing_time=account_time, correlation_id=correlation_id, error=error_msg)
+                log_error_with_context(e, account_id=account_id, correlation_id=correlation_id, operation='setup')
+                
+            except AccountProcessorRunError as e:
+                # Processing failed
+                account_time = time.time() - account_start_time
+                error_msg = f"Processing failed: {e}"
+                outcome = (False, error_msg)
+                log_account_end(account_id, success=False, processing_time=account_time, correlation_id=correlation_id, error=error_msg)
+                log_error_with_context(e, account_id=account_id, correlation_id=correlation_id, operation='processing')
+                
+            except AccountProcessorError as e:
+                # General AccountProcessor error
+                account_time = time.time() - account_start_time
+                error_msg = f"AccountProcessor error: {e}"
+                outcome = (False, error_msg)
+                log_account_end(account_id, success=False, processing_time=account_time, correlation_id=correlation_id, error=error_msg)
+                log_error_with_context(e, account_id=account_id, correlation_id=correlation_id, operation='account_processing')
+                
+            except Exception as e:
+                # Unexpected error
+                account_time = time.time() - account_start_time
+                error_msg = f"Unexpected error: {type(e).__name__}: {e}"
+                outcome = (False, error_msg)
+                log_account_end(account_id, success=False, processing_time=account_time, correlation_id=correlation_id, error=error_msg)
+                log_error_with_context(e, account_id=account_id, correlation_id=correlation_id, operation='unexpected')
+                
+            finally:
+                # Ensure cleanup happens even on failure
+                if processor is not None:
+                    try:
+                        processor.teardown()
+                    except Exception as cleanup_error:
+                        self.logger.warning(
+                            f"Error during cleanup for account '{account_id}': {cleanup_error}",
+                            exc_info=True
+                        )
+        
+        return outcome
+    
+    def _process_accounts_in_parallel(
+        self,
+        args: argparse.Namespace,
+        correlation_id: str,
+        max_workers: int
+    ):
+        """
+        Process the selected accounts on a pool of worker threads.
+        
+        Each account still gets its own AccountProcessor (and IMAP connection), so
+        accounts stay isolated; the total wall time approaches that of the slowest
+        account. Logging context and dry-run mode are carried into the workers.
+        
+        Args:
+            args: Parsed CLI arguments (processing options)
+            correlation_id: Correlation ID of this orchestration run
+            max_workers: Maximum number of accounts processed at the same time
+        
+        Yields:
+            (account_id, (success, error message or None)) in account selection order
+        """
+        account_ids = list(self._iter_accounts())
+        max_workers = min(max_workers, len(account_ids))
+        self.logger.info(f"Processing {len(account_ids)} accounts with {max_workers} parallel workers")
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='account') as executor:
+            futures = [
+                (account_id, executor.submit(
+                    propagate_context(self._process_account), account_id, args, correlation_id
+                ))
+                for account_id in account_ids
+            ]
+            for account_id, future in futures:
+                yield account_id, future.result()
+    
+    def _watch_account(
+        self,
+        account_id: str,
+        args: argparse.Namespace,
+        correlation_id: str,
+        stop_event: threading.Event
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Watch one account for new mail until stop_event is set (see src.watch).
+        
+        Args:
+            account_id: Account to watch
+            args: Parsed CLI arguments (processing options)
+            correlation_id: Correlation ID of this orchestration run
+            stop_event: Event that ends watching when set
+        
+        Returns:
+            Tuple of (success, error message or None)
+        """
+        from src.watch import watch_account
+        
+        with with_account_context(account_id=account_id, correlation_id=correlation_id):
+            try:
+                processor = self.create_account_processor(account_id)
+                runs = watch_account(
+                    processor,
+                    stop_event,
+                    run_options={
+                        'max_emails': args.max_emails,
+                        'debug_prompt': args.debug_prompt
+                    }
+                )
+                self.logger.info(f"Watch ended for account {account_id} ({runs} run(s))")
+                return (True, None)
+            except Exception as e:
+                error_msg = f"Watch failed: {type(e).__name__}: {e}"
+                log_error_with_context(e, account_id=account_id, correlation_id=correlation_id, operation='watch')
+                return (False, error_msg)
+    
+    def _watch_accounts(self, args: argparse.Namespace, correlation_id: str):
+        """
+        Watch all selected accounts at once, one thread and IMAP connection each.
+        
+        Runs until interrupted (Ctrl+C), then stops every watcher and waits for them
+        to tear down.
+        
+        Args:
+            args: Parsed CLI arguments (processing options)
+            correlation_id: Correlation ID of this orchestration run
+        
+        Yields:
+            (account_id, (success, error message or None)) in account selection order
+        """
+        account_ids = list(self._iter_accounts())
+        stop_event = threading.Event()
+        self.logger.info(f"Watching {len(account_ids)} account(s) for new mail (Ctrl+C to stop)")
+        
+        with ThreadPoolExecutor(max_workers=len(account_ids), thread_name_prefix='watch') as executor:
+            futures = [
+                (account_id, executor.submit(
+                    propagate_context(self._watch_account), account_id, args, correlation_id, stop_event
+                ))
+                for account_id in account_ids
+            ]
+            try:
+                while not all(future.done() for _, future in futures):
+                    wait([future for _, future in futures], timeout=1.0)
+            except KeyboardInterrupt:
+                self.logger.info("Stopping watch mode...")
+            finally:
+                stop_event.set()
+            for account_id, future in futures:
+                yield account_id, future.result()
+    
     def run(self, argv: Optional[List[str]] = None) -> OrchestrationResult:
         """
         Main entry point: parse CLI args, select accounts, and orchestrate processing.
@@ -495,7 +762,7 @@ Examples:
         This method coordinates the complete multi-account processing flow:
         1. Parse CLI arguments
         2. Select accounts to process
-        3. Iterate through accounts
+        3. Iterate through accounts (or run up to --parallel-accounts of them at once)
         4. Create isolated AccountProcessor for each account
         5. Execute processing with robust error handling
         6. Aggregate results and return summary
@@ -549,6 +816,14 @@ Examples:
                 logging.getLogger().setLevel(getattr(logging, args.log_level))
                 self.logger.info(f"Logging level set to: {args.log_level}")
             
+            if getattr(args, 'parallel_accounts', None) is not None and args.parallel_accounts < 1:
+                raise ValueError(f"--parallel-accounts must be at least 1, got {args.parallel_accounts}")
+            
+            watch = getattr(args, 'watch', False)
+            if watch and (args.uid or args.force_reprocess
+                          or getattr(args, 'after', None) or getattr(args, 'before', None)):
+                raise ValueError("--watch cannot be combined with --uid, --force-reprocess, --after or --before")
+            
             # Step 2: Select accounts
             account_ids = self.select_accounts(args)
             result.total_accounts = len(account_ids)
@@ -559,111 +834,25 @@ Examples:
                 return result
             
             # Step 3: Process each account with error isolation
-            for account_id in self._iter_accounts():
-                account_start_time = time.time()
-                processor = None
-                
-                # Set account context for this account's processing
-                with with_account_context(account_id=account_id, correlation_id=correlation_id):
-                    self.logger.info("=" * 60)
-                    log_account_start(account_id, correlation_id=correlation_id)
-                    self.logger.info("=" * 60)
-                    
-                    try:
-                        # Create AccountProcessor for this account
-                        processor = self.create_account_processor(account_id)
-                        
-                        # Set up account (IMAP connection, etc.)
-                        processor.setup()
-                        
-                        # Parse date strings if provided
-                        from src.date_query_builder import parse_date_string
-                        from datetime import datetime
-                        after_date = None
-                        before_date = None
-                        
-                        if hasattr(args, 'after') and args.after:
-                            try:
-                                after_date = parse_date_string(args.after)
-                                self.logger.info(f"Date filter --after: {after_date}")
-                            except ValueError as e:
-                                self.logger.error(f"Invalid --after date format: {e}")
-                                raise ValueError(f"Invalid --after date format: {e}")
-                        
-                        if hasattr(args, 'before') and args.before:
-                            try:
-                                before_date = parse_date_string(args.before)
-                                self.logger.info(f"Date filter --before: {before_date}")
-                            except ValueError as e:
-                                self.logger.error(f"Invalid --before date format: {e}")
-                                raise ValueError(f"Invalid --before date format: {e}")
-                        
-                        # Run processing with options from CLI
-                        processor.run(
-                            force_reprocess=args.force_reprocess,
-                            uid=args.uid,
-                            max_emails=args.max_emails,
-                            debug_prompt=args.debug_prompt,
-                            min_uid=getattr(args, 'min_uid', None),
-                            after_date=after_date,
-                            before_date=before_date
-                        )
-                        
-                        # Teardown (cleanup, close connections)
-                        processor.teardown()
-                        
-                        # Record success
-                        account_time = time.time() - account_start_time
-                        result.successful_accounts += 1
-                        result.account_results[account_id] = (True, None)
-                        log_account_end(account_id, success=True, processing_time=account_time, correlation_id=correlation_id)
-                        
-                    except AccountProcessorSetupError as e:
-                        # Setup failed (e.g., IMAP connection error)
-                        account_time = time.time() - account_start_time
-                        result.failed_accounts += 1
-                        error_msg = f"Setup failed: {e}"
-                        result.account_results[account_id] = (False, error_msg)
-                        log_account_end(account_id, success=False, processing_time=account_time, correlation_id=correlation_id, error=error_msg)
-                        log_error_with_context(e, account_id=account_id, correlation_id=correlation_id, operation='setup')
-                        
-                    except AccountProcessorRunError as e:
-                        # Processing failed
-                        account_time = time.time() - account_start_time
-                        result.failed_accounts += 1
-                        error_msg = f"Processing failed: {e}"
-                        result.account_results[account_id] = (False, error_msg)
-                        log_account_end(account_id, success=False, processing_time=account_time, correlation_id=correlation_id, error=error_msg)
-                        log_error_with_context(e, account_id=account_id, correlation_id=correlation_id, operation='processing')
-                        
-                    except AccountProcessorError as e:
-                        # General AccountProcessor error
-                        account_time = time.time() - account_start_time
-                        result.failed_accounts += 1
-                        error_msg = f"AccountProcessor error: {e}"
-                        result.account_results[account_id] = (False, error_msg)
-                        log_account_end(account_id, success=False, processing_time=account_time, correlation_id=correlation_id, error=error_msg)
-                        log_error_with_context(e, account_id=account_id, correlation_id=correlation_id, operation='account_processing')
-                        
-                    except Exception as e:
-                        # Unexpected error
-                        account_time = time.time() - account_start_time
-                        result.failed_accounts += 1
-                        error_msg = f"Unexpected error: {type(e).__name__}: {e}"
-                        result.account_results[account_id] = (False, error_msg)
-                        log_account_end(account_id, success=False, processing_time=account_time, correlation_id=correlation_id, error=error_msg)
-                        log_error_with_context(e, account_id=account_id, correlation_id=correlation_id, operation='unexpected')
-                        
-                    finally:
-                        # Ensure cleanup happens even on failure
-                        if processor is not None:
-                            try:
-                                processor.teardown()
-                            except Exception as cleanup_error:
-                                self.logger.warning(
-                                    f"Error during cleanup for account '{account_id}': {cleanup_error}",
-                                    exc_info=True
-                                )
+            parallel_accounts = getattr(args, 'parallel_accounts', None) or 1
+            if watch:
+                outcomes = self._watch_accounts(args, correlation_id)
+            elif parallel_accounts > 1 and len(account_ids) > 1:
+                outcomes = self._process_accounts_in_parallel(args, correlation_id, parallel_accounts)
+            else:
+                outcomes = (
+                    (account_id, self._process_account(account_id, args, correlation_id))
+                    for account_id in self._iter_accounts()
+                )
+            
+            for account_id, (success, error_msg) in outcomes:
+                if success:
+                    result.successful_accounts += 1
+                else:
+                    result.failed_accounts += 1
+                result.account_results[account_id] = (success, error_msg)
+                if account_id in self._token_usage:
+                    result.token_usage[account_id] = self._token_usage.pop(account_id)
             
             # Step 4: Generate summary
             result.total_time = time.time() - start_time
@@ -675,6 +864,12 @@ Examples:
             self.logger.info(f"  [OK] Successful: {result.successful_accounts}")
             self.logger.info(f"  [FAILED] Failed: {result.failed_accounts}")
             self.logger.info(f"Total time: {result.total_time:.2f}s")
+            total_usage = result.total_token_usage
+            if total_usage.total_tokens:
+                self.logger.info(
+                    f"LLM tokens: prompt={total_usage.prompt_tokens:,} "
+                    f"(cached {total_usage.cached_tokens:,}), completion={total_usage.completion_tokens:,}"
+                )
             
             if result.failed_accounts > 0:
                 self.logger.warning("Some accounts failed processing - check logs for details")
@@ -0,0 +1,288 @@
+"""
+Process-wide rate limiter for LLM API calls.
+
+LLMClient and OpenRouterClient share one RateLimiter per process, so accounts
+processed by MasterOrchestrator and concurrent classification workers draw from
+the same budget instead of each tripping the provider's limits on its own.
+
+The limiter combines:
+- A request token bucket (openrouter.max_requests_per_second)
+- A prompt token bucket (openrouter.max_tokens_per_minute)
+- AIMD concurrency control: every HTTP 429 halves the number of requests allowed
+  in flight, each success raises it again by about one request per round trip
+- Retry-After: after a 429, no request is sent until the server's delay passed
+
+Usage:
+    >>> from src.rate_limiter import get_shared_rate_limiter
+    >>>
+    >>> limiter = get_shared_rate_limiter(requests_per_second=5, tokens_per_minute=200000)
+    >>> limiter.acquire(tokens=1200)
+    >>> try:
+    ...     response = session.post(url, json=payload, headers=headers, timeout=60)
+    ... finally:
+    ...     limiter.release(
+    ...         rate_limited=response.status_code == 429,
+    ...         retry_after=parse_retry_after(response.headers.get('Retry-After'))
+    ...     )
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds to pause all requests after a 429 without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+
+# Upper bound for a server-requested pause (protects against bogus headers)
+MAX_RETRY_AFTER = 300.0
+
+# Window used to report the observed request rate
+RATE_WINDOW_SECONDS = 60.0
+
+# Longest single wait before the limiter re-checks (e.g. for a released slot)
+_MAX_WAIT_SECONDS = 1.0
+
+_lock = threading.Lock()
+_shared_limiter: Optional['RateLimiter'] = None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP date).
+
+    Args:
+        value: Header value, or None if the header is missing
+
+    Returns:
+        Delay in seconds (capped at MAX_RETRY_AFTER), or None if missing or invalid
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+class RateLimiter:
+    """
+    Thread-safe request/token rate limiter with AIMD concurrency control.
+
+    Callers pair every acquire() with one release(). Limits that are None are not
+    enforced; with no limits and no 429 seen, acquire() never waits.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[int] = None
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_second: Sustained request rate (None = unlimited)
+            tokens_per_minute: Sustained prompt tokens per minute (None = unlimited)
+        """
+        self._condition = threading.Condition()
+        self.requests_per_second: Optional[float] = None
+        self.tokens_per_minute: Optional[int] = None
+        self._request_allowance = 0.0
+        self._token_allowance = 0.0
+        self._refilled_at = time.monotonic()
+        self.configure(requests_per_second, tokens_per_minute)
+
+        # AIMD: None = no concurrency limit (until the first 429)
+        self._concurrency_limit: Optional[float] = None
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._blocked_until = 0.0
+
+        self._waiting = 0
+        self._peak_waiting = 0
+        self._started = deque()
+        self.rate_limited_count = 0
+
+    def configure(
+        self,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[int] = None
+    ) -> None:
+        """
+        Apply limits; a limit that is already set only ever gets stricter.
+
+        Args:
+            requests_per_second: Sustained request rate (None = keep current)
+            tokens_per_minute: Sustained prompt tokens per minute (None = keep current)
+        """
+        with self._condition:
+            if requests_per_second is not None and (
+                self.requests_per_second is None or requests_per_second < self.requests_per_second
+            ):
+                first = self.requests_per_second is None
+                self.requests_per_second = float(requests_per_second)
+                self._request_allowance = self._request_capacity if first else \
+                    min(self._request_allowance, self._request_capacity)
+            if tokens_per_minute is not None and (
+                self.tokens_per_minute is None or tokens_per_minute < self.tokens_per_minute
+            ):
+                first = self.tokens_per_minute is None
+                self.tokens_per_minute = int(tokens_per_minute)
+                self._token_allowance = float(self.tokens_per_minute) if first else \
+                    min(self._token_allowance, float(self.tokens_per_minute))
+
+    @property
+    def _request_capacity(self) -> float:
+        # Bursts of up to one second worth of requests (at least one request)
+        return max(1.0, self.requests_per_second or 0.0)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        if self.requests_per_second is not None:
+            self._request_allowance = min(
+                self._request_capacity,
+                self._request_allowance + elapsed * self.requests_per_second
+            )
+        if self.tokens_per_minute is not None:
+            self._token_allowance = min(
+                float(self.tokens_per_minute),
+                self._token_allowance + elapsed * self.tokens_per_minute / 60.0
+            )
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """Return seconds until a request of tokens may start (0 = now)."""
+        waits = [self._blocked_until - now]
+        if self._concurrency_limit is not None and self._in_flight >= max(1, int(self._concurrency_limit)):
+            # Woken up by release()
+            waits.append(_MAX_WAIT_SECONDS)
+        if self.requests_per_second is not None and self._request_allowance < 1.0:
+            waits.append((1.0 - self._request_allowance) / self.requests_per_second)
+        if self.tokens_per_minute is not None:
+            needed = min(tokens, self.tokens_per_minute)
+            if self._token_allowance < needed:
+                waits.append((needed - self._token_allowance) * 60.0 / self.tokens_per_minute)
+        return max(waits)
+
+    def acquire(self, tokens: int = 0) -> None:
+        """
+        Block until a request with an estimated tokens prompt tokens may be sent.
+
+        Args:
+            tokens: Estimated prompt tokens of the request
+        """
+        with self._condition:
+            self._waiting += 1
+            self._peak_waiting = max(self._peak_waiting, self._waiting)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._wait_time(now, tokens)
+                    if wait <= 0:
+                        break
+                    self._condition.wait(min(wait, _MAX_WAIT_SECONDS))
+            finally:
+                self._waiting -= 1
+
+            if self.requests_per_second is not None:
+                self._request_allowance -= 1.0
+            if self.tokens_per_minute is not None:
+                self._token_allowance -= min(tokens, self.tokens_per_minute)
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            self._started.append(now)
+
+    def release(self, rate_limited: bool = False, retry_after: Optional[float] = None) -> None:
+        """
+        Finish a request taken with acquire().
+
+        Args:
+            rate_limited: True if the server answered HTTP 429
+            retry_after: Seconds the server asked to wait (Retry-After), if any
+        """
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            if rate_limited:
+                self.rate_limited_count += 1
+                current = self._concurrency_limit
+                if current is None:
+                    current = float(self._in_flight + 1)
+                self._concurrency_limit = max(1.0, current / 2)
+                delay = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+                self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+                logger.warning(
+                    f"LLM API rate limited (HTTP 429): pausing requests for {delay:.1f}s, "
+                    f"concurrency limit {int(self._concurrency_limit)}"
+                )
+            elif self._concurrency_limit is not None:
+                self._concurrency_limit += 1.0 / self._concurrency_limit
+                if self._concurrency_limit >= self._peak_in_flight:
+                    # Back at the highest concurrency ever used: lift the limit
+                    self._concurrency_limit = None
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the limiter state for run summaries.
+
+        Returns:
+            Dictionary with requests_per_second (observed over the last minute),
+            concurrency_limit (None = unlimited), in_flight, queue_depth,
+            peak_queue_depth and rate_limited (number of 429 responses)
+        """
+        with self._condition:
+            now = time.monotonic()
+            while self._started and self._started[0] < now - RATE_WINDOW_SECONDS:
+                self._started.popleft()
+            return {
+                'requests_per_second': round(len(self._started) / RATE_WINDOW_SECONDS, 2),
+                'concurrency_limit': None if self._concurrency_limit is None else int(self._concurrency_limit),
+                'in_flight': self._in_flight,
+                'queue_depth': self._waiting,
+                'peak_queue_depth': self._peak_waiting,
+                'rate_limited': self.rate_limited_count
+            }
+
+
+def get_shared_rate_limiter(
+    requests_per_second: Optional[float] = None,
+    tokens_per_minute: Optional[int] = None
+) -> RateLimiter:
+    """
+    Return the process-wide limiter, creating it or tightening its limits if needed.
+
+    Args:
+        requests_per_second: Request rate the caller must not exceed (None = no limit)
+        tokens_per_minute: Prompt tokens per minute the caller must not exceed (None = no limit)
+
+    Returns:
+        Shared RateLimiter
+    """
+    global _shared_limiter
+    with _lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter(requests_per_second, tokens_per_minute)
+        else:
+            _shared_limiter.configure(requests_per_second, tokens_per_minute)
+        return _shared_limiter
+
+
+def reset_shared_rate_limiter() -> None:
+    """Drop the shared limiter (a new one is created on next use)."""
+    global _shared_limiter
+    with _lock:
+        _shared_limiter = None
@@ -19,6 +19,9 @@ Integration Pattern:
     4. After LLM classification: rules = load_whitelist_rules(config_path)
     5. Apply whitelist: new_score, tags = apply_whitelist(email_context, rules, current_score)
     
+    For large rule files, wrap the loaded rules in CompiledRuleSet once and pass
+    that instead of the list; check_blacklist() and apply_whitelist() accept both.
+    
     Example:
         >>> from src.models import EmailContext
         >>> from src.rules import load_blacklist_rules, check_blacklist
@@ -35,10 +38,11 @@ import logging
 import os
 import re
 import yaml
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Pattern, Union, Any
+from typing import Callable, Dict, List, Optional, Pattern, Union, Any
 from email.utils import parseaddr
 
 from src.models import EmailContext
@@ -559,7 +563,10 @@ def rule_matches_email(email_obj: EmailContext, rule: BlacklistRule) -> bool:
         return False
 
 
-def check_blacklist(email_obj: EmailContext, rules: List[BlacklistRule]) -> ActionEnum:
+def check_blacklist(
+    email_obj: EmailContext,
+    rules: Union[List[BlacklistRule], "CompiledRuleSet"]
+) -> ActionEnum:
     """
     Check if an email matches any blacklist rules and return the appropriate action.
     
@@ -574,7 +581,8 @@ def check_blacklist(email_obj: EmailContext, rules: List[BlacklistRule]) -> Acti
     
     Args:
         email_obj: EmailContext object to check against blacklist rules
-        rules: List of BlacklistRule objects to check
+        rules: List of BlacklistRule objects to check, or a CompiledRuleSet
+               built from them (same result, evaluated via index lookups)
     
     Returns:
         ActionEnum indicating what action to take:
@@ -595,14 +603,18 @@ def check_blacklist(email_obj: EmailContext, rules: List[BlacklistRule]) -> Acti
     if not rules:
         return ActionEnum.PASS
     
+    # A compiled rule set only yields the rules that match (in file order)
+    compiled = isinstance(rules, CompiledRuleSet)
+    candidates = rules.match(email_obj) if compiled else rules
+    
     # Track the highest priority action found
     # Priority order: DROP > RECORD > PASS
     highest_action = ActionEnum.PASS
     
-    for rule in rules:
+    for rule in candidates:
         try:
             # Check if this rule matches the email
-            if rule_matches_email(email_obj, rule):
+            if compiled or rule_matches_email(email_obj, rule):
                 # Update highest priority action
                 # DROP has highest priority, then RECORD, then PASS
                 if rule.action == ActionEnum.DROP:
@@ -636,6 +648,94 @@ def check_blacklist(email_obj: EmailContext, rules: List[BlacklistRule]) -> Acti
     return highest_action
 
 
+# Maximum length of one chunk of compiled IMAP exclusion clauses. Each chunk is
+# appended to the base search query, which keeps the whole UID SEARCH command well
+# below the ~8000 octet line limit many servers enforce (RFC 7162, section 4).
+DEFAULT_IMAP_EXCLUSION_CHUNK_LENGTH = 2000
+
+
+def _imap_quote(value: str) -> Optional[str]:
+    """
+    Quote a value as an IMAP quoted string, or return None if it cannot be quoted.
+    
+    Quoted strings are 7-bit only and cannot contain CR/LF; values that need a
+    literal or a CHARSET argument are left to the client-side blacklist check.
+    """
+    if not value or not value.isascii() or any(char in value for char in '\r\n\0'):
+        return None
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def compile_imap_exclusions(
+    rules: Union[List[BlacklistRule], "CompiledRuleSet"],
+    max_length: int = DEFAULT_IMAP_EXCLUSION_CHUNK_LENGTH
+) -> List[str]:
+    """
+    Compile literal DROP sender rules into IMAP SEARCH exclusion clauses.
+    
+    Each rule becomes a 'NOT FROM "..."' clause, so the server never returns the
+    emails they would drop. Only rules the server matches exactly like
+    check_blacklist() are compiled: regex rules, subject rules, RECORD/PASS rules,
+    domain rules and values that cannot be sent as a quoted string are skipped;
+    they are still applied by check_blacklist() after the header fetch.
+    
+    The clauses are grouped into chunks of at most max_length characters. Search
+    each chunk separately (appended to the base query) and intersect the results:
+    an email is kept only if no chunk excludes it.
+    
+    Note:
+        IMAP FROM matches are case-insensitive substring matches on the From header,
+        the same as sender rules. Domain rules match the sender's domain exactly
+        (match_domain_rule()), which a substring search cannot express: 'NOT FROM
+        "@example.co"' would also hide all mail from '@example.com', and emails the
+        server excludes are never fetched, so the client could not correct it.
+    
+    Args:
+        rules: BlacklistRule objects, or a CompiledRuleSet built from them
+        max_length: Maximum length of one chunk (a single longer clause gets its own chunk)
+    
+    Returns:
+        Chunks of space-separated clauses (empty if no rule can be compiled)
+    
+    Example:
+        >>> rules = [BlacklistRule(trigger_type="sender", value="spam@example.com", action=ActionEnum.DROP)]
+        >>> compile_imap_exclusions(rules)
+        ['NOT FROM "spam@example.com"']
+    """
+    clauses = []
+    seen = set()
+    for rule in rules or []:
+        if rule.action != ActionEnum.DROP or rule.pattern is not None or rule.trigger_type != "sender":
+            continue
+        value = rule.value.strip()
+        
+        quoted = _imap_quote(value)
+        if quoted is None:
+            logger.debug(f"Blacklist rule {rule.trigger_type}={rule.value} cannot be searched on the server")
+            continue
+        if value.lower() in seen:
+            continue
+        seen.add(value.lower())
+        clauses.append(f"NOT FROM {quoted}")
+    
+    chunks = []
+    current = []
+    current_length = 0
+    for clause in clauses:
+        added_length = len(clause) + (1 if current else 0)
+        if current and current_length + added_length > max_length:
+            chunks.append(' '.join(current))
+            current = []
+            current_length = 0
+            added_length = len(clause)
+        current.append(clause)
+        current_length += added_length
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
 @dataclass
 class WhitelistRule:
     """
@@ -1006,7 +1106,7 @@ def whitelist_rule_matches_email(email_obj: EmailContext, rule: WhitelistRule) -
 
 def apply_whitelist(
     email_obj: EmailContext,
-    rules: List[WhitelistRule],
+    rules: Union[List[WhitelistRule], "CompiledRuleSet"],
     current_score: float
 ) -> tuple[float, List[str]]:
     """
@@ -1020,7 +1120,8 @@ def apply_whitelist(
     
     Args:
         email_obj: EmailContext object to check against whitelist rules
-        rules: List of WhitelistRule objects to check
+        rules: List of WhitelistRule objects to check, or a CompiledRuleSet
+               built from them (same result, evaluated via index lookups)
         current_score: Current importance score (before whitelist adjustments)
     
     Returns:
@@ -1043,13 +1144,17 @@ def apply_whitelist(
     if not rules:
         return (current_score, [])
     
+    # A compiled rule set only yields the rules that match (in file order)
+    compiled = isinstance(rules, CompiledRuleSet)
+    candidates = rules.match(email_obj) if compiled else rules
+    
     new_score = current_score
     tags_list = []
     
-    for rule in rules:
+    for rule in candidates:
         try:
             # Check if this rule matches the email
-            if whitelist_rule_matches_email(email_obj, rule):
+            if compiled or whitelist_rule_matches_email(email_obj, rule):
                 # Apply score boost
                 new_score += rule.score_boost
                 
@@ -1075,3 +1180,214 @@ def apply_whitelist(
             continue
     
     return (new_score, tags_list)
+
+
+class _SubstringMatcher:
+    """
+    Aho-Corasick automaton for case-insensitive substring matching of many literals.
+    
+    Finds every pattern contained in a text in a single pass over the text, so the
+    cost per email does not grow with the number of literal rules.
+    """
+    
+    def __init__(self, patterns: List[tuple]):
+        """
+        Build the automaton.
+        
+        Args:
+            patterns: List of (lowercased_literal, payload) tuples. The payloads of
+                     every literal found in a text are returned by find_all().
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Any]] = [[]]
+        
+        for literal, payload in patterns:
+            state = 0
+            for char in literal:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(payload)
+        
+        # Breadth-first construction of failure links (depth-1 states fail to the root)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    
+    def find_all(self, text: str) -> set:
+        """Return the payloads of all literals contained in text (already lowercased)."""
+        found = set()
+        state = 0
+        goto = self._goto
+        fail = self._fail
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if self._output[state]:
+                found.update(self._output[state])
+        return found
+
+
+class CompiledRuleSet:
+    """
+    Indexed form of a blacklist or whitelist rule list for fast per-email evaluation.
+    
+    Built once from loaded rules, it replaces the linear scan in check_blacklist()
+    and apply_whitelist() with:
+    - a hash lookup for literal domain rules (exact, case-insensitive)
+    - one Aho-Corasick automaton each for literal sender and subject rules
+      (case-insensitive substring, same as _match_pattern)
+    - a linear scan only over regex rules
+    
+    Each email's sender, subject and domain are normalized once per evaluation
+    instead of once per rule. Matching semantics are identical to the list-based
+    functions, and matches are reported in original rule order so DROP > RECORD > PASS
+    priority and cumulative whitelist boosts/tags come out the same.
+    
+    Example:
+        >>> rules = CompiledRuleSet(load_blacklist_rules("config/blacklist.yaml"))
+        >>> action = check_blacklist(email, rules)
+    """
+    
+    def __init__(self, rules: List[Union[BlacklistRule, WhitelistRule]]):
+        """
+        Compile a list of rules.
+        
+        Args:
+            rules: BlacklistRule or WhitelistRule objects (as returned by the loaders)
+        """
+        self.rules = list(rules)
+        self._domain_index: Dict[str, List[int]] = {}
+        self._regex_rules: List[int] = []
+        sender_literals = []
+        subject_literals = []
+        
+        for index, rule in enumerate(self.rules):
+            if rule.pattern is not None:
+                self._regex_rules.append(index)
+            elif rule.trigger_type == "domain":
+                self._domain_index.setdefault(rule.value.lower(), []).append(index)
+            elif rule.trigger_type == "sender":
+                sender_literals.append((rule.value.lower(), index))
+            elif rule.trigger_type == "subject":
+                subject_literals.append((rule.value.lower(), index))
+        
+        self._sender_matcher = _SubstringMatcher(sender_literals) if sender_literals else None
+        self._subject_matcher = _SubstringMatcher(subject_literals) if subject_literals else None
+    
+    def __len__(self) -> int:
+        return len(self.rules)
+    
+    def __iter__(self):
+        return iter(self.rules)
+    
+    def match(self, email_obj: EmailContext) -> List[Union[BlacklistRule, WhitelistRule]]:
+        """
+        Find all rules that match an email.
+        
+        Args:
+            email_obj: EmailContext to evaluate
+        
+        Returns:
+            Matching rules, in the order they appear in the rule file
+        """
+        sender = email_obj.sender or ""
+        subject = email_obj.subject or ""
+        domain = _extract_domain_from_email(sender) if sender else None
+        
+        matched = set()
+        if sender and self._sender_matcher:
+            matched.update(self._sender_matcher.find_all(sender.lower()))
+        if subject and self._subject_matcher:
+            matched.update(self._subject_matcher.find_all(subject.lower()))
+        if domain:
+            matched.update(self._domain_index.get(domain.lower(), ()))
+        
+        fields = {"sender": sender, "subject": subject, "domain": domain}
+        for index in self._regex_rules:
+            rule = self.rules[index]
+            value = fields[rule.trigger_type]
+            if value and _match_pattern(rule.value, rule.pattern, value):
+                matched.add(index)
+        
+        return [self.rules[index] for index in sorted(matched)]
+
+
+class RuleFileCache:
+    """
+    Cache of compiled rules per rules file, invalidated when the file changes on disk.
+    
+    The loader (load_blacklist_rules or load_whitelist_rules) only runs when a path is
+    requested for the first time or when the file's modification time or size has
+    changed since it was loaded. Every other lookup costs a single os.stat(), so the
+    rules can be fetched per email while YAML parsing, validation and regex
+    compilation happen once per file version.
+    
+    A missing file is cached as well (the loaders return an empty list for it) and
+    is picked up as soon as it appears.
+    
+    Example:
+        >>> cache = RuleFileCache(load_blacklist_rules)
+        >>> rules = cache.get("config/blacklist.yaml")  # Loads and compiles
+        >>> rules = cache.get("config/blacklist.yaml")  # Cached until the file changes
+        >>> action = check_blacklist(email, rules)
+    """
+    
+    def __init__(self, loader: Callable[[str], List[Union[BlacklistRule, WhitelistRule]]]):
+        """
+        Create an empty cache.
+        
+        Args:
+            loader: Function that loads a list of rules from a file path
+        """
+        self._loader = loader
+        self._entries: Dict[str, tuple] = {}
+    
+    @staticmethod
+    def _file_signature(path: str) -> Optional[tuple]:
+        """Return (mtime_ns, size) for path, or None if it cannot be stat'ed."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def get(self, path: Union[str, Path]) -> CompiledRuleSet:
+        """
+        Return the compiled rules for a file, reloading it only if it changed.
+        
+        Args:
+            path: Path to the rules file
+        
+        Returns:
+            CompiledRuleSet for the current contents of the file
+        """
+        key = str(path)
+        signature = self._file_signature(key)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        
+        if entry is not None:
+            logger.info(f"Rules file changed on disk, reloading: {key}")
+        rules = CompiledRuleSet(self._loader(key))
+        self._entries[key] = (signature, rules)
+        return rules
+    
+    def clear(self) -> None:
+        """Drop all cached rules (next get() reloads from disk)."""
+        self._entries.clear()
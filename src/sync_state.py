@@ -0,0 +1,242 @@
+"""
+Persistent per-account, per-mailbox IMAP sync state.
+
+Incremental runs used to rely on the KEYWORD exclusion search or on the highest
+UID found in the vault. Neither notices a UIDVALIDITY change (after which every
+stored UID refers to a different message) and neither can tell which emails had
+their flags changed without looking at the whole mailbox. This module stores,
+per (account, mailbox):
+
+    uidvalidity     UIDVALIDITY of the mailbox when the state was saved
+    last_uid        highest UID handled by a completed run
+    highest_modseq  HIGHESTMODSEQ at the start of that run (CONDSTORE servers only)
+
+With this, a steady-state run only searches 'UID <last_uid+1>:*' and, on CONDSTORE
+servers, fetches flags CHANGEDSINCE highest_modseq, i.e. costs O(new messages).
+
+Emails that fail (classification error, fetch error) do not hold last_uid back.
+Their UIDs are stored next to the state with an attempt count and retried
+explicitly by the following runs; after imap.max_failed_attempts attempts
+(default: 3) an email is given up with a warning, so a single email that always
+fails cannot pin the position of the mailbox.
+
+Usage:
+    >>> from src.sync_state import SyncState, SyncStateStore
+    >>>
+    >>> with SyncStateStore('logs/sync_state.sqlite3') as store:
+    ...     store.save('work', 'INBOX', SyncState(uidvalidity=1, last_uid=120, highest_modseq=9001))
+    ...     store.load('work', 'INBOX').last_uid
+    120
+"""
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Location of the state database (paths.sync_state_file)
+DEFAULT_SYNC_STATE_FILE = 'logs/sync_state.sqlite3'
+
+# Attempts before a failing email is given up (imap.max_failed_attempts)
+DEFAULT_MAX_FAILED_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    account_id TEXT NOT NULL,
+    mailbox TEXT NOT NULL,
+    uidvalidity INTEGER NOT NULL,
+    last_uid INTEGER NOT NULL,
+    highest_modseq INTEGER,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (account_id, mailbox)
+);
+CREATE TABLE IF NOT EXISTS failed_uids (
+    account_id TEXT NOT NULL,
+    mailbox TEXT NOT NULL,
+    uid INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (account_id, mailbox, uid)
+);
+"""
+
+
+@dataclass
+class SyncState:
+    """Sync position of one mailbox."""
+    uidvalidity: int
+    last_uid: int
+    highest_modseq: Optional[int] = None
+
+    def is_valid_for(self, mailbox_status: Dict[str, Any]) -> bool:
+        """Return True if the state still applies to the mailbox (same UIDVALIDITY)."""
+        return mailbox_status.get('uidvalidity') == self.uidvalidity
+
+    def is_up_to_date(self, mailbox_status: Dict[str, Any]) -> bool:
+        """
+        Return True if nothing changed in the mailbox since the state was saved.
+
+        Requires UIDNEXT (no new messages) and, on CONDSTORE servers, an unchanged
+        HIGHESTMODSEQ (no flag changes or expunges).
+        """
+        if not self.is_valid_for(mailbox_status):
+            return False
+        uidnext = mailbox_status.get('uidnext')
+        if uidnext is None or uidnext > self.last_uid + 1:
+            return False
+        highest_modseq = mailbox_status.get('highest_modseq')
+        if highest_modseq is None or self.highest_modseq is None:
+            return False
+        return highest_modseq <= self.highest_modseq
+
+
+def update_failed_attempts(
+    previous: Dict[int, int],
+    attempted: Iterable[int],
+    failed: Iterable[int],
+    max_attempts: int
+) -> Tuple[Dict[int, int], List[int]]:
+    """
+    Count a run's attempts of failing emails.
+
+    Args:
+        previous: Attempts of the UIDs that were pending retry before the run
+        attempted: UIDs the run tried to handle (previous UIDs it did not try keep their count)
+        failed: UIDs that failed in the run
+        max_attempts: Attempts after which an email is given up
+
+    Returns:
+        Tuple of (attempts of the UIDs to retry next run, UIDs given up in this run)
+    """
+    attempted = set(attempted)
+    pending = {uid: attempts for uid, attempts in previous.items() if uid not in attempted}
+    given_up = []
+    for uid in sorted(set(failed)):
+        attempts = previous.get(uid, 0) + 1
+        if attempts >= max_attempts:
+            given_up.append(uid)
+        else:
+            pending[uid] = attempts
+    return pending, given_up
+
+
+class SyncStateStore:
+    """
+    SQLite-backed map of (account, mailbox) -> SyncState.
+
+    A single instance can be shared between threads (e.g. --parallel-accounts);
+    access is serialized with a lock.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open (and create if needed) the state database.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self) -> 'SyncStateStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def load(self, account_id: str, mailbox: str) -> Optional[SyncState]:
+        """Return the saved state of an account mailbox, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT uidvalidity, last_uid, highest_modseq FROM sync_state "
+                "WHERE account_id = ? AND mailbox = ?",
+                (account_id, mailbox)
+            ).fetchone()
+        if row is None:
+            return None
+        return SyncState(uidvalidity=row[0], last_uid=row[1], highest_modseq=row[2])
+
+    def save(self, account_id: str, mailbox: str, state: SyncState) -> None:
+        """
+        Store the state of an account mailbox (replaces the previous state).
+
+        Args:
+            account_id: Account identifier
+            mailbox: Mailbox name (e.g. 'INBOX')
+            state: SyncState to store
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state "
+                "(account_id, mailbox, uidvalidity, last_uid, highest_modseq, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    account_id,
+                    mailbox,
+                    int(state.uidvalidity),
+                    int(state.last_uid),
+                    state.highest_modseq,
+                    datetime.now(timezone.utc).isoformat()
+                )
+            )
+            self._conn.commit()
+
+    def load_failed(self, account_id: str, mailbox: str) -> Dict[int, int]:
+        """Return the UIDs pending retry in an account mailbox, mapped to their attempts."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT uid, attempts FROM failed_uids WHERE account_id = ? AND mailbox = ?",
+                (account_id, mailbox)
+            ).fetchall()
+        return dict(rows)
+
+    def save_failed(self, account_id: str, mailbox: str, attempts: Dict[int, int]) -> None:
+        """
+        Store the UIDs pending retry in an account mailbox (replaces the previous ones).
+
+        Args:
+            account_id: Account identifier
+            mailbox: Mailbox name (e.g. 'INBOX')
+            attempts: Dictionary mapping UID -> failed attempts so far
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM failed_uids WHERE account_id = ? AND mailbox = ?",
+                (account_id, mailbox)
+            )
+            self._conn.executemany(
+                "INSERT INTO failed_uids (account_id, mailbox, uid, attempts, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(account_id, mailbox, int(uid), int(count), now) for uid, count in attempts.items()]
+            )
+            self._conn.commit()
+
+    def reset(self, account_id: str, mailbox: str) -> None:
+        """Forget the state (and pending retries) of an account mailbox (e.g. after a UIDVALIDITY change)."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM sync_state WHERE account_id = ? AND mailbox = ?",
+                (account_id, mailbox)
+            )
+            self._conn.execute(
+                "DELETE FROM failed_uids WHERE account_id = ? AND mailbox = ?",
+                (account_id, mailbox)
+            )
+            self._conn.commit()
+        logger.info(f"Reset sync state for account {account_id}, mailbox {mailbox}")
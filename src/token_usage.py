@@ -0,0 +1,253 @@
+"""
+Token accounting for LLM API calls.
+
+OpenAI-compatible APIs (OpenRouter included) report the tokens a request consumed
+in a "usage" block:
+
+    {"usage": {"prompt_tokens": 1840, "completion_tokens": 21,
+               "prompt_tokens_details": {"cached_tokens": 1024}}}
+
+LLMClient attaches these counts to every LLMResponse, AccountProcessor sums them
+per run and writes them to analytics, and this module keeps a per-account history
+of prompt tokens per byte of raw message (IMAP RFC822.SIZE). The safety interlock
+uses that history to turn a cheap bulk size fetch of the pending emails into a
+token estimate, instead of assuming a fixed number of tokens per email (which is
+far off for accounts with large HTML newsletters or attachments).
+
+Usage:
+    >>> from src.token_usage import TokenStats, TokenStatsStore, estimate_tokens_from_sizes
+    >>>
+    >>> with TokenStatsStore('logs/token_stats.sqlite3') as store:
+    ...     store.record('work', TokenStats(emails=12, message_bytes=480000,
+    ...                                     prompt_tokens=61000, completion_tokens=300))
+    ...     estimate = estimate_tokens_from_sizes([40000, 2500], store.load('work'))
+"""
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Location of the history database (paths.token_stats_file)
+DEFAULT_TOKEN_STATS_FILE = 'logs/token_stats.sqlite3'
+
+# Emails of history needed before the learned ratios are trusted
+MIN_HISTORY_EMAILS = 20
+
+# History is scaled down to this many emails, so the ratios follow recent mail
+MAX_HISTORY_EMAILS = 2000
+
+# Estimates without history: characters per token, prompt template size and
+# completion size of one classification (JSON with two scores)
+CHARS_PER_TOKEN = 4
+PROMPT_OVERHEAD_TOKENS = 300
+COMPLETION_TOKENS_PER_EMAIL = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS token_stats (
+    account_id TEXT PRIMARY KEY,
+    emails INTEGER NOT NULL,
+    message_bytes INTEGER NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+def _count(value: Any) -> int:
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass
+class TokenUsage:
+    """Prompt, completion and cached prompt tokens of one or more requests."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @classmethod
+    def from_api_response(cls, api_response: Any) -> 'TokenUsage':
+        """
+        Read the usage block of an OpenAI-compatible chat completion response.
+
+        Args:
+            api_response: Raw API response dictionary
+
+        Returns:
+            TokenUsage (all zero if the provider did not report usage)
+        """
+        usage = api_response.get('usage') if isinstance(api_response, dict) else None
+        if not isinstance(usage, dict):
+            return cls()
+        details = usage.get('prompt_tokens_details')
+        cached = details.get('cached_tokens') if isinstance(details, dict) else None
+        return cls(
+            prompt_tokens=_count(usage.get('prompt_tokens')),
+            completion_tokens=_count(usage.get('completion_tokens')),
+            cached_tokens=_count(cached if cached is not None else usage.get('cached_tokens'))
+        )
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, other: 'TokenUsage') -> None:
+        """Add the counts of other to this usage."""
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+
+    def to_dict(self) -> Dict[str, int]:
+        """Convert to dictionary format (for analytics and summaries)."""
+        return {
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cached_tokens': self.cached_tokens
+        }
+
+
+@dataclass
+class TokenStats:
+    """Token history of one account (emails with a known RFC822.SIZE only)."""
+    emails: int
+    message_bytes: int
+    prompt_tokens: int
+    completion_tokens: int
+
+    @property
+    def reliable(self) -> bool:
+        """True if enough emails were seen to trust the ratios."""
+        return self.emails >= MIN_HISTORY_EMAILS and self.message_bytes > 0
+
+    @property
+    def prompt_tokens_per_byte(self) -> float:
+        return self.prompt_tokens / self.message_bytes if self.message_bytes else 0.0
+
+    @property
+    def completion_tokens_per_email(self) -> float:
+        return self.completion_tokens / self.emails if self.emails else 0.0
+
+
+def estimate_tokens_from_sizes(
+    message_sizes: Iterable[int],
+    stats: Optional[TokenStats] = None,
+    max_body_chars: int = 6000
+) -> TokenUsage:
+    """
+    Estimate the tokens needed to classify emails of the given raw sizes.
+
+    With reliable history, prompt tokens are the summed sizes times the account's
+    prompt tokens per byte, which already reflects how much of its raw messages
+    (HTML markup, attachments, truncation) ends up in the prompt. Without history,
+    each email counts min(size, max_body_chars) / CHARS_PER_TOKEN plus the prompt
+    template.
+
+    Args:
+        message_sizes: RFC822.SIZE of each pending email, in bytes
+        stats: Token history of the account, if any
+        max_body_chars: Characters of body sent per email (processing.max_body_chars)
+
+    Returns:
+        TokenUsage with the estimated prompt and completion tokens
+    """
+    sizes = [max(0, int(size)) for size in message_sizes]
+    if stats is not None and stats.reliable:
+        return TokenUsage(
+            prompt_tokens=round(sum(sizes) * stats.prompt_tokens_per_byte),
+            completion_tokens=round(len(sizes) * stats.completion_tokens_per_email)
+        )
+    return TokenUsage(
+        prompt_tokens=sum(min(size, max_body_chars) // CHARS_PER_TOKEN + PROMPT_OVERHEAD_TOKENS for size in sizes),
+        completion_tokens=len(sizes) * COMPLETION_TOKENS_PER_EMAIL
+    )
+
+
+class TokenStatsStore:
+    """
+    SQLite-backed map of account -> TokenStats.
+
+    A single instance can be shared between threads (e.g. --parallel-accounts);
+    access is serialized with a lock.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open (and create if needed) the history database.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self) -> 'TokenStatsStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def load(self, account_id: str) -> Optional[TokenStats]:
+        """Return the token history of an account, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT emails, message_bytes, prompt_tokens, completion_tokens "
+                "FROM token_stats WHERE account_id = ?",
+                (account_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return TokenStats(emails=row[0], message_bytes=row[1], prompt_tokens=row[2], completion_tokens=row[3])
+
+    def record(self, account_id: str, stats: TokenStats) -> None:
+        """
+        Add the emails of a run to the account history.
+
+        Args:
+            account_id: Account identifier
+            stats: Classified emails with a known size, their summed RFC822.SIZE and
+                   the tokens the API reported for them
+        """
+        if stats.emails <= 0 or stats.message_bytes <= 0:
+            return
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT emails, message_bytes, prompt_tokens, completion_tokens "
+                "FROM token_stats WHERE account_id = ?",
+                (account_id,)
+            ).fetchone()
+            totals = [
+                stats.emails + (row[0] if row else 0),
+                stats.message_bytes + (row[1] if row else 0),
+                stats.prompt_tokens + (row[2] if row else 0),
+                stats.completion_tokens + (row[3] if row else 0)
+            ]
+            if totals[0] > MAX_HISTORY_EMAILS:
+                scale = MAX_HISTORY_EMAILS / totals[0]
+                totals = [round(total * scale) for total in totals]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO token_stats "
+                "(account_id, emails, message_bytes, prompt_tokens, completion_tokens, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (account_id, *totals, datetime.now(timezone.utc).isoformat())
+            )
+            self._conn.commit()
+        logger.debug(f"Recorded token usage of {stats.emails} email(s) for account {account_id}")
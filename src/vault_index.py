@@ -0,0 +1,197 @@
+"""
+Sidecar UID index for notes written to the Obsidian vault.
+
+Finding the highest processed UID used to require reading and YAML-parsing every
+note in the account directory. This module keeps a small SQLite database next to
+the notes that maps account -> UID -> note path / Message-ID, so the highest UID
+and "is this UID already in the vault?" are single indexed lookups.
+
+The index lives in a hidden directory in the vault root (ignored by Obsidian):
+
+    <vault>/.email-agent/uid_index.sqlite3
+
+Notes are added as they are written (AccountProcessor._write_note_to_disk). An
+account is only trusted once it has been fully indexed from the vault via
+rebuild_account(); until then callers fall back to scanning the vault (see
+src.vault_utils.get_max_uid_from_vault, which triggers the rebuild automatically).
+
+Usage:
+    >>> from src.vault_index import VaultUidIndex
+    >>>
+    >>> with VaultUidIndex.for_vault('/path/to/vault') as index:
+    ...     index.add('work', 12345, 'work/2024-01-01-Subject.md', '<id@example.com>')
+    ...     index.max_uid('work')
+    12345
+"""
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Location of the index inside the vault
+INDEX_DIRNAME = '.email-agent'
+INDEX_FILENAME = 'uid_index.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    account_id TEXT NOT NULL,
+    uid INTEGER NOT NULL,
+    note_path TEXT,
+    message_id TEXT,
+    PRIMARY KEY (account_id, uid)
+);
+CREATE TABLE IF NOT EXISTS indexed_accounts (
+    account_id TEXT PRIMARY KEY,
+    rebuilt_at TEXT NOT NULL
+);
+"""
+
+
+def get_index_path(vault_path: Union[str, Path]) -> Path:
+    """Return the path of the UID index database for a vault."""
+    return Path(vault_path) / INDEX_DIRNAME / INDEX_FILENAME
+
+
+class VaultUidIndex:
+    """
+    SQLite-backed map of account -> UID -> (note path, Message-ID).
+
+    The (account_id, uid) primary key makes max_uid() and contains() index
+    lookups regardless of how many notes the vault holds. A single instance can be
+    shared between threads; access is serialized with a lock.
+    """
+
+    def __init__(self, index_path: Union[str, Path]):
+        """
+        Open (and create if needed) the index database.
+
+        Args:
+            index_path: Path to the SQLite database file
+        """
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def for_vault(cls, vault_path: Union[str, Path]) -> 'VaultUidIndex':
+        """Open the index stored in the given vault."""
+        return cls(get_index_path(vault_path))
+
+    def __enter__(self) -> 'VaultUidIndex':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def add(
+        self,
+        account_id: str,
+        uid: int,
+        note_path: Optional[str] = None,
+        message_id: Optional[str] = None
+    ) -> None:
+        """
+        Record a note for an account UID (replaces an existing entry for the UID).
+
+        Args:
+            account_id: Account identifier
+            uid: IMAP UID of the email
+            note_path: Path of the written note
+            message_id: Message-ID header of the email
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO notes (account_id, uid, note_path, message_id) "
+                "VALUES (?, ?, ?, ?)",
+                (account_id, int(uid), note_path, message_id)
+            )
+            self._conn.commit()
+
+    def max_uid(self, account_id: str) -> Optional[int]:
+        """Return the highest indexed UID for an account, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(uid) FROM notes WHERE account_id = ?", (account_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def contains(self, account_id: str, uid: int) -> bool:
+        """Return True if a note for the account UID is in the index."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM notes WHERE account_id = ? AND uid = ?", (account_id, int(uid))
+            ).fetchone()
+        return row is not None
+
+    def get_note_path(self, account_id: str, uid: int) -> Optional[str]:
+        """Return the note path recorded for the account UID, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT note_path FROM notes WHERE account_id = ? AND uid = ?",
+                (account_id, int(uid))
+            ).fetchone()
+        return row[0] if row else None
+
+    def count(self, account_id: str) -> int:
+        """Return the number of indexed notes for an account."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM notes WHERE account_id = ?", (account_id,)
+            ).fetchone()
+        return row[0]
+
+    def is_indexed(self, account_id: str) -> bool:
+        """Return True if the account has been fully indexed from the vault."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM indexed_accounts WHERE account_id = ?", (account_id,)
+            ).fetchone()
+        return row is not None
+
+    def rebuild_account(
+        self,
+        account_id: str,
+        entries: Iterable[Tuple[int, Optional[str], Optional[str]]]
+    ) -> int:
+        """
+        Replace all entries of an account and mark it as fully indexed.
+
+        Args:
+            account_id: Account identifier
+            entries: (uid, note_path, message_id) tuples from a full vault scan
+
+        Returns:
+            Number of notes indexed
+        """
+        rows = [
+            (account_id, int(uid), note_path, message_id)
+            for uid, note_path, message_id in entries
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM notes WHERE account_id = ?", (account_id,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO notes (account_id, uid, note_path, message_id) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO indexed_accounts (account_id, rebuilt_at) VALUES (?, ?)",
+                    (account_id, datetime.now(timezone.utc).isoformat())
+                )
+        logger.info(f"Rebuilt vault UID index for account {account_id}: {len(rows)} note(s)")
+        return len(rows)
@@ -5,21 +5,92 @@ This module provides functions to:
 - Scan markdown files in vault directories for UID values
 - Extract maximum UID from account-specific vault directories
 - Support incremental processing based on existing notes
+- Build the sidecar UID index (src.vault_index) from a full scan
 """
 import logging
 import yaml
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Tuple
 from src.prompt_loader import parse_markdown_frontmatter
+from src.dry_run import is_dry_run
+from src.vault_index import VaultUidIndex, get_index_path
 
 logger = logging.getLogger(__name__)
 
 
-def get_max_uid_from_vault(account_id: str, vault_path: str) -> Optional[int]:
+def _iter_note_uids(account_vault_path: Path) -> Iterator[Tuple[Path, int, Optional[str]]]:
     """
-    Scan markdown files in account-specific vault directory and return highest UID.
+    Yield (note_path, uid, message_id) for every note with a valid UID in frontmatter.
     
-    This function:
+    Files that cannot be read or have no/invalid UID are skipped.
+    """
+    for md_file in account_vault_path.glob('*.md'):
+        try:
+            with open(md_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+            
+            # Parse frontmatter
+            parsed = parse_markdown_frontmatter(content)
+            metadata = parsed.get('metadata', {})
+        except Exception as e:
+            # Log and continue with other files
+            logger.warning(f"Error reading {md_file}: {e}")
+            continue
+        
+        # Extract UID (can be string or int)
+        uid_value = metadata.get('uid')
+        if not uid_value:
+            continue
+        try:
+            uid_int = int(uid_value)
+        except (ValueError, TypeError):
+            # Skip invalid UIDs (log at debug level)
+            logger.debug(f"Invalid UID value in {md_file}: {uid_value}")
+            continue
+        
+        message_id = metadata.get('message_id')
+        yield md_file, uid_int, str(message_id) if message_id else None
+
+
+def rebuild_uid_index(account_id: str, vault_path: str) -> int:
+    """
+    Rebuild the sidecar UID index for an account from a full vault scan.
+    
+    Args:
+        account_id: Account identifier (e.g., 'info.nica')
+        vault_path: Base Obsidian vault path
+        
+    Returns:
+        Number of notes indexed
+    """
+    account_subdir = account_id.replace('.', '-')
+    account_vault_path = Path(vault_path) / account_subdir
+    
+    with VaultUidIndex.for_vault(vault_path) as index:
+        return _rebuild_account_index(index, account_id, account_vault_path)
+
+
+def _rebuild_account_index(index: VaultUidIndex, account_id: str, account_vault_path: Path) -> int:
+    """Replace the account's index entries with the notes found in account_vault_path."""
+    entries = []
+    if account_vault_path.is_dir():
+        entries = [
+            (uid, str(md_file), message_id)
+            for md_file, uid, message_id in _iter_note_uids(account_vault_path)
+        ]
+    return index.rebuild_account(account_id, entries)
+
+
+def get_max_uid_from_vault(account_id: str, vault_path: str, use_index: bool = True) -> Optional[int]:
+    """
+    Return the highest UID among the notes in the account-specific vault directory.
+    
+    With use_index=True (default) the answer comes from the sidecar UID index
+    (src.vault_index). The first call for an account builds the index from a full
+    scan; later calls are a single indexed lookup. Notes written by the processor
+    keep the index up to date; run `scan-uids --rebuild` after editing notes by hand.
+    
+    The full scan:
     1. Converts account_id to subdirectory name (e.g., 'info.nica' -> 'info-nica')
     2. Scans all .md files in that subdirectory
     3. Extracts UID from YAML frontmatter
@@ -28,6 +99,7 @@ def get_max_uid_from_vault(account_id: str, vault_path: str) -> Optional[int]:
     Args:
         account_id: Account identifier (e.g., 'info.nica')
         vault_path: Base Obsidian vault path
+        use_index: Use (and build if missing) the sidecar UID index
         
     Returns:
         Highest UID found as integer, or None if no UIDs found or directory doesn't exist
@@ -50,37 +122,29 @@ def get_max_uid_from_vault(account_id: str, vault_path: str) -> Optional[int]:
         logger.warning(f"Vault path is not a directory: {account_vault_path}")
         return None
     
+    # Dry-run never writes to the vault, so only use an index that already exists
+    if use_index and (not is_dry_run() or get_index_path(vault_path).exists()):
+        try:
+            with VaultUidIndex.for_vault(vault_path) as index:
+                if not index.is_indexed(account_id) and not is_dry_run():
+                    logger.info(f"Building vault UID index for account {account_id} (one-time full scan)")
+                    _rebuild_account_index(index, account_id, account_vault_path)
+                if index.is_indexed(account_id):
+                    max_uid = index.max_uid(account_id)
+                    logger.debug(f"Max UID from vault index for account {account_id}: {max_uid}")
+                    return max_uid
+        except Exception as e:
+            # The index is an optimization: fall back to scanning the vault
+            logger.warning(f"Vault UID index unavailable ({e}), scanning notes instead")
+    
     max_uid = None
-    files_scanned = 0
+    files_scanned = sum(1 for _ in account_vault_path.glob('*.md'))
     files_with_uid = 0
     
-    # Scan all .md files in the account directory
-    for md_file in account_vault_path.glob('*.md'):
-        files_scanned += 1
-        try:
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Parse frontmatter
-            parsed = parse_markdown_frontmatter(content)
-            metadata = parsed.get('metadata', {})
-            
-            # Extract UID (can be string or int)
-            uid_value = metadata.get('uid')
-            if uid_value:
-                try:
-                    uid_int = int(uid_value)
-                    files_with_uid += 1
-                    if max_uid is None or uid_int > max_uid:
-                        max_uid = uid_int
-                except (ValueError, TypeError):
-                    # Skip invalid UIDs (log at debug level)
-                    logger.debug(f"Invalid UID value in {md_file}: {uid_value}")
-                    continue
-        except Exception as e:
-            # Log and continue with other files
-            logger.warning(f"Error reading {md_file}: {e}")
-            continue
+    for _md_file, uid_int, _message_id in _iter_note_uids(account_vault_path):
+        files_with_uid += 1
+        if max_uid is None or uid_int > max_uid:
+            max_uid = uid_int
     
     if max_uid is not None:
         logger.info(
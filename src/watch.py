@@ -0,0 +1,111 @@
+"""
+Watch mode: keep an account connected and process new mail as it arrives.
+
+Instead of reconnecting and searching on a timer, watch_account() holds the
+authenticated IMAP connection of an AccountProcessor open and waits with IMAP IDLE
+(NOOP polling on servers without IDLE). Each new-mail notification triggers an
+incremental run(), which only searches UIDs above the last processed one.
+
+Runs never prompt for the safety interlock confirmation (a watch thread cannot
+wait on stdin): runs estimated at or below safety_interlock.cost_threshold
+proceed, larger ones are skipped with a warning.
+
+IDLE is re-issued every imap.idle_refresh_seconds (default: 25 minutes), below
+the 29-minute limit after which servers may drop idle clients. Lost connections
+are re-established with exponential backoff.
+
+Usage:
+    >>> import threading
+    >>> from src.watch import watch_account
+    >>>
+    >>> stop_event = threading.Event()
+    >>> watch_account(processor, stop_event)  # returns once stop_event is set
+"""
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from src.account_processor import (
+    AccountProcessor,
+    AccountProcessorRunError,
+    AccountProcessorSetupError
+)
+from src.imap_client import IMAPClientError
+
+logger = logging.getLogger(__name__)
+
+# Seconds before IDLE is restarted (imap.idle_refresh_seconds); RFC 2177 allows 29 minutes
+DEFAULT_IDLE_REFRESH_SECONDS = 25 * 60
+
+# Seconds between NOOP polls on servers without IDLE (imap.poll_interval_seconds)
+DEFAULT_POLL_INTERVAL_SECONDS = 10
+
+# Reconnect backoff after a lost connection (doubles up to the maximum)
+RECONNECT_DELAY_SECONDS = 5
+MAX_RECONNECT_DELAY_SECONDS = 300
+
+
+def watch_account(
+    processor: AccountProcessor,
+    stop_event: threading.Event,
+    run_options: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Process an account continuously until stop_event is set.
+
+    Sets the processor up, runs once to catch up, then alternates between waiting
+    for new mail and running. Connection and run errors are logged and followed by
+    a reconnect; the processor is torn down before returning.
+
+    Args:
+        processor: AccountProcessor (not yet set up)
+        stop_event: Event that ends watching when set
+        run_options: Keyword arguments passed to every processor.run() call
+            (e.g. max_emails, debug_prompt); runs are always non-interactive
+
+    Returns:
+        Number of completed processing runs
+    """
+    run_options = dict(run_options or {}, interactive=False)
+    imap_config = processor.config.get('imap', {})
+    idle_refresh = imap_config.get('idle_refresh_seconds', DEFAULT_IDLE_REFRESH_SECONDS)
+    poll_interval = imap_config.get('poll_interval_seconds', DEFAULT_POLL_INTERVAL_SECONDS)
+
+    runs = 0
+    connected = False
+    reconnect_delay = RECONNECT_DELAY_SECONDS
+    try:
+        while not stop_event.is_set():
+            try:
+                if not connected:
+                    processor.setup()
+                    connected = True
+                    # Catch up on mail that arrived while disconnected
+                    processor.run(**run_options)
+                    runs += 1
+                    reconnect_delay = RECONNECT_DELAY_SECONDS
+                    logger.info(
+                        f"Watching account {processor.account_id} for new mail "
+                        f"(IDLE refresh: {idle_refresh}s, poll interval: {poll_interval}s)"
+                    )
+
+                if processor.wait_for_new_mail(idle_refresh, poll_interval, stop_event):
+                    logger.info(f"New mail for account {processor.account_id}")
+                    processor.run(**run_options)
+                    runs += 1
+
+            except (AccountProcessorSetupError, AccountProcessorRunError, IMAPClientError, OSError) as e:
+                logger.warning(
+                    f"Watch interrupted for account {processor.account_id}: {e}. "
+                    f"Reconnecting in {reconnect_delay}s."
+                )
+                processor.teardown()
+                connected = False
+                if stop_event.wait(reconnect_delay):
+                    break
+                reconnect_delay = min(reconnect_delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+    finally:
+        processor.teardown()
+
+    logger.info(f"Stopped watching account {processor.account_id} after {runs} run(s)")
+    return runs
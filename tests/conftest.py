@@ -264,6 +264,7 @@ def mock_imap_client():
     client.get_unprocessed_emails = Mock(return_value=[])
     client.is_processed = Mock(return_value=False)
     client.set_flag = Mock(return_value=True)
+    client.set_flag_bulk = Mock(return_value=True)
     client.remove_flag = Mock(return_value=True)
     client._connected = True
     client._imap = Mock()
@@ -260,6 +260,7 @@ def mock_imap_client_v4():
     client.fetch_emails = Mock(return_value=[])
     client.fetch_email_by_uid = Mock(return_value=None)
     client.set_flag = Mock(return_value=True)
+    client.set_flag_bulk = Mock(return_value=True)
     client.remove_flag = Mock(return_value=True)
     client._connected = True
     return client
@@ -7,16 +7,23 @@ without requiring real external dependencies.
 
 Mock Services:
 - MockImapClient: In-memory IMAP client with configurable responses
+- MockImapConnection: imaplib-style protocol fake over a MockImapClient mailbox
+  that counts round trips (used for fetch benchmarks)
 - MockLLMClient: Deterministic LLM client with scenario-based responses
 """
 
 import logging
+import re
+from email import message_from_bytes, policy
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
 from typing import Dict, Any, List, Optional, Callable
 from dataclasses import dataclass
 from unittest.mock import Mock, MagicMock
 
 from src.models import EmailContext, from_imap_dict
-from src.imap_client import ImapClient, IMAPConnectionError, IMAPFetchError
+from src.imap_client import ImapClient, IMAPConnectionError, IMAPFetchError, build_uid_set
 from src.llm_client import LLMClient, LLMResponse
 
 logger = logging.getLogger(__name__)
@@ -33,6 +40,7 @@ class MockEmailData:
     date: Optional[str] = None
     to: Optional[List[str]] = None
     flags: List[str] = None
+    attachment_size: int = 0  # If > 0, rendered as multipart with a PDF attachment of this size
     
     def __post_init__(self):
         if self.flags is None:
@@ -232,6 +240,22 @@ class MockImapClient(ImapClient):
                 self._emails[uid].flags.append(flag)
         return True
         
+    def set_flag_bulk(self, uids: List[str], flag: str) -> bool:
+        """
+        Set a flag on several emails.
+        
+        Args:
+            uids: Email UIDs
+            flag: Flag to set (e.g., 'AIProcessed')
+            
+        Returns:
+            True if successful
+            
+        Raises:
+            IMAPFetchError: If not connected
+        """
+        return all(self.set_flag(uid, flag) for uid in uids)
+        
     def remove_flag(self, uid: str, flag: str) -> bool:
         """
         Remove a flag from an email.
@@ -274,12 +298,17 @@ class MockImapClient(ImapClient):
             
         return len(self._emails)
         
-    def count_unprocessed_emails(self, force_reprocess: bool = False) -> tuple[int, List[str]]:
+    def count_unprocessed_emails(
+        self,
+        force_reprocess: bool = False,
+        min_uid: Optional[int] = None
+    ) -> tuple[int, List[str]]:
         """
         Count unprocessed emails and return their UIDs.
         
         Args:
             force_reprocess: If True, ignore processed flags
+            min_uid: Optional minimum UID (only UIDs greater than it are returned)
             
         Returns:
             Tuple of (count, list of UIDs)
@@ -296,14 +325,15 @@ class MockImapClient(ImapClient):
         if force_reprocess:
             # Return all emails
             uids = [email.uid for email in self._emails.values()]
-            return (len(uids), uids)
         else:
             # Return only unprocessed emails (not flagged with AIProcessed)
             uids = [
                 email.uid for email in self._emails.values()
                 if 'AIProcessed' not in email.flags
             ]
-            return (len(uids), uids)
+        if min_uid is not None:
+            uids = [uid for uid in uids if int(uid) > min_uid]
+        return (len(uids), uids)
             
     def get_unprocessed_emails(
         self,
@@ -366,6 +396,269 @@ class MockImapClient(ImapClient):
         return [self.fetch_email_by_uid(email.uid) for email in unprocessed]
 
 
+class MockImapConnection:
+    """
+    imaplib-compatible connection fake backed by a MockImapClient mailbox.
+    
+    Answers the UID SEARCH/FETCH/STORE commands issued by ImapClient with responses
+    shaped like imaplib's, and records every command and the response bytes sent so
+    tests can count round trips and transfer volume. Pass capabilities=['ESEARCH']
+    to answer searches with RFC 4731 ESEARCH responses. Pass folders (mailbox name ->
+    MockImapClient) to answer SELECT, LIST and STATUS for several mailboxes.
+    
+    Example:
+        >>> mailbox = MockImapClient()
+        >>> mailbox.add_email(MockEmailData(uid="1", sender="a@b.com", subject="S", body="B"))
+        >>> client = ConfigurableImapClient(config)
+        >>> client._imap = MockImapConnection(mailbox)
+        >>> client._connected = True
+        >>> client.get_unprocessed_emails()
+        >>> client._imap.round_trips
+        2
+    """
+    
+    def __init__(
+        self,
+        mailbox: MockImapClient,
+        capabilities: Optional[List[str]] = None,
+        folders: Optional[Dict[str, MockImapClient]] = None
+    ):
+        """
+        Initialize protocol fake.
+        
+        Args:
+            mailbox: MockImapClient whose in-memory emails back the responses
+            capabilities: Extensions advertised by CAPABILITY (e.g. ['ESEARCH'])
+            folders: Optional mailboxes that can be selected by name (INBOX is mailbox)
+        """
+        self.mailbox = mailbox
+        self.folders = dict(folders or {})
+        self.folders.setdefault('INBOX', mailbox)
+        self.capabilities = ['IMAP4rev1'] + list(capabilities or [])
+        self.commands: List[tuple] = []
+        self.bytes_sent = 0
+        self._untagged: Dict[str, List[bytes]] = {}
+    
+    @property
+    def round_trips(self) -> int:
+        """Number of commands sent to the fake server."""
+        return len(self.commands)
+    
+    def command_count(self, command: str) -> int:
+        """Number of commands of the given type (e.g. 'FETCH') sent to the fake server."""
+        return sum(1 for entry in self.commands if entry[0] == command)
+    
+    def reset_counters(self) -> None:
+        """Forget recorded commands and transferred bytes."""
+        self.commands.clear()
+        self.bytes_sent = 0
+    
+    def _expand_uid_set(self, uid_set: str) -> List[str]:
+        """Expand an IMAP UID set ('1:3,7') into the mailbox UIDs it covers."""
+        known = sorted(int(uid) for uid in self.mailbox._emails)
+        selected = []
+        for part in uid_set.split(','):
+            if ':' in part:
+                low, high = part.split(':')
+                if high == '*':
+                    high = known[-1] if known else low
+                low, high = int(low), int(high)
+                selected.extend(uid for uid in known if low <= uid <= high)
+            else:
+                selected.append(int(part))
+        return [str(uid) for uid in selected if str(uid) in self.mailbox._emails]
+    
+    def _render_message(self, email_data: MockEmailData) -> bytes:
+        """Render a MockEmailData as raw RFC822 bytes."""
+        if email_data.attachment_size:
+            return self._render_multipart(email_data)
+        headers = [
+            f"From: {email_data.sender}",
+            f"To: {', '.join(email_data.to)}",
+            f"Subject: {email_data.subject}",
+            f"Date: {email_data.date}",
+            "Content-Type: text/plain; charset=utf-8",
+        ]
+        return ("\r\n".join(headers) + "\r\n\r\n" + email_data.body).encode('utf-8')
+    
+    def _render_multipart(self, email_data: MockEmailData) -> bytes:
+        """Render a MockEmailData as multipart/mixed (text/plain + text/html + PDF attachment)."""
+        alternative = MIMEMultipart('alternative', boundary=f'alt-{email_data.uid}')
+        alternative.attach(MIMEText(email_data.body, 'plain', 'utf-8'))
+        alternative.attach(MIMEText(email_data.html_body, 'html', 'utf-8'))
+        attachment = MIMEApplication(b'%PDF' + b'x' * (email_data.attachment_size - 4), 'pdf')
+        attachment.add_header('Content-Disposition', 'attachment', filename='report.pdf')
+        message = MIMEMultipart('mixed', boundary=f'mixed-{email_data.uid}')
+        message['From'] = email_data.sender
+        message['To'] = ', '.join(email_data.to)
+        message['Subject'] = email_data.subject
+        message['Date'] = email_data.date
+        message.attach(alternative)
+        message.attach(attachment)
+        return message.as_bytes(policy=policy.SMTP)
+    
+    def _bodystructure(self, part) -> str:
+        """Render the IMAP BODYSTRUCTURE of a parsed message part."""
+        if part.is_multipart():
+            children = ''.join(self._bodystructure(child) for child in part.get_payload())
+            return f'({children} "{part.get_content_subtype().upper()}")'
+        charset = part.get_content_charset()
+        params = f'("CHARSET" "{charset}")' if charset else 'NIL'
+        encoding = part.get('Content-Transfer-Encoding', '7bit').upper()
+        payload = part.get_payload().encode('utf-8')
+        disposition = 'NIL'
+        if 'attachment' in str(part.get('Content-Disposition', '')):
+            disposition = f'("ATTACHMENT" ("FILENAME" "{part.get_filename()}"))'
+        fields = (f'"{part.get_content_maintype().upper()}" "{part.get_content_subtype().upper()}" '
+                  f'{params} NIL NIL "{encoding}" {len(payload)}')
+        if part.get_content_maintype() == 'text':
+            fields += f' {len(payload.splitlines())}'
+        return f'({fields} NIL {disposition} NIL)'
+    
+    def _section(self, message, section: str) -> bytes:
+        """Return the raw (still transfer-encoded) content of a body section like '1.2'."""
+        part = message
+        for index in section.split('.'):
+            if part.is_multipart():
+                part = part.get_payload()[int(index) - 1]
+        return part.get_payload().encode('utf-8')
+    
+    def _fetch_structure_or_sections(self, uid: str, items: str) -> List[Any]:
+        """Answer BODYSTRUCTURE and BODY.PEEK[<section>]<o.n> FETCH items for one message."""
+        raw = self._render_message(self.mailbox._emails[uid])
+        message = message_from_bytes(raw)
+        literals = []
+        if 'BODYSTRUCTURE' in items:
+            header = raw.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n"
+            literals.append((f"BODYSTRUCTURE {self._bodystructure(message)} BODY[HEADER]", header))
+        for section, origin, length in re.findall(r'BODY\.PEEK\[([\d.]+)\](?:<(\d+)\.(\d+)>)?', items):
+            content = self._section(message, section)
+            if origin:
+                content = content[int(origin):int(origin) + int(length)]
+            literals.append((f"BODY[{section}]" + (f"<{origin}>" if origin else ""), content))
+        
+        data = []
+        for index, (item, content) in enumerate(literals):
+            prefix = f"{uid} (UID {uid} " if index == 0 else " "
+            self.bytes_sent += len(content)
+            data.append((f"{prefix}{item} {{{len(content)}}}".encode('ascii'), content))
+        data.append(b')')
+        return data
+    
+    @staticmethod
+    def _unquote(name: str) -> str:
+        if len(name) >= 2 and name.startswith('"') and name.endswith('"'):
+            return re.sub(r'\\(.)', r'\1', name[1:-1])
+        return name
+    
+    def _uidnext(self, mailbox: MockImapClient) -> int:
+        return max((int(uid) for uid in mailbox._emails), default=0) + 1
+    
+    def select(self, name: str = 'INBOX'):
+        """Handle an imaplib-style select() call (UIDVALIDITY is the folder position + 1)."""
+        name = self._unquote(name)
+        self.commands.append(('SELECT', name))
+        if name not in self.folders:
+            return ('NO', [b'Mailbox does not exist'])
+        self.mailbox = self.folders[name]
+        self._untagged['UIDVALIDITY'] = [str(list(self.folders).index(name) + 1).encode('ascii')]
+        self._untagged['UIDNEXT'] = [str(self._uidnext(self.mailbox)).encode('ascii')]
+        return ('OK', [str(len(self.mailbox._emails)).encode('ascii')])
+    
+    def list(self, directory: str = '""', pattern: str = '*'):
+        """Handle an imaplib-style list() call ('*' and '%' wildcards, '/' delimiter)."""
+        pattern = self._unquote(pattern)
+        self.commands.append(('LIST', pattern))
+        regex = re.escape(pattern).replace(r'\*', '.*').replace('%', '[^/]*')
+        return ('OK', [
+            f'(\\HasNoChildren) "/" "{name}"'.encode('utf-8')
+            for name in self.folders if re.fullmatch(regex, name)
+        ])
+    
+    def status(self, name: str, items: str):
+        """Handle an imaplib-style status() call (UIDNEXT only)."""
+        name = self._unquote(name)
+        self.commands.append(('STATUS', name))
+        if name not in self.folders:
+            return ('NO', [b'Mailbox does not exist'])
+        return ('OK', [f'"{name}" (UIDNEXT {self._uidnext(self.folders[name])})'.encode('utf-8')])
+    
+    def capability(self):
+        """Handle an imaplib-style capability() call."""
+        return ('OK', [' '.join(self.capabilities).encode('ascii')])
+    
+    def response(self, code: str):
+        """Return (and forget) untagged responses of the given type, like imaplib."""
+        return (code, self._untagged.pop(code.upper(), [None]))
+    
+    def uid(self, command: str, *args):
+        """Handle an imaplib-style uid() call."""
+        command = command.upper()
+        self.commands.append((command,) + args)
+        
+        if command == 'SEARCH':
+            query = args[-1] if args else 'ALL'
+            excluded = re.findall(r'UNKEYWORD "([^"]+)"', query)
+            uids = [
+                uid for uid, email_data in self.mailbox._emails.items()
+                if not any(flag in email_data.flags for flag in excluded)
+            ]
+            uid_range = re.search(r'UID (\d+):\*', query)
+            if uid_range:
+                # Like a real server, n:* also matches the highest UID when it is below n
+                highest = max((int(uid) for uid in self.mailbox._emails), default=0)
+                low = min(int(uid_range.group(1)), highest)
+                uids = [uid for uid in uids if int(uid) >= low]
+            if args and args[0] and args[0].upper().startswith('RETURN'):
+                result = f'(TAG "A1") UID COUNT {len(uids)}'
+                if uids:
+                    result += f' ALL {build_uid_set(uids)}'
+                response = result.encode('ascii')
+                self._untagged['ESEARCH'] = [response]
+                self.bytes_sent += len(response)
+                return ('OK', [None])
+            response = ' '.join(uids).encode('ascii')
+            self.bytes_sent += len(response)
+            return ('OK', [response])
+        
+        if command == 'FETCH' and ('BODYSTRUCTURE' in args[1] or 'BODY.PEEK[' in args[1]) \
+                and 'HEADER.FIELDS' not in args[1]:
+            data = []
+            for uid in self._expand_uid_set(args[0]):
+                data.extend(self._fetch_structure_or_sections(uid, args[1]))
+            return ('OK', data)
+        
+        if command == 'FETCH':
+            headers_only = 'HEADER.FIELDS' in args[1]
+            item = 'BODY[HEADER.FIELDS]' if headers_only else 'RFC822'
+            data = []
+            for uid in self._expand_uid_set(args[0]):
+                raw = self._render_message(self.mailbox._emails[uid])
+                if headers_only:
+                    raw = raw.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n"
+                self.bytes_sent += len(raw)
+                envelope = f"{uid} (UID {uid} {item} {{{len(raw)}}}".encode('ascii')
+                data.append((envelope, raw))
+                data.append(b')')
+            return ('OK', data)
+        
+        if command == 'STORE':
+            flag = args[2].strip('()')
+            for uid in self._expand_uid_set(args[0]):
+                flags = self.mailbox._emails[uid].flags
+                if args[1].startswith('+') and flag not in flags:
+                    flags.append(flag)
+                elif args[1].startswith('-') and flag in flags:
+                    flags.remove(flag)
+            return ('OK', [b''])
+        
+        return ('BAD', [f"Unsupported command {command}".encode('ascii')])
+    
+    def logout(self):
+        """Mock logout."""
+        return ('BYE', [b''])
+
+
 class MockLLMClient(LLMClient):
     """
     Mock LLM client that returns deterministic responses based on input prompts.
@@ -0,0 +1,228 @@
+"""
+Round-trip benchmark for batched IMAP fetching and flagging.
+
+Runs ConfigurableImapClient.get_unprocessed_emails against the in-memory
+MockImapClient mailbox (through MockImapConnection) and counts the IMAP commands
+sent, comparing per-UID fetching with batched UID FETCH. Processed-flag updates
+are compared the same way (per-UID STORE vs. BatchedFlagWriter), and search
+response sizes for full vs. incremental (UID min+1:*) and ESEARCH searches, and
+bytes transferred for full RFC822 vs. BODYSTRUCTURE-driven text-part fetches.
+Each test asserts the round trips or the byte ratio it expects.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from src.account_processor import ConfigurableImapClient
+from src.dry_run import DryRunContext
+from src.imap_client import BatchedFlagWriter
+from tests.integration.mock_services import MockImapClient, MockImapConnection, MockEmailData
+
+
+MAILBOX_SIZE = 500
+
+
+@pytest.fixture
+def large_mailbox():
+    """Mock mailbox with MAILBOX_SIZE emails, every tenth already processed."""
+    mailbox = MockImapClient()
+    for uid in range(1, MAILBOX_SIZE + 1):
+        mailbox.add_email(MockEmailData(
+            uid=str(uid),
+            sender=f"sender{uid}@example.com",
+            subject=f"Message {uid}",
+            body=f"Body of message {uid}",
+            flags=['AIProcessed'] if uid % 10 == 0 else []
+        ))
+    return mailbox
+
+
+def _connect(mailbox, config, capabilities=None):
+    """Create a ConfigurableImapClient talking to MockImapConnection."""
+    client = ConfigurableImapClient(config, authenticator=Mock())
+    connection = MockImapConnection(mailbox, capabilities=capabilities)
+    client._imap = connection
+    client._connected = True
+    return client, connection
+
+
+def _fetch_with_batch_size(mailbox, batch_size):
+    """Fetch all unprocessed emails and return (emails, connection)."""
+    config = {
+        'imap': {
+            'server': 'imap.example.com',
+            'port': 993,
+            'username': 'bench@example.com',
+            'query': 'ALL',
+            'processed_tag': 'AIProcessed',
+            'fetch_batch_size': batch_size
+        }
+    }
+    client, connection = _connect(mailbox, config)
+    emails = client.get_unprocessed_emails()
+    client._connected = False
+    return emails, connection
+
+
+@pytest.mark.parametrize("batch_size", [1, 10, 50, 100])
+def test_fetch_round_trips_by_batch_size(large_mailbox, batch_size):
+    """Batched fetch returns the same emails with one FETCH per chunk."""
+    emails, connection = _fetch_with_batch_size(large_mailbox, batch_size)
+    
+    expected_uids = [str(uid) for uid in range(1, MAILBOX_SIZE + 1) if uid % 10 != 0]
+    assert [e['uid'] for e in emails] == expected_uids
+    
+    expected_fetches = -(-len(expected_uids) // batch_size)
+    assert connection.command_count('SEARCH') == 1
+    assert connection.command_count('FETCH') == expected_fetches
+    assert connection.round_trips == 1 + expected_fetches
+
+
+def test_batched_fetch_matches_per_uid_fetch(large_mailbox):
+    """Batched and per-UID fetches parse into identical email dictionaries."""
+    single, single_conn = _fetch_with_batch_size(large_mailbox, 1)
+    batched, batched_conn = _fetch_with_batch_size(large_mailbox, 50)
+    
+    assert batched == single
+    assert batched_conn.round_trips * 40 < single_conn.round_trips
+
+
+def test_header_prefilter_reduces_fetched_bytes():
+    """Header-first fetch skips bodies of blacklisted newsletters (60% DROP)."""
+    from src.account_processor import AccountProcessor
+    from src.rules import BlacklistRule, ActionEnum
+    
+    mailbox = MockImapClient()
+    for uid in range(1, 101):
+        is_newsletter = uid % 5 < 3
+        mailbox.add_email(MockEmailData(
+            uid=str(uid),
+            sender="digest@newsletter.example" if is_newsletter else f"colleague{uid}@work.example",
+            subject=f"Message {uid}",
+            body=("Long newsletter content. " * 400) if is_newsletter else f"Short note {uid}"
+        ))
+    rules = [BlacklistRule(trigger_type="domain", value="newsletter.example", action=ActionEnum.DROP)]
+    
+    full_emails, full_conn = _fetch_with_batch_size(mailbox, 50)
+    
+    config = {'imap': {'server': 'imap.example.com', 'port': 993, 'username': 'bench@example.com'}}
+    client, connection = _connect(mailbox, config)
+    processor = AccountProcessor(
+        account_id='bench',
+        account_config=config,
+        imap_client_factory=lambda cfg: client,
+        llm_client=Mock(),
+        blacklist_service=lambda path: rules,
+        whitelist_service=lambda path: [],
+        note_generator=Mock(),
+        parser=Mock(),
+        decision_logic=Mock()
+    )
+    processor._imap_conn = client
+    
+    all_uids = [str(uid) for uid in range(1, 101)]
+    remaining = processor._prefilter_blacklisted_uids(all_uids)
+    emails = client.get_unprocessed_emails(uids=remaining)
+    
+    assert len(processor._dropped_emails) == 60
+    assert len(emails) == 40
+    # Headers of 100 emails plus 40 short bodies, against 60 long newsletters fetched in full
+    assert connection.bytes_sent * 10 < full_conn.bytes_sent
+
+
+def test_text_parts_fetch_skips_attachments():
+    """BODYSTRUCTURE-driven fetch of text parts avoids downloading 200 KB PDFs."""
+    mailbox = MockImapClient()
+    for uid in range(1, 41):
+        mailbox.add_email(MockEmailData(
+            uid=str(uid),
+            sender=f"billing{uid}@vendor.example",
+            subject=f"Invoice {uid}",
+            body=f"Please find invoice {uid} attached.",
+            attachment_size=200_000
+        ))
+    
+    full_emails, full_conn = _fetch_with_batch_size(mailbox, 50)
+    
+    config = {
+        'imap': {
+            'server': 'imap.example.com', 'port': 993, 'username': 'bench@example.com',
+            'query': 'ALL', 'fetch_mode': 'text_parts'
+        },
+        'processing': {'max_body_chars': 4000}
+    }
+    client, connection = _connect(mailbox, config)
+    emails = client.get_unprocessed_emails()
+    
+    assert emails == full_emails
+    assert emails[0]['body'] == "Please find invoice 1 attached."
+    assert emails[0]['html_body'] == "<p>Please find invoice 1 attached.</p>"
+    assert connection.command_count('FETCH') == 2
+    assert connection.bytes_sent * 100 < full_conn.bytes_sent
+
+
+def test_text_parts_fetch_truncates_long_bodies():
+    """A body longer than max_body_chars is fetched as a partial range."""
+    mailbox = MockImapClient()
+    mailbox.add_email(MockEmailData(
+        uid="1", sender="a@example.com", subject="Long", body="x" * 50_000, attachment_size=1000
+    ))
+    config = {
+        'imap': {
+            'server': 'imap.example.com', 'port': 993, 'username': 'bench@example.com',
+            'query': 'ALL', 'fetch_mode': 'text_parts'
+        },
+        'processing': {'max_body_chars': 1000}
+    }
+    client, connection = _connect(mailbox, config)
+    
+    email_data = client.get_email_by_uid("1")
+    
+    assert 1000 <= len(email_data['body']) < 50_000
+    assert set(email_data['body']) == {'x'}
+    assert any('<0.5600>' in command[2] for command in connection.commands)
+
+
+@pytest.mark.parametrize("batch_size", [1, 50, 100])
+def test_flag_store_round_trips_by_batch_size(large_mailbox, batch_size):
+    """Buffered flag writes send one UID STORE per batch and flag every email."""
+    config = {'imap': {'server': 'imap.example.com', 'port': 993, 'username': 'bench@example.com'}}
+    client, connection = _connect(large_mailbox, config)
+    uids = [str(uid) for uid in range(1, MAILBOX_SIZE + 1) if uid % 10 != 0]
+    
+    with DryRunContext(False):
+        writer = BatchedFlagWriter(client, 'AIProcessed', batch_size=batch_size, flush_interval=3600)
+        for uid in uids:
+            writer.add(uid)
+        assert writer.flush() == []
+    
+    assert connection.command_count('STORE') == -(-len(uids) // batch_size)
+    assert all('AIProcessed' in email_data.flags for email_data in large_mailbox._emails.values())
+    assert connection.round_trips == connection.command_count('STORE')
+
+
+@pytest.mark.parametrize("capabilities", [None, ['ESEARCH']])
+def test_incremental_search_response_size(capabilities):
+    """An incremental search returns only new UIDs instead of the whole mailbox."""
+    mailbox = MockImapClient()
+    for uid in range(1, 20001):
+        mailbox.add_email(MockEmailData(uid=str(uid), sender="a@example.com", subject="S", body="B"))
+    config = {'imap': {'server': 'imap.example.com', 'port': 993, 'username': 'bench@example.com'}}
+    
+    client, full_conn = _connect(mailbox, config, capabilities)
+    count, _ = client.count_unprocessed_emails()
+    assert count == 20000
+    
+    client, incremental_conn = _connect(mailbox, config, capabilities)
+    count, uids = client.count_unprocessed_emails(min_uid=19995)
+    assert (count, uids) == (5, ['19996', '19997', '19998', '19999', '20000'])
+    assert incremental_conn.bytes_sent < 50
+    
+    client, up_to_date_conn = _connect(mailbox, config, capabilities)
+    assert client.count_unprocessed_emails(min_uid=20000) == (0, [])
+    
+    if capabilities:
+        # ESEARCH returns the full result as a compact UID set
+        assert full_conn.bytes_sent < 100
+    else:
+        assert incremental_conn.bytes_sent * 1000 < full_conn.bytes_sent
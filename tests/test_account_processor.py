@@ -17,20 +17,24 @@ from src.account_processor import (
     AccountProcessorSetupError,
     AccountProcessorRunError,
     ConfigurableImapClient,
+    MultiFolderImapClient,
     create_imap_client_from_config,
     estimate_processing_cost,
     prompt_user_confirmation,
     CostEstimate
 )
+from src.dry_run import DryRunContext
 from src.models import EmailContext, from_imap_dict
-from src.rules import ActionEnum
+from src.rules import ActionEnum, BlacklistRule
 from src.llm_client import LLMResponse
+from src.token_usage import MIN_HISTORY_EMAILS, TokenStatsStore, TokenUsage
+from src.imap_client import parse_uid_set
 from src.decision_logic import ClassificationResult, ClassificationStatus
 from src.auth.strategies import PasswordAuthenticator, OAuthAuthenticator
 
 
 @pytest.fixture
-def sample_account_config():
+def sample_account_config(tmp_path):
     """Sample account configuration for testing."""
     return {
         'imap': {
@@ -47,6 +51,9 @@ def sample_account_config():
         },
         'processing': {
             'max_emails_per_run': 10
+        },
+        'paths': {
+            'token_stats_file': str(tmp_path / 'token_stats.sqlite3')
         }
     }
 
@@ -60,8 +67,13 @@ def mock_imap_client():
     client.disconnect = Mock()
     client.count_unprocessed_emails = Mock(return_value=(0, []))
     client.get_unprocessed_emails = Mock(return_value=[])
+    # Streaming path delegates to get_unprocessed_emails so tests can configure either
+    client.iter_unprocessed_emails = Mock(
+        side_effect=lambda **kwargs: iter(client.get_unprocessed_emails(**kwargs))
+    )
     client.get_email_by_uid = Mock()
     client.set_flag = Mock(return_value=True)
+    client.set_flag_bulk = Mock(return_value=True)
     return client
 
 
@@ -127,6 +139,67 @@ def account_processor(sample_account_config, mock_imap_client, mock_llm_client,
     return processor
 
 
+@pytest.fixture
+def make_account_processor(mock_llm_client, mock_note_generator, mock_decision_logic):
+    """Factory for AccountProcessors around a given IMAP client and blacklist rules."""
+    from src.content_parser import parse_html_content
+    
+    def build(config, client, rules=()):
+        return AccountProcessor(
+            account_id='test_account',
+            account_config=config,
+            imap_client_factory=lambda cfg: client,
+            llm_client=mock_llm_client,
+            blacklist_service=Mock(return_value=list(rules)),
+            whitelist_service=Mock(return_value=[]),
+            note_generator=mock_note_generator,
+            parser=parse_html_content,
+            decision_logic=mock_decision_logic
+        )
+    return build
+
+
+@pytest.fixture
+def scripted_imap_client():
+    """
+    Factory for ConfigurableImapClients on a mocked connection with scripted UID commands.
+    
+    search is the SEARCH result (bytes, or a callable mapping the query to an IMAP
+    response); fetch maps (uid_set, items) of a FETCH to an IMAP response.
+    """
+    def build(config, search=b'1 2 3', fetch=None, mailbox_status=None):
+        client = ConfigurableImapClient(config, authenticator=Mock())
+        client._imap = MagicMock()
+        client._imap.capability.return_value = ('OK', [b'IMAP4rev1'])
+        
+        def uid_side_effect(command, uid_set, *args):
+            if command == 'SEARCH':
+                return search(args[0]) if callable(search) else ('OK', [search])
+            return fetch(uid_set, args[0]) if fetch is not None else ('OK', [None])
+        
+        client._imap.uid.side_effect = uid_side_effect
+        client._connected = True
+        if mailbox_status is not None:
+            client._mailbox_status = dict(mailbox_status, mailbox='INBOX')
+        client.connect = Mock()
+        client.disconnect = Mock()
+        return client
+    return build
+
+
+def _rfc822_response(uid_set, items=None):
+    """FETCH response with a minimal message for every UID of uid_set."""
+    data = []
+    for uid in parse_uid_set(uid_set):
+        data += [(f'{uid} (UID {uid} RFC822 {{20}}'.encode(), b'Subject: Hi\r\n\r\nBody'), b')']
+    return ('OK', data)
+
+
+def _searches(client):
+    """Queries of the UID SEARCH commands sent by a scripted client."""
+    return [c[0][2] for c in client._imap.uid.call_args_list if c[0][0] == 'SEARCH']
+
+
 class TestAccountProcessorInitialization:
     """Test AccountProcessor initialization and state isolation."""
     
@@ -267,6 +340,130 @@ class TestAccountProcessorRun:
         mock_note_generator.generate_note.assert_called()
 
 
+    def test_run_processes_emails_as_they_stream(self, account_processor, mock_imap_client):
+        """Test that run() processes each email before the next one is fetched."""
+        account_processor.setup()
+        account_processor.config['safety_interlock'] = {'enabled': False}
+        mock_imap_client.count_unprocessed_emails.return_value = (2, ['1', '2'])
+        
+        events = []
+        
+        def stream(**kwargs):
+            for uid in kwargs['uids']:
+                events.append(f"fetch {uid}")
+                yield {'uid': uid, 'subject': 'S', 'from': 'a@b.com', 'body': 'B'}
+        
+        mock_imap_client.iter_unprocessed_emails = Mock(side_effect=stream)
+        
+        with patch.object(account_processor, '_process_message',
+                          side_effect=lambda email_dict, **kw: events.append(f"process {email_dict['uid']}")):
+            account_processor.run()
+        
+        assert events == ['fetch 1', 'process 1', 'fetch 2', 'process 2']
+        assert account_processor._processing_context['emails_fetched'] == 2
+
+
+    def test_run_concurrent_classification_preserves_order(self, account_processor, mock_imap_client,
+                                                            mock_llm_client):
+        """Test that concurrent classification overlaps LLM calls but flags emails in order."""
+        import threading
+        import time
+        
+        account_processor.setup()
+        account_processor.config['safety_interlock'] = {'enabled': False}
+        account_processor.config['classification'] = {'max_concurrency': 3}
+        uids = ['1', '2', '3', '4', '5']
+        mock_imap_client.count_unprocessed_emails.return_value = (len(uids), uids)
+        mock_imap_client.get_unprocessed_emails.return_value = [
+            {'uid': uid, 'subject': f'Email {uid}', 'from': 'a@b.com', 'body': f'Body {uid}'}
+            for uid in uids
+        ]
+        
+        lock = threading.Lock()
+        in_flight = {'now': 0, 'max': 0}
+        
+        def slow_classify(email_content, debug_uid=None, **kwargs):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            # Earlier emails take longer, so they finish out of order
+            time.sleep(0.05 * (6 - int(debug_uid)))
+            with lock:
+                in_flight['now'] -= 1
+            return LLMResponse(spam_score=2, importance_score=8)
+        
+        mock_llm_client.classify_email.side_effect = slow_classify
+        
+        with patch('src.account_processor.check_blacklist', return_value=ActionEnum.PASS), \
+             patch('src.account_processor.apply_whitelist', return_value=(8.0, [])), \
+             patch.object(account_processor, '_write_note_to_disk', return_value=None):
+            account_processor.run()
+        
+        assert in_flight['max'] > 1
+        mock_imap_client.set_flag_bulk.assert_called_once_with(uids, 'AIProcessed')
+        assert [e.uid for e in account_processor._processed_emails] == uids
+
+
+    def test_run_batch_classification_groups_emails(self, account_processor, mock_imap_client,
+                                                     mock_llm_client):
+        """Test that classification.batch_size groups emails into classify_emails_batch calls."""
+        account_processor.setup()
+        account_processor.config['safety_interlock'] = {'enabled': False}
+        account_processor.config['classification'] = {'batch_size': 2}
+        uids = ['1', '2', '3', '4', '5']
+        mock_imap_client.count_unprocessed_emails.return_value = (len(uids), uids)
+        mock_imap_client.get_unprocessed_emails.return_value = [
+            {'uid': uid, 'subject': f'Email {uid}', 'from': 'a@b.com', 'body': f'Body {uid}'}
+            for uid in uids
+        ]
+        # Email 3 cannot be classified, not even individually
+        mock_llm_client.classify_emails_batch.side_effect = lambda emails, **kwargs: {
+            uid: LLMResponse(spam_score=2, importance_score=8) for uid in emails if uid != '3'
+        }
+        
+        with patch('src.account_processor.check_blacklist', return_value=ActionEnum.PASS), \
+             patch('src.account_processor.apply_whitelist', return_value=(8.0, [])), \
+             patch.object(account_processor, '_write_note_to_disk', return_value=None):
+            account_processor.run()
+        
+        batches = [list(c[0][0]) for c in mock_llm_client.classify_emails_batch.call_args_list]
+        assert batches == [['1', '2'], ['3', '4'], ['5']]
+        mock_llm_client.classify_email.assert_not_called()
+        assert [e.uid for e in account_processor._processed_emails] == ['1', '2', '4', '5']
+
+    def test_run_combined_mode_summarizes_in_classification_call(self, account_processor, mock_imap_client,
+                                                                 mock_llm_client, tmp_path):
+        """Test that summarization.combined_mode reuses the summary from the classification call."""
+        prompt_file = tmp_path / 'summarization_prompt.md'
+        prompt_file.write_text('Summarize the email in two sentences.')
+        account_processor.setup()
+        account_processor.config['safety_interlock'] = {'enabled': False}
+        account_processor.config['summarization'] = {'combined_mode': True}
+        account_processor.config['processing'] = {'summarization_tags': ['important'], 'importance_threshold': 8}
+        account_processor.config['paths'] = {'summarization_prompt_path': str(prompt_file)}
+        mock_imap_client.count_unprocessed_emails.return_value = (1, ['1'])
+        mock_imap_client.get_unprocessed_emails.return_value = [
+            {'uid': '1', 'subject': 'Contract', 'from': 'a@b.com', 'body': 'Please sign by Friday'}
+        ]
+        mock_llm_client.classify_and_summarize.return_value = LLMResponse(
+            spam_score=2, importance_score=9, summary='Sign the contract by Friday.'
+        )
+
+        with patch('src.account_processor.check_blacklist', return_value=ActionEnum.PASS), \
+             patch('src.account_processor.apply_whitelist', return_value=(9.0, [])), \
+             patch('src.email_summarization.generate_email_summary') as mock_summary, \
+             patch.object(account_processor, '_write_note_to_disk', return_value=None):
+            account_processor.run()
+
+        kwargs = mock_llm_client.classify_and_summarize.call_args[1]
+        assert kwargs['summary_instructions'] == 'Summarize the email in two sentences.'
+        assert kwargs['importance_threshold'] == 8
+        mock_llm_client.classify_email.assert_not_called()
+        mock_summary.assert_not_called()
+        summary = account_processor._processed_emails[0].summary
+        assert (summary['success'], summary['summary']) == (True, 'Sign the contract by Friday.')
+
+
 class TestAccountProcessorTeardown:
     """Test AccountProcessor teardown() method."""
     
@@ -291,6 +488,20 @@ class TestAccountProcessorTeardown:
         
         # Verify disconnect was attempted
         mock_imap_client.disconnect.assert_called_once()
+    
+    def test_teardown_flushes_pending_flags(self, account_processor, mock_imap_client):
+        """Test that buffered processed flags are stored before disconnecting."""
+        account_processor.setup()
+        mock_imap_client.attach_mock(mock_imap_client.set_flag_bulk, 'set_flag_bulk')
+        mock_imap_client.attach_mock(mock_imap_client.disconnect, 'disconnect')
+        account_processor._mark_email_processed('7')
+        account_processor._mark_email_processed('8')
+        mock_imap_client.set_flag_bulk.assert_not_called()
+    
+        account_processor.teardown()
+    
+        assert [c[0] for c in mock_imap_client.mock_calls[-2:]] == ['set_flag_bulk', 'disconnect']
+        mock_imap_client.set_flag_bulk.assert_called_once_with(['7', '8'], 'AIProcessed')
 
 
 class TestConfigurableImapClient:
@@ -751,7 +962,641 @@ class TestAccountProcessorPipeline:
         mock_note_generator.generate_note.assert_called()
         
         # Verify email was marked as processed
-        mock_imap_client.set_flag.assert_called()
+        mock_imap_client.set_flag_bulk.assert_called_once_with(['123'], 'AIProcessed')
+
+
+class TestHeaderPrefilter:
+    """Test the header-only blacklist pass that runs before body fetch."""
+    
+    JUNK_DOMAIN_RULES = [BlacklistRule(trigger_type='domain', value='junk.com', action=ActionEnum.DROP)]
+    
+    @pytest.fixture
+    def client(self, sample_account_config, scripted_imap_client):
+        def fetch(uid_set, items):
+            if 'HEADER.FIELDS' in items:
+                return ('OK', [
+                    (b'1 (UID 1 BODY[HEADER.FIELDS] {30}', b'From: spam@junk.com\r\nSubject: Buy\r\n\r\n'), b')',
+                    (b'2 (UID 2 BODY[HEADER.FIELDS] {30}', b'From: boss@work.com\r\nSubject: Hi\r\n\r\n'), b')',
+                    (b'3 (UID 3 BODY[HEADER.FIELDS] {30}', b'From: spam@junk.com\r\nSubject: Sale\r\n\r\n'), b')',
+                ])
+            return ('OK', [(f'1 (UID {uid_set} RFC822 {{40}}'.encode(),
+                            f'From: boss@work.com\r\nSubject: Hi\r\n\r\nBody {uid_set}'.encode()), b')'])
+        
+        return scripted_imap_client(sample_account_config, fetch=fetch)
+    
+    @staticmethod
+    def _blacklist_by_sender(email_context, rules):
+        return ActionEnum.DROP if 'junk.com' in email_context.sender else ActionEnum.PASS
+    
+    def test_dropped_emails_are_never_body_fetched(self, sample_account_config, client, make_account_processor):
+        """Test that DROP emails found in the header pass skip the RFC822 fetch."""
+        sample_account_config['safety_interlock'] = {'enabled': False}
+        processor = make_account_processor(sample_account_config, client, self.JUNK_DOMAIN_RULES)
+        processor.setup()
+        
+        with patch('src.account_processor.check_blacklist', side_effect=self._blacklist_by_sender), \
+             patch('src.account_processor.apply_whitelist', return_value=(8.0, [])), \
+             patch.object(processor, '_write_note_to_disk', return_value=None):
+            processor.run()
+        
+        body_fetches = [
+            c for c in client._imap.uid.call_args_list
+            if c[0][0] == 'FETCH' and 'RFC822' in c[0][2]
+        ]
+        assert [c[0][1] for c in body_fetches] == ['2']
+        assert sorted(e.uid for e in processor._dropped_emails) == ['1', '3']
+        assert [e.uid for e in processor._processed_emails] == ['2']
+    
+    def test_prefilter_can_be_disabled(self, sample_account_config, client, make_account_processor):
+        """Test that processing.header_prefilter=False skips the header pass."""
+        sample_account_config['processing']['header_prefilter'] = False
+        processor = make_account_processor(sample_account_config, client, self.JUNK_DOMAIN_RULES)
+        processor.setup()
+        
+        assert processor._header_prefilter_enabled() is False
+    
+    def test_prefilter_skipped_without_drop_rules(self, sample_account_config, client, make_account_processor):
+        """Test that no header fetch is made when no blacklist rule can drop an email."""
+        sample_account_config['safety_interlock'] = {'enabled': False}
+        rules = [BlacklistRule(trigger_type='sender', value='junk.com', action=ActionEnum.RECORD)]
+        processor = make_account_processor(sample_account_config, client, rules)
+        processor.setup()
+        
+        assert processor._header_prefilter_enabled() is False
+        
+        with patch('src.account_processor.apply_whitelist', return_value=(8.0, [])), \
+             patch.object(processor, '_write_note_to_disk', return_value=None):
+            processor.run()
+        
+        header_fetches = [
+            c for c in client._imap.uid.call_args_list
+            if c[0][0] == 'FETCH' and 'HEADER.FIELDS' in c[0][2]
+        ]
+        assert header_fetches == []
+
+
+class TestServerSideBlacklist:
+    """Test pushing DROP sender/domain rules into the IMAP search."""
+    
+    @staticmethod
+    def _drop_rules(count):
+        return [
+            BlacklistRule(trigger_type='sender', value=f'news@spam{i}.com', action=ActionEnum.DROP)
+            for i in range(count)
+        ]
+    
+    def test_search_excludes_dropped_senders(self, sample_account_config, scripted_imap_client,
+                                            make_account_processor):
+        """Test that chunked NOT FROM searches are intersected before anything is fetched."""
+        def search_results(query):
+            # Each chunk excludes a different email
+            return ('OK', [b'2 3' if 'spam0.com' in query else b'1 2'])
+        
+        client = scripted_imap_client(sample_account_config, search=search_results)
+        processor = make_account_processor(sample_account_config, client, self._drop_rules(200))
+        processor.setup()
+        processor._apply_search_exclusions()
+        
+        count, uids = client.count_unprocessed_emails()
+        
+        queries = _searches(client)
+        assert len(queries) > 1
+        assert all(query.startswith('ALL UNKEYWORD "AIProcessed" NOT FROM ') for query in queries)
+        assert all(len(query) < 8000 for query in queries)
+        assert (count, uids) == (1, ['2'])
+    
+    def test_rejected_exclusions_fall_back_to_plain_search(self, sample_account_config, scripted_imap_client,
+                                                          make_account_processor):
+        """Test that a server rejecting NOT FROM clauses gets the plain query instead."""
+        def search_results(query):
+            if 'NOT FROM' in query:
+                return ('NO', [b'Query too complex'])
+            return ('OK', [b'1 2 3'])
+        
+        client = scripted_imap_client(sample_account_config, search=search_results)
+        processor = make_account_processor(sample_account_config, client, self._drop_rules(3))
+        processor.setup()
+        processor._apply_search_exclusions()
+        
+        assert client.count_unprocessed_emails() == (3, ['1', '2', '3'])
+        assert client._search_exclusions == []
+        
+        # Unchanged rules are not recompiled, so the next run searches plainly right away
+        processor._apply_search_exclusions()
+        assert client._search_exclusions == []
+    
+    def test_can_be_disabled(self, sample_account_config, scripted_imap_client, make_account_processor):
+        """Test that processing.server_side_blacklist=False leaves the search unchanged."""
+        sample_account_config['processing']['server_side_blacklist'] = False
+        client = scripted_imap_client(sample_account_config, search=b'1')
+        processor = make_account_processor(sample_account_config, client, self._drop_rules(3))
+        processor.setup()
+        processor._apply_search_exclusions()
+        
+        client.count_unprocessed_emails()
+        
+        assert _searches(client) == ['ALL UNKEYWORD "AIProcessed"']
+
+
+class TestRuleCaching:
+    """Test that rules files are loaded once and reloaded only when they change."""
+    
+    def test_rules_loaded_once_from_configured_paths(self, tmp_path, sample_account_config,
+                                                     mock_imap_client, mock_llm_client,
+                                                     mock_note_generator, mock_decision_logic):
+        """Test that rules come from paths.* and are not re-read per email."""
+        from src.rules import load_blacklist_rules, load_whitelist_rules
+        from src.content_parser import parse_html_content
+        
+        blacklist_file = tmp_path / 'blacklist.yaml'
+        blacklist_file.write_text('- trigger: domain\n  value: junk.com\n  action: drop\n')
+        whitelist_file = tmp_path / 'whitelist.yaml'
+        whitelist_file.write_text('[]\n')
+        sample_account_config['paths'] = {
+            'blacklist_file': str(blacklist_file),
+            'whitelist_file': str(whitelist_file)
+        }
+        blacklist_service = Mock(side_effect=load_blacklist_rules)
+        whitelist_service = Mock(side_effect=load_whitelist_rules)
+        processor = AccountProcessor(
+            account_id='test_account',
+            account_config=sample_account_config,
+            imap_client_factory=lambda cfg: mock_imap_client,
+            llm_client=mock_llm_client,
+            blacklist_service=blacklist_service,
+            whitelist_service=whitelist_service,
+            note_generator=mock_note_generator,
+            parser=parse_html_content,
+            decision_logic=mock_decision_logic
+        )
+        processor.setup()
+        
+        blacklist_service.assert_called_once_with(str(blacklist_file))
+        whitelist_service.assert_called_once_with(str(whitelist_file))
+        
+        for uid in ('1', '2', '3'):
+            email = EmailContext(uid=uid, sender=f'user{uid}@junk.com', subject='Hi')
+            assert processor._check_blacklist(email) == ActionEnum.DROP
+        assert blacklist_service.call_count == 1
+        
+        # Editing the file triggers exactly one reload
+        blacklist_file.write_text('- trigger: domain\n  value: other.com\n  action: record\n')
+        email = EmailContext(uid='4', sender='user@junk.com', subject='Hi')
+        assert processor._check_blacklist(email) == ActionEnum.PASS
+        assert processor._check_blacklist(email) == ActionEnum.PASS
+        assert blacklist_service.call_count == 2
+
+
+class TestVaultUidIndexUpdates:
+    """Test that written notes are recorded in the vault UID index."""
+    
+    def test_written_note_is_indexed(self, tmp_path, account_processor):
+        """Test that _write_note_to_disk adds the UID, path and Message-ID to the index."""
+        from src.vault_index import VaultUidIndex
+        
+        account_processor.config['paths'] = {'obsidian_vault': str(tmp_path)}
+        account_processor._write_note_to_disk(
+            note_content='---\nuid: 77\n---\n',
+            email_subject='Hello',
+            email_uid='77',
+            email_date='Wed, 13 Sep 2023 14:34:53 +0200',
+            message_id='<m77@example.com>'
+        )
+        account_processor.teardown()
+        
+        with VaultUidIndex.for_vault(tmp_path) as index:
+            assert index.max_uid('test_account') == 77
+            note_path = index.get_note_path('test_account', 77)
+        assert note_path.startswith(str(tmp_path / 'test_account'))
+
+
+class TestClassificationCache:
+    """Test that classification results are reused from the cache."""
+    
+    def test_cached_classification_skips_llm_call(self, tmp_path, account_processor,
+                                                  mock_imap_client, mock_llm_client):
+        """Test that identical content is classified once and then served from the cache."""
+        account_processor.config['classification'] = {'model': 'test-model', 'cache_enabled': True}
+        account_processor.config['paths'] = {
+            'classification_cache_file': str(tmp_path / 'cache.sqlite3')
+        }
+        account_processor.setup()
+        
+        first = EmailContext(uid='1', sender='a@example.com', subject='Hi', raw_text='Same body')
+        second = EmailContext(uid='2', sender='b@example.com', subject='Hi', raw_text='Same body')
+        other = EmailContext(uid='3', sender='c@example.com', subject='Hi', raw_text='Other body')
+        
+        responses = [account_processor._classify_with_llm(e) for e in (first, second, other)]
+        
+        assert mock_llm_client.classify_email.call_count == 2
+        assert responses[1].importance_score == responses[0].importance_score
+        cache = account_processor._classification_cache
+        assert (cache.hits, cache.misses) == (1, 2)
+        account_processor.teardown()
+    
+    def test_prompt_modes_do_not_share_cache_entries(self, tmp_path, account_processor, mock_llm_client):
+        """Test that single, batch and combined results are cached under separate keys."""
+        prompt_file = tmp_path / 'summarization_prompt.md'
+        prompt_file.write_text('Summarize the email in two sentences.')
+        account_processor.config['classification'] = {'model': 'test-model', 'cache_enabled': True}
+        account_processor.config['paths'] = {
+            'classification_cache_file': str(tmp_path / 'cache.sqlite3'),
+            'summarization_prompt_path': str(prompt_file)
+        }
+        account_processor.config['processing'] = {'summarization_tags': ['important']}
+        account_processor.setup()
+        mock_llm_client.classify_emails_batch.side_effect = lambda emails, **kwargs: {
+            uid: LLMResponse(spam_score=1, importance_score=5) for uid in emails
+        }
+        mock_llm_client.classify_and_summarize.return_value = LLMResponse(
+            spam_score=2, importance_score=9, summary='Sign the contract by Friday.'
+        )
+        email = EmailContext(uid='1', sender='a@example.com', subject='Hi', raw_text='Same body')
+        
+        account_processor._classify_with_llm(email)
+        account_processor._classify_batch_with_llm([email])
+        account_processor.config['summarization'] = {'combined_mode': True}
+        account_processor._classify_with_llm(email)
+        cached = account_processor._classify_with_llm(email)
+        
+        assert mock_llm_client.classify_email.call_count == 1
+        assert mock_llm_client.classify_emails_batch.call_count == 1
+        assert mock_llm_client.classify_and_summarize.call_count == 1
+        assert cached.summary == 'Sign the contract by Friday.'
+        cache = account_processor._classification_cache
+        assert (cache.hits, cache.misses) == (1, 3)
+        account_processor.teardown()
+    
+    def test_cache_disabled_by_default(self, account_processor):
+        """Test that no cache is opened unless classification.cache_enabled is set."""
+        account_processor.setup()
+        assert account_processor._classification_cache is None
+
+
+class TestSyncState:
+    """Test incremental runs driven by the persisted per-mailbox sync state."""
+    
+    @pytest.fixture
+    def config(self, tmp_path, sample_account_config):
+        sample_account_config['safety_interlock'] = {'enabled': False}
+        sample_account_config['processing']['header_prefilter'] = False
+        sample_account_config['paths'] = {'sync_state_file': str(tmp_path / 'sync.sqlite3')}
+        return sample_account_config
+    
+    @pytest.fixture
+    def make_processor(self, config, scripted_imap_client, make_account_processor):
+        def build(status, search_response=b'1 2 3'):
+            client = scripted_imap_client(
+                config, search=search_response, fetch=_rfc822_response, mailbox_status=status
+            )
+            processor = make_account_processor(config, client)
+            processor._process_message = Mock()
+            processor.setup()
+            return processor, client
+        return build
+    
+    def test_next_run_searches_only_new_uids(self, config, make_processor):
+        """Test that the last handled UID is saved and used as the next search range."""
+        from src.sync_state import SyncStateStore
+        
+        processor, client = make_processor({'uidvalidity': 7, 'uidnext': 4})
+        processor.run()
+        processor.teardown()
+        assert _searches(client) == ['ALL UNKEYWORD "AIProcessed"']
+        
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            state = store.load('test_account', 'INBOX')
+        assert (state.uidvalidity, state.last_uid) == (7, 3)
+        
+        processor, client = make_processor({'uidvalidity': 7, 'uidnext': 5}, b'4')
+        processor.run()
+        processor.teardown()
+        assert _searches(client) == ['ALL UNKEYWORD "AIProcessed" UID 4:*']
+        assert [c[0][0]['uid'] for c in processor._process_message.call_args_list] == ['4']
+    
+    def test_failed_classification_is_retried_next_run(self, config, make_processor):
+        """Test that an email whose LLM classification failed is retried by UID without holding back the position."""
+        from src.models import from_imap_dict
+        from src.sync_state import SyncStateStore
+        
+        processor, client = make_processor({'uidvalidity': 7, 'uidnext': 4})
+        
+        def process_message(email_dict, debug_prompt=False):
+            if email_dict['uid'] == '2':
+                processor._complete_message(from_imap_dict(email_dict), None)
+        
+        processor._process_message.side_effect = process_message
+        processor.run()
+        processor.teardown()
+        
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            assert store.load('test_account', 'INBOX').last_uid == 3
+            assert store.load_failed('test_account', 'INBOX') == {2: 1}
+        
+        processor, client = make_processor({'uidvalidity': 7, 'uidnext': 5}, b'4')
+        processor.run()
+        processor.teardown()
+        assert _searches(client) == ['ALL UNKEYWORD "AIProcessed" UID 4:*']
+        assert [c[0][0]['uid'] for c in processor._process_message.call_args_list] == ['2', '4']
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            assert store.load('test_account', 'INBOX').last_uid == 4
+            assert store.load_failed('test_account', 'INBOX') == {}
+    
+    def test_always_failing_email_is_given_up(self, config, make_processor, caplog):
+        """Test that an email is no longer retried after imap.max_failed_attempts failures."""
+        from src.models import from_imap_dict
+        from src.sync_state import SyncStateStore
+        
+        config['imap']['max_failed_attempts'] = 2
+        for attempt in range(3):
+            processor, client = make_processor(
+                {'uidvalidity': 7, 'uidnext': 4}, b'1 2 3' if attempt == 0 else b''
+            )
+            processor._process_message.side_effect = (
+                lambda email_dict, debug_prompt=False:
+                    processor._complete_message(from_imap_dict(email_dict), None)
+                    if email_dict['uid'] == '2' else None
+            )
+            with caplog.at_level('WARNING'):
+                processor.run()
+            processor.teardown()
+            processed = [c[0][0]['uid'] for c in processor._process_message.call_args_list]
+            assert processed == [['1', '2', '3'], ['2'], []][attempt]
+        
+        assert 'Giving up on email UID 2' in caplog.text
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            assert store.load('test_account', 'INBOX').last_uid == 3
+            assert store.load_failed('test_account', 'INBOX') == {}
+    
+    def test_uidvalidity_change_discards_state(self, config, make_processor):
+        """Test that a new UIDVALIDITY triggers a full search and replaces the state."""
+        from src.sync_state import SyncState, SyncStateStore
+        
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            store.save('test_account', 'INBOX', SyncState(uidvalidity=1, last_uid=500))
+        
+        processor, client = make_processor({'uidvalidity': 2, 'uidnext': 4})
+        processor.run()
+        processor.teardown()
+        
+        assert _searches(client) == ['ALL UNKEYWORD "AIProcessed"']
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            state = store.load('test_account', 'INBOX')
+        assert (state.uidvalidity, state.last_uid) == (2, 3)
+    
+    def test_unchanged_mailbox_skips_search(self, config, make_processor):
+        """Test that an unchanged UIDNEXT and HIGHESTMODSEQ need no SEARCH at all."""
+        from src.sync_state import SyncState, SyncStateStore
+        
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            store.save('test_account', 'INBOX', SyncState(uidvalidity=7, last_uid=3, highest_modseq=50))
+        
+        processor, client = make_processor(
+            {'uidvalidity': 7, 'uidnext': 4, 'highest_modseq': 50}
+        )
+        processor.run()
+        
+        assert client._imap.uid.call_count == 0
+        processor._process_message.assert_not_called()
+    
+    def test_flag_changes_reopen_processed_emails(self, config, make_processor):
+        """Test that emails whose processed flag was removed are found via CHANGEDSINCE."""
+        from src.sync_state import SyncState, SyncStateStore
+        
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            store.save('test_account', 'INBOX', SyncState(uidvalidity=7, last_uid=3, highest_modseq=50))
+        
+        processor, client = make_processor(
+            {'uidvalidity': 7, 'uidnext': 5, 'highest_modseq': 60}
+        )
+        
+        def uid_side_effect(command, *args):
+            if command == 'FETCH' and 'CHANGEDSINCE' in args[-1]:
+                return ('OK', [b'1 (UID 1 MODSEQ (55) FLAGS (\\Seen))',
+                               b'2 (UID 2 MODSEQ (58) FLAGS (\\Seen AIProcessed))'])
+            if command == 'SEARCH':
+                return ('OK', [b'4'])
+            return _rfc822_response(args[0])
+        
+        client._imap.uid.side_effect = uid_side_effect
+        processor.run()
+        
+        changed_fetch = [c for c in client._imap.uid.call_args_list if c[0][0] == 'FETCH'][0]
+        assert changed_fetch[0][1:] == ('1:3', '(UID FLAGS)', '(CHANGEDSINCE 50)')
+        assert [c[0][0]['uid'] for c in processor._process_message.call_args_list] == ['1', '4']
+
+
+class TestMultiFolderImapClient:
+    """Test scanning several folders (imap.folders) over a connection pool."""
+    
+    @staticmethod
+    def _folders():
+        from tests.integration.mock_services import MockImapClient, MockEmailData
+        folders = {}
+        for name, uids in (('INBOX', [1, 2]), ('Lists/python', [5, 6, 7]), ('Lists/rust', [3]), ('Archive', [9])):
+            mailbox = MockImapClient()
+            for uid in uids:
+                mailbox.add_email(MockEmailData(
+                    uid=str(uid), sender='a@example.com', subject=f'{name} {uid}', body='Body'
+                ))
+            folders[name] = mailbox
+        return folders
+    
+    @staticmethod
+    def _make_client(config, folders, connections):
+        from tests.integration.mock_services import MockImapConnection
+        
+        def connection_factory():
+            client = ConfigurableImapClient(config, authenticator=Mock())
+            client._imap = MockImapConnection(folders['INBOX'], folders=folders)
+            client._connected = True
+            connections.append(client)
+            return client
+        
+        return MultiFolderImapClient(config, connection_factory=connection_factory)
+    
+    @pytest.fixture
+    def config(self, tmp_path, sample_account_config):
+        sample_account_config['imap']['folders'] = ['INBOX', 'Lists/*']
+        sample_account_config['imap']['folder_connections'] = 2
+        sample_account_config['safety_interlock'] = {'enabled': False}
+        sample_account_config['paths'] = {'sync_state_file': str(tmp_path / 'sync.sqlite3')}
+        return sample_account_config
+    
+    def test_patterns_are_resolved_and_uids_carry_the_folder(self, config):
+        """Test LIST pattern resolution, the pool size and folder UIDs."""
+        from src.imap_client import FOLDER_UID_STRIDE, folder_number
+        
+        connections = []
+        client = self._make_client(config, self._folders(), connections)
+        client.connect()
+        
+        assert client.folders == ['INBOX', 'Lists/python', 'Lists/rust']
+        assert len(connections) == 2
+        
+        count, uids = client.count_unprocessed_emails()
+        
+        python_base = folder_number('Lists/python') * FOLDER_UID_STRIDE
+        rust_base = folder_number('Lists/rust') * FOLDER_UID_STRIDE
+        assert count == 6
+        assert uids == ['1', '2'] + [str(python_base + uid) for uid in (5, 6, 7)] + [str(rust_base + 3)]
+    
+    def test_emails_are_merged_and_flags_routed_per_folder(self, config):
+        """Test that all folders are streamed as one iterator and flags reach the right folder."""
+        folders = self._folders()
+        client = self._make_client(config, folders, [])
+        client.connect()
+        
+        emails = list(client.iter_unprocessed_emails())
+        
+        assert sorted(email['subject'] for email in emails) == [
+            'INBOX 1', 'INBOX 2', 'Lists/python 5', 'Lists/python 6', 'Lists/python 7', 'Lists/rust 3'
+        ]
+        python_email = next(email for email in emails if email['subject'] == 'Lists/python 6')
+        assert python_email['folder'] == 'Lists/python'
+        
+        with DryRunContext(False):
+            assert client.set_flag_bulk([python_email['uid'], '1'], 'AIProcessed')
+        
+        assert folders['Lists/python']._emails['6'].flags == ['AIProcessed']
+        assert folders['INBOX']._emails['1'].flags == ['AIProcessed']
+        assert folders['Lists/rust']._emails['3'].flags == []
+        assert client.count_unprocessed_emails()[0] == 4
+    
+    def test_sync_state_is_kept_per_folder(self, config):
+        """Test that a run saves one position per folder and the next run searches from it."""
+        from src.sync_state import SyncStateStore
+        
+        folders = self._folders()
+        connections = []
+        processor = AccountProcessor(
+            account_id='test_account',
+            account_config=config,
+            imap_client_factory=lambda cfg: self._make_client(cfg, folders, connections),
+            llm_client=Mock(),
+            blacklist_service=Mock(return_value=[]),
+            whitelist_service=Mock(return_value=[]),
+            note_generator=Mock(),
+            parser=Mock(),
+            decision_logic=Mock()
+        )
+        processor._process_message = Mock()
+        processor.setup()
+        with DryRunContext(False):
+            processor.run()
+        
+        assert processor._process_message.call_count == 6
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            assert store.load('test_account', 'INBOX').last_uid == 2
+            assert store.load('test_account', 'Lists/python').last_uid == 7
+            assert store.load('test_account', 'Lists/rust').last_uid == 3
+        
+        from tests.integration.mock_services import MockEmailData
+        folders['Lists/python'].add_email(MockEmailData(uid='8', sender='a@example.com', subject='New', body='Body'))
+        for connection in connections:
+            connection._imap.reset_counters()
+        processor._process_message.reset_mock()
+        with DryRunContext(False):
+            processor.run()
+        
+        searches = [c[-1] for connection in connections for c in connection._imap.commands if c[0] == 'SEARCH']
+        assert sorted(searches) == [
+            'ALL UNKEYWORD "AIProcessed" UID 3:*',
+            'ALL UNKEYWORD "AIProcessed" UID 4:*',
+            'ALL UNKEYWORD "AIProcessed" UID 8:*'
+        ]
+        assert [c[0][0]['subject'] for c in processor._process_message.call_args_list] == ['New']
+    
+    def test_failed_emails_are_retried_per_folder(self, config):
+        """Test that a failed email is stored for its folder and retried by UID next run."""
+        from src.sync_state import SyncStateStore
+        
+        folders = self._folders()
+        processor = AccountProcessor(
+            account_id='test_account',
+            account_config=config,
+            imap_client_factory=lambda cfg: self._make_client(cfg, folders, []),
+            llm_client=Mock(),
+            blacklist_service=Mock(return_value=[]),
+            whitelist_service=Mock(return_value=[]),
+            note_generator=Mock(),
+            parser=Mock(),
+            decision_logic=Mock()
+        )
+        
+        def process_message(email_dict, debug_prompt=False):
+            if email_dict['subject'] == 'Lists/python 6':
+                raise RuntimeError('classification failed')
+        
+        processor._process_message = Mock(side_effect=process_message)
+        processor.setup()
+        with DryRunContext(False):
+            processor.run()
+        
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            assert store.load('test_account', 'Lists/python').last_uid == 7
+            assert store.load_failed('test_account', 'Lists/python') == {6: 1}
+        
+        processor._process_message = Mock()
+        with DryRunContext(False):
+            processor.run()
+        
+        assert [c[0][0]['subject'] for c in processor._process_message.call_args_list] == ['Lists/python 6']
+        with SyncStateStore(config['paths']['sync_state_file']) as store:
+            assert store.load_failed('test_account', 'Lists/python') == {}
+    
+    def test_fetch_shards_split_one_folder_across_connections(self, config, monkeypatch):
+        """Test that imap.fetch_shards fetches contiguous UID ranges of INBOX on separate connections."""
+        from tests.integration.mock_services import MockImapClient, MockEmailData
+        
+        monkeypatch.setenv('TEST_IMAP_PASSWORD', 'secret')
+        del config['imap']['folders']
+        config['imap'].update({'fetch_shards': 3, 'folder_connections': 3, 'fetch_batch_size': 2})
+        assert isinstance(create_imap_client_from_config(config), MultiFolderImapClient)
+        
+        inbox = MockImapClient()
+        for uid in range(1, 13):
+            inbox.add_email(MockEmailData(uid=str(uid), sender='a@example.com', subject=f'Mail {uid}', body='Body'))
+        connections = []
+        client = self._make_client(config, {'INBOX': inbox}, connections)
+        client.connect()
+        
+        emails = list(client.iter_unprocessed_emails(max_emails=100))
+        
+        assert len(connections) == 3
+        assert sorted(int(email['uid']) for email in emails) == list(range(1, 13))
+        fetched = [
+            sorted(int(uid) for c in connection._imap.commands if c[0] == 'FETCH' for uid in parse_uid_set(c[1]))
+            for connection in connections
+        ]
+        assert all(fetched)
+        assert sorted(uid for uids in fetched for uid in uids) == list(range(1, 13))
+    
+    def test_pool_respects_max_server_connections(self, config):
+        """Test that the pool stops growing at imap.max_server_connections and frees its slots."""
+        from src.imap_client import SERVER_CONNECTIONS
+        from tests.integration.mock_services import MockImapConnection
+        
+        config['imap'].update({'server': 'imap.capped.test', 'folder_connections': 3, 'max_server_connections': 2})
+        folders = self._folders()
+        client = MultiFolderImapClient(
+            config,
+            connection_factory=lambda: ConfigurableImapClient(config, authenticator=Mock())
+        )
+        
+        with patch(
+            'src.account_processor.imaplib.IMAP4_SSL',
+            side_effect=lambda *args: MockImapConnection(folders['INBOX'], folders=folders)
+        ):
+            client.connect()
+            
+            assert len(client._connections) == 2
+            assert SERVER_CONNECTIONS.open_connections('imap.capped.test:993') == 2
+            assert client.count_unprocessed_emails()[0] == 6
+            
+            client.disconnect()
+        
+        assert SERVER_CONNECTIONS.open_connections('imap.capped.test:993') == 0
 
 
 class TestSafetyInterlock:
@@ -844,6 +1689,19 @@ class TestSafetyInterlock:
                 model_config=model_config
             )
     
+    def test_cost_estimation_from_estimated_usage(self):
+        """Test that a size-based token estimate replaces average_tokens_per_email."""
+        estimate = estimate_processing_cost(
+            email_count=4,
+            model_config={'model': 'test-model', 'cost_per_1k_tokens': 0.001},
+            safety_config={'average_tokens_per_email': 2000},
+            estimated_usage=TokenUsage(prompt_tokens=11800, completion_tokens=200)
+        )
+        
+        assert estimate.tokens_per_email == 3000
+        assert estimate.estimated_cost == pytest.approx(0.012)
+        assert (estimate.breakdown['prompt_tokens'], estimate.breakdown['completion_tokens']) == (11800, 200)
+    
     @patch('builtins.input', return_value='yes')
     def test_prompt_user_confirmation_yes(self, mock_input):
         """Test user confirmation with 'yes' response."""
@@ -899,6 +1757,46 @@ class TestSafetyInterlock:
         
         assert result is True
     
+    def test_prompt_user_confirmation_is_serialized_across_threads(self):
+        """Test that parallel accounts are asked one at a time, each prompt naming its account."""
+        import threading
+        import time
+        estimate = CostEstimate(
+            email_count=10,
+            estimated_cost=0.05,
+            currency='$',
+            cost_per_email=0.005,
+            tokens_per_email=2000,
+            model_name='test-model',
+            breakdown={}
+        )
+        prompts = []
+        active = []
+        overlaps = []
+        
+        def slow_callback(prompt):
+            active.append(prompt)
+            overlaps.append(len(active) > 1)
+            time.sleep(0.05)
+            prompts.append(prompt)
+            active.remove(prompt)
+            return 'yes'
+        
+        threads = [
+            threading.Thread(target=prompt_user_confirmation, args=(estimate, slow_callback, account_id))
+            for account_id in ('work', 'personal')
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert overlaps == [False, False]
+        assert sorted(prompts) == [
+            "Type 'yes' to confirm and proceed for account 'personal', or anything else to cancel: ",
+            "Type 'yes' to confirm and proceed for account 'work', or anything else to cancel: "
+        ]
+    
     def test_safety_interlock_count_emails(self, account_processor, mock_imap_client):
         """Test that safety interlock counts emails before fetching."""
         account_processor.setup()
@@ -993,6 +1891,36 @@ class TestSafetyInterlock:
         # Verify get_unprocessed_emails was NOT called (user cancelled)
         mock_imap_client.get_unprocessed_emails.assert_not_called()
     
+    def test_safety_interlock_never_prompts_when_not_interactive(self, account_processor, mock_imap_client):
+        """Test that non-interactive runs (watch mode) proceed below the threshold and skip above it."""
+        account_processor.setup()
+        mock_imap_client.get_unprocessed_emails = Mock(return_value=[])
+        account_processor.config['safety_interlock'] = {
+            'enabled': True,
+            'cost_threshold': 0.10,
+            'skip_confirmation_below_threshold': False,
+            'average_tokens_per_email': 2000
+        }
+        account_processor.config['classification'] = {
+            'model': 'test-model',
+            'cost_per_1k_tokens': 0.001
+        }
+        account_processor._confirmation_callback = Mock(return_value='yes')
+        
+        # 1 email: 0.002 (below threshold)
+        mock_imap_client.count_unprocessed_emails = Mock(return_value=(1, ['1']))
+        account_processor.run(interactive=False)
+        mock_imap_client.get_unprocessed_emails.assert_called_once()
+        
+        # 100 emails: 0.20 (above threshold)
+        mock_imap_client.get_unprocessed_emails.reset_mock()
+        uids = [str(uid) for uid in range(1, 101)]
+        mock_imap_client.count_unprocessed_emails = Mock(return_value=(100, uids))
+        account_processor.run(interactive=False)
+        mock_imap_client.get_unprocessed_emails.assert_not_called()
+        
+        account_processor._confirmation_callback.assert_not_called()
+    
     def test_safety_interlock_disabled(self, account_processor, mock_imap_client):
         """Test that safety interlock can be disabled."""
         account_processor.setup()
@@ -1033,3 +1961,54 @@ class TestSafetyInterlock:
         
         # Verify get_unprocessed_emails was called (continues despite estimation failure)
         mock_imap_client.get_unprocessed_emails.assert_called_once()
+    
+    def test_message_sizes_fetched_in_large_batches(self, sample_account_config):
+        """Test that sizing a large backlog takes a few FETCH commands, not one per body batch."""
+        sample_account_config['imap']['fetch_batch_size'] = 50
+        client = ConfigurableImapClient(sample_account_config, authenticator=Mock())
+        client._imap = MagicMock()
+        client._imap.uid.return_value = ('OK', [])
+        client._connected = True
+        
+        client.fetch_message_sizes([str(uid) for uid in range(1, 2501)])
+        
+        assert [c[0][1] for c in client._imap.uid.call_args_list] == ['1:1000', '1001:2000', '2001:2500']
+    
+    def test_safety_interlock_learns_tokens_per_byte(self, account_processor, mock_imap_client,
+                                                     mock_llm_client, tmp_path):
+        """Test that reported token usage is recorded per byte and used for the next estimate."""
+        account_processor.setup()
+        account_processor._token_stats_store = TokenStatsStore(tmp_path / 'token_stats.sqlite3')
+        account_processor.config['safety_interlock'] = {'enabled': True, 'cost_threshold': 1.0,
+                                                        'skip_confirmation_below_threshold': True}
+        account_processor.config['classification'] = {'model': 'test-model', 'cost_per_1k_tokens': 0.001}
+        account_processor.config['paths'] = {'analytics_file': str(tmp_path / 'analytics.jsonl')}
+        uids = [str(uid) for uid in range(1, MIN_HISTORY_EMAILS + 1)]
+        mock_imap_client.count_unprocessed_emails.return_value = (len(uids), uids)
+        mock_imap_client.fetch_message_sizes = Mock(side_effect=lambda requested: {uid: 40000 for uid in requested})
+        mock_imap_client.get_unprocessed_emails.return_value = [
+            {'uid': uid, 'subject': f'Newsletter {uid}', 'from': 'a@b.com', 'body': 'Deals'} for uid in uids
+        ]
+        mock_llm_client.classify_email.return_value = LLMResponse(
+            spam_score=2, importance_score=8, usage=TokenUsage(prompt_tokens=2000, completion_tokens=20)
+        )
+        
+        with patch('src.account_processor.check_blacklist', return_value=ActionEnum.PASS), \
+             patch('src.account_processor.apply_whitelist', return_value=(8.0, [])), \
+             patch.object(account_processor, '_write_note_to_disk', return_value=None):
+            account_processor.run()
+            # No history yet: body capped at max_body_chars (6000 / 4 tokens) plus the prompt
+            assert account_processor._estimated_token_usage.prompt_tokens == len(uids) * 1800
+            assert account_processor.token_usage.prompt_tokens == len(uids) * 2000
+            
+            account_processor.run()
+        
+        # History: 2000 tokens per 40000 bytes
+        assert account_processor._estimated_token_usage == TokenUsage(
+            prompt_tokens=len(uids) * 2000, completion_tokens=len(uids) * 20
+        )
+        history = account_processor._token_stats_store.load('test_account')
+        assert (history.emails, history.prompt_tokens_per_byte) == (2 * len(uids), 0.05)
+        summaries = [line for line in (tmp_path / 'analytics.jsonl').read_text().splitlines() if 'run_summary' in line]
+        assert len(summaries) == 2 and '"prompt_tokens": 40000' in summaries[0]
+        account_processor.teardown()
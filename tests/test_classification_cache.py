@@ -0,0 +1,100 @@
+"""
+Tests for the persistent classification cache (src.classification_cache).
+"""
+import pytest
+from unittest.mock import patch
+
+from src.classification_cache import ClassificationCache, make_cache_key
+from src.llm_client import LLMResponse
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ClassificationCache(tmp_path / 'cache.sqlite3', ttl_days=30, max_entries=3)
+    yield cache
+    cache.close()
+
+
+def test_cache_key_covers_all_inputs():
+    """Test that every key component changes the key."""
+    base = make_cache_key('model-a', 0.2, 1, 'content')
+    assert make_cache_key('model-a', 0.2, 1, 'content') == base
+    assert make_cache_key('model-b', 0.2, 1, 'content') != base
+    assert make_cache_key('model-a', 0.3, 1, 'content') != base
+    assert make_cache_key('model-a', 0.2, 2, 'content') != base
+    assert make_cache_key('model-a', 0.2, 1, 'content!') != base
+
+
+def test_get_put_and_counters(cache):
+    """Test a miss, a store, then a hit returning the same scores."""
+    key = make_cache_key('model', 0.2, 1, 'Hello')
+    assert cache.get(key) is None
+
+    cache.put(key, LLMResponse(spam_score=1, importance_score=9, raw_response='{"x": 1}'))
+    cached = cache.get(key)
+
+    assert (cached.spam_score, cached.importance_score, cached.raw_response) == (1, 9, '{"x": 1}')
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_summary_is_stored(cache):
+    """Test that the summary of a combined classify-and-summarize result is kept."""
+    cache.put('k', LLMResponse(spam_score=1, importance_score=9, summary='Sign by Friday.'))
+    assert cache.get('k').summary == 'Sign by Friday.'
+
+
+def test_adds_summary_column_to_existing_database(tmp_path):
+    """Test that a database created without the summary column is upgraded."""
+    import sqlite3
+    path = tmp_path / 'cache.sqlite3'
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE classifications (key TEXT PRIMARY KEY, spam_score INTEGER NOT NULL, "
+        "importance_score INTEGER NOT NULL, raw_response TEXT, created_at REAL NOT NULL, "
+        "last_used_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO classifications VALUES ('old', 1, 2, NULL, 1e12, 1e12)")
+    conn.commit()
+    conn.close()
+
+    cache = ClassificationCache(path, ttl_days=0)
+    assert cache.get('old').summary is None
+    cache.put('new', LLMResponse(spam_score=0, importance_score=9, summary='Done.'))
+    assert cache.get('new').summary == 'Done.'
+    cache.close()
+
+
+def test_persists_across_instances(tmp_path):
+    """Test that results survive reopening the database."""
+    path = tmp_path / 'cache.sqlite3'
+    first = ClassificationCache(path)
+    first.put('k', LLMResponse(spam_score=3, importance_score=4))
+    first.close()
+
+    second = ClassificationCache(path)
+    assert second.get('k').importance_score == 4
+    second.close()
+
+
+def test_expired_entries_are_misses(cache):
+    """Test that entries older than the TTL are ignored and removed."""
+    with patch('src.classification_cache.time.time', return_value=1000.0):
+        cache.put('k', LLMResponse(spam_score=0, importance_score=5))
+    with patch('src.classification_cache.time.time', return_value=1000.0 + 31 * 86400):
+        assert cache.get('k') is None
+    assert len(cache) == 0
+
+
+def test_size_bound_evicts_least_recently_used(cache):
+    """Test that the table is trimmed to max_entries, oldest use first."""
+    for i, key in enumerate(['a', 'b', 'c']):
+        with patch('src.classification_cache.time.time', return_value=1000.0 + i):
+            cache.put(key, LLMResponse(spam_score=0, importance_score=i))
+    with patch('src.classification_cache.time.time', return_value=2000.0):
+        assert cache.get('a') is not None  # 'a' is now the most recently used
+    with patch('src.classification_cache.time.time', return_value=2001.0):
+        cache.put('d', LLMResponse(spam_score=0, importance_score=7))
+
+        assert len(cache) == 3
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
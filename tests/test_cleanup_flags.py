@@ -40,6 +40,8 @@ def mock_imap_client():
     client.disconnect = Mock()
     client.get_email_by_uid = Mock()
     client.clear_flag = Mock(return_value=True)
+    client.clear_flag_bulk = Mock(return_value=True)
+    client.get_headers_by_uids = Mock(return_value={})
     client._imap = Mock()
     client._imap.uid = Mock()
     client._connected = False
@@ -117,16 +119,15 @@ class TestCleanupFlags:
             if command == 'SEARCH':
                 return ('OK', [b'12345'])
             elif command == 'FETCH':
-                # Return FETCH response with flags
-                return ('OK', [(b'12345 (FLAGS (\\Seen \\Flagged AIProcessed) BODY[HEADER.FIELDS (SUBJECT)] {10}\r\nSubject: Test Email\r\n)')])
+                # Return FETCH (FLAGS) response for the whole mailbox
+                return ('OK', [b'1 (UID 12345 FLAGS (\\Seen \\Flagged AIProcessed))'])
             return ('OK', [])
         
         mock_imap_client._imap.uid.side_effect = uid_side_effect
         
-        # Mock get_email_by_uid for subject extraction (fallback)
-        mock_imap_client.get_email_by_uid.return_value = {
-            'uid': '12345',
-            'subject': 'Test Email'
+        # Subjects are fetched in a separate batched header pass
+        mock_imap_client.get_headers_by_uids.return_value = {
+            '12345': {'uid': '12345', 'subject': 'Test Email'}
         }
         
         cleanup = CleanupFlags(config=mock_config, imap_client=mock_imap_client)
@@ -135,7 +136,54 @@ class TestCleanupFlags:
         # Should find one email with application flags
         assert len(results) == 1
         assert results[0].uid == '12345'
+        assert results[0].subject == 'Test Email'
         assert 'AIProcessed' in results[0].application_flags
+        mock_imap_client.get_email_by_uid.assert_not_called()
+    
+    def test_scan_flags_single_fetch_sweep(self, mock_config, mock_imap_client):
+        """Test that the ALL query reads every email's flags with one UID FETCH 1:*."""
+        mock_imap_client._connected = True
+        
+        def uid_side_effect(command, *args):
+            if command == 'SEARCH':
+                return ('OK', [b'1 2 3 4'])
+            return ('OK', [
+                b'1 (UID 1 FLAGS (\\Seen AIProcessed))',
+                b'2 (UID 2 FLAGS ())',
+                b'3 (UID 3 FLAGS (ObsidianNoteCreated AIProcessed))',
+                b'4 (UID 4 FLAGS (\\Flagged))'
+            ])
+        
+        mock_imap_client._imap.uid.side_effect = uid_side_effect
+        
+        cleanup = CleanupFlags(config=mock_config, imap_client=mock_imap_client)
+        results = cleanup.scan_flags(include_subjects=False)
+        
+        assert [(r.uid, r.application_flags) for r in results] == [
+            ('1', ['AIProcessed']),
+            ('3', ['ObsidianNoteCreated', 'AIProcessed'])
+        ]
+        fetches = [c for c in mock_imap_client._imap.uid.call_args_list if c[0][0] == 'FETCH']
+        assert fetches == [call('FETCH', '1:*', '(FLAGS)')]
+        mock_imap_client.get_headers_by_uids.assert_not_called()
+    
+    def test_scan_flags_custom_query_fetches_matching_uids(self, mock_config, mock_imap_client):
+        """Test that a custom query fetches flags for the matching UID set only."""
+        mock_config['imap']['query'] = 'UNSEEN'
+        mock_imap_client._connected = True
+        
+        def uid_side_effect(command, *args):
+            if command == 'SEARCH':
+                return ('OK', [b'5 6 7 10'])
+            return ('OK', [b'1 (UID 5 FLAGS (AIProcessed))', b'2 (UID 99 FLAGS (AIProcessed))'])
+        
+        mock_imap_client._imap.uid.side_effect = uid_side_effect
+        
+        cleanup = CleanupFlags(config=mock_config, imap_client=mock_imap_client)
+        results = cleanup.scan_flags()
+        
+        assert [r.uid for r in results] == ['5']
+        mock_imap_client._imap.uid.assert_any_call('FETCH', '5:7,10', '(FLAGS)')
     
     def test_scan_flags_without_application_flags(self, mock_config, mock_imap_client):
         """Test scanning flags when emails don't have application flags."""
@@ -147,7 +195,7 @@ class TestCleanupFlags:
                 return ('OK', [b'12345'])
             elif command == 'FETCH':
                 # Return FETCH response without application flags
-                return ('OK', [(b'12345 (FLAGS (\\Seen \\Flagged) BODY[HEADER.FIELDS (SUBJECT)] {10}\r\nSubject: Test\r\n)')])
+                return ('OK', [b'1 (UID 12345 FLAGS (\\Seen \\Flagged))'])
             return ('OK', [])
         
         mock_imap_client._imap.uid.side_effect = uid_side_effect
@@ -207,10 +255,11 @@ class TestCleanupFlags:
         cleanup = CleanupFlags(config=mock_config, imap_client=mock_imap_client)
         summary = cleanup.remove_flags([scan_result], dry_run=False)
         
-        # Should call clear_flag for each application flag
-        assert mock_imap_client.clear_flag.call_count == 2
-        mock_imap_client.clear_flag.assert_any_call('12345', 'AIProcessed')
-        mock_imap_client.clear_flag.assert_any_call('12345', 'ObsidianNoteCreated')
+        # Should clear each application flag with one grouped STORE
+        assert mock_imap_client.clear_flag_bulk.call_count == 2
+        mock_imap_client.clear_flag_bulk.assert_any_call(['12345'], 'AIProcessed')
+        mock_imap_client.clear_flag_bulk.assert_any_call(['12345'], 'ObsidianNoteCreated')
+        mock_imap_client.clear_flag.assert_not_called()
         
         assert summary.total_emails_scanned == 1
         assert summary.total_flags_removed == 2
@@ -226,7 +275,10 @@ class TestCleanupFlags:
             all_flags=['\\Seen', 'AIProcessed', 'ObsidianNoteCreated']
         )
         
-        # First flag removal succeeds, second fails
+        # Grouped STORE fails, so flags are retried per email:
+        # first flag removal succeeds, second fails
+        mock_imap_client.clear_flag_bulk.return_value = False
+        
         def clear_flag_side_effect(uid, flag):
             if flag == 'AIProcessed':
                 return True
@@ -251,6 +303,7 @@ class TestCleanupFlags:
         )
         
         # Simulate exception during flag removal
+        mock_imap_client.clear_flag_bulk.side_effect = Exception("Unexpected error")
         mock_imap_client.clear_flag.side_effect = Exception("Unexpected error")
         
         cleanup = CleanupFlags(config=mock_config, imap_client=mock_imap_client)
@@ -258,6 +311,25 @@ class TestCleanupFlags:
         
         assert summary.errors == 1
     
+    def test_remove_flags_groups_uids_per_flag(self, mock_config, mock_imap_client):
+        """Test that all emails carrying a flag are cleared with one STORE per flag."""
+        scan_results = [
+            FlagScanResult(uid=str(uid), subject='', application_flags=['AIProcessed'], all_flags=['AIProcessed'])
+            for uid in range(1, 101)
+        ]
+        scan_results[0].application_flags.append('ObsidianNoteCreated')
+        
+        cleanup = CleanupFlags(config=mock_config, imap_client=mock_imap_client)
+        summary = cleanup.remove_flags(scan_results, dry_run=False)
+        
+        assert mock_imap_client.clear_flag_bulk.call_args_list == [
+            call([str(uid) for uid in range(1, 101)], 'AIProcessed'),
+            call(['1'], 'ObsidianNoteCreated')
+        ]
+        assert summary.total_flags_removed == 101
+        assert summary.emails_modified == 100
+        assert summary.errors == 0
+    
     def test_format_scan_results_empty(self, mock_config, mock_imap_client):
         """Test formatting empty scan results."""
         cleanup = CleanupFlags(config=mock_config, imap_client=mock_imap_client)
@@ -0,0 +1,42 @@
+"""
+Tests for worker-thread context propagation.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from src.concurrency import propagate_context
+from src.dry_run import DryRunContext, is_dry_run
+from src.logging_context import get_logging_context, with_account_context
+
+
+def _snapshot():
+    return get_logging_context().get('account_id'), is_dry_run()
+
+
+def test_worker_without_propagation_loses_context():
+    """Plain submission runs without the caller's thread-local state."""
+    with with_account_context(account_id='work'), DryRunContext(True):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            account_id, dry_run = executor.submit(_snapshot).result()
+    
+    assert dry_run is False
+
+
+def test_propagate_context_carries_logging_context_and_dry_run():
+    """Wrapped callables see the submitting thread's account context and dry-run mode."""
+    with with_account_context(account_id='work', correlation_id='abc'), DryRunContext(True):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = [executor.submit(propagate_context(_snapshot)).result() for _ in range(3)]
+    
+    assert results == [('work', True)] * 3
+
+
+def test_propagate_context_isolates_callers():
+    """Contexts captured by different callers do not leak into each other."""
+    with with_account_context(account_id='first'):
+        first = propagate_context(_snapshot)
+    with with_account_context(account_id='second'), DryRunContext(True):
+        second = propagate_context(_snapshot)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(first).result() == ('first', False)
+        assert executor.submit(second).result() == ('second', True)
@@ -122,6 +122,22 @@ class TestConfigSchemaValidator:
         assert any('MISSING_REQUIRED_FIELD' in issue.error_code for issue in result.errors)
         assert any('imap.server' in issue.path for issue in result.errors)
     
+    def test_validate_imap_only_required_for_imap_source(self, validator, valid_config):
+        """Test that local sources need no imap section, while IMAP sources still do."""
+        config = dict(valid_config, source={'type': 'mbox', 'path': 'archive.mbox'})
+        del config['imap']
+        result = validator.validate(config)
+        assert result.is_valid is True
+        
+        config['source'] = {'type': 'maildir', 'path': 'Maildir'}
+        config['imap'] = {'processed_tag': 'Archived'}
+        assert validator.validate(config).is_valid is True
+        
+        config['source'] = {'type': 'imap'}
+        result = validator.validate(config)
+        assert result.is_valid is False
+        assert {issue.path for issue in result.errors} == {'imap.server', 'imap.username'}
+    
     def test_validate_invalid_type(self, validator):
         """Test that invalid field type is caught."""
         config = {
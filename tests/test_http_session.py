@@ -0,0 +1,76 @@
+"""
+Tests for the shared keep-alive HTTP session (src.http_session).
+"""
+import pytest
+from unittest.mock import Mock
+
+from src.http_session import (
+    DEFAULT_POOL_SIZE,
+    close_shared_session,
+    create_session,
+    get_shared_session,
+)
+from src.llm_client import LLMClient
+from src.openrouter_client import OpenRouterClient
+
+
+@pytest.fixture(autouse=True)
+def fresh_shared_session():
+    """Start and end every test without a shared session."""
+    close_shared_session()
+    yield
+    close_shared_session()
+
+
+@pytest.fixture
+def llm_config(monkeypatch):
+    monkeypatch.setenv('OPENROUTER_API_KEY', 'test_api_key')
+    return {
+        'openrouter': {'api_key_env': 'OPENROUTER_API_KEY'},
+        'classification': {'model': 'test-model', 'max_concurrency': 24}
+    }
+
+
+def test_create_session_sizes_pool():
+    """Test that the HTTPS adapter pool holds pool_size connections."""
+    session = create_session(pool_size=16)
+    assert session.get_adapter('https://openrouter.ai')._pool_maxsize == 16
+
+
+def test_shared_session_is_reused_and_grows():
+    """Test that callers share one session and the pool grows to the largest request."""
+    first = get_shared_session()
+    assert first.get_adapter('https://openrouter.ai')._pool_maxsize == DEFAULT_POOL_SIZE
+
+    second = get_shared_session(pool_size=32)
+    assert second is first
+    assert first.get_adapter('https://openrouter.ai')._pool_maxsize == 32
+
+    # A smaller request never shrinks the pool
+    get_shared_session(pool_size=2)
+    assert first.get_adapter('https://openrouter.ai')._pool_maxsize == 32
+
+
+def test_clients_share_session_across_accounts(llm_config):
+    """Test that LLM clients for different accounts and the summarization client share connections."""
+    work = LLMClient(llm_config)
+    personal = LLMClient(dict(llm_config, classification={'model': 'other-model'}))
+    summarizer = OpenRouterClient('test_api_key')
+
+    assert work._session is personal._session is summarizer.session
+    assert work._session.get_adapter('https://openrouter.ai')._pool_maxsize == 24
+
+
+def test_llm_client_uses_injected_session(llm_config):
+    """Test that requests go through the session passed to LLMClient."""
+    session = Mock()
+    session.post.return_value.json.return_value = {
+        'choices': [{'message': {'content': '{"spam_score": 1, "importance_score": 9}'}}]
+    }
+    client = LLMClient(llm_config, session=session)
+
+    response = client.classify_email("Hello")
+
+    assert response.importance_score == 9
+    session.post.assert_called_once()
+    assert session.post.call_args[0][0] == 'https://openrouter.ai/api/v1/chat/completions'
@@ -0,0 +1,124 @@
+"""
+Tests for BODYSTRUCTURE parsing and text-part decoding (src.imap_bodystructure).
+"""
+import base64
+
+import pytest
+
+from src.imap_bodystructure import (
+    BodyStructureError,
+    TextPart,
+    decode_text_part,
+    find_text_parts,
+    parse_fetch_response,
+    text_part_fetch_item
+)
+
+
+# multipart/mixed: (multipart/alternative: text/plain, text/html), PDF attachment
+MIXED_RESPONSE = [
+    (
+        b'7 (UID 42 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "iso-8859-1") NIL NIL "QUOTED-PRINTABLE" 120 4 '
+        b'NIL NIL NIL)("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "BASE64" 900 12 NIL NIL NIL) "ALTERNATIVE")'
+        b'("APPLICATION" "PDF" ("NAME" {10}',
+        b'report.pdf'
+    ),
+    (
+        b') NIL NIL "BASE64" 4000000 NIL ("ATTACHMENT" ("FILENAME" "report.pdf")) NIL) "MIXED" '
+        b'("BOUNDARY" "xyz") NIL NIL) BODY[HEADER] {19}',
+        b'Subject: Report\r\n\r\n'
+    ),
+    b')'
+]
+
+
+class TestParseFetchResponse:
+    """Tests for parse_fetch_response."""
+
+    def test_parses_items_and_literals(self):
+        """Test that literals inside BODYSTRUCTURE and as item values are re-inlined."""
+        messages = parse_fetch_response(MIXED_RESPONSE)
+
+        assert len(messages) == 1
+        assert messages[0]['UID'] == '42'
+        assert messages[0]['BODY[HEADER]'] == b'Subject: Report\r\n\r\n'
+        assert messages[0]['BODYSTRUCTURE'][1][2] == [b'NAME', b'report.pdf']
+
+    def test_partial_origin_is_removed_from_item_names(self):
+        """Test that BODY[1]<0> is returned as BODY[1], for several messages."""
+        data = [
+            (b'1 (UID 5 BODY[1]<0> {5}', b'Hello'), b')',
+            (b'2 (UID 6 BODY[1] {3}', b'Hey'), b')',
+        ]
+
+        messages = parse_fetch_response(data)
+
+        assert [(m['UID'], m['BODY[1]']) for m in messages] == [('5', b'Hello'), ('6', b'Hey')]
+
+    def test_malformed_response(self):
+        """Test that an unterminated list raises BodyStructureError."""
+        with pytest.raises(BodyStructureError):
+            parse_fetch_response([b'1 (UID 5 BODYSTRUCTURE ("TEXT" "PLAIN"'])
+
+
+class TestFindTextParts:
+    """Tests for find_text_parts."""
+
+    def test_nested_multipart_skips_attachments(self):
+        """Test section numbering in nested multiparts and that attachments are skipped."""
+        structure = parse_fetch_response(MIXED_RESPONSE)[0]['BODYSTRUCTURE']
+
+        parts = find_text_parts(structure)
+
+        assert parts['plain'] == TextPart('1.1', 'plain', 'iso-8859-1', 'quoted-printable', 120)
+        assert parts['html'] == TextPart('1.2', 'html', 'utf-8', 'base64', 900)
+
+    def test_single_part_message_is_section_1(self):
+        """Test that a non-multipart message body is section 1."""
+        structure = ['TEXT', 'PLAIN', None, None, None, '7BIT', '25', '1']
+
+        assert find_text_parts(structure) == {'plain': TextPart('1', 'plain', None, '7bit', 25)}
+
+    def test_text_attachment_is_skipped(self):
+        """Test that a text/plain part with Content-Disposition: attachment is not used."""
+        attachment = ['TEXT', 'PLAIN', None, None, None, '7BIT', '10', '1', None,
+                      [b'ATTACHMENT', [b'FILENAME', b'notes.txt']], None]
+        structure = [attachment, 'MIXED']
+
+        assert find_text_parts(structure) == {}
+
+
+class TestTextPartFetch:
+    """Tests for text_part_fetch_item and decode_text_part."""
+
+    def test_fetch_item_uses_partial_range_only_for_large_parts(self):
+        """Test that the <0.N> range is derived from max_chars and the encoding."""
+        small = TextPart('1', 'plain', 'utf-8', '7bit', 1000)
+        large = TextPart('1.1', 'plain', 'utf-8', 'base64', 10_000_000)
+
+        assert text_part_fetch_item(small, 4000) == 'BODY.PEEK[1]'
+        assert text_part_fetch_item(large, 4000) == 'BODY.PEEK[1.1]<0.22400>'
+        assert text_part_fetch_item(large, None) == 'BODY.PEEK[1.1]'
+
+    def test_decode_truncated_base64(self):
+        """Test that an incomplete base64 quantum and a cut character are dropped."""
+        encoded = base64.encodebytes('Grüße aus Köln'.encode('utf-8'))
+        part = TextPart('1', 'plain', 'utf-8', 'base64', len(encoded))
+
+        assert decode_text_part(encoded, part) == 'Grüße aus Köln'
+        assert decode_text_part(encoded[:10], part, truncated=True) == 'Grüß'
+        assert decode_text_part(encoded[:7], part, truncated=True) == 'Gr'
+
+    def test_decode_quoted_printable_charset(self):
+        """Test quoted-printable decoding with a charset and a cut escape sequence."""
+        part = TextPart('1', 'plain', 'iso-8859-1', 'quoted-printable', 20)
+
+        assert decode_text_part(b'Caf=E9 =\r\nnoir', part) == 'Café noir'
+        assert decode_text_part(b'Caf=E9 ol=E', part, truncated=True) == 'Café ol'
+
+    def test_decode_unknown_charset_falls_back_to_utf8(self):
+        """Test that an unknown charset does not fail decoding."""
+        part = TextPart('1', 'plain', 'x-unknown', '8bit', 5)
+
+        assert decode_text_part('héllo'.encode('utf-8'), part) == 'héllo'
+        assert decode_text_part(None, part) == ''
@@ -13,7 +13,14 @@ from src.imap_client import (
     ImapClient,
     IMAPConnectionError,
     IMAPFetchError,
-    IMAPClientError
+    IMAPClientError,
+    IMAPConnectionLimitError,
+    BatchedFlagWriter,
+    ServerConnectionLimiter,
+    build_uid_set,
+    parse_fetch_literals,
+    parse_message_streaming,
+    parse_uid_set
 )
 from src.account_processor import ConfigurableImapClient
 
@@ -192,6 +199,501 @@ def test_imap_client_get_unprocessed_emails(mock_imap_connection):
     assert 'UNKEYWORD "AIProcessed"' in search_call[0][2]
 
 
+def test_build_uid_set_collapses_ranges():
+    """Test that consecutive UIDs are collapsed into ranges."""
+    assert build_uid_set(['7', '1', '2', '3', '10', '11']) == '1:3,7,10:11'
+    assert build_uid_set(['5']) == '5'
+    assert build_uid_set([]) == ''
+
+
+def test_parse_uid_set_expands_ranges():
+    """Test that UID sets (e.g. from ESEARCH) expand back into UIDs."""
+    assert parse_uid_set('1:3,7,11:10') == ['1', '2', '3', '7', '10', '11']
+    assert parse_uid_set(build_uid_set(['4', '9', '5'])) == ['4', '5', '9']
+    assert parse_uid_set('') == []
+
+
+def test_imap_client_search_uids_restricts_to_new_uids(mock_imap_connection):
+    """Test that min_uid becomes a server-side UID range and n:* quirks are filtered."""
+    mock_imap_connection.capability.return_value = ('OK', [b'IMAP4rev1 IDLE'])
+    mock_imap_connection.uid.return_value = ('OK', [b'500'])
+    
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    # UID 501:* matches the highest UID (500) even though it is below 501
+    assert client.search_uids('ALL UNKEYWORD "AIProcessed"', min_uid=500) == []
+    mock_imap_connection.uid.assert_called_once_with(
+        'SEARCH', None, 'ALL UNKEYWORD "AIProcessed" UID 501:*'
+    )
+
+
+def test_imap_client_search_uids_uses_esearch(mock_imap_connection):
+    """Test that ESEARCH is used when advertised and its UID set is expanded."""
+    mock_imap_connection.capability.return_value = ('OK', [b'IMAP4rev1 ESEARCH'])
+    mock_imap_connection.uid.return_value = ('OK', [None])
+    mock_imap_connection.response.return_value = (
+        'ESEARCH', [b'(TAG "A4") UID MIN 101 MAX 105 COUNT 4 ALL 101:103,105']
+    )
+    
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    assert client.search_uids('ALL', min_uid=100) == ['101', '102', '103', '105']
+    mock_imap_connection.uid.assert_called_once_with(
+        'SEARCH', 'RETURN (MIN MAX COUNT ALL)', 'ALL UID 101:*'
+    )
+    mock_imap_connection.response.assert_called_once_with('ESEARCH')
+
+
+def test_configurable_client_connect_records_mailbox_status(mock_imap_config):
+    """Test that connect enables CONDSTORE and records UIDVALIDITY/UIDNEXT/HIGHESTMODSEQ."""
+    mock_imap = MagicMock()
+    mock_imap.capability.return_value = ('OK', [b'IMAP4rev1 ENABLE CONDSTORE'])
+    mock_imap.xatom.return_value = ('OK', [b'CONDSTORE'])
+    mock_imap.select.return_value = ('OK', [b'42'])
+    codes = {'UIDVALIDITY': [b'3857529045'], 'UIDNEXT': [b'4392'], 'HIGHESTMODSEQ': [b'90060115']}
+    mock_imap.response.side_effect = lambda code: (code, codes.get(code, [None]))
+    
+    client = ConfigurableImapClient(mock_imap_config, authenticator=Mock())
+    with patch('src.account_processor.imaplib.IMAP4_SSL', return_value=mock_imap):
+        client.connect()
+    
+    mock_imap.xatom.assert_called_once_with('ENABLE', 'CONDSTORE')
+    assert client.get_mailbox_status() == {
+        'mailbox': 'INBOX',
+        'uidvalidity': 3857529045,
+        'uidnext': 4392,
+        'highest_modseq': 90060115
+    }
+
+
+def test_configurable_client_connect_without_condstore(mock_imap_config):
+    """Test that servers without CONDSTORE are not sent ENABLE and report no HIGHESTMODSEQ."""
+    mock_imap = MagicMock()
+    mock_imap.capability.return_value = ('OK', [b'IMAP4rev1'])
+    mock_imap.select.return_value = ('OK', [b'42'])
+    codes = {'UIDVALIDITY': [b'7'], 'UIDNEXT': [b'100']}
+    mock_imap.response.side_effect = lambda code: (code, codes.get(code, [None]))
+    
+    client = ConfigurableImapClient(mock_imap_config, authenticator=Mock())
+    with patch('src.account_processor.imaplib.IMAP4_SSL', return_value=mock_imap):
+        client.connect()
+    
+    mock_imap.xatom.assert_not_called()
+    status = client.get_mailbox_status()
+    assert (status['uidvalidity'], status['uidnext'], status['highest_modseq']) == (7, 100, None)
+
+
+def test_server_connection_limiter_caps_per_server():
+    """Test that slots are counted per server and a full server does not block others."""
+    limiter = ServerConnectionLimiter()
+    
+    assert limiter.acquire('a:993', limit=2, timeout=0)
+    assert limiter.acquire('a:993', limit=2, timeout=0)
+    assert not limiter.acquire('a:993', limit=2, timeout=0.01)
+    assert limiter.acquire('b:993', limit=2, timeout=0)
+    assert limiter.acquire('a:993', limit=None)
+    
+    limiter.release('a:993')
+    assert limiter.open_connections('a:993') == 2
+    assert limiter.acquire('a:993', limit=3, timeout=0)
+
+
+def test_configurable_client_connect_fails_fast_when_server_is_full(mock_imap_config):
+    """Test that connect raises IMAPConnectionLimitError instead of waiting if asked to."""
+    mock_imap_config['imap'].update({'server': 'full.imap.com', 'max_server_connections': 1})
+    mock_imap = MagicMock()
+    mock_imap.select.return_value = ('OK', [b'1'])
+    first = ConfigurableImapClient(mock_imap_config, authenticator=Mock())
+    second = ConfigurableImapClient(mock_imap_config, authenticator=Mock())
+    second.wait_for_connection_slot = False
+    
+    with patch('src.account_processor.imaplib.IMAP4_SSL', return_value=mock_imap):
+        first.connect()
+        with pytest.raises(IMAPConnectionLimitError):
+            second.connect()
+        first.disconnect()
+        second.connect()
+    
+    assert second._connected
+    second.disconnect()
+
+
+def test_imap_client_fetch_flags_changed_since(mock_imap_connection):
+    """Test that CHANGEDSINCE results are parsed into flags per UID."""
+    mock_imap_connection.uid.return_value = ('OK', [
+        b'3 (UID 12 MODSEQ (901) FLAGS (\\Seen AIProcessed))',
+        b'5 (UID 15 MODSEQ (905) FLAGS ())',
+        b'9 (UID 40 MODSEQ (910) FLAGS (\\Seen))'
+    ])
+    
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    assert client.fetch_flags_changed_since(900, max_uid=20) == {
+        '12': ['Seen', 'AIProcessed'],
+        '15': []
+    }
+    mock_imap_connection.uid.assert_called_once_with(
+        'FETCH', '1:20', '(UID FLAGS)', '(CHANGEDSINCE 900)'
+    )
+
+
+def _idle_client(lines):
+    """Create an ImapClient whose connection answers IDLE with the given lines."""
+    client = ImapClient()
+    client._imap = MagicMock()
+    client._imap.readline.side_effect = lines
+    client._imap.file.peek.return_value = b''
+    client._connected = True
+    return client
+
+
+def test_imap_client_idle_returns_on_exists():
+    """Test that IDLE ends with DONE as soon as the server reports EXISTS."""
+    client = _idle_client([b'+ idling\r\n', b'* 5 EXISTS\r\n', b'IDLE1 OK IDLE terminated\r\n'])
+    
+    with patch('src.imap_client.select.select', return_value=([client._imap.sock], [], [])):
+        assert client.idle(timeout=60) is True
+    
+    sent = [c[0][0] for c in client._imap.send.call_args_list]
+    assert sent == [b'IDLE1 IDLE\r\n', b'DONE\r\n']
+
+
+def test_imap_client_idle_times_out():
+    """Test that IDLE is ended after the timeout when no mail arrives."""
+    client = _idle_client([b'+ idling\r\n', b'IDLE1 OK IDLE terminated\r\n'])
+    
+    with patch('src.imap_client.select.select', return_value=([], [], [])):
+        assert client.idle(timeout=0.05) is False
+    
+    assert client._imap.send.call_args_list[-1][0][0] == b'DONE\r\n'
+
+
+def test_imap_client_idle_reads_exists_already_buffered():
+    """Test that an EXISTS read along with the IDLE continuation is seen without waiting."""
+    client = _idle_client([b'+ idling\r\n', b'* 5 EXISTS\r\n', b'IDLE1 OK IDLE terminated\r\n'])
+    client._imap.file.peek.return_value = b'* 5 EXISTS\r\n'
+    
+    with patch('src.imap_client.select.select', return_value=([], [], [])) as mock_select:
+        assert client.idle(timeout=60) is True
+    
+    mock_select.assert_not_called()
+
+
+def test_imap_client_poll_ignores_exists_from_select():
+    """Test that the EXISTS count reported by SELECT is not taken for new mail."""
+    imap = imaplib.IMAP4.__new__(imaplib.IMAP4)
+    imap.debug = 0
+    imap.untagged_responses = {}
+    
+    def select(mailbox):
+        imap.untagged_responses.update({'EXISTS': [b'42'], 'UIDVALIDITY': [b'7']})
+        return ('OK', [b'42'])
+    
+    imap.select = select
+    imap.noop = lambda: ('OK', [b'NOOP completed'])
+    client = ImapClient()
+    client._imap = imap
+    client._connected = True
+    
+    assert client.select_mailbox('INBOX')['uidvalidity'] == 7
+    assert client.poll() is False
+    
+    imap.untagged_responses['EXISTS'] = [b'43']
+    assert client.poll() is True
+
+
+def test_imap_client_wait_for_new_mail_polls_without_idle():
+    """Test the NOOP fallback for servers that do not advertise IDLE."""
+    client = ImapClient()
+    client._imap = MagicMock()
+    client._imap.capability.return_value = ('OK', [b'IMAP4rev1'])
+    client._imap.noop.return_value = ('OK', [b'NOOP completed'])
+    client._imap.response.return_value = ('EXISTS', [b'43'])
+    client._connected = True
+    
+    with patch('src.imap_client.time.sleep') as mock_sleep:
+        assert client.wait_for_new_mail(timeout=1500, poll_interval=10) is True
+    
+    mock_sleep.assert_called_once_with(10)
+    client._imap.send.assert_not_called()
+    client._imap.response.assert_called_once_with('EXISTS')
+
+
+def test_parse_fetch_literals_reads_uid_from_envelope_or_trailer():
+    """Test UID extraction from multi-message FETCH responses."""
+    data = [
+        (b'1 (UID 101 RFC822 {4}', b'AAAA'),
+        b')',
+        (b'2 (RFC822 {4}', b'BBBB'),
+        b' UID 102)',
+    ]
+    assert parse_fetch_literals(data) == [('101', b'AAAA'), ('102', b'BBBB')]
+
+
+def _message_with_attachment(attachment_bytes: int, body: str = 'Hello there') -> bytes:
+    """Build a raw multipart/mixed message: alternative text parts, a forwarded email and a PDF."""
+    from email.mime.application import MIMEApplication
+    from email.mime.message import MIMEMessage
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.policy import SMTP
+    
+    alternative = MIMEMultipart('alternative')
+    alternative.attach(MIMEText(body, 'plain', 'utf-8'))
+    alternative.attach(MIMEText(f'<p>{body}</p>', 'html', 'utf-8'))
+    forwarded = MIMEText('Forwarded text', 'plain', 'utf-8')
+    forwarded['Subject'] = 'Inner'
+    attachment = MIMEApplication(b'%PDF' + b'\x00' * attachment_bytes, 'pdf')
+    attachment.add_header('Content-Disposition', 'attachment', filename='big.pdf')
+    message = MIMEMultipart('mixed')
+    message['From'] = 'sender@example.com'
+    message['Subject'] = 'Large'
+    message.attach(alternative)
+    message.attach(MIMEMessage(forwarded))
+    message.attach(attachment)
+    return message.as_bytes(policy=SMTP)
+
+
+def test_streaming_parser_matches_full_parse_without_attachment_payloads():
+    """Test that streaming parsing keeps headers and text parts but not attachments."""
+    import email as email_module
+    raw = _message_with_attachment(50_000)
+    
+    full = email_module.message_from_bytes(raw)
+    streamed = parse_message_streaming(raw)
+    
+    assert streamed.items() == full.items()
+    assert [p.get_content_type() for p in streamed.walk()] == [p.get_content_type() for p in full.walk()]
+    text_parts = [p for p in full.walk() if p.get_content_maintype() == 'text']
+    assert [p.get_payload(decode=True) for p in streamed.walk() if p.get_content_maintype() == 'text'] == \
+        [p.get_payload(decode=True) for p in text_parts]
+    pdf = [p for p in streamed.walk() if p.get_content_type() == 'application/pdf'][0]
+    assert pdf.get_filename() == 'big.pdf'
+    assert pdf.get_payload() == ''
+    
+    # As with a full parse, the last text/plain part (here: the forwarded email) wins
+    parsed = ImapClient()._parse_email_message('1', raw)
+    assert (parsed['subject'], parsed['body'], parsed['html_body']) == \
+        ('Large', 'Forwarded text', '<p>Hello there</p>')
+
+
+def test_streaming_parser_caps_text_parts():
+    """Test that text parts are cut after max_text_part_bytes (whole lines)."""
+    raw = _message_with_attachment(10, body='line of text\n' * 10_000)
+    
+    msg = parse_message_streaming(raw, max_text_part_bytes=4096)
+    
+    plain = next(p for p in msg.walk() if p.get_content_type() == 'text/plain')
+    text = plain.get_payload(decode=True).decode('utf-8')
+    assert 1000 < len(text) < 4096
+    assert text.startswith('line of text\nline of text')
+
+
+def test_streaming_parser_peak_memory_does_not_grow_with_attachment():
+    """Test that parsing a 25 MB message allocates far less than the message size."""
+    import email as email_module
+    import tracemalloc
+    raw = _message_with_attachment(18 * 1024 * 1024)
+    assert len(raw) > 24 * 1024 * 1024
+    
+    def peak(parse):
+        tracemalloc.start()
+        try:
+            parse(raw)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    
+    streaming_peak = peak(parse_message_streaming)
+    full_peak = peak(email_module.message_from_bytes)
+    
+    assert streaming_peak < 2 * 1024 * 1024
+    assert full_peak > len(raw)
+
+
+def test_imap_client_get_emails_by_uids(mock_imap_connection):
+    """Test fetching several emails in one UID FETCH round trip."""
+    mock_imap_connection.uid.return_value = ('OK', [
+        (b'1 (UID 101 RFC822 {40}', b'From: a@example.com\nSubject: First\n\nBody1'),
+        b')',
+        (b'2 (UID 102 RFC822 {40}', b'From: b@example.com\nSubject: Second\n\nBody2'),
+        b')',
+    ])
+    
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    emails = client.get_emails_by_uids(['101', '102'])
+    
+    assert set(emails) == {'101', '102'}
+    assert emails['102']['subject'] == 'Second'
+    assert emails['101']['body'] == 'Body1'
+    mock_imap_connection.uid.assert_called_once_with('FETCH', '101:102', '(UID RFC822)')
+
+
+def test_imap_client_get_emails_by_uids_failure(mock_imap_connection):
+    """Test that a failed batch FETCH raises IMAPFetchError."""
+    mock_imap_connection.uid.return_value = ('NO', [b'Fetch failed'])
+    
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    with pytest.raises(IMAPFetchError, match="in batch"):
+        client.get_emails_by_uids(['101', '102'])
+
+
+def test_imap_client_get_text_parts_by_uids(mock_imap_connection):
+    """Test that text_parts mode fetches sections only, with an RFC822 fallback."""
+    def uid_side_effect(command, uid_set, items):
+        if 'BODYSTRUCTURE' in items:
+            return ('OK', [
+                (b'1 (UID 101 BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 5 1 NIL NIL NIL)'
+                 b'("APPLICATION" "PDF" NIL NIL NIL "BASE64" 900000 NIL ("ATTACHMENT" NIL) NIL) "MIXED") '
+                 b'BODY[HEADER] {18}', b'Subject: First\r\n\r\n'),
+                b')',
+                (b'2 (UID 102 BODYSTRUCTURE ("TEXT" BROKEN) BODY[HEADER] {19}', b'Subject: Second\r\n\r\n'),
+                b')',
+            ])
+        if 'BODY.PEEK[1]' in items:
+            return ('OK', [(b'1 (UID 101 BODY[1] {5}', b'Body1'), b')'])
+        return ('OK', [(b'2 (UID 102 RFC822 {40}', b'From: b@example.com\nSubject: Second\n\nBody2'), b')'])
+    
+    mock_imap_connection.uid.side_effect = uid_side_effect
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    client.text_parts_max_chars = 4000
+    
+    emails = client.get_emails_by_uids(['101', '102'])
+    
+    assert (emails['101']['subject'], emails['101']['body']) == ('First', 'Body1')
+    assert (emails['102']['subject'], emails['102']['body']) == ('Second', 'Body2')
+    assert [c[0][2] for c in mock_imap_connection.uid.call_args_list] == [
+        '(UID BODYSTRUCTURE BODY.PEEK[HEADER])',
+        '(UID BODY.PEEK[1])',
+        '(UID RFC822)',
+    ]
+
+
+def test_imap_client_get_headers_by_uids(mock_imap_connection):
+    """Test header-only batch fetch uses BODY.PEEK and returns header data without bodies."""
+    mock_imap_connection.uid.return_value = ('OK', [
+        (b'1 (UID 7 BODY[HEADER.FIELDS (FROM SUBJECT DATE TO CC MESSAGE-ID)] {80}',
+         b'From: news@example.com\r\nSubject: Weekly\r\nCc: a@x.com, b@x.com\r\nMessage-ID: <m1@x>\r\n\r\n'),
+        b')',
+    ])
+    
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    headers = client.get_headers_by_uids(['7'])
+    
+    assert headers['7']['from'] == 'news@example.com'
+    assert headers['7']['subject'] == 'Weekly'
+    assert headers['7']['cc'] == ['a@x.com', 'b@x.com']
+    assert headers['7']['message_id'] == '<m1@x>'
+    assert headers['7']['body'] == ''
+    fetch_args = mock_imap_connection.uid.call_args[0]
+    assert fetch_args[1] == '7'
+    assert 'BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE TO CC MESSAGE-ID)]' in fetch_args[2]
+
+
+def test_imap_client_get_message_sizes(mock_imap_connection):
+    """Test that RFC822.SIZE of several emails is read with one UID FETCH."""
+    mock_imap_connection.uid.return_value = ('OK', [
+        b'1 (UID 7 RFC822.SIZE 48211)',
+        b'2 (RFC822.SIZE 1520 UID 8)',
+        b'3 (UID 99 RFC822.SIZE 10)'
+    ])
+    
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    assert client.get_message_sizes(['7', '8', '9']) == {'7': 48211, '8': 1520}
+    mock_imap_connection.uid.assert_called_once_with('FETCH', '7:9', '(UID RFC822.SIZE)')
+
+
+def test_configurable_client_batches_fetch_and_isolates_missing_uids(mock_imap_config, mock_imap_connection):
+    """Test batched fetch with per-UID fallback for messages missing from the batch."""
+    mock_imap_config['imap']['fetch_batch_size'] = 2
+    
+    def uid_side_effect(command, uid_set, *args):
+        if uid_set == '1:2':
+            # UID 2 is missing from the batch response
+            return ('OK', [(b'1 (UID 1 RFC822 {20}', b'Subject: One\n\nBody'), b')'])
+        if uid_set == '2':
+            return ('NO', [b'No such message'])
+        if uid_set == '3':
+            return ('OK', [(b'3 (UID 3 RFC822 {20}', b'Subject: Three\n\nBody')])
+        raise AssertionError(f"Unexpected FETCH {uid_set}")
+    
+    mock_imap_connection.uid.side_effect = uid_side_effect
+    
+    client = ConfigurableImapClient(mock_imap_config, authenticator=Mock())
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    emails = client.get_unprocessed_emails(uids=['1', '2', '3'])
+    
+    assert [e['uid'] for e in emails] == ['1', '3']
+    assert emails[1]['subject'] == 'Three'
+
+
+def test_configurable_client_falls_back_when_batch_fails(mock_imap_config, mock_imap_connection):
+    """Test that a failed batch command is retried one UID at a time."""
+    def uid_side_effect(command, uid_set, *args):
+        if ',' in uid_set or ':' in uid_set:
+            return ('BAD', [b'Command Argument Error'])
+        return ('OK', [(None, f'Subject: Message {uid_set}\n\nBody'.encode())])
+    
+    mock_imap_connection.uid.side_effect = uid_side_effect
+    
+    client = ConfigurableImapClient(mock_imap_config, authenticator=Mock())
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    emails = client.get_unprocessed_emails(uids=['10', '12'])
+    
+    assert [e['uid'] for e in emails] == ['10', '12']
+    assert mock_imap_connection.uid.call_count == 3
+
+
+def test_configurable_client_iter_unprocessed_emails_is_lazy(mock_imap_config, mock_imap_connection):
+    """Test that streaming fetch only issues a FETCH when the next batch is consumed."""
+    mock_imap_config['imap']['fetch_batch_size'] = 2
+    
+    def uid_side_effect(command, uid_set, *args):
+        data = []
+        for uid in uid_set.replace(':', ',').split(','):
+            data.append((f'1 (UID {uid} RFC822 {{20}}'.encode(), f'Subject: {uid}\n\nBody'.encode()))
+            data.append(b')')
+        return ('OK', data)
+    
+    mock_imap_connection.uid.side_effect = uid_side_effect
+    
+    client = ConfigurableImapClient(mock_imap_config, authenticator=Mock())
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    stream = client.iter_unprocessed_emails(uids=['1', '2', '3'])
+    assert mock_imap_connection.uid.call_count == 0
+    
+    assert next(stream)['uid'] == '1'
+    assert mock_imap_connection.uid.call_count == 1
+    assert [e['uid'] for e in stream] == ['2', '3']
+    assert mock_imap_connection.uid.call_count == 2
+
+
 @patch('src.dry_run.is_dry_run', return_value=False)
 def test_imap_client_set_flag(mock_dry_run, mock_imap_connection):
     """Test setting IMAP flag."""
@@ -207,6 +709,82 @@ def test_imap_client_set_flag(mock_dry_run, mock_imap_connection):
     mock_imap_connection.uid.assert_called_with('STORE', '12345', '+FLAGS', '(AIProcessed)')
 
 
+@patch('src.dry_run.is_dry_run', return_value=False)
+def test_imap_client_set_flag_bulk(mock_dry_run, mock_imap_connection):
+    """Test setting a flag on several emails with one compressed UID STORE."""
+    mock_imap_connection.uid.return_value = ('OK', [b''])
+    
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    assert client.set_flag_bulk(['1300', '1201', '1202', '1203'], 'AIProcessed') is True
+    mock_imap_connection.uid.assert_called_once_with(
+        'STORE', '1201:1203,1300', '+FLAGS.SILENT', '(AIProcessed)'
+    )
+
+
+@patch('src.dry_run.is_dry_run', return_value=False)
+def test_imap_client_clear_flag_bulk(mock_dry_run, mock_imap_connection):
+    """Test clearing a flag from several emails with one compressed UID STORE."""
+    mock_imap_connection.uid.return_value = ('OK', [b''])
+    
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    assert client.clear_flag_bulk(['5', '6', '9'], 'AIProcessed') is True
+    mock_imap_connection.uid.assert_called_once_with(
+        'STORE', '5:6,9', '-FLAGS.SILENT', '(AIProcessed)'
+    )
+
+
+@patch('src.dry_run.is_dry_run', return_value=False)
+def test_batched_flag_writer_flushes_on_batch_size(mock_dry_run, mock_imap_connection):
+    """Test that the writer stores one batch per batch_size UIDs plus a final flush."""
+    mock_imap_connection.uid.return_value = ('OK', [b''])
+    client = ImapClient()
+    client._imap = mock_imap_connection
+    client._connected = True
+    
+    writer = BatchedFlagWriter(client, 'AIProcessed', batch_size=3, flush_interval=3600)
+    for uid in ['1', '2', '3', '4', '5']:
+        writer.add(uid)
+    assert writer.pending == ['4', '5']
+    assert writer.flush() == []
+    assert writer.pending == []
+    
+    assert [c[0][1] for c in mock_imap_connection.uid.call_args_list] == ['1:3', '4:5']
+
+
+def test_batched_flag_writer_flushes_on_interval():
+    """Test that a UID pending longer than flush_interval triggers a flush."""
+    client = Mock()
+    client.set_flag_bulk.return_value = True
+    writer = BatchedFlagWriter(client, 'AIProcessed', batch_size=100, flush_interval=30)
+    
+    with patch('src.imap_client.time.monotonic', side_effect=[0, 0, 10, 31]):
+        writer.add('1')
+        writer.add('2')
+        assert not client.set_flag_bulk.called
+        writer.add('3')
+    
+    client.set_flag_bulk.assert_called_once_with(['1', '2', '3'], 'AIProcessed')
+
+
+def test_batched_flag_writer_retries_per_uid_when_bulk_fails():
+    """Test that a failed bulk STORE is retried UID by UID and failures reported."""
+    client = Mock()
+    client.set_flag_bulk.return_value = False
+    client.set_flag.side_effect = lambda uid, flag: uid != '2'
+    writer = BatchedFlagWriter(client, 'AIProcessed')
+    for uid in ['1', '2', '3']:
+        writer.add(uid)
+    
+    assert writer.flush() == ['2']
+    assert [c[0][0] for c in client.set_flag.call_args_list] == ['1', '2', '3']
+
+
 @patch('src.dry_run.is_dry_run', return_value=False)
 def test_imap_client_clear_flag(mock_dry_run, mock_imap_connection):
     """Test clearing IMAP flag."""
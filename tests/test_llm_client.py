@@ -17,6 +17,7 @@ from src.llm_client import (
     LLMResponseParseError,
     LLMClientError
 )
+from src.token_usage import TokenUsage
 # V4: LLMClient now uses config dictionaries, not Settings
 
 
@@ -59,7 +60,7 @@ def test_llm_client_initialization(mock_llm_config):
     assert client._api_url == 'https://openrouter.ai/api/v1'
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_classify_email_success(mock_post, mock_llm_config):
     """Test successful email classification."""
     # Mock API response - return dict directly from json() method
@@ -95,7 +96,7 @@ def test_llm_client_classify_email_success(mock_post, mock_llm_config):
     assert call_args[1]['json']['temperature'] == 0.2
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_classify_email_with_user_prompt(mock_post, mock_llm_config):
     """Test email classification with custom user prompt."""
     api_response_dict = {
@@ -127,7 +128,7 @@ def test_llm_client_classify_email_with_user_prompt(mock_post, mock_llm_config):
     assert "Custom classification prompt" in messages[1]['content']
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_classify_email_truncation(mock_post, mock_llm_config):
     """Test that email content is truncated if too long."""
     mock_llm_config['processing']['max_body_chars'] = 100
@@ -156,7 +157,7 @@ def test_llm_client_classify_email_truncation(mock_post, mock_llm_config):
     assert "[Content truncated]" in messages[1]['content']
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_parse_json_response(mock_post, mock_llm_config):
     """Test parsing of valid JSON response."""
     api_response_dict = {
@@ -180,7 +181,7 @@ def test_llm_client_parse_json_response(mock_post, mock_llm_config):
     assert result.importance_score == 6
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_parse_markdown_wrapped_json(mock_post, mock_llm_config):
     """Test parsing JSON wrapped in markdown code blocks."""
     api_response_dict = {
@@ -204,7 +205,7 @@ def test_llm_client_parse_markdown_wrapped_json(mock_post, mock_llm_config):
     assert result.importance_score == 7
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 @patch('src.llm_client.time.sleep')
 def test_llm_client_parse_invalid_json(mock_sleep, mock_post, mock_llm_config):
     """Test handling of invalid JSON response (triggers retries, then raises LLMAPIError)."""
@@ -231,7 +232,7 @@ def test_llm_client_parse_invalid_json(mock_sleep, mock_post, mock_llm_config):
     assert mock_post.call_count == 3
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 @patch('src.llm_client.time.sleep')
 def test_llm_client_parse_missing_fields(mock_sleep, mock_post, mock_llm_config):
     """Test handling of response with missing required fields (triggers retries)."""
@@ -258,7 +259,7 @@ def test_llm_client_parse_missing_fields(mock_sleep, mock_post, mock_llm_config)
     assert mock_post.call_count == 3
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_parse_out_of_range_scores(mock_post, mock_llm_config):
     """Test that out-of-range scores are clamped."""
     api_response_dict = {
@@ -283,7 +284,7 @@ def test_llm_client_parse_out_of_range_scores(mock_post, mock_llm_config):
     assert result.importance_score == 0
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_http_error(mock_post, mock_llm_config):
     """Test handling of HTTP errors."""
     mock_response = MagicMock()
@@ -298,7 +299,7 @@ def test_llm_client_http_error(mock_post, mock_llm_config):
         client.classify_email("Test")
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 @patch('src.llm_client.time.sleep')
 def test_llm_client_retry_logic(mock_sleep, mock_post, mock_llm_config):
     """Test that retry logic works correctly."""
@@ -334,7 +335,7 @@ def test_llm_client_retry_logic(mock_sleep, mock_post, mock_llm_config):
     assert result.importance_score == 8
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 @patch('src.llm_client.time.sleep')
 def test_llm_client_retry_exhaustion(mock_sleep, mock_post, mock_llm_config):
     """Test that all retries are exhausted before raising error."""
@@ -354,7 +355,7 @@ def test_llm_client_retry_exhaustion(mock_sleep, mock_post, mock_llm_config):
     assert mock_sleep.call_count == 2  # Sleep between attempts
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_network_error(mock_post, mock_llm_config):
     """Test handling of network errors."""
     mock_post.side_effect = RequestException("Network connection failed")
@@ -364,7 +365,7 @@ def test_llm_client_network_error(mock_post, mock_llm_config):
         client.classify_email("Test")
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_timeout_error(mock_post, mock_llm_config):
     """Test handling of timeout errors."""
     mock_post.side_effect = Timeout("Request timed out")
@@ -374,7 +375,7 @@ def test_llm_client_timeout_error(mock_post, mock_llm_config):
         client.classify_email("Test")
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_invalid_json_response(mock_post, mock_llm_config):
     """Test handling of invalid JSON in API response."""
     mock_response = MagicMock()
@@ -389,7 +390,7 @@ def test_llm_client_invalid_json_response(mock_post, mock_llm_config):
         client.classify_email("Test")
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 @patch('src.llm_client.time.sleep')
 def test_llm_client_empty_response(mock_sleep, mock_post, mock_llm_config):
     """Test handling of empty response content (triggers retries)."""
@@ -416,7 +417,7 @@ def test_llm_client_empty_response(mock_sleep, mock_post, mock_llm_config):
     assert mock_post.call_count == 3
 
 
-@patch('src.llm_client.requests.post')
+@patch('src.llm_client.requests.Session.post')
 def test_llm_client_response_format_instructions(mock_post, mock_llm_config):
     """Test that prompt includes JSON format instructions."""
     api_response_dict = {
@@ -443,3 +444,125 @@ def test_llm_client_response_format_instructions(mock_post, mock_llm_config):
     assert "spam_score" in user_message
     assert "importance_score" in user_message
     assert "JSON" in user_message or "json" in user_message
+
+
+def _api_response(content):
+    mock_response = MagicMock()
+    mock_response.json = lambda: {"choices": [{"message": {"content": content}}]}
+    mock_response.raise_for_status = MagicMock(return_value=None)
+    return mock_response
+
+
+@patch('src.llm_client.requests.Session.post')
+def test_llm_client_classify_emails_batch_maps_results_by_id(mock_post, mock_llm_config):
+    """Test that several emails share one request and results map back to caller ids."""
+    mock_llm_config['classification'].update({'batch_size': 3})
+    mock_post.return_value = _api_response(json.dumps({"results": [
+        {"id": 2, "spam_score": 9, "importance_score": 1},
+        {"id": 1, "spam_score": 0, "importance_score": 7},
+        {"id": 3, "spam_score": 4, "importance_score": 4}
+    ]}))
+    
+    client = LLMClient(mock_llm_config)
+    results = client.classify_emails_batch({'101': 'Invoice due', '102': 'You won!', '103': 'Build passed'})
+    
+    assert mock_post.call_count == 1
+    prompt = mock_post.call_args[1]['json']['messages'][1]['content']
+    assert '=== EMAIL id=1 ===\nInvoice due' in prompt
+    assert '=== EMAIL id=3 ===\nBuild passed' in prompt
+    assert {uid: (r.spam_score, r.importance_score) for uid, r in results.items()} == {
+        '101': (0, 7), '102': (9, 1), '103': (4, 4)
+    }
+
+
+@patch('src.llm_client.requests.Session.post')
+def test_llm_client_classify_emails_batch_requeues_missing_items(mock_post, mock_llm_config):
+    """Test that emails missing from the batch answer are classified individually."""
+    mock_post.side_effect = [
+        _api_response('[{"id": 1, "spam_score": 1, "importance_score": 6}]'),
+        _api_response('{"spam_score": 8, "importance_score": 2}')
+    ]
+    
+    client = LLMClient(mock_llm_config)
+    results = client.classify_emails_batch({'a': 'First email', 'b': 'Second email'})
+    
+    assert mock_post.call_count == 2
+    single_prompt = mock_post.call_args_list[1][1]['json']['messages'][1]['content']
+    assert 'Second email' in single_prompt and 'First email' not in single_prompt
+    assert (results['a'].importance_score, results['b'].spam_score) == (6, 8)
+
+
+@patch('src.llm_client.requests.Session.post')
+def test_llm_client_classify_emails_batch_respects_size_and_token_budget(mock_post, mock_llm_config):
+    """Test that batches are split by batch_size and batch_max_tokens."""
+    mock_llm_config['classification'].update({'batch_size': 2, 'batch_max_tokens': 500})
+    
+    def respond(*args, **kwargs):
+        prompt = kwargs['json']['messages'][1]['content']
+        count = prompt.count('=== EMAIL')
+        if not count:
+            return _api_response('{"spam_score": 0, "importance_score": 5}')
+        return _api_response(json.dumps({"results": [
+            {"id": i, "spam_score": 0, "importance_score": 5} for i in range(1, count + 1)
+        ]}))
+    mock_post.side_effect = respond
+    
+    client = LLMClient(mock_llm_config)
+    emails = {'1': 'a', '2': 'b', '3': 'c', '4': 'x' * 1000, '5': 'y' * 1000, '6': 'z' * 3000}
+    results = client.classify_emails_batch(emails)
+    
+    sent = [call_args[1]['json']['messages'][1]['content'] for call_args in mock_post.call_args_list]
+    # [1, 2] by batch_size, [3, 4] by token budget, then 5 (alone) and 6 (too large) individually
+    assert [prompt.count('=== EMAIL') for prompt in sent] == [2, 2, 0, 0]
+    assert 'id=2 ===\n' + 'x' * 1000 in sent[1]
+    assert 'y' * 1000 in sent[2] and 'z' * 3000 in sent[3]
+    assert list(results) == ['1', '2', '3', '4', '5', '6']
+
+
+@patch('src.llm_client.requests.Session.post')
+def test_llm_client_classify_and_summarize(mock_post, mock_llm_config):
+    """Test that one request returns the scores and a summary for important emails only."""
+    mock_post.side_effect = [
+        _api_response('{"spam_score": 1, "importance_score": 9, "summary": "  **Deadline** moved  "}'),
+        _api_response('{"spam_score": 7, "importance_score": 2, "summary": null}')
+    ]
+    
+    client = LLMClient(mock_llm_config)
+    important = client.classify_and_summarize('Project update', 'Summarize in one line.', importance_threshold=8)
+    unimportant = client.classify_and_summarize('Cheap pills', 'Summarize in one line.', importance_threshold=8)
+    
+    prompt = mock_post.call_args_list[0][1]['json']['messages'][1]['content']
+    assert 'Summarize in one line.' in prompt and 'Project update' in prompt
+    assert 'importance_score >= 8' in prompt
+    assert (important.importance_score, important.summary) == (9, '**Deadline** moved')
+    assert (unimportant.spam_score, unimportant.summary) == (7, None)
+
+
+@patch('src.llm_client.time.sleep')
+@patch('src.llm_client.requests.Session.post')
+def test_llm_client_reports_token_usage(mock_post, mock_sleep, mock_llm_config):
+    """Test that API usage is attached to responses, including failed attempts and batch shares."""
+    def with_usage(content, prompt_tokens, completion_tokens, cached_tokens=0):
+        response = _api_response(content)
+        response.json = lambda: {
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+        }
+        return response
+    
+    mock_post.side_effect = [
+        with_usage('not json', 500, 5),
+        with_usage('{"spam_score": 1, "importance_score": 6}', 500, 12, cached_tokens=400),
+        with_usage('{"results": [{"id": 1, "spam_score": 0, "importance_score": 3}, '
+                   '{"id": 2, "spam_score": 0, "importance_score": 4}]}', 1001, 31)
+    ]
+    
+    client = LLMClient(mock_llm_config)
+    single = client.classify_email('Hello')
+    batch = client.classify_emails_batch({'a': 'x' * 300, 'b': 'y' * 100})
+    
+    assert single.usage == TokenUsage(prompt_tokens=1000, completion_tokens=17, cached_tokens=400)
+    assert batch['a'].usage.prompt_tokens > batch['b'].usage.prompt_tokens
+    assert batch['a'].usage.prompt_tokens + batch['b'].usage.prompt_tokens == 1001
+    assert batch['a'].usage.completion_tokens + batch['b'].usage.completion_tokens == 31
@@ -0,0 +1,190 @@
+"""
+Tests for local mailbox sources (src.local_mailbox).
+"""
+import mailbox
+from email.message import EmailMessage
+
+import pytest
+
+from src.account_processor import create_imap_client_from_config
+from src.dry_run import DryRunContext
+from src.imap_client import BatchedFlagWriter, IMAPConnectionError, IMAPFetchError
+from src.local_mailbox import LocalMailboxClient, LocalMailboxStore
+
+
+def _message(index: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg['From'] = f'sender{index}@example.com'
+    msg['To'] = 'me@example.com'
+    msg['Subject'] = f'Archived {index}'
+    msg['Date'] = 'Mon, 01 Jan 2019 10:00:00 +0000'
+    msg.set_content(f'Body of message {index}')
+    return msg
+
+
+def _config(source_type, path, tmp_path, **imap):
+    return {
+        'imap': dict({'processed_tag': 'AIProcessed'}, **imap),
+        'source': {'type': source_type, 'path': str(path), 'state_file': str(tmp_path / 'local.sqlite3')}
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_dry_run():
+    # Flags are only stored outside dry-run mode (set globally by some CLI tests)
+    with DryRunContext(False):
+        yield
+
+
+@pytest.fixture
+def mbox_path(tmp_path):
+    path = tmp_path / 'archive.mbox'
+    box = mailbox.mbox(str(path))
+    for index in range(1, 4):
+        box.add(_message(index))
+    box.close()
+    return path
+
+
+class TestLocalMailboxClient:
+    """Tests for LocalMailboxClient."""
+
+    def test_mbox_emails_are_parsed_in_file_order(self, mbox_path, tmp_path):
+        """Test that mbox messages get UIDs 1..n in file order and parse like IMAP emails."""
+        client = LocalMailboxClient(_config('mbox', mbox_path, tmp_path))
+        client.connect()
+
+        assert client.count_unprocessed_emails() == (3, ['1', '2', '3'])
+        emails = client.get_unprocessed_emails(max_emails=2)
+
+        assert [email['subject'] for email in emails] == ['Archived 1', 'Archived 2']
+        assert emails[0]['uid'] == '1'
+        assert emails[0]['from'] == 'sender1@example.com'
+        assert 'Body of message 1' in emails[0]['body']
+        client.disconnect()
+
+    def test_processed_state_persists_across_runs(self, mbox_path, tmp_path):
+        """Test that flags are stored locally and processed emails are skipped on the next run."""
+        config = _config('mbox', mbox_path, tmp_path)
+        client = LocalMailboxClient(config)
+        client.connect()
+        writer = BatchedFlagWriter(client, 'AIProcessed', batch_size=10)
+        writer.add('1')
+        writer.add('3')
+        assert writer.flush() == []
+        client.disconnect()
+
+        box = mailbox.mbox(str(mbox_path))
+        box.add(_message(4))
+        box.close()
+
+        client = LocalMailboxClient(config)
+        client.connect()
+        assert client.has_flag('1', 'AIProcessed')
+        assert client.count_unprocessed_emails() == (2, ['2', '4'])
+        assert client.count_unprocessed_emails(force_reprocess=True)[0] == 4
+        assert client.count_unprocessed_emails(min_uid=2) == (1, ['4'])
+
+        assert client.clear_flag('1', 'AIProcessed')
+        assert [email['uid'] for email in client.iter_unprocessed_emails()] == ['1', '2', '4']
+        client.disconnect()
+
+    def test_mbox_uids_survive_deleting_earlier_messages(self, mbox_path, tmp_path):
+        """Test that mbox UIDs and flags follow the message, not its index in the file."""
+        config = _config('mbox', mbox_path, tmp_path)
+        box = mailbox.mbox(str(mbox_path))
+        with_id = _message(4)
+        with_id['Message-ID'] = '<archived-4@example.com>'
+        box.add(with_id)
+        box.close()
+        client = LocalMailboxClient(config)
+        client.connect()
+        assert client.set_flag('2', 'AIProcessed')
+        client.disconnect()
+
+        box = mailbox.mbox(str(mbox_path))
+        box.lock()
+        box.remove(0)
+        box.flush()
+        box.unlock()
+        box.close()
+
+        client = LocalMailboxClient(config)
+        client.connect()
+        assert client.has_flag('2', 'AIProcessed')
+        assert client.get_email_by_uid('2')['subject'] == 'Archived 2'
+        assert [email['subject'] for email in client.get_unprocessed_emails()] == ['Archived 3', 'Archived 4']
+        assert client.count_unprocessed_emails() == (2, ['3', '4'])
+        client.disconnect()
+
+    def test_maildir_and_eml_sources_are_deterministic(self, tmp_path):
+        """Test that Maildir keys and .eml paths are numbered in sorted order."""
+        maildir = mailbox.Maildir(str(tmp_path / 'Maildir'))
+        for index in range(1, 4):
+            maildir.add(_message(index))
+        eml_dir = tmp_path / 'eml'
+        (eml_dir / 'b').mkdir(parents=True)
+        (eml_dir / 'b' / 'first.eml').write_bytes(_message(2).as_bytes())
+        (eml_dir / 'a.eml').write_bytes(_message(1).as_bytes())
+        (eml_dir / 'notes.txt').write_text('not an email')
+
+        subjects = {}
+        for source_type, path in (('maildir', tmp_path / 'Maildir'), ('eml', eml_dir)):
+            client = LocalMailboxClient(_config(source_type, path, tmp_path))
+            client.connect()
+            subjects[source_type] = [email['subject'] for email in client.get_unprocessed_emails()]
+            client.disconnect()
+
+        assert subjects['maildir'] == sorted(subjects['maildir'])
+        assert len(subjects['maildir']) == 3
+        assert subjects['eml'] == ['Archived 1', 'Archived 2']
+
+    def test_dry_run_does_not_store_flags(self, mbox_path, tmp_path):
+        """Test that set_flag_bulk only reports the change in dry-run mode."""
+        client = LocalMailboxClient(_config('mbox', mbox_path, tmp_path))
+        client.connect()
+
+        with DryRunContext(True):
+            assert client.set_flag_bulk(['1', '2'], 'AIProcessed')
+
+        assert client.count_unprocessed_emails()[0] == 3
+        client.disconnect()
+
+    def test_unknown_uid_and_missing_source(self, mbox_path, tmp_path):
+        """Test errors for unknown UIDs and sources that do not exist."""
+        client = LocalMailboxClient(_config('mbox', mbox_path, tmp_path))
+        client.connect()
+        with pytest.raises(IMAPFetchError):
+            client.get_email_by_uid('99')
+        assert not client.set_flag('99', 'AIProcessed')
+        client.disconnect()
+
+        with pytest.raises(IMAPConnectionError):
+            LocalMailboxClient(_config('mbox', tmp_path / 'missing.mbox', tmp_path)).connect()
+        with pytest.raises(IMAPConnectionError):
+            LocalMailboxClient({'source': {'type': 'pst', 'path': str(mbox_path)}})
+
+    def test_factory_selects_local_source(self, mbox_path, tmp_path):
+        """Test that create_imap_client_from_config dispatches on source.type."""
+        client = create_imap_client_from_config(_config('mbox', mbox_path, tmp_path))
+
+        assert isinstance(client, LocalMailboxClient)
+
+
+class TestLocalMailboxStore:
+    """Tests for LocalMailboxStore."""
+
+    def test_uids_are_stable_per_source(self, tmp_path):
+        """Test that known keys keep their UID and new keys are appended."""
+        with LocalMailboxStore(tmp_path / 'local.sqlite3') as store:
+            assert store.assign_uids('mbox:/a', ['0', '1']) == {'0': 1, '1': 2}
+            assert store.assign_uids('mbox:/b', ['0']) == {'0': 1}
+            assert store.assign_uids('mbox:/a', ['2', '0', '1']) == {'2': 3, '0': 1, '1': 2}
+
+    def test_rename_keys_keeps_uids(self, tmp_path):
+        """Test that renamed keys keep their UID and conflicting renames are skipped."""
+        with LocalMailboxStore(tmp_path / 'local.sqlite3') as store:
+            store.assign_uids('mbox:/a', ['0', '1', '<b@x>'])
+            store.rename_keys('mbox:/a', {'0': '<a@x>', '1': '<b@x>', '5': '<c@x>'})
+
+            assert store.assign_uids('mbox:/a', ['<a@x>', '<b@x>', '1']) == {'<a@x>': 1, '<b@x>': 3, '1': 2}
@@ -604,6 +604,86 @@ class TestOrchestrationRun:
             assert work_processor.setup.called
             assert personal_processor.setup.called
     
+    def test_run_parallel_accounts(self, master_orchestrator):
+        """Test that --parallel-accounts runs accounts concurrently with error isolation."""
+        import threading
+        from src.dry_run import DryRunContext, is_dry_run
+        from src.logging_context import get_logging_context
+        
+        account_ids = ['work', 'personal', 'shared']
+        # All three runs must be in flight at once to get past the barrier
+        barrier = threading.Barrier(len(account_ids), timeout=5)
+        seen = {}
+        
+        def make_processor(account_id):
+            processor = Mock()
+            
+            def run(**kwargs):
+                barrier.wait()
+                seen[account_id] = (is_dry_run(), get_logging_context().get('correlation_id'))
+                if account_id == 'personal':
+                    raise AccountProcessorRunError("Failed")
+            processor.run.side_effect = run
+            return processor
+        
+        args = create_test_args(all_accounts=True, parallel_accounts=3)
+        master_orchestrator.parse_args = Mock(return_value=args)
+        
+        def select_accounts_side_effect(args):
+            master_orchestrator.accounts_to_process = list(account_ids)
+            return list(account_ids)
+        master_orchestrator.select_accounts = Mock(side_effect=select_accounts_side_effect)
+        master_orchestrator.create_account_processor = Mock(side_effect=make_processor)
+        
+        with patch('src.orchestrator.log_account_start'), \
+             patch('src.orchestrator.log_account_end'), \
+             patch('src.orchestrator.log_error_with_context'), \
+             DryRunContext(True):
+            result = master_orchestrator.run(['--all-accounts', '--parallel-accounts', '3'])
+        
+        assert result.total_accounts == 3
+        assert result.successful_accounts == 2
+        assert result.failed_accounts == 1
+        assert list(result.account_results) == account_ids
+        assert result.account_results['personal'][0] is False
+        # Dry-run and the run's correlation ID reached every worker
+        assert len({correlation_id for _, correlation_id in seen.values()}) == 1
+        assert all(dry_run for dry_run, _ in seen.values())
+    
+    def test_parse_args_parallel_accounts(self):
+        """Test --parallel-accounts parsing (defaults to sequential)."""
+        assert MasterOrchestrator.parse_args(['--all-accounts']).parallel_accounts == 1
+        assert MasterOrchestrator.parse_args(['--all-accounts', '--parallel-accounts', '4']).parallel_accounts == 4
+    
+    def test_run_watch_mode(self, master_orchestrator):
+        """Test that --watch hands every account to watch_account with a shared stop event."""
+        args = create_test_args(all_accounts=True, watch=True, max_emails=5)
+        master_orchestrator.parse_args = Mock(return_value=args)
+        
+        def select_accounts_side_effect(args):
+            master_orchestrator.accounts_to_process = ['work', 'personal']
+            return ['work', 'personal']
+        master_orchestrator.select_accounts = Mock(side_effect=select_accounts_side_effect)
+        master_orchestrator.create_account_processor = Mock(side_effect=lambda account_id: Mock(account_id=account_id))
+        
+        with patch('src.watch.watch_account', return_value=1) as mock_watch:
+            result = master_orchestrator.run(['--all-accounts', '--watch'])
+        
+        assert result.successful_accounts == 2
+        assert mock_watch.call_count == 2
+        stop_events = {c[0][1] for c in mock_watch.call_args_list}
+        assert len(stop_events) == 1
+        assert mock_watch.call_args[1]['run_options'] == {'max_emails': 5, 'debug_prompt': False}
+    
+    def test_run_watch_rejects_one_off_options(self, master_orchestrator):
+        """Test that --watch cannot be combined with --uid."""
+        master_orchestrator.parse_args = Mock(return_value=create_test_args(
+            account_list=['work'], watch=True, uid='42'
+        ))
+        
+        with pytest.raises(ValueError, match='--watch'):
+            master_orchestrator.run(['--account', 'work', '--watch', '--uid', '42'])
+    
     def test_run_no_accounts_selected(self, master_orchestrator):
         """Test run when no accounts are selected."""
         master_orchestrator.parse_args = Mock(return_value=argparse.Namespace(
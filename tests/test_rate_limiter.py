@@ -0,0 +1,129 @@
+"""
+Tests for the process-wide LLM rate limiter (src.rate_limiter).
+"""
+import threading
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.llm_client import LLMClient, LLMRateLimitError
+from src.rate_limiter import (
+    MAX_RETRY_AFTER,
+    RateLimiter,
+    get_shared_rate_limiter,
+    parse_retry_after,
+    reset_shared_rate_limiter,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_shared_limiter():
+    """Start and end every test without a shared limiter."""
+    reset_shared_rate_limiter()
+    yield
+    reset_shared_rate_limiter()
+
+
+def _response(status_code, content='', headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.text = content
+    response.json = lambda: {"choices": [{"message": {"content": content}}]}
+    response.raise_for_status = MagicMock(return_value=None)
+    return response
+
+
+def test_parse_retry_after_seconds_and_dates():
+    """Test that Retry-After accepts seconds and HTTP dates and ignores garbage."""
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('999999') == MAX_RETRY_AFTER
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    retry_at = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= parse_retry_after(retry_at) <= 30
+
+
+def test_request_and_token_buckets_delay_requests():
+    """Test that requests beyond the request and token budgets wait for a refill."""
+    limiter = RateLimiter(requests_per_second=20)
+    start = time.monotonic()
+    for _ in range(22):
+        limiter.acquire()
+        limiter.release()
+    assert time.monotonic() - start >= 0.08
+
+    limiter = RateLimiter(tokens_per_minute=600)
+    limiter.acquire(tokens=600)
+    limiter.release()
+    start = time.monotonic()
+    limiter.acquire(tokens=3)
+    assert time.monotonic() - start >= 0.25
+
+
+def test_rate_limited_response_halves_concurrency_and_pauses():
+    """Test AIMD: a 429 halves the concurrency limit and successes restore it."""
+    limiter = RateLimiter()
+    for _ in range(4):
+        limiter.acquire()
+    limiter.release(rate_limited=True, retry_after=0.1)
+    assert limiter.stats()['concurrency_limit'] == 2
+
+    # 3 requests are still in flight: a new one waits for the pause and for a slot
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    waiter.start()
+    time.sleep(0.2)
+    assert not acquired.is_set()
+    assert limiter.stats()['queue_depth'] == 1
+
+    limiter.release()
+    limiter.release()
+    waiter.join(timeout=2)
+    assert acquired.is_set()
+    limiter.release()
+
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release()
+    stats = limiter.stats()
+    assert stats['concurrency_limit'] is None
+    assert (stats['rate_limited'], stats['peak_queue_depth']) == (1, 1)
+
+
+def test_shared_limiter_only_tightens():
+    """Test that the shared limiter keeps the strictest configured limits."""
+    limiter = get_shared_rate_limiter(requests_per_second=5)
+    assert get_shared_rate_limiter(requests_per_second=10, tokens_per_minute=1000) is limiter
+    assert (limiter.requests_per_second, limiter.tokens_per_minute) == (5.0, 1000)
+
+
+@patch('src.llm_client.time.sleep')
+def test_llm_client_honors_retry_after(mock_sleep, monkeypatch):
+    """Test that a 429 is retried after the server's Retry-After instead of the backoff."""
+    monkeypatch.setenv('OPENROUTER_API_KEY', 'test_api_key')
+    session = MagicMock()
+    session.post.side_effect = [
+        _response(429, 'slow down', {'Retry-After': '0'}),
+        _response(200, '{"spam_score": 1, "importance_score": 9}')
+    ]
+    limiter = RateLimiter()
+    client = LLMClient(
+        {'classification': {'model': 'test-model', 'retry_delay_seconds': 5}},
+        session=session,
+        rate_limiter=limiter
+    )
+
+    result = client.classify_email('Quarterly report')
+
+    assert result.importance_score == 9
+    mock_sleep.assert_called_once_with(0.0)
+    assert limiter.stats()['rate_limited'] == 1
+    assert limiter.stats()['in_flight'] == 0
+
+    session.post.side_effect = [_response(429, 'slow down')]
+    with pytest.raises(LLMRateLimitError):
+        client._make_api_request('prompt')
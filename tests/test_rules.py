@@ -12,9 +12,12 @@ from src.models import EmailContext
 from src.rules import (
     ActionEnum,
     BlacklistRule,
+    CompiledRuleSet,
     InvalidRuleError,
+    RuleFileCache,
     WhitelistRule,
     check_blacklist,
+    compile_imap_exclusions,
     load_blacklist_rules,
     load_whitelist_rules,
     match_domain_rule,
@@ -1316,3 +1319,202 @@ class TestLoadWhitelistRules:
             assert rules == []
         finally:
             Path(config_path).unlink()
+
+
+class TestCompileImapExclusions:
+    """Tests for compile_imap_exclusions (blacklist rules -> IMAP SEARCH clauses)."""
+    
+    def test_compiles_literal_drop_sender_rules(self):
+        """Test that only literal DROP sender rules become NOT FROM clauses."""
+        rules = [validate_blacklist_rule(raw) for raw in [
+            {"trigger": "sender", "value": "spam@example.com", "action": "drop"},
+            {"trigger": "domain", "value": "Blocked.com", "action": "drop"},
+            {"trigger": "sender", "value": "newsletter", "action": "record"},
+            {"trigger": "subject", "value": "Unsubscribe", "action": "drop"},
+            {"trigger": "domain", "value": ".*\\.marketing\\.io$", "action": "drop"},
+            {"trigger": "sender", "value": "SPAM@example.com", "action": "drop"},
+        ]]
+        
+        assert compile_imap_exclusions(rules) == ['NOT FROM "spam@example.com"']
+        assert compile_imap_exclusions(CompiledRuleSet(rules)) == compile_imap_exclusions(rules)
+    
+    def test_quotes_special_characters_and_skips_non_ascii(self):
+        """Test IMAP quoted-string escaping and that unquotable values are skipped."""
+        rules = [
+            BlacklistRule(trigger_type="sender", value='"Spam" <a\\b@x.com>', action=ActionEnum.DROP),
+            BlacklistRule(trigger_type="sender", value="müll@example.com", action=ActionEnum.DROP),
+        ]
+        
+        assert compile_imap_exclusions(rules) == ['NOT FROM "\\"Spam\\" <a\\\\b@x.com>"']
+    
+    def test_chunks_stay_within_max_length(self):
+        """Test that clauses are split into chunks no longer than max_length."""
+        rules = [
+            BlacklistRule(trigger_type="sender", value=f"news@spam{i}.com", action=ActionEnum.DROP)
+            for i in range(50)
+        ]
+        
+        chunks = compile_imap_exclusions(rules, max_length=100)
+        
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert ' '.join(chunks).split(' NOT FROM ')[-1] == '"news@spam49.com"'
+        assert sum(chunk.count('NOT FROM') for chunk in chunks) == 50
+    
+    def test_domain_rules_are_not_searched_as_substrings(self):
+        """Test that a domain rule cannot hide mail from longer domains on the server."""
+        rule = BlacklistRule(trigger_type="domain", value="example.co", action=ActionEnum.DROP)
+        
+        assert compile_imap_exclusions([rule]) == []
+        assert check_blacklist(EmailContext(uid="1", sender="a@example.co", subject="Hi"), [rule]) == ActionEnum.DROP
+        assert check_blacklist(EmailContext(uid="2", sender="a@example.com", subject="Hi"), [rule]) == ActionEnum.PASS
+    
+    def test_no_rules(self):
+        """Test that an empty rule list compiles to no chunks."""
+        assert compile_imap_exclusions([]) == []
+
+
+class TestCompiledRuleSet:
+    """Tests for CompiledRuleSet (indexed rule evaluation)."""
+    
+    def _blacklist(self):
+        raw_rules = [
+            {"trigger": "sender", "value": "spam@example.com", "action": "drop"},
+            {"trigger": "sender", "value": "newsletter", "action": "record"},
+            {"trigger": "subject", "value": "Unsubscribe", "action": "record"},
+            {"trigger": "domain", "value": "Blocked.COM", "action": "drop"},
+            {"trigger": "subject", "value": "^\\[ADV\\]", "action": "drop"},
+            {"trigger": "domain", "value": ".*\\.marketing\\.io$", "action": "record"},
+        ]
+        return [validate_blacklist_rule(raw) for raw in raw_rules]
+    
+    @pytest.mark.parametrize("sender,subject", [
+        ("spam@example.com", "Hello"),
+        ("SPAM@EXAMPLE.COM", "Hello"),
+        ("Weekly Newsletter <news@shop.com>", "Deals"),
+        ("friend@example.com", "Please UNSUBSCRIBE me"),
+        ("user@blocked.com", "Hi"),
+        ("user@sub.blocked.com", "Hi"),
+        ("user@example.com", "[ADV] Buy now"),
+        ("user@example.com", "Re: [ADV] Buy now"),
+        ("promo@eu.marketing.io", "Hi"),
+        ("newsletter@blocked.com", "Unsubscribe"),
+        ("friend@example.com", ""),
+        ("", "Unsubscribe"),
+    ])
+    def test_check_blacklist_matches_list_evaluation(self, sender, subject):
+        """Test that a compiled rule set gives the same action as the rule list."""
+        rules = self._blacklist()
+        email = EmailContext(uid="1", sender=sender, subject=subject)
+        assert check_blacklist(email, CompiledRuleSet(rules)) == check_blacklist(email, rules)
+    
+    def test_match_returns_rules_in_file_order(self):
+        """Test that matched rules are reported in their original order."""
+        rules = self._blacklist()
+        email = EmailContext(uid="1", sender="newsletter@blocked.com", subject="Unsubscribe")
+        matched = CompiledRuleSet(rules).match(email)
+        assert matched == [rules[1], rules[2], rules[3]]
+    
+    def test_domain_literal_is_exact_match(self):
+        """Test that literal domain rules do not match subdomains or substrings."""
+        rules = [BlacklistRule(trigger_type="domain", value="example.com", action=ActionEnum.DROP)]
+        compiled = CompiledRuleSet(rules)
+        assert compiled.match(EmailContext(uid="1", sender="a@example.com", subject="")) == rules
+        assert compiled.match(EmailContext(uid="2", sender="a@mail.example.com", subject="")) == []
+        assert compiled.match(EmailContext(uid="3", sender="example.com@other.org", subject="")) == []
+    
+    def test_overlapping_sender_literals(self):
+        """Test that literals sharing prefixes/suffixes are all found in one pass."""
+        values = ["he", "she", "his", "hers", "ushe"]
+        rules = [
+            BlacklistRule(trigger_type="sender", value=value, action=ActionEnum.RECORD)
+            for value in values
+        ]
+        email = EmailContext(uid="1", sender="ushers@example.com", subject="")
+        matched = CompiledRuleSet(rules).match(email)
+        assert [rule.value for rule in matched] == ["he", "she", "hers", "ushe"]
+    
+    def test_many_rules_agree_with_list_evaluation(self):
+        """Test agreement with the list functions on a large generated rule set."""
+        rules = [
+            BlacklistRule(trigger_type="sender", value=f"user{i}@spam{i % 37}.com", action=ActionEnum.RECORD)
+            for i in range(2000)
+        ] + [
+            BlacklistRule(trigger_type="domain", value=f"drop{i}.net", action=ActionEnum.DROP)
+            for i in range(500)
+        ]
+        compiled = CompiledRuleSet(rules)
+        assert len(compiled) == 2500
+        
+        for sender in ["user15@spam15.com", "user1999@spam1.com", "x@drop42.net", "nobody@nowhere.org"]:
+            email = EmailContext(uid="1", sender=sender, subject="Hi")
+            assert check_blacklist(email, compiled) == check_blacklist(email, rules)
+    
+    def test_apply_whitelist_matches_list_evaluation(self):
+        """Test that boosts and tags accumulate the same way as with the rule list."""
+        rules = [
+            WhitelistRule(trigger_type="domain", value="company.com", score_boost=5, tags=["#work"]),
+            WhitelistRule(trigger_type="sender", value="boss@", score_boost=10, tags=["#priority", "#work"]),
+            WhitelistRule(trigger_type="subject", value="urgent", score_boost=3, tags=["#urgent"]),
+        ]
+        email = EmailContext(uid="1", sender="Boss@Company.com", subject="URGENT: report")
+        
+        result = apply_whitelist(email, CompiledRuleSet(rules), 2.0)
+        assert result == apply_whitelist(email, rules, 2.0)
+        assert result == (20.0, ["#work", "#priority", "#urgent"])
+    
+    def test_empty_rule_set(self):
+        """Test that an empty compiled rule set behaves like an empty list."""
+        email = EmailContext(uid="1", sender="a@example.com", subject="Hi")
+        compiled = CompiledRuleSet([])
+        assert check_blacklist(email, compiled) == ActionEnum.PASS
+        assert apply_whitelist(email, compiled, 4.0) == (4.0, [])
+
+
+class TestRuleFileCache:
+    """Tests for RuleFileCache (mtime/size based invalidation)."""
+    
+    def test_loads_once_until_file_changes(self, tmp_path):
+        """Test that the loader runs again only after the file is modified."""
+        rules_file = tmp_path / "blacklist.yaml"
+        rules_file.write_text("- trigger: sender\n  value: spam@example.com\n  action: drop\n")
+        calls = []
+        
+        def loader(path):
+            calls.append(path)
+            return load_blacklist_rules(path)
+        
+        cache = RuleFileCache(loader)
+        first = cache.get(rules_file)
+        assert cache.get(str(rules_file)) is first
+        assert len(first) == 1
+        assert calls == [str(rules_file)]
+        
+        rules_file.write_text(
+            "- trigger: sender\n  value: spam@example.com\n  action: drop\n"
+            "- trigger: subject\n  value: Sale\n  action: record\n"
+        )
+        second = cache.get(rules_file)
+        assert len(second) == 2
+        assert len(calls) == 2
+    
+    def test_missing_file_is_cached_until_created(self, tmp_path):
+        """Test that a missing file is not re-read on every lookup but is picked up once created."""
+        rules_file = tmp_path / "whitelist.yaml"
+        calls = []
+        
+        def loader(path):
+            calls.append(path)
+            return load_whitelist_rules(path)
+        
+        cache = RuleFileCache(loader)
+        assert len(cache.get(rules_file)) == 0
+        assert len(cache.get(rules_file)) == 0
+        assert len(calls) == 1
+        
+        rules_file.write_text(
+            "- trigger: domain\n  value: company.com\n  action: boost\n"
+            "  score_boost: 10\n  add_tags: ['#work']\n"
+        )
+        assert len(cache.get(rules_file)) == 1
+        assert len(calls) == 2
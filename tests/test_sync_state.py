@@ -0,0 +1,74 @@
+"""
+Tests for the per-mailbox IMAP sync state (src.sync_state).
+"""
+from src.sync_state import SyncState, SyncStateStore, update_failed_attempts
+
+
+class TestSyncStateStore:
+    """Tests for SyncStateStore."""
+
+    def test_save_load_and_reset(self, tmp_path):
+        """Test that states are stored per account and mailbox and can be reset."""
+        path = tmp_path / 'state' / 'sync.sqlite3'
+        with SyncStateStore(path) as store:
+            assert store.load('work', 'INBOX') is None
+            store.save('work', 'INBOX', SyncState(uidvalidity=11, last_uid=120, highest_modseq=9001))
+            store.save('work', 'Archive', SyncState(uidvalidity=12, last_uid=5))
+            store.save('work', 'INBOX', SyncState(uidvalidity=11, last_uid=130, highest_modseq=9050))
+
+        with SyncStateStore(path) as store:
+            assert store.load('work', 'INBOX') == SyncState(11, 130, 9050)
+            assert store.load('work', 'Archive') == SyncState(12, 5, None)
+            assert store.load('personal', 'INBOX') is None
+
+            store.reset('work', 'INBOX')
+            assert store.load('work', 'INBOX') is None
+            assert store.load('work', 'Archive') is not None
+
+    def test_failed_uids_are_stored_per_mailbox(self, tmp_path):
+        """Test that pending retries are replaced on save and cleared by reset."""
+        with SyncStateStore(tmp_path / 'sync.sqlite3') as store:
+            store.save_failed('work', 'INBOX', {5: 1, 9: 2})
+            store.save_failed('work', 'Archive', {3: 1})
+            assert store.load_failed('work', 'INBOX') == {5: 1, 9: 2}
+
+            store.save_failed('work', 'INBOX', {9: 3})
+            assert store.load_failed('work', 'INBOX') == {9: 3}
+
+            store.reset('work', 'INBOX')
+            assert store.load_failed('work', 'INBOX') == {}
+            assert store.load_failed('work', 'Archive') == {3: 1}
+
+
+class TestUpdateFailedAttempts:
+    """Tests for counting failed attempts across runs."""
+
+    def test_attempts_are_counted_until_given_up(self):
+        """Test that failures count up, successes clear and untried UIDs keep their count."""
+        pending, given_up = update_failed_attempts(
+            {5: 1, 7: 2, 9: 1}, attempted=[5, 7, 12], failed=[7, 12], max_attempts=3
+        )
+        assert pending == {9: 1, 12: 1}
+        assert given_up == [7]
+
+
+class TestSyncState:
+    """Tests for SyncState checks against the selected mailbox status."""
+
+    def test_uidvalidity_must_match(self):
+        """Test that a state only applies to the UIDVALIDITY it was saved with."""
+        state = SyncState(uidvalidity=11, last_uid=120)
+        assert state.is_valid_for({'uidvalidity': 11})
+        assert not state.is_valid_for({'uidvalidity': 12})
+        assert not state.is_valid_for({})
+
+    def test_up_to_date_requires_uidnext_and_modseq(self):
+        """Test that only unchanged UIDNEXT and HIGHESTMODSEQ count as up to date."""
+        state = SyncState(uidvalidity=11, last_uid=120, highest_modseq=9001)
+        status = {'uidvalidity': 11, 'uidnext': 121, 'highest_modseq': 9001}
+        assert state.is_up_to_date(status)
+        assert not state.is_up_to_date(dict(status, uidnext=122))
+        assert not state.is_up_to_date(dict(status, highest_modseq=9002))
+        assert not state.is_up_to_date(dict(status, highest_modseq=None))
+        assert not state.is_up_to_date(dict(status, uidvalidity=12))
+        assert not SyncState(uidvalidity=11, last_uid=120).is_up_to_date(status)
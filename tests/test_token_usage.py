@@ -0,0 +1,71 @@
+"""
+Tests for LLM token accounting (src.token_usage).
+"""
+from src.token_usage import (
+    MAX_HISTORY_EMAILS,
+    TokenStats,
+    TokenStatsStore,
+    TokenUsage,
+    estimate_tokens_from_sizes,
+)
+
+
+class TestTokenUsage:
+    """Tests for TokenUsage."""
+
+    def test_reads_usage_block_of_api_response(self):
+        """Test that prompt, completion and cached tokens are read, missing usage is zero."""
+        usage = TokenUsage.from_api_response({'usage': {
+            'prompt_tokens': 1840, 'completion_tokens': 21, 'total_tokens': 1861,
+            'prompt_tokens_details': {'cached_tokens': 1024}
+        }})
+        assert usage == TokenUsage(prompt_tokens=1840, completion_tokens=21, cached_tokens=1024)
+        assert usage.total_tokens == 1861
+
+        assert TokenUsage.from_api_response({'choices': []}) == TokenUsage()
+        assert TokenUsage.from_api_response({'usage': {'prompt_tokens': None}}) == TokenUsage()
+
+        usage.add(TokenUsage(prompt_tokens=10, completion_tokens=1))
+        assert usage.to_dict() == {'prompt_tokens': 1850, 'completion_tokens': 22, 'cached_tokens': 1024}
+
+
+class TestEstimateTokensFromSizes:
+    """Tests for estimate_tokens_from_sizes."""
+
+    def test_history_ratio_replaces_size_heuristic(self):
+        """Test that reliable history is used and small histories are ignored."""
+        sizes = [100000, 2000]
+        history = TokenStats(emails=40, message_bytes=4000000, prompt_tokens=200000, completion_tokens=800)
+
+        assert estimate_tokens_from_sizes(sizes, history) == TokenUsage(prompt_tokens=5100, completion_tokens=40)
+
+        # Without (enough) history: body capped at max_body_chars, plus the prompt template
+        few = TokenStats(emails=3, message_bytes=300000, prompt_tokens=90000, completion_tokens=60)
+        assert estimate_tokens_from_sizes(sizes, few, max_body_chars=6000) == \
+            estimate_tokens_from_sizes(sizes, None, max_body_chars=6000) == \
+            TokenUsage(prompt_tokens=1500 + 300 + 500 + 300, completion_tokens=60)
+
+
+class TestTokenStatsStore:
+    """Tests for TokenStatsStore."""
+
+    def test_record_accumulates_and_follows_recent_mail(self, tmp_path):
+        """Test that runs add up per account and old history is scaled down."""
+        path = tmp_path / 'stats' / 'tokens.sqlite3'
+        with TokenStatsStore(path) as store:
+            assert store.load('work') is None
+            store.record('work', TokenStats(emails=10, message_bytes=50000, prompt_tokens=5000, completion_tokens=200))
+            store.record('work', TokenStats(emails=10, message_bytes=30000, prompt_tokens=3000, completion_tokens=200))
+            store.record('work', TokenStats(emails=0, message_bytes=0, prompt_tokens=0, completion_tokens=0))
+
+        with TokenStatsStore(path) as store:
+            assert store.load('work') == TokenStats(20, 80000, 8000, 400)
+            assert store.load('personal') is None
+
+            store.record('work', TokenStats(
+                emails=MAX_HISTORY_EMAILS, message_bytes=MAX_HISTORY_EMAILS * 1000,
+                prompt_tokens=MAX_HISTORY_EMAILS * 500, completion_tokens=0
+            ))
+            history = store.load('work')
+            assert history.emails == MAX_HISTORY_EMAILS
+            assert 0.4 < history.prompt_tokens_per_byte < 0.5
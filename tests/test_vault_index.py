@@ -0,0 +1,118 @@
+"""
+Tests for the vault UID index (src.vault_index) and its use in src.vault_utils.
+"""
+import pytest
+from unittest.mock import patch
+
+from src.vault_index import VaultUidIndex, get_index_path
+from src.vault_utils import get_max_uid_from_vault, rebuild_uid_index
+from src.dry_run import DryRunContext
+
+
+@pytest.fixture(autouse=True)
+def no_dry_run():
+    """Run with dry-run disabled (the index is only written outside dry-run)."""
+    with DryRunContext(False):
+        yield
+
+
+def _write_note(directory, name, uid, message_id=None):
+    directory.mkdir(parents=True, exist_ok=True)
+    lines = ['---', f'uid: {uid}']
+    if message_id:
+        lines.append(f'message_id: "{message_id}"')
+    lines += ['---', '', 'Body']
+    (directory / name).write_text('\n'.join(lines), encoding='utf-8')
+
+
+class TestVaultUidIndex:
+    """Tests for VaultUidIndex."""
+
+    def test_add_and_query(self, tmp_path):
+        """Test max_uid, contains and note path lookups per account."""
+        with VaultUidIndex.for_vault(tmp_path) as index:
+            index.add('work', 10, 'work/a.md', '<a@example.com>')
+            index.add('work', 42, 'work/b.md')
+            index.add('personal', 99, 'personal/c.md')
+
+            assert index.max_uid('work') == 42
+            assert index.max_uid('personal') == 99
+            assert index.max_uid('unknown') is None
+            assert index.contains('work', 10)
+            assert not index.contains('work', 99)
+            assert index.get_note_path('work', 42) == 'work/b.md'
+            assert index.count('work') == 2
+
+        assert get_index_path(tmp_path).exists()
+
+    def test_rebuild_replaces_account_entries(self, tmp_path):
+        """Test that rebuild_account replaces entries and marks the account indexed."""
+        with VaultUidIndex.for_vault(tmp_path) as index:
+            index.add('work', 500, 'work/stale.md')
+            index.add('personal', 7, 'personal/keep.md')
+            assert not index.is_indexed('work')
+
+            assert index.rebuild_account('work', [(1, 'work/a.md', None), (3, 'work/b.md', '<b@x>')]) == 2
+
+            assert index.is_indexed('work')
+            assert index.max_uid('work') == 3
+            assert not index.contains('work', 500)
+            assert index.max_uid('personal') == 7
+
+    def test_entries_persist_across_instances(self, tmp_path):
+        """Test that the index is stored on disk."""
+        with VaultUidIndex.for_vault(tmp_path) as index:
+            index.add('work', 5, 'work/a.md')
+        with VaultUidIndex.for_vault(tmp_path) as index:
+            assert index.max_uid('work') == 5
+
+
+class TestGetMaxUidFromVault:
+    """Tests for get_max_uid_from_vault with the UID index."""
+
+    def test_first_call_builds_index_then_uses_it(self, tmp_path):
+        """Test that only the first call scans the notes."""
+        account_dir = tmp_path / 'info-nica'
+        _write_note(account_dir, 'a.md', 12, '<a@example.com>')
+        _write_note(account_dir, 'b.md', 30)
+        _write_note(account_dir, 'no-uid.md', '')
+
+        assert get_max_uid_from_vault('info.nica', str(tmp_path)) == 30
+        with VaultUidIndex.for_vault(tmp_path) as index:
+            assert index.is_indexed('info.nica')
+            assert index.contains('info.nica', 12)
+
+        with patch('src.vault_utils._iter_note_uids') as mock_scan:
+            assert get_max_uid_from_vault('info.nica', str(tmp_path)) == 30
+            mock_scan.assert_not_called()
+
+    def test_rebuild_picks_up_manual_changes(self, tmp_path):
+        """Test that rebuild_uid_index re-reads the notes."""
+        account_dir = tmp_path / 'work'
+        _write_note(account_dir, 'a.md', 5)
+        assert get_max_uid_from_vault('work', str(tmp_path)) == 5
+
+        _write_note(account_dir, 'b.md', 8)
+        assert get_max_uid_from_vault('work', str(tmp_path)) == 5
+        assert rebuild_uid_index('work', str(tmp_path)) == 2
+        assert get_max_uid_from_vault('work', str(tmp_path)) == 8
+
+    def test_dry_run_does_not_create_index(self, tmp_path):
+        """Test that dry-run scans the notes without writing the index."""
+        _write_note(tmp_path / 'work', 'a.md', 5)
+
+        with DryRunContext(True):
+            assert get_max_uid_from_vault('work', str(tmp_path)) == 5
+
+        assert not get_index_path(tmp_path).exists()
+
+    def test_without_index(self, tmp_path):
+        """Test that use_index=False always scans."""
+        _write_note(tmp_path / 'work', 'a.md', 3)
+
+        assert get_max_uid_from_vault('work', str(tmp_path), use_index=False) == 3
+        assert not get_index_path(tmp_path).exists()
+
+    def test_missing_account_directory(self, tmp_path):
+        """Test that a missing account directory returns None."""
+        assert get_max_uid_from_vault('work', str(tmp_path)) is None
@@ -0,0 +1,74 @@
+"""
+Tests for watch mode (src.watch).
+"""
+import threading
+from unittest.mock import Mock, patch
+
+from src.account_processor import AccountProcessorSetupError
+from src.imap_client import IMAPConnectionError
+from src.watch import watch_account
+
+
+def _make_processor(config=None):
+    processor = Mock()
+    processor.account_id = 'work'
+    processor.config = config or {}
+    return processor
+
+
+def test_watch_runs_on_new_mail_until_stopped():
+    """Test a catch-up run, one run per notification and teardown on stop."""
+    stop_event = threading.Event()
+    processor = _make_processor({'imap': {'idle_refresh_seconds': 600, 'poll_interval_seconds': 5}})
+    
+    def wait_side_effect(timeout, poll_interval, event):
+        if processor.wait_for_new_mail.call_count == 3:
+            event.set()
+            return False
+        return True
+    
+    processor.wait_for_new_mail.side_effect = wait_side_effect
+    
+    runs = watch_account(processor, stop_event, run_options={'max_emails': 20})
+    
+    assert runs == 3
+    processor.setup.assert_called_once()
+    assert processor.run.call_count == 3
+    processor.run.assert_called_with(max_emails=20, interactive=False)
+    processor.wait_for_new_mail.assert_called_with(600, 5, stop_event)
+    processor.teardown.assert_called()
+
+
+def test_watch_reconnects_after_connection_loss():
+    """Test that a lost connection is torn down and set up again after a delay."""
+    stop_event = threading.Event()
+    processor = _make_processor()
+    processor.wait_for_new_mail.side_effect = [
+        IMAPConnectionError("connection closed during IDLE"),
+        False
+    ]
+    
+    def stop_after_second_setup():
+        if processor.setup.call_count == 2:
+            processor.wait_for_new_mail.side_effect = lambda *args: stop_event.set() or False
+    
+    processor.setup.side_effect = stop_after_second_setup
+    
+    with patch.object(stop_event, 'wait', return_value=False) as mock_wait:
+        runs = watch_account(processor, stop_event)
+    
+    mock_wait.assert_called_once_with(5)
+    assert processor.setup.call_count == 2
+    assert runs == 2
+
+
+def test_watch_stops_while_waiting_to_reconnect():
+    """Test that stopping during the reconnect delay ends the watch."""
+    stop_event = threading.Event()
+    processor = _make_processor()
+    processor.setup.side_effect = AccountProcessorSetupError("IMAP connection failed")
+    
+    with patch.object(stop_event, 'wait', return_value=True):
+        assert watch_account(processor, stop_event) == 0
+    
+    processor.run.assert_not_called()